@@ -5,4 +5,9 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_dcmn.settings")
 
 app = Celery("django_dcmn")
 app.config_from_object("django.conf:settings", namespace="CELERY")
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Task runtime metrics + worker exporter (django_dcmn/metrics.py)
+from .metrics import connect_celery_signals  # noqa: E402
+
+connect_celery_signals()
\ No newline at end of file
@@ -0,0 +1,12 @@
+# django_dcmn/mail.py
+from anymail.backends.resend import EmailBackend as AnymailResendBackend
+
+from .metrics import track_email_send
+
+
+class ResendEmailBackend(AnymailResendBackend):
+    """Resend backend that records send latency and 429s (see metrics.py)."""
+
+    def post_to_esp(self, payload, message):
+        with track_email_send():
+            return super().post_to_esp(payload, message)
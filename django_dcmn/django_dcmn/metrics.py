@@ -0,0 +1,272 @@
+# django_dcmn/metrics.py
+"""
+Prometheus metrics.
+
+    zoho_request_seconds{operation}             Zoho call latency (create, update, search,
+    zoho_requests_total{operation,status}       get, attach, composite, token_refresh)
+    email_send_seconds / email_send_total{status}   Resend sends (status 'sent', '429', 'error')
+    webhook_seconds{source} / webhook_requests_total{source,status}
+    zoho_cache_lookups_total{cache,result}      local Zoho caches (record, contact): hit / miss
+    celery_task_seconds{task} / celery_tasks_total{task,state}
+    celery_queue_length{queue}                  collected on scrape (broker Redis)
+    orders_zoho_unsynced{order_type}            collected on scrape (DB)
+
+Exposed by the /metrics view (web) and by an HTTP exporter inside the Celery
+worker (CELERY_METRICS_PORT). With several processes per service (gunicorn
+workers, Celery prefork) set PROMETHEUS_MULTIPROC_DIR so every process
+writes to the shared directory and each endpoint serves the aggregate.
+
+prometheus_client is optional: without it every helper is a no-op and
+/metrics answers 503.
+"""
+
+import os
+import time
+import logging
+import functools
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Histogram
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+TASK_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600)
+
+if prometheus_client is not None:
+    ZOHO_REQUEST_SECONDS = Histogram(
+        'zoho_request_seconds', 'Zoho API call latency', ['operation'], buckets=LATENCY_BUCKETS,
+    )
+    ZOHO_REQUESTS = Counter(
+        'zoho_requests_total', 'Zoho API calls by HTTP status', ['operation', 'status'],
+    )
+    EMAIL_SEND_SECONDS = Histogram(
+        'email_send_seconds', 'Email provider send latency', buckets=LATENCY_BUCKETS,
+    )
+    EMAIL_SENDS = Counter(
+        'email_send_total', 'Email sends by outcome', ['status'],
+    )
+    WEBHOOK_SECONDS = Histogram(
+        'webhook_seconds', 'Inbound webhook handling time', ['source'], buckets=LATENCY_BUCKETS,
+    )
+    WEBHOOK_REQUESTS = Counter(
+        'webhook_requests_total', 'Inbound webhooks by response status', ['source', 'status'],
+    )
+    CACHE_LOOKUPS = Counter(
+        'zoho_cache_lookups_total', 'Local Zoho cache lookups', ['cache', 'result'],
+    )
+    CELERY_TASK_SECONDS = Histogram(
+        'celery_task_seconds', 'Celery task runtime', ['task'], buckets=TASK_BUCKETS,
+    )
+    CELERY_TASKS = Counter(
+        'celery_tasks_total', 'Celery tasks by final state', ['task', 'state'],
+    )
+
+
+def is_available() -> bool:
+    return prometheus_client is not None
+
+
+# =============================================================================
+# ZOHO
+# =============================================================================
+
+def zoho_operation(method: str, url: str) -> str:
+    """Operation label of a Zoho call, from its method and URL."""
+    path = urlparse(url).path
+    if '/oauth/' in path:
+        return 'token_refresh'
+    if path.endswith('/Attachments'):
+        return 'attach'
+    if '/search' in path:
+        return 'search'
+    if '__composite_requests' in path:
+        return 'composite'
+    return {'POST': 'create', 'PUT': 'update', 'GET': 'get'}.get(method.upper(), method.lower())
+
+
+def observe_zoho(method: str, url: str, seconds: float, status):
+    """status: HTTP status code, or an exception class name when no response came back."""
+    if prometheus_client is None:
+        return
+    operation = zoho_operation(method, url)
+    ZOHO_REQUEST_SECONDS.labels(operation).observe(seconds)
+    ZOHO_REQUESTS.labels(operation, str(status)).inc()
+
+
+def observe_cache(cache_name: str, result: str):
+    """result: 'hit' or 'miss'."""
+    if prometheus_client is None:
+        return
+    CACHE_LOOKUPS.labels(cache_name, result).inc()
+
+
+# =============================================================================
+# EMAIL
+# =============================================================================
+
+@contextmanager
+def track_email_send():
+    """Time one provider send; a 429 from the provider is counted separately."""
+    if prometheus_client is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        status_code = getattr(e, 'status_code', None)
+        EMAIL_SENDS.labels('429' if status_code == 429 else 'error').inc()
+        raise
+    else:
+        EMAIL_SENDS.labels('sent').inc()
+    finally:
+        EMAIL_SEND_SECONDS.observe(time.perf_counter() - start)
+
+
+# =============================================================================
+# WEBHOOKS
+# =============================================================================
+
+def track_webhook(source: str):
+    """
+    Decorator for webhook views (function views and APIView methods):
+    handling time and response status per source.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if prometheus_client is None:
+                return view(*args, **kwargs)
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                response = view(*args, **kwargs)
+                status = str(getattr(response, 'status_code', 200))
+                return response
+            finally:
+                WEBHOOK_SECONDS.labels(source).observe(time.perf_counter() - start)
+                WEBHOOK_REQUESTS.labels(source, status).inc()
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# CELERY
+# =============================================================================
+
+_task_started = {}
+
+
+def connect_celery_signals():
+    """Task runtime/state per task name. Called from django_dcmn/celery.py."""
+    if prometheus_client is None:
+        return
+
+    from celery import signals
+
+    @signals.task_prerun.connect(weak=False)
+    def _task_prerun(task_id=None, **kwargs):
+        _task_started[task_id] = time.perf_counter()
+
+    @signals.task_postrun.connect(weak=False)
+    def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+        start = _task_started.pop(task_id, None)
+        name = getattr(task, 'name', 'unknown')
+        if start is not None:
+            CELERY_TASK_SECONDS.labels(name).observe(time.perf_counter() - start)
+        CELERY_TASKS.labels(name, state or 'UNKNOWN').inc()
+
+    @signals.task_retry.connect(weak=False)
+    def _task_retry(sender=None, **kwargs):
+        CELERY_TASKS.labels(getattr(sender, 'name', 'unknown'), 'RETRY').inc()
+
+    @signals.worker_ready.connect(weak=False)
+    def _start_exporter(**kwargs):
+        port = settings.CELERY_METRICS_PORT
+        if port:
+            prometheus_client.start_http_server(port, registry=get_registry(include_collectors=False))
+            logger.info(f"[Metrics] Celery metrics exporter on :{port}")
+
+
+# =============================================================================
+# SCRAPE-TIME COLLECTORS
+# =============================================================================
+
+class QueueAndBacklogCollector:
+    """Celery queue length, unsynced orders and inbound webhook backlog, read when /metrics is scraped."""
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+
+        queues = GaugeMetricFamily('celery_queue_length', 'Messages waiting in a Celery queue', labels=['queue'])
+        try:
+            import redis
+
+            conn = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+            for queue in settings.METRICS_CELERY_QUEUES:
+                queues.add_metric([queue], conn.llen(queue))
+        except Exception as e:
+            logger.debug(f"[Metrics] Queue length unavailable: {e}")
+        yield queues
+
+        unsynced = GaugeMetricFamily('orders_zoho_unsynced', 'Orders not synced to Zoho', labels=['order_type'])
+        try:
+            for order_type, count in unsynced_order_counts().items():
+                unsynced.add_metric([order_type], count)
+        except Exception as e:
+            logger.debug(f"[Metrics] Unsynced order counts unavailable: {e}")
+        yield unsynced
+
+        inbound = GaugeMetricFamily(
+            'inbound_events_backlog', 'Inbound webhook events not yet processed', labels=['source', 'status'],
+        )
+        try:
+            from orders.services.inbox import backlog_counts
+
+            for (source, status), count in backlog_counts().items():
+                inbound.add_metric([source, status], count)
+        except Exception as e:
+            logger.debug(f"[Metrics] Inbound event backlog unavailable: {e}")
+        yield inbound
+
+
+def unsynced_order_counts() -> dict:
+    """order_type -> number of orders with zoho_synced=False (unpaid FBI/marriage orders excluded)."""
+    from orders.models import (
+        FbiApostilleOrder, MarriageOrder, EmbassyLegalizationOrder, TranslationOrder,
+        ApostilleOrder, I9VerificationOrder, QuoteRequest, PreCheckSubmission,
+    )
+
+    querysets = {
+        'fbi': FbiApostilleOrder.objects.filter(is_paid=True),
+        'marriage': MarriageOrder.objects.filter(is_paid=True),
+        'embassy': EmbassyLegalizationOrder.objects.all(),
+        'translation': TranslationOrder.objects.all(),
+        'apostille': ApostilleOrder.objects.all(),
+        'I-9': I9VerificationOrder.objects.all(),
+        'quote': QuoteRequest.objects.all(),
+        'pre-check': PreCheckSubmission.objects.all(),
+    }
+    return {order_type: qs.filter(zoho_synced=False).count() for order_type, qs in querysets.items()}
+
+
+def get_registry(include_collectors: bool = True):
+    """Registry to expose: multiprocess aggregate if PROMETHEUS_MULTIPROC_DIR is set."""
+    from prometheus_client import CollectorRegistry, REGISTRY, multiprocess
+
+    registry = CollectorRegistry()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    if include_collectors:
+        registry.register(QueueAndBacklogCollector())
+    return registry
@@ -13,6 +13,7 @@ import os
 from pathlib import Path
 import dj_database_url
 from decouple import config
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -33,7 +34,7 @@ STRIPE_CANCEL_URL = "https://www.dcmobilenotary.com/cancel-page"
 
 
 # ====== EMAIL ======
-EMAIL_BACKEND = "anymail.backends.resend.EmailBackend"
+EMAIL_BACKEND = "django_dcmn.mail.ResendEmailBackend"  # anymail Resend + send metrics
 ANYMAIL = {
     "RESEND_API_KEY": os.getenv("RESEND_API_KEY"),
 }
@@ -60,6 +61,98 @@ ZOHO_CLIENT_SECRET = os.getenv('ZOHO_CLIENT_SECRET')
 ZOHO_WEBHOOK_TOKEN = config('ZOHO_WEBHOOK_TOKEN', default='')
 ZOHO_LEADS_WON_FIELD = 'Number_of_Leads_Won'  # API name of the field in Zoho Contacts
 
+# API endpoints (point both at `manage.py run_fake_zoho` for offline load tests)
+ZOHO_API_DOMAIN = config('ZOHO_API_DOMAIN', default='https://www.zohoapis.com')
+ZOHO_TOKEN_URL = config('ZOHO_TOKEN_URL', default='https://accounts.zoho.com/oauth/v2/token')
+
+# Shared HTTP transport (orders/zoho_transport.py)
+ZOHO_HTTP_CONNECT_TIMEOUT = config('ZOHO_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+ZOHO_HTTP_READ_TIMEOUT = config('ZOHO_HTTP_READ_TIMEOUT', default=30, cast=float)
+ZOHO_HTTP_MAX_RETRIES = config('ZOHO_HTTP_MAX_RETRIES', default=3, cast=int)
+ZOHO_HTTP_BACKOFF_FACTOR = config('ZOHO_HTTP_BACKOFF_FACTOR', default=0.5, cast=float)
+ZOHO_HTTP_POOL_SIZE = config('ZOHO_HTTP_POOL_SIZE', default=10, cast=int)
+
+# Cluster-wide API rate limiter (orders/zoho_ratelimit.py)
+ZOHO_RATE_LIMIT_ENABLED = config('ZOHO_RATE_LIMIT_ENABLED', default=True, cast=bool)
+ZOHO_RATE_LIMIT_RATE = config('ZOHO_RATE_LIMIT_RATE', default=5, cast=float)  # calls/sec refill
+ZOHO_RATE_LIMIT_BURST = config('ZOHO_RATE_LIMIT_BURST', default=20, cast=int)
+ZOHO_RATE_LIMIT_CONCURRENCY = config('ZOHO_RATE_LIMIT_CONCURRENCY', default=10, cast=int)  # org concurrency limit
+ZOHO_RATE_LIMIT_429_BACKOFF = config('ZOHO_RATE_LIMIT_429_BACKOFF', default=30, cast=int)  # if no Retry-After
+ZOHO_RATE_LIMIT_429_RETRIES = config('ZOHO_RATE_LIMIT_429_RETRIES', default=2, cast=int)
+
+# Circuit breaker for Zoho outages (orders/zoho_circuit.py)
+ZOHO_CIRCUIT_ENABLED = config('ZOHO_CIRCUIT_ENABLED', default=True, cast=bool)
+ZOHO_CIRCUIT_FAILURE_THRESHOLD = config('ZOHO_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)  # failures to open
+ZOHO_CIRCUIT_FAILURE_WINDOW = config('ZOHO_CIRCUIT_FAILURE_WINDOW', default=60, cast=int)  # seconds
+ZOHO_CIRCUIT_OPEN_SECONDS = config('ZOHO_CIRCUIT_OPEN_SECONDS', default=30, cast=int)  # fail fast, then probe
+ZOHO_CIRCUIT_PROBE_TIMEOUT = config('ZOHO_CIRCUIT_PROBE_TIMEOUT', default=60, cast=int)  # max duration of a probe call
+
+# Async order sync (orders/zoho_async.py, needs httpx; h2 enables HTTP/2)
+ZOHO_ASYNC_SYNC_ENABLED = config('ZOHO_ASYNC_SYNC_ENABLED', default=True, cast=bool)
+
+# Attribution record + order in one composite request (orders/zoho_sync.py)
+ZOHO_COMPOSITE_ENABLED = config('ZOHO_COMPOSITE_ENABLED', default=True, cast=bool)
+ZOHO_COMPOSITE_RETRY_AFTER = config('ZOHO_COMPOSITE_RETRY_AFTER', default=3600, cast=int)  # two-step only this long after a refused call
+
+# Attachment uploads + ledger (orders/services/zoho_attachments.py)
+ZOHO_ATTACHMENT_UPLOAD_WORKERS = config('ZOHO_ATTACHMENT_UPLOAD_WORKERS', default=4, cast=int)  # parallel uploads per record
+ZOHO_ATTACHMENT_STALE_AFTER = config('ZOHO_ATTACHMENT_STALE_AFTER', default=600, cast=int)  # 'uploading' rows older = crashed
+ZOHO_ATTACHMENT_MAX_ATTEMPTS = config('ZOHO_ATTACHMENT_MAX_ATTEMPTS', default=5, cast=int)
+
+# OAuth token manager (orders/zoho_auth.py)
+ZOHO_TOKEN_LOCK_TIMEOUT = config('ZOHO_TOKEN_LOCK_TIMEOUT', default=30, cast=int)  # max refresh duration
+ZOHO_TOKEN_LOCK_WAIT = config('ZOHO_TOKEN_LOCK_WAIT', default=15, cast=int)  # how long waiters block
+ZOHO_TOKEN_REFRESH_AHEAD = config('ZOHO_TOKEN_REFRESH_AHEAD', default=900, cast=int)  # beat renews below this TTL
+
+# Batched write buffer (orders/zoho_write_buffer.py)
+ZOHO_WRITE_BUFFER_BATCH_SIZE = config('ZOHO_WRITE_BUFFER_BATCH_SIZE', default=100, cast=int)  # Zoho max is 100
+ZOHO_WRITE_BUFFER_MAX_DELAY = config('ZOHO_WRITE_BUFFER_MAX_DELAY', default=10, cast=int)  # seconds
+ZOHO_WRITE_BUFFER_MAX_ATTEMPTS = config('ZOHO_WRITE_BUFFER_MAX_ATTEMPTS', default=5, cast=int)
+
+# Contact ID cache, Redis tier (orders/services/zoho_contacts.py); the DB table never expires
+ZOHO_CONTACT_CACHE_TTL = config('ZOHO_CONTACT_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+
+# Record read cache (orders/services/zoho_records.py), 0 = off
+ZOHO_RECORD_CACHE_TTL = config('ZOHO_RECORD_CACHE_TTL', default=120, cast=int)
+
+# Hashes of field values last written per Zoho record, for diff-only updates (orders/zoho_schema.py)
+ZOHO_SYNC_STATE_TTL = config('ZOHO_SYNC_STATE_TTL', default=90 * 24 * 3600, cast=int)
+
+# Transactional outbox for CRM side effects (orders/services/outbox.py)
+OUTBOX_RELAY_INTERVAL = config('OUTBOX_RELAY_INTERVAL', default=5, cast=float)  # seconds between relay runs
+OUTBOX_RELAY_BATCH_SIZE = config('OUTBOX_RELAY_BATCH_SIZE', default=100, cast=int)
+OUTBOX_REDELIVER_AFTER = config('OUTBOX_REDELIVER_AFTER', default=900, cast=int)  # unacknowledged dispatch = lost task
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_RETRY_BACKOFF = config('OUTBOX_RETRY_BACKOFF', default=30, cast=int)  # seconds, doubled per attempt
+OUTBOX_RETRY_BACKOFF_MAX = config('OUTBOX_RETRY_BACKOFF_MAX', default=3600, cast=int)
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=14, cast=int)
+
+# Order intake pipeline: emails, phone lead match, Zoho outbox row (orders/services/intake.py)
+INTAKE_STEP_RETRIES = config('INTAKE_STEP_RETRIES', default=3, cast=int)  # Celery retries of a failed step
+INTAKE_STEP_RETRY_BACKOFF = config('INTAKE_STEP_RETRY_BACKOFF', default=10, cast=int)  # seconds, doubled per retry
+INTAKE_RESUME_AFTER = config('INTAKE_RESUME_AFTER', default=600, cast=int)  # failed/lost step restarted after this long
+INTAKE_MAX_ATTEMPTS = config('INTAKE_MAX_ATTEMPTS', default=8, cast=int)
+
+# Idempotent order-creation / checkout POSTs (orders/services/idempotency.py), 0 = off
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=24 * 3600, cast=int)  # Idempotency-Key header
+IDEMPOTENCY_DERIVED_TTL = config('IDEMPOTENCY_DERIVED_TTL', default=600, cast=int)  # no header: payload hash
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=120, cast=int)  # claim of a crashed request
+
+# Inbound webhook inbox: every delivery saved, processed in Celery or inline (orders/services/inbox.py)
+INBOX_BATCH_SIZE = config('INBOX_BATCH_SIZE', default=50, cast=int)
+INBOX_MAX_ATTEMPTS = config('INBOX_MAX_ATTEMPTS', default=6, cast=int)
+INBOX_RETRY_BACKOFF = config('INBOX_RETRY_BACKOFF', default=30, cast=int)  # seconds, doubled per attempt
+INBOX_RETRY_BACKOFF_MAX = config('INBOX_RETRY_BACKOFF_MAX', default=3600, cast=int)
+INBOX_LOCK_TIMEOUT = config('INBOX_LOCK_TIMEOUT', default=600, cast=int)  # one drainer per source; > a drain run
+INBOX_PROCESSING_TIMEOUT = config('INBOX_PROCESSING_TIMEOUT', default=300, cast=int)  # claimed event of a crashed run
+INBOX_RETENTION_DAYS = config('INBOX_RETENTION_DAYS', default=30, cast=int)
+
+# Pricing catalog snapshot (orders/services/pricing.py): seconds between Redis version checks per process
+PRICING_CATALOG_CHECK_INTERVAL = config('PRICING_CATALOG_CHECK_INTERVAL', default=10, cast=float)
+# Cache-Control of /api/fbi/options/ and /api/fbi/quote/ (browser, CDN, CDN serving stale while it revalidates)
+PRICING_CACHE_MAX_AGE = config('PRICING_CACHE_MAX_AGE', default=60, cast=int)
+PRICING_CACHE_S_MAXAGE = config('PRICING_CACHE_S_MAXAGE', default=300, cast=int)
+PRICING_CACHE_STALE_WHILE_REVALIDATE = config('PRICING_CACHE_STALE_WHILE_REVALIDATE', default=3600, cast=int)
 
 # ====== REVIEWS ======
 GOOGLE_REVIEW_URL = config('GOOGLE_REVIEW_URL', default='https://search.google.com/local/writereview?placeid=ChIJi7ayhx-3t4kRpyVMzASAj9s')
@@ -70,6 +163,52 @@ TRUSTPILOT_TRIGGER_EMAIL = config('TRUSTPILOT_TRIGGER_EMAIL', default='dcmobilen
 CELERY_BROKER_URL = config("REDIS_URL")
 CELERY_RESULT_BACKEND = config("REDIS_URL")
 
+# Run by the `beat` process in the Procfile (a single beat per deployment; `worker` runs the tasks)
+CELERY_BEAT_SCHEDULE = {
+    'refresh-zoho-token': {
+        'task': 'orders.tasks.refresh_zoho_token_task',
+        'schedule': 300.0,
+    },
+    'flush-zoho-write-buffer': {
+        'task': 'orders.tasks.flush_zoho_write_buffer_task',
+        'schedule': 60.0,
+    },
+    'resume-zoho-attachment-uploads': {
+        'task': 'orders.tasks.resume_zoho_attachment_uploads_task',
+        'schedule': 600.0,
+    },
+    'relay-outbox': {
+        'task': 'orders.tasks.relay_outbox_task',
+        'schedule': OUTBOX_RELAY_INTERVAL,
+    },
+    'purge-outbox': {
+        'task': 'orders.tasks.purge_outbox_task',
+        'schedule': 24 * 3600.0,
+    },
+    'resume-intake-pipelines': {
+        'task': 'orders.tasks.resume_intake_pipelines_task',
+        'schedule': 300.0,
+    },
+    'purge-idempotency-keys': {
+        'task': 'orders.tasks.purge_idempotency_keys_task',
+        'schedule': 24 * 3600.0,
+    },
+    'process-inbound-events': {
+        'task': 'orders.tasks.process_inbound_events_task',
+        'schedule': 30.0,
+    },
+    'purge-inbound-events': {
+        'task': 'orders.tasks.purge_inbound_events_task',
+        'schedule': 24 * 3600.0,
+    },
+}
+
+
+# ====== METRICS (django_dcmn/metrics.py) ======
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token for /metrics, empty = open
+CELERY_METRICS_PORT = config('CELERY_METRICS_PORT', default=0, cast=int)  # worker exporter, 0 = off
+METRICS_CELERY_QUEUES = config('METRICS_CELERY_QUEUES', default='celery').split(',')
+
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=False, cast=bool)
@@ -80,6 +219,8 @@ CORS_ALLOWED_ORIGINS = [
     "https://dcmobilenotary.webflow.io",
     "https://www.dcmobilenotary.com",
 ]
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Application definition
 
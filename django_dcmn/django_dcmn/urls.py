@@ -18,7 +18,7 @@ from django.conf import settings
 from django.contrib import admin
 from django.conf.urls.static import static
 from django.urls import path, include
-from .views import serve_media_file
+from .views import serve_media_file, metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,4 +26,5 @@ urlpatterns = [
     path('api/reviews/', include('reviews.urls')),
 
     path('media/<path:path>', serve_media_file),
+    path('metrics', metrics_view),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -8,4 +8,19 @@ def serve_media_file(request, path):
 
     if os.path.exists(file_path):
         return FileResponse(open(file_path, 'rb'))
-    raise Http404("File not found")
\ No newline at end of file
+    raise Http404("File not found")
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (Bearer METRICS_TOKEN if set)."""
+    from django.http import HttpResponse
+    from . import metrics
+
+    if not metrics.is_available():
+        return HttpResponse("prometheus_client is not installed", status=503)
+
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization', '') != f'Bearer {token}':
+        return HttpResponse(status=401)
+
+    from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+    return HttpResponse(generate_latest(metrics.get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -21,6 +21,12 @@ from .models import (
     PreCheckSubmission,
     FingerprintingSubmission,
     PhoneCallLead,
+    ZohoContact,
+    ZohoAttachmentSync,
+    Outbox,
+    InboundEvent,
+    IdempotencyKey,
+    OrderIndex,
     Track,
 )
 
@@ -219,6 +225,79 @@ class PhoneCallLeadAdmin(admin.ModelAdmin):
     )
 
 
+
+# ====== Zoho Contact cache ======
+@admin.register(ZohoContact)
+class ZohoContactAdmin(admin.ModelAdmin):
+    list_display = ('key_type', 'key_value', 'zoho_contact_id', 'updated_at')
+    list_filter = ('key_type',)
+    search_fields = ('key_value', 'zoho_contact_id')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+
+@admin.register(ZohoAttachmentSync)
+class ZohoAttachmentSyncAdmin(admin.ModelAdmin):
+    list_display = ('file_attachment', 'zoho_module', 'zoho_record_id', 'status', 'attempts', 'updated_at')
+    list_filter = ('status', 'zoho_module')
+    search_fields = ('zoho_record_id', 'zoho_attachment_id', 'content_hash')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+# ====== Outbox ======
+@admin.register(Outbox)
+class OutboxAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'idempotency_key', 'status', 'attempts', 'available_at', 'updated_at')
+    list_filter = ('status', 'topic')
+    search_fields = ('idempotency_key',)
+    readonly_fields = ('created_at', 'updated_at', 'dispatched_at')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry now')
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+
+        updated = queryset.exclude(status=Outbox.STATUS_DONE).update(
+            status=Outbox.STATUS_PENDING, attempts=0, available_at=timezone.now(),
+        )
+        self.message_user(request, f"{updated} event(s) queued for delivery")
+
+
+# ====== Inbound webhooks ======
+@admin.register(InboundEvent)
+class InboundEventAdmin(admin.ModelAdmin):
+    list_display = ('source', 'event_id', 'status', 'attempts', 'duration_ms', 'received_at', 'processed_at')
+    list_filter = ('status', 'source')
+    search_fields = ('event_id', 'sequence_key')
+    readonly_fields = ('received_at', 'processed_at', 'duration_ms')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry now')
+    def retry_now(self, request, queryset):
+        from .services.inbox import retry
+
+        updated = retry(queryset)
+        self.message_user(request, f"{updated} event(s) queued for processing")
+
+
+# ====== Idempotency keys ======
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('endpoint', 'key', 'status', 'response_status', 'expires_at', 'created_at')
+    list_filter = ('status', 'endpoint')
+    search_fields = ('key', 'request_hash')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+# ====== Order index ======
+@admin.register(OrderIndex)
+class OrderIndexAdmin(admin.ModelAdmin):
+    list_display = ('order_type', 'order_id', 'name', 'email_lower', 'phone_last10', 'tid', 'zoho_record_id', 'created_at')
+    list_filter = ('order_type',)
+    search_fields = ('=phone_last10', '=email_lower', '=tid', '=zoho_record_id', 'name')
+    readonly_fields = ('indexed_at',)
+
+
 @admin.register(Track)
 class TrackAdmin(admin.ModelAdmin):
     list_display = ('tid', 'updated_at', 'created_at')
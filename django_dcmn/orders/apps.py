@@ -5,3 +5,9 @@ class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
     verbose_name = 'Orders'
+
+    def ready(self):
+        from .services import pricing, order_index
+
+        pricing.connect_signals()
+        order_index.connect_signals()
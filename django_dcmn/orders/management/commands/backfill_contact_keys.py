@@ -0,0 +1,66 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import ContactKeysMixin
+
+
+def contact_key_models() -> list:
+    return [
+        model for model in apps.get_app_config('orders').get_models()
+        if issubclass(model, ContactKeysMixin)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Fill phone_last10 / email_lower on phone leads and orders, in primary key chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--model',
+            action='append',
+            default=[],
+            help='Model name to backfill (repeatable, default: all models with contact keys).',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between chunks (keeps load off a busy database).',
+        )
+        parser.add_argument('--dry-run', action='store_true', default=False)
+
+    def handle(self, *args, **options):
+        models = contact_key_models()
+        if options['model']:
+            wanted = {name.lower() for name in options['model']}
+            models = [m for m in models if m.__name__.lower() in wanted]
+            if not models:
+                raise CommandError(f"No model with contact keys among {options['model']}")
+
+        batch_size = options['batch_size']
+        for model in models:
+            fields = ['pk', model.contact_phone_field, model.contact_email_field, 'phone_last10', 'email_lower']
+            last_pk, scanned, updated = 0, 0, 0
+
+            while True:
+                chunk = list(model.objects.filter(pk__gt=last_pk).order_by('pk').only(*fields)[:batch_size])
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+                scanned += len(chunk)
+
+                changed = [row for row in chunk if row.refresh_contact_keys()]
+                if changed and not options['dry_run']:
+                    model.objects.bulk_update(changed, ['phone_last10', 'email_lower'])
+                updated += len(changed)
+
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+
+            verb = 'would update' if options['dry_run'] else 'updated'
+            self.stdout.write(f"  {model.__name__}: scanned {scanned}, {verb} {updated}")
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.models import OrderIndex, Track
+from orders.services.intake import INTAKE_MODELS, get_intake_model
+from orders.services.order_index import INDEX_FIELDS, index_values, track_rows
+
+
+class Command(BaseCommand):
+    help = 'Build OrderIndex rows for existing orders and copy TIDs from tracking records, in primary key chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--type',
+            action='append',
+            default=[],
+            help=f"Order type to index (repeatable, default: all of {', '.join(INTAKE_MODELS)}).",
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between chunks (keeps load off a busy database).',
+        )
+        parser.add_argument('--dry-run', action='store_true', default=False)
+
+    def handle(self, *args, **options):
+        order_types = options['type'] or list(INTAKE_MODELS)
+        unknown = [t for t in order_types if t not in INTAKE_MODELS]
+        if unknown:
+            raise CommandError(f"Unknown order type(s): {', '.join(unknown)}")
+
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        verb = 'would index' if dry_run else 'indexed'
+
+        for order_type in order_types:
+            model = get_intake_model(order_type)
+            last_pk, indexed = 0, 0
+
+            while True:
+                chunk = list(model.objects.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+
+                if not dry_run:
+                    OrderIndex.objects.bulk_create(
+                        [OrderIndex(order_type=order_type, order_id=o.pk, **index_values(o)) for o in chunk],
+                        update_conflicts=True,
+                        unique_fields=['order_type', 'order_id'],
+                        update_fields=[*INDEX_FIELDS, 'indexed_at'],
+                    )
+                indexed += len(chunk)
+
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+
+            self.stdout.write(f"  {order_type}: {verb} {indexed}")
+
+        # TIDs: tracking records name their order (order_type / order_id, or the Zoho record id)
+        last_pk, linked = 0, 0
+        while True:
+            chunk = list(Track.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'tid', 'data')[:batch_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            for track in chunk:
+                rows = track_rows(track)
+                if rows is None:
+                    continue
+                rows = rows.filter(order_type__in=order_types)
+                if dry_run:
+                    linked += rows.exclude(tid=track.tid).count()
+                else:
+                    linked += rows.exclude(tid=track.tid).update(tid=track.tid)
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(f"  TIDs: {'would link' if dry_run else 'linked'} {linked}")
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import InboundEvent
+from orders.services import inbox
+
+
+class Command(BaseCommand):
+    help = 'Per-source inbound webhook numbers: received, statuses, throughput, handler time and processing lag.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24.0)
+        parser.add_argument('--source', action='append', default=[],
+                            choices=[s for s, _ in InboundEvent.SOURCE_CHOICES],
+                            help='Source to report (repeatable, default: all).')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        rows = inbox.stats(since, sources=options['source'] or None)
+        if not rows:
+            self.stdout.write(f"No inbound events in the last {options['hours']:g}h")
+            return
+
+        def ms(value):
+            return '-' if value is None else f"{value}ms"
+
+        self.stdout.write(f"Inbound events, last {options['hours']:g}h")
+        for row in rows:
+            statuses = ', '.join(f"{k}={v}" for k, v in sorted(row['statuses'].items()))
+            self.stdout.write(f"  {row['source']}: {row['received']} received ({row['per_hour']}/h) [{statuses}]")
+            self.stdout.write(
+                f"    handler p50={ms(row['duration_ms_p50'])} p95={ms(row['duration_ms_p95'])} "
+                f"max={ms(row['duration_ms_max'])} | lag p50={ms(row['lag_ms_p50'])} p95={ms(row['lag_ms_p95'])}"
+            )
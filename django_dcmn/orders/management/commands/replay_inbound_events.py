@@ -0,0 +1,74 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from orders.models import InboundEvent
+from orders.services import inbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Process stored inbound webhook events again (failed ones by default). '
+        'Events sharing a sequence key are replayed in order, one key per worker.'
+    )
+
+    def add_arguments(self, parser):
+        sources = [s for s, _ in InboundEvent.SOURCE_CHOICES]
+        statuses = [s for s, _ in InboundEvent.STATUS_CHOICES]
+        parser.add_argument('--source', action='append', default=[], choices=sources,
+                            help='Source to replay (repeatable, default: all).')
+        parser.add_argument('--status', action='append', default=[], choices=statuses,
+                            help='Status to replay (repeatable, default: failed).')
+        parser.add_argument('--id', action='append', type=int, default=[],
+                            help='Replay these event ids only, whatever their status (repeatable).')
+        parser.add_argument('--since-hours', type=float, default=None,
+                            help='Only events received in the last N hours.')
+        parser.add_argument('--limit', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--dry-run', action='store_true', default=False)
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        events = InboundEvent.objects.all()
+        if options['id']:
+            events = events.filter(pk__in=options['id'])
+        else:
+            events = events.filter(status__in=options['status'] or [InboundEvent.STATUS_FAILED])
+        if options['source']:
+            events = events.filter(source__in=options['source'])
+        if options['since_hours'] is not None:
+            events = events.filter(received_at__gte=timezone.now() - timedelta(hours=options['since_hours']))
+        events = list(events.order_by('received_at', 'pk')[:options['limit']])
+
+        # Same sequence key -> same worker, in arrival order
+        groups = defaultdict(list)
+        for event in events:
+            groups[(event.source, event.sequence_key or f'#{event.pk}')].append(event)
+
+        if options['dry_run']:
+            for event in events:
+                self.stdout.write(f"  would replay #{event.pk} {event.source} {event.event_id} ({event.status})")
+            self.stdout.write(f"{len(events)} event(s) in {len(groups)} sequence(s)")
+            return
+
+        def run(group):
+            done = 0
+            try:
+                for event in group:
+                    done += inbox.replay(event)
+            finally:
+                connections.close_all()
+            return done
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            done = sum(pool.map(run, groups.values()))
+
+        failed = len(events) - done
+        self.stdout.write(f"  replayed {len(events)}: {done} done, {failed} not done")
+        self.stdout.write(self.style.SUCCESS('Done.') if not failed else self.style.WARNING('Done with failures.'))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.zoho_fake import FakeZohoConfig, make_fake_server, parse_latency
+
+
+class Command(BaseCommand):
+    help = 'Run an offline Zoho CRM stand-in (orders/zoho_fake.py) for load tests and benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--latency',
+            default='const:0',
+            help='Latency distribution in seconds: const:S, uniform:LOW,HIGH, normal:MEAN,SD, '
+                 'lognormal:MU,SIGMA or exp:MEAN.',
+        )
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of a 5xx answer.')
+        parser.add_argument('--token-ttl', type=float, default=3600, help='Seconds an access token is accepted (then 401).')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Calls/sec before 429 (0 = unlimited).')
+        parser.add_argument('--rate-burst', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=None, help='Seed for latency and failure injection.')
+
+    def handle(self, *args, **options):
+        try:
+            parse_latency(options['latency'])
+        except (ValueError, IndexError) as e:
+            raise CommandError(f"Bad --latency '{options['latency']}': {e}")
+        config = FakeZohoConfig(
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            token_ttl=options['token_ttl'],
+            rate_limit=options['rate_limit'],
+            rate_burst=options['rate_burst'],
+            seed=options['seed'],
+        )
+        server, fake = make_fake_server(options['host'], options['port'], config)
+        base = f"http://{options['host']}:{server.server_port}"
+
+        self.stdout.write(f"Fake Zoho listening on {base} ({config})")
+        self.stdout.write("Point the app at it with:")
+        self.stdout.write(f"  ZOHO_API_DOMAIN={base}")
+        self.stdout.write(f"  ZOHO_TOKEN_URL={base}/oauth/v2/token")
+        self.stdout.write(f"Stats: {base}/__fake__/stats")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.SUCCESS(f"Stopped. Requests: {dict(fake.stats)}"))
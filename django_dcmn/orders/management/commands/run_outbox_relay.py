@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.services.outbox import relay_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver outbox events continuously (alternative to the relay-outbox beat entry).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.OUTBOX_RELAY_INTERVAL,
+            help='Seconds to sleep when the outbox is empty.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            default=False,
+            help='Drain the outbox once and exit.',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        self.stdout.write(f"Outbox relay started (batch={settings.OUTBOX_RELAY_BATCH_SIZE}, interval={interval}s)")
+
+        while True:
+            try:
+                handled = relay_batch()
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Relay failed: {e}"))
+                handled = 0
+
+            if handled:
+                self.stdout.write(f"  → Relayed {handled} event(s)")
+            if handled >= settings.OUTBOX_RELAY_BATCH_SIZE:
+                continue  # more waiting, no sleep
+            if options['once']:
+                break
+            time.sleep(interval)
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
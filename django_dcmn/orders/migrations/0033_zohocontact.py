@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0032_fingerprintingsubmission_service_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZohoContact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_type', models.CharField(choices=[('email', 'Email (lowercased)'), ('phone', 'Phone (last 10 digits)')], max_length=10)),
+                ('key_value', models.CharField(max_length=255)),
+                ('zoho_contact_id', models.CharField(db_index=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '⚙️ Zoho Contact',
+                'verbose_name_plural': '⚙️ Zoho Contacts',
+                'constraints': [models.UniqueConstraint(fields=('key_type', 'key_value'), name='uniq_zoho_contact_key')],
+            },
+        ),
+    ]
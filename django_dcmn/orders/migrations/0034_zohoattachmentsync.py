@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0033_zohocontact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZohoAttachmentSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoho_module', models.CharField(max_length=100)),
+                ('zoho_record_id', models.CharField(db_index=True, max_length=100)),
+                ('content_hash', models.CharField(blank=True, help_text='SHA-256 of the uploaded file', max_length=64)),
+                ('zoho_attachment_id', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('uploading', 'Uploading'), ('uploaded', 'Uploaded'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('file_attachment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zoho_syncs', to='orders.fileattachment')),
+            ],
+            options={
+                'verbose_name': '⚙️ Zoho Attachment Sync',
+                'verbose_name_plural': '⚙️ Zoho Attachment Syncs',
+                'constraints': [models.UniqueConstraint(fields=('file_attachment', 'zoho_module', 'zoho_record_id'), name='uniq_zoho_attachment_sync')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0035_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apostilleorder',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='embassylegalizationorder',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='fbiapostilleorder',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='i9verificationorder',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='marriageorder',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='prechecksubmission',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='quoterequest',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='translationorder',
+            name='zoho_record_id',
+            field=models.CharField(blank=True, default='', help_text='Zoho CRM record ID (set once created)', max_length=50),
+        ),
+    ]
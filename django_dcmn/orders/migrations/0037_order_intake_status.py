@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0036_order_zoho_record_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apostilleorder',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='embassylegalizationorder',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='fbiapostilleorder',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='fingerprintingsubmission',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='i9verificationorder',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='marriageorder',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='prechecksubmission',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='quoterequest',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+        migrations.AddField(
+            model_name='translationorder',
+            name='intake_status',
+            field=models.JSONField(blank=True, default=dict, help_text='Intake pipeline step status (orders/services/intake.py)'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 00:40
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0037_order_intake_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='sha256 of endpoint + client key (or request hash)', max_length=64, unique=True)),
+                ('endpoint', models.CharField(max_length=255)),
+                ('request_hash', models.CharField(help_text='sha256 of the payload and files', max_length=64)),
+                ('status', models.CharField(choices=[('processing', 'Processing'), ('done', 'Done')], default='processing', max_length=20)),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '⚙️ Idempotency Key',
+                'verbose_name_plural': '⚙️ Idempotency Keys',
+            },
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2 on 2026-10-18 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0038_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apostilleorder',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='apostilleorder',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='embassylegalizationorder',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='embassylegalizationorder',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='fbiapostilleorder',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='fbiapostilleorder',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='fingerprintingsubmission',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='fingerprintingsubmission',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='i9verificationorder',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='i9verificationorder',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='marriageorder',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='marriageorder',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='phonecalllead',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='phonecalllead',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='prechecksubmission',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='prechecksubmission',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='quoterequest',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='quoterequest',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='translationorder',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='translationorder',
+            name='phone_last10',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0039_contact_match_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_type', models.CharField(help_text='Intake order type (fbi, marriage, embassy, ...)', max_length=20)),
+                ('order_id', models.PositiveBigIntegerField()),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('phone_last10', models.CharField(blank=True, db_index=True, default='', max_length=10)),
+                ('email_lower', models.CharField(blank=True, db_index=True, default='', max_length=254)),
+                ('zoho_record_id', models.CharField(blank=True, db_index=True, default='', max_length=50)),
+                ('tid', models.CharField(blank=True, db_index=True, default='', max_length=20)),
+                ('created_at', models.DateTimeField(db_index=True, help_text='Order creation time')),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '🔎 Order Index',
+                'verbose_name_plural': '🔎 Order Index',
+                'constraints': [models.UniqueConstraint(fields=('order_type', 'order_id'), name='order_index_type_id_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 00:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0040_order_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboundEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('whatconverts', 'WhatConverts')], max_length=30)),
+                ('event_id', models.CharField(help_text='Delivery id from the sender (WhatConverts: lead_id:trigger)', max_length=255)),
+                ('sequence_key', models.CharField(blank=True, help_text='Events with the same key are processed in order', max_length=255)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Not processed before this time (retry backoff)')),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Handler outcome')),
+                ('last_error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': '⚙️ Inbound Event',
+                'verbose_name_plural': '⚙️ Inbound Events',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='inbound_status_available_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'event_id'), name='inbound_event_source_id_uniq')],
+            },
+        ),
+    ]
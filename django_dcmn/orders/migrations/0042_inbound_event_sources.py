@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 00:52
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0041_inbound_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboundevent',
+            name='duration_ms',
+            field=models.PositiveIntegerField(blank=True, help_text='Handler time of the last attempt', null=True),
+        ),
+        migrations.AddField(
+            model_name='inboundevent',
+            name='meta',
+            field=models.JSONField(blank=True, default=dict, help_text='Request context for the handler (base_url)'),
+        ),
+        migrations.AlterField(
+            model_name='inboundevent',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Not processed before this time (retry backoff, processing lease)'),
+        ),
+        migrations.AlterField(
+            model_name='inboundevent',
+            name='event_id',
+            field=models.CharField(help_text='Delivery id from the sender (WhatConverts: lead_id:trigger, Stripe: event id)', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='inboundevent',
+            name='received_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='inboundevent',
+            name='result',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Handler outcome'),
+        ),
+        migrations.AlterField(
+            model_name='inboundevent',
+            name='source',
+            field=models.CharField(choices=[('whatconverts', 'WhatConverts'), ('stripe', 'Stripe'), ('zoho_tracking_create', 'Zoho: create TID'), ('zoho_tracking_update', 'Zoho: tracking stage'), ('zoho_review', 'Zoho: review request')], max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='inboundevent',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
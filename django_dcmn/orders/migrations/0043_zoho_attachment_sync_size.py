@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0042_inbound_event_sources'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zohoattachmentsync',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, help_text='File size when claimed for upload', null=True),
+        ),
+        migrations.AlterField(
+            model_name='zohoattachmentsync',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the uploaded file (taken while streaming)', max_length=64),
+        ),
+    ]
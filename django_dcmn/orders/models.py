@@ -1,9 +1,46 @@
 # orders/models.py
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 
+from .utils import normalize_email, normalize_phone
+
+
+# ---------- Contact match keys ----------
+class ContactKeysMixin(models.Model):
+    """
+    Indexed exact-match keys for phone lead / order matching (WhatConverts):
+    phone_last10 (last 10 digits, the US number without country code) and
+    email_lower. Kept in sync on save(); rows written by queryset.update()
+    or before the columns existed are filled by `manage.py backfill_contact_keys`.
+    """
+    contact_phone_field = 'phone'
+    contact_email_field = 'email'
+
+    phone_last10 = models.CharField(max_length=10, blank=True, default='', db_index=True, editable=False)
+    email_lower = models.CharField(max_length=254, blank=True, default='', db_index=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def refresh_contact_keys(self) -> bool:
+        """Recompute the keys from the contact fields. Returns True if they changed."""
+        phone_last10 = normalize_phone(getattr(self, self.contact_phone_field))
+        email_lower = normalize_email(getattr(self, self.contact_email_field))
+        changed = (phone_last10, email_lower) != (self.phone_last10, self.email_lower)
+        self.phone_last10, self.email_lower = phone_last10, email_lower
+        return changed
+
+    def save(self, *args, **kwargs):
+        self.refresh_contact_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {self.contact_phone_field, self.contact_email_field} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'phone_last10', 'email_lower'}
+        super().save(*args, **kwargs)
+
 
 class ShippingOption(models.Model):
     code = models.CharField(max_length=50, unique=True)
@@ -50,7 +87,53 @@ class FileAttachment(models.Model):
         verbose_name_plural = '⚙️ File Attachments'
 
 
-class FbiApostilleOrder(models.Model):
+
+class ZohoAttachmentSync(models.Model):
+    """
+    Ledger of FileAttachment uploads to a Zoho record's Attachments.
+    One row per file/record pair, so retries only upload what is missing.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_UPLOADING = 'uploading'
+    STATUS_UPLOADED = 'uploaded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_UPLOADING, 'Uploading'),
+        (STATUS_UPLOADED, 'Uploaded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    file_attachment = models.ForeignKey(FileAttachment, on_delete=models.CASCADE, related_name='zoho_syncs')
+    zoho_module = models.CharField(max_length=100)
+    zoho_record_id = models.CharField(max_length=100, db_index=True)
+
+    size = models.PositiveBigIntegerField(null=True, blank=True, help_text="File size when claimed for upload")
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the uploaded file (taken while streaming)")
+    zoho_attachment_id = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.file_attachment_id} → {self.zoho_module}/{self.zoho_record_id} ({self.status})"
+
+    class Meta:
+        verbose_name = '⚙️ Zoho Attachment Sync'
+        verbose_name_plural = '⚙️ Zoho Attachment Syncs'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['file_attachment', 'zoho_module', 'zoho_record_id'],
+                name='uniq_zoho_attachment_sync',
+            ),
+        ]
+
+
+class FbiApostilleOrder(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -66,10 +149,12 @@ class FbiApostilleOrder(models.Model):
 
     is_paid = models.BooleanField(default=False)
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     tid_created = models.BooleanField(default=False, help_text="Tracking ID created")
     manager_notified = models.BooleanField(default=False, help_text="Manager email sent")
     track = models.ForeignKey('Track', on_delete=models.SET_NULL, null=True, blank=True, related_name='fbi_orders')
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     file_attachments = GenericRelation(
@@ -97,7 +182,7 @@ class FbiPricingSettings(models.Model):
         verbose_name = 'FBI Apostille — Pricing Setting'
 
 
-class MarriageOrder(models.Model):
+class MarriageOrder(ContactKeysMixin, models.Model):
     # Step 1
     name = models.CharField(max_length=255)
     email = models.EmailField()
@@ -120,10 +205,12 @@ class MarriageOrder(models.Model):
     )
     is_paid = models.BooleanField(default=False)
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     tid_created = models.BooleanField(default=False, help_text="Tracking ID created")
     manager_notified = models.BooleanField(default=False, help_text="Manager email sent")
     track = models.ForeignKey('Track', on_delete=models.SET_NULL, null=True, blank=True, related_name='marriage_orders')
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -158,7 +245,7 @@ class MarriagePricingSettings(models.Model):
         verbose_name_plural = "Triple Seal Marriage — Pricing Settings"
 
 
-class EmbassyLegalizationOrder(models.Model):
+class EmbassyLegalizationOrder(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -168,7 +255,9 @@ class EmbassyLegalizationOrder(models.Model):
     comments = models.TextField(blank=True, null=True)
 
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     file_attachments = GenericRelation(
@@ -186,7 +275,7 @@ class EmbassyLegalizationOrder(models.Model):
         verbose_name_plural = 'Embassy Legalization — Orders'
 
 
-class TranslationOrder(models.Model):
+class TranslationOrder(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -195,7 +284,9 @@ class TranslationOrder(models.Model):
     comments = models.TextField(blank=True, null=True)
 
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     file_attachments = GenericRelation(
@@ -213,7 +304,7 @@ class TranslationOrder(models.Model):
         verbose_name_plural = 'Translation — Orders'
 
 
-class ApostilleOrder(models.Model):
+class ApostilleOrder(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -227,7 +318,9 @@ class ApostilleOrder(models.Model):
     comments = models.TextField(blank=True, null=True)
 
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     file_attachments = GenericRelation(
@@ -245,7 +338,7 @@ class ApostilleOrder(models.Model):
         verbose_name_plural = 'Apostille — Orders'
 
 
-class I9VerificationOrder(models.Model):
+class I9VerificationOrder(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -255,7 +348,9 @@ class I9VerificationOrder(models.Model):
     comments = models.TextField(blank=True, null=True)
 
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     file_attachments = GenericRelation(
@@ -273,7 +368,7 @@ class I9VerificationOrder(models.Model):
         verbose_name_plural = "I-9 Verification — Orders"
 
 
-class QuoteRequest(models.Model):
+class QuoteRequest(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -285,7 +380,9 @@ class QuoteRequest(models.Model):
     comments = models.TextField(blank=True, null=True)
 
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -296,7 +393,7 @@ class QuoteRequest(models.Model):
         verbose_name_plural = 'Quote — Requests'
 
 
-class FingerprintingSubmission(models.Model):
+class FingerprintingSubmission(ContactKeysMixin, models.Model):
     SERVICE_LOCATION_CHOICES = [
         ('Office', 'Office'),
         ('Mobile', 'Mobile'),
@@ -325,6 +422,7 @@ class FingerprintingSubmission(models.Model):
 
     zoho_synced = models.BooleanField(default=False)
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -335,7 +433,7 @@ class FingerprintingSubmission(models.Model):
         verbose_name_plural = 'Fingerprinting — Submissions'
 
 
-class PreCheckSubmission(models.Model):
+class PreCheckSubmission(ContactKeysMixin, models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
@@ -344,7 +442,9 @@ class PreCheckSubmission(models.Model):
     comments = models.TextField(blank=True, null=True)
 
     zoho_synced = models.BooleanField(default=False)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', help_text="Zoho CRM record ID (set once created)")
     attribution_data = models.JSONField(blank=True, null=True, help_text="Marketing attribution data")
+    intake_status = models.JSONField(blank=True, default=dict, help_text="Intake pipeline step status (orders/services/intake.py)")
     created_at = models.DateTimeField(auto_now_add=True)
 
     file_attachments = GenericRelation(
@@ -363,8 +463,10 @@ class PreCheckSubmission(models.Model):
 
 
 # --- Phone Call Leads (WhatConverts) ---
-class PhoneCallLead(models.Model):
+class PhoneCallLead(ContactKeysMixin, models.Model):
     """Store phone call leads from WhatConverts"""
+    contact_phone_field = 'contact_phone'
+    contact_email_field = 'contact_email'
 
     # WhatConverts identifiers
     whatconverts_lead_id = models.CharField(max_length=100, unique=True, db_index=True, help_text="WhatConverts lead_id")
@@ -441,6 +543,209 @@ class PhoneCallLead(models.Model):
         ordering = ['-created_at']
 
 
+# --- Zoho Contact cache ---
+class ZohoContact(models.Model):
+    """
+    Local map of normalized email / phone -> Zoho Contact ID.
+    Source of truth for contact resolution; Redis is the hot tier in front of it
+    (see orders/services/zoho_contacts.py).
+    """
+
+    KEY_EMAIL = 'email'
+    KEY_PHONE = 'phone'
+    KEY_TYPE_CHOICES = [
+        (KEY_EMAIL, 'Email (lowercased)'),
+        (KEY_PHONE, 'Phone (last 10 digits)'),
+    ]
+
+    key_type = models.CharField(max_length=10, choices=KEY_TYPE_CHOICES)
+    key_value = models.CharField(max_length=255)
+    zoho_contact_id = models.CharField(max_length=100, db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key_type}:{self.key_value} → {self.zoho_contact_id}"
+
+    class Meta:
+        verbose_name = '⚙️ Zoho Contact'
+        verbose_name_plural = '⚙️ Zoho Contacts'
+        constraints = [
+            models.UniqueConstraint(fields=['key_type', 'key_value'], name='uniq_zoho_contact_key'),
+        ]
+
+
+# --- Transactional outbox ---
+class Outbox(models.Model):
+    """
+    CRM side effect (order sync, Zoho field write) saved in the same
+    transaction as the change that caused it. The outbox relay delivers
+    pending rows at least once; idempotency_key dedupes re-enqueues.
+    See orders/services/outbox.py.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_DISPATCHED = 'dispatched'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DISPATCHED, 'Dispatched'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    topic = models.CharField(max_length=50, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=255, unique=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not delivered before this time (retry backoff)")
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.topic} | {self.idempotency_key} ({self.status})"
+
+    class Meta:
+        verbose_name = '⚙️ Outbox Event'
+        verbose_name_plural = '⚙️ Outbox Events'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+
+# --- Inbound webhook inbox ---
+class InboundEvent(models.Model):
+    """
+    Webhook delivery as received (Stripe, Zoho CRM workflows, WhatConverts)
+    and the outcome of processing it. (source, event_id) is unique, so
+    redeliveries are stored once; events with the same sequence_key are
+    processed in the order received. See orders/services/inbox.py.
+    """
+
+    SOURCE_WHATCONVERTS = 'whatconverts'
+    SOURCE_STRIPE = 'stripe'
+    SOURCE_ZOHO_TRACKING_CREATE = 'zoho_tracking_create'
+    SOURCE_ZOHO_TRACKING_UPDATE = 'zoho_tracking_update'
+    SOURCE_ZOHO_REVIEW = 'zoho_review'
+    SOURCE_CHOICES = [
+        (SOURCE_WHATCONVERTS, 'WhatConverts'),
+        (SOURCE_STRIPE, 'Stripe'),
+        (SOURCE_ZOHO_TRACKING_CREATE, 'Zoho: create TID'),
+        (SOURCE_ZOHO_TRACKING_UPDATE, 'Zoho: tracking stage'),
+        (SOURCE_ZOHO_REVIEW, 'Zoho: review request'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    source = models.CharField(max_length=30, choices=SOURCE_CHOICES)
+    event_id = models.CharField(max_length=255, help_text="Delivery id from the sender (WhatConverts: lead_id:trigger, Stripe: event id)")
+    sequence_key = models.CharField(max_length=255, blank=True, help_text="Events with the same key are processed in order")
+    payload = models.JSONField(default=dict, blank=True)
+    meta = models.JSONField(default=dict, blank=True, help_text="Request context for the handler (base_url)")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not processed before this time (retry backoff, processing lease)")
+    result = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, help_text="Handler outcome")
+    last_error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, help_text="Handler time of the last attempt")
+
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} | {self.event_id} ({self.status})"
+
+    class Meta:
+        verbose_name = '⚙️ Inbound Event'
+        verbose_name_plural = '⚙️ Inbound Events'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'event_id'], name='inbound_event_source_id_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='inbound_status_available_idx'),
+        ]
+
+
+# --- Idempotent POSTs ---
+class IdempotencyKey(models.Model):
+    """
+    Response of an order-creation / checkout POST, replayed when the same
+    request is retried (Idempotency-Key header, or a hash of the payload and
+    files). See orders/services/idempotency.py.
+    """
+
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_CHOICES = [
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+    ]
+
+    key = models.CharField(max_length=64, unique=True, help_text="sha256 of endpoint + client key (or request hash)")
+    endpoint = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64, help_text="sha256 of the payload and files")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PROCESSING)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.endpoint} | {self.key[:12]} ({self.status})"
+
+    class Meta:
+        verbose_name = '⚙️ Idempotency Key'
+        verbose_name_plural = '⚙️ Idempotency Keys'
+
+
+# --- Cross-type order index ---
+class OrderIndex(models.Model):
+    """
+    One row per order of any type (web form orders and submissions), so
+    "orders for this phone / email / TID / Zoho record" is one indexed query.
+    Kept in sync by signals; see orders/services/order_index.py.
+    """
+
+    order_type = models.CharField(max_length=20, help_text="Intake order type (fbi, marriage, embassy, ...)")
+    order_id = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=255, blank=True)
+    phone_last10 = models.CharField(max_length=10, blank=True, default='', db_index=True)
+    email_lower = models.CharField(max_length=254, blank=True, default='', db_index=True)
+    zoho_record_id = models.CharField(max_length=50, blank=True, default='', db_index=True)
+    tid = models.CharField(max_length=20, blank=True, default='', db_index=True)
+    created_at = models.DateTimeField(db_index=True, help_text="Order creation time")
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.order_type} #{self.order_id}"
+
+    class Meta:
+        verbose_name = '🔎 Order Index'
+        verbose_name_plural = '🔎 Order Index'
+        constraints = [
+            models.UniqueConstraint(fields=['order_type', 'order_id'], name='order_index_type_id_uniq'),
+        ]
+
+
 # --- Tracking ---
 class Track(models.Model):
     tid = models.CharField(max_length=20, unique=True, db_index=True)
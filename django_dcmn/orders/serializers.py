@@ -60,7 +60,7 @@ class FbiApostilleOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = FbiApostilleOrder
         fields = '__all__'
-        read_only_fields = ('is_paid', 'zoho_synced', 'created_at', 'total_price', 'attribution_data')
+        read_only_fields = ('is_paid', 'zoho_synced', 'created_at', 'total_price', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 
 # ====== MARRIAGE ======
@@ -89,35 +89,35 @@ class EmbassyLegalizationOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = EmbassyLegalizationOrder
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 
 class TranslationOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = TranslationOrder
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 # ====== APOSTILLE ======
 class ApostilleOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = ApostilleOrder
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 # ====== I-9 ======
 class I9OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = I9VerificationOrder
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 # ====== Quote ======
 class QuoteRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuoteRequest
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 
 # ====== Fingerprinting ======
@@ -125,7 +125,7 @@ class FingerprintingSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = FingerprintingSubmission
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'intake_status')
 
 
 # ====== Pre-Check ======
@@ -133,7 +133,7 @@ class PreCheckSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = PreCheckSubmission
         fields = '__all__'
-        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data')
+        read_only_fields = ('zoho_synced', 'created_at', 'attribution_data', 'zoho_record_id', 'intake_status')
 
 
 # ====== TRACKING ======
@@ -5,6 +5,8 @@ from .tracking import create_order_tracking
 from .order_processing import process_new_order
 from .attribution import (
     process_attribution,
+    save_web_attribution,
+    apply_phone_lead_attribution,
     extract_attribution_from_request,
     clean_attribution_data,
     build_zoho_attribution_payload,
@@ -18,6 +20,8 @@ __all__ = [
     'process_new_order',
     # Attribution
     'process_attribution',
+    'save_web_attribution',
+    'apply_phone_lead_attribution',
     'extract_attribution_from_request',
     'clean_attribution_data',
     'build_zoho_attribution_payload',
@@ -206,13 +206,15 @@ def clean_attribution_data(raw_data: dict | None) -> dict | None:
 # ZOHO PAYLOAD BUILDING
 # =============================================================================
 
-def build_zoho_attribution_payload(attribution_data: dict, lead_name: str = '') -> dict | None:
+def build_zoho_attribution_payload(attribution_data: dict, lead_name: str = '', record_key: str = '') -> dict | None:
     """
     Transform attribution data into Zoho API format for Lead_Attribution_Records.
 
     Args:
         attribution_data: Cleaned attribution dict
         lead_name: Client name for record naming
+        record_key: Per-order key put in the Name instead of the current time,
+            so the Name is stable across retries (orders upsert on it)
 
     Returns:
         Dict ready for Zoho API or None if no data
@@ -249,11 +251,11 @@ def build_zoho_attribution_payload(attribution_data: dict, lead_name: str = '')
     # Generate unique Name for Zoho record (required field)
     source = attribution_data.get('source', 'direct')
     medium = attribution_data.get('medium', 'none')
-    date_str = datetime.now().strftime('%Y-%m-%d %H:%M')
+    suffix = record_key or datetime.now().strftime('%Y-%m-%d %H:%M')
 
     # Truncate lead_name to 20 chars
     name_part = lead_name[:20] if lead_name else 'Lead'
-    payload['Name'] = f"{name_part} | {source}/{medium} | {date_str}"
+    payload['Name'] = f"{name_part} | {source}/{medium} | {suffix}"
 
     # Ensure Lead_Type is always set (default to 'Form' for web submissions)
     if 'Lead_Type' not in payload:
@@ -322,6 +324,9 @@ def process_attribution(request, order) -> dict | None:
     3. Otherwise extract attribution from web form request
     4. Enrich with geo and save to order
 
+    The intake pipeline (services/intake.py) runs the two halves separately:
+    save_web_attribution in the request, apply_phone_lead_attribution in Celery.
+
     Args:
         request: Django/DRF request
         order: Order model instance
@@ -331,34 +336,64 @@ def process_attribution(request, order) -> dict | None:
     """
     # Check for matching phone lead FIRST (before processing web attribution)
     # If found, use WhatConverts attribution instead of web form attribution
-    phone_lead = check_and_update_phone_lead(order, request)
+    attribution = apply_phone_lead_attribution(order)
+    if attribution:
+        return attribution
+    return save_web_attribution(request, order)
 
-    if phone_lead:
-        # Use attribution from WhatConverts phone lead
-        logger.info(f"✅ Using WhatConverts attribution from phone lead {phone_lead.id}")
-        from .whatconverts import build_attribution_from_phone_lead
-        attribution = build_attribution_from_phone_lead(phone_lead)
 
-        # Override lead_type to indicate it was originally a phone lead
-        attribution['lead_type'] = 'phone'  # Keep as 'phone' to preserve origin
+def extract_web_attribution(request) -> dict | None:
+    """Web form attribution from the request, geo-enriched, lead_type defaulted to 'form'."""
+    attribution = extract_attribution_from_request(request)
+    if not attribution:
+        return None
 
-    else:
-        # No phone lead found, use regular web form attribution
-        attribution = extract_attribution_from_request(request)
+    # Enrich with geo (if configured)
+    attribution = enrich_with_geo(attribution, request)
 
-        if not attribution:
-            logger.debug(f"No attribution data for order {order.id}")
-            return None
+    # Set default lead_type to 'Form' if not provided
+    # (All web forms are 'Form' type, unless explicitly overridden)
+    if 'lead_type' not in attribution or not attribution['lead_type']:
+        attribution['lead_type'] = 'form'
+    return attribution
+
+
+def save_web_attribution(request, order) -> dict | None:
+    """Extract web form attribution from the request and save it to the order (no external calls)."""
+    attribution = extract_web_attribution(request)
+    if not attribution:
+        logger.debug(f"No attribution data for order {order.id}")
+        return None
+    _save_attribution(order, attribution)
+    return attribution
+
+
+def apply_phone_lead_attribution(order) -> dict | None:
+    """
+    Match the order against WhatConverts phone leads; on a match the phone
+    lead attribution replaces the web form one and the lead's Zoho record is
+    updated (or the update is queued to the outbox).
+
+    Returns:
+        Phone lead attribution dict, or None if no phone lead matched
+    """
+    phone_lead = check_and_update_phone_lead(order)
+    if not phone_lead:
+        return None
 
-        # Enrich with geo (if configured)
-        attribution = enrich_with_geo(attribution, request)
+    # Use attribution from WhatConverts phone lead
+    logger.info(f"✅ Using WhatConverts attribution from phone lead {phone_lead.id}")
+    from .whatconverts import build_attribution_from_phone_lead
+    attribution = build_attribution_from_phone_lead(phone_lead)
 
-        # Set default lead_type to 'Form' if not provided
-        # (All web forms are 'Form' type, unless explicitly overridden)
-        if 'lead_type' not in attribution or not attribution['lead_type']:
-            attribution['lead_type'] = 'form'
+    # Override lead_type to indicate it was originally a phone lead
+    attribution['lead_type'] = 'phone'  # Keep as 'phone' to preserve origin
 
-    # Save to order
+    _save_attribution(order, attribution)
+    return attribution
+
+
+def _save_attribution(order, attribution: dict):
     try:
         order.attribution_data = attribution
         order.save(update_fields=['attribution_data'])
@@ -366,17 +401,14 @@ def process_attribution(request, order) -> dict | None:
     except Exception as e:
         logger.exception(f"Failed to save attribution for order {order.id}: {e}")
 
-    return attribution
-
 
-def check_and_update_phone_lead(order, request) -> Optional['PhoneCallLead']:
+def check_and_update_phone_lead(order) -> Optional['PhoneCallLead']:
     """
     Check if this order matches an existing phone lead.
     If found, update phone lead with form data and return it.
 
     Args:
         order: Order model instance
-        request: Django request object
 
     Returns:
         PhoneCallLead if matched, None otherwise
@@ -1,6 +1,8 @@
 # orders/services/files.py
 """File attachment handling utilities."""
 
+from urllib.parse import urljoin
+
 from django.contrib.contenttypes.models import ContentType
 from ..models import FileAttachment
 import logging
@@ -39,14 +41,15 @@ def save_file_attachments(request, model_class, order) -> list[str]:
     return file_urls
 
 
-def build_file_links(request, order, html: bool = False) -> str:
+def build_file_links(request, order, html: bool = False, base_url: str | None = None) -> str:
     """
     Build formatted file links string from order attachments.
     
     Args:
-        request: Django request object
+        request: Django request object, or None outside a request
         order: Order instance with file_attachments relation
         html: If True, return HTML list items; otherwise plain text
+        base_url: Site root used when there is no request (Celery)
     
     Returns:
         Formatted string with file links or 'None'
@@ -55,14 +58,17 @@ def build_file_links(request, order, html: bool = False) -> str:
     
     if not attachments:
         return "<li>No files attached</li>" if html else "None"
+
+    def absolute(url: str) -> str:
+        return request.build_absolute_uri(url) if request is not None else urljoin(base_url or '', url)
     
     if html:
         return "".join([
-            f'<li><a href="{request.build_absolute_uri(f.file.url)}">{f.file.name}</a></li>'
+            f'<li><a href="{absolute(f.file.url)}">{f.file.name}</a></li>'
             for f in attachments
         ])
     else:
         return "".join([
-            f"📎 {request.build_absolute_uri(f.file.url)}\n"
+            f"📎 {absolute(f.file.url)}\n"
             for f in attachments
         ])
@@ -0,0 +1,249 @@
+# orders/services/idempotency.py
+"""
+Idempotent POSTs for order-creation and checkout endpoints.
+
+Frontends retry on slow responses; without this every retry creates another
+order, attachments, Track, Zoho deal and staff emails. A request is keyed by:
+
+    Idempotency-Key header   -> kept IDEMPOTENCY_TTL seconds; reusing the key
+                                with a different payload is rejected (422)
+    no header                -> sha256 of the payload and uploaded files, kept
+                                IDEMPOTENCY_DERIVED_TTL seconds (retry window)
+
+The first request claims the key with a unique DB row (IdempotencyKey) and
+runs the view; a 2xx response is stored on the row and in Redis, and repeats
+get it back with `Idempotent-Replayed: true` without running the view again.
+A repeat that arrives while the first request is still running gets 409 with
+Retry-After. Non-2xx responses and exceptions release the key, so a corrected
+request can go through. A claim left behind by a crashed worker is taken over
+after IDEMPOTENCY_LOCK_TIMEOUT seconds. Expired rows are purged daily
+(purge_idempotency_keys_task).
+"""
+
+import json
+import hashlib
+import logging
+import functools
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+CACHE_KEY_PREFIX = 'idempotency'
+
+
+def _cache_key(key: str) -> str:
+    return f'{CACHE_KEY_PREFIX}:{key}'
+
+
+# =============================================================================
+# KEYS
+# =============================================================================
+
+def request_fingerprint(request) -> str:
+    """sha256 of method, path, form fields and uploaded files (name, size, content)."""
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+
+    data = request.data
+    if hasattr(data, 'getlist'):  # QueryDict (multipart/form)
+        fields = {k: [v for v in data.getlist(k) if not isinstance(v, UploadedFile)] for k in data.keys()}
+    else:
+        fields = dict(data)
+    digest.update(json.dumps(fields, sort_keys=True, cls=DjangoJSONEncoder, default=str).encode())
+
+    for field in sorted(request.FILES.keys()):
+        for f in request.FILES.getlist(field):
+            digest.update(f'\n{field}:{f.name}:{f.size}:'.encode())
+            for chunk in f.chunks():
+                digest.update(chunk)
+            f.seek(0)
+
+    return digest.hexdigest()
+
+
+def _key(endpoint: str, key: str) -> str:
+    return hashlib.sha256(f'{endpoint}\n{key}'.encode()).hexdigest()
+
+
+# =============================================================================
+# CLAIM / STORE / RELEASE
+# =============================================================================
+
+def _replay(entry: dict, fingerprint: str) -> Response:
+    if entry['request_hash'] != fingerprint:
+        return Response(
+            {'error': 'Idempotency-Key was already used with a different request.'},
+            status=422,
+        )
+    response = Response(entry['body'], status=entry['status'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _conflict() -> Response:
+    response = Response(
+        {'error': 'A request with this Idempotency-Key is still being processed.'},
+        status=409,
+    )
+    response['Retry-After'] = '2'
+    return response
+
+
+def _entry(row) -> dict:
+    return {'request_hash': row.request_hash, 'status': row.response_status, 'body': row.response_body}
+
+
+def _remember(key: str, entry: dict, expires_at):
+    ttl = int((expires_at - timezone.now()).total_seconds())
+    if ttl <= 0:
+        return
+    try:
+        cache.set(_cache_key(key), entry, ttl)
+    except Exception as e:
+        logger.warning(f"[Idempotency] Cache unavailable: {e}")
+
+
+def claim(key: str, endpoint: str, fingerprint: str, ttl: int) -> Response | None:
+    """
+    Claim a key for this request.
+
+    Returns:
+        None if the caller should run the view; otherwise the response to
+        return (stored response replayed, 409 in progress, 422 key reuse)
+    """
+    from ..models import IdempotencyKey
+
+    try:
+        cached = cache.get(_cache_key(key))
+    except Exception as e:
+        logger.warning(f"[Idempotency] Cache unavailable: {e}")
+        cached = None
+    if cached:
+        logger.info(f"[Idempotency] Replaying {endpoint} ({key[:12]}) from cache")
+        return _replay(cached, fingerprint)
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=key, endpoint=endpoint, request_hash=fingerprint,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+        return None
+    except IntegrityError:
+        pass
+
+    row = IdempotencyKey.objects.filter(key=key).first()
+    if row is None:
+        return _conflict()  # released between our insert and read; the client retries
+
+    stale = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    if row.expires_at <= now or (row.status == IdempotencyKey.STATUS_PROCESSING and row.updated_at < stale):
+        taken = IdempotencyKey.objects.filter(pk=row.pk, updated_at=row.updated_at).update(
+            status=IdempotencyKey.STATUS_PROCESSING,
+            request_hash=fingerprint,
+            response_status=None,
+            response_body=None,
+            expires_at=now + timedelta(seconds=ttl),
+            updated_at=now,
+        )
+        if taken:
+            logger.warning(f"[Idempotency] Took over expired/stale key for {endpoint} ({key[:12]})")
+            return None
+        return _conflict()
+
+    if row.status == IdempotencyKey.STATUS_DONE:
+        logger.info(f"[Idempotency] Replaying {endpoint} ({key[:12]})")
+        _remember(key, _entry(row), row.expires_at)
+        return _replay(_entry(row), fingerprint)
+
+    logger.info(f"[Idempotency] {endpoint} ({key[:12]}) still processing, 409")
+    return _conflict()
+
+
+def store(key: str, response):
+    """Save a successful response for replay."""
+    from ..models import IdempotencyKey
+
+    row = IdempotencyKey.objects.filter(key=key).first()
+    if row is None:
+        return
+    row.status = IdempotencyKey.STATUS_DONE
+    row.response_status = response.status_code
+    row.response_body = response.data
+    row.save(update_fields=['status', 'response_status', 'response_body', 'updated_at'])
+    _remember(key, _entry(row), row.expires_at)
+
+
+def release(key: str):
+    """Drop the claim of a request that did not succeed (it may be retried)."""
+    from ..models import IdempotencyKey
+
+    IdempotencyKey.objects.filter(key=key, status=IdempotencyKey.STATUS_PROCESSING).delete()
+
+
+def purge_expired() -> int:
+    """Delete expired keys. Returns number of rows deleted."""
+    from ..models import IdempotencyKey
+
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
+
+
+# =============================================================================
+# VIEW DECORATOR
+# =============================================================================
+
+def idempotent(view):
+    """
+    Decorator for APIView.post: replay the stored response of a repeated
+    request instead of running the view again.
+    """
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.IDEMPOTENCY_TTL:
+            return view(self, request, *args, **kwargs)
+
+        client_key = request.META.get(HEADER, '').strip()
+        if len(client_key) > MAX_KEY_LENGTH:
+            return Response({'error': f'Idempotency-Key longer than {MAX_KEY_LENGTH} characters.'}, status=400)
+
+        fingerprint = request_fingerprint(request)
+        ttl = settings.IDEMPOTENCY_TTL if client_key else settings.IDEMPOTENCY_DERIVED_TTL
+        key = _key(request.path, client_key or fingerprint)
+
+        try:
+            outcome = claim(key, request.path, fingerprint, ttl)
+        except Exception as e:
+            # Never block intake on the dedupe layer
+            logger.exception(f"[Idempotency] Claim failed for {request.path}, running unprotected: {e}")
+            return view(self, request, *args, **kwargs)
+        if outcome is not None:
+            return outcome
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except Exception:
+            release(key)
+            raise
+
+        try:
+            if 200 <= response.status_code < 300:
+                store(key, response)
+            else:
+                release(key)
+        except Exception as e:
+            logger.exception(f"[Idempotency] Failed to store response for {request.path}: {e}")
+        return response
+
+    return wrapper
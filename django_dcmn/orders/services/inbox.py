@@ -0,0 +1,382 @@
+# orders/services/inbox.py
+"""
+Inbound webhook inbox (InboundEvent).
+
+Every webhook delivery is saved before it is processed, deduplicated on
+(source, event_id):
+
+    queued sources (WhatConverts, Stripe)
+        receive()        -> event saved, view answers 2xx at once; once
+                            committed, process_inbound_events_task is queued
+    inline sources (Zoho TID create / stage update / review request: the
+    CRM workflow reads the response)
+        handle_inline()  -> event saved and processed in the request; a
+                            redelivery of a done event gets the stored response
+                            (Zoho sends no delivery id: events are keyed by deal
+                            or CRM modified time when given, else not deduped)
+
+HANDLERS maps a source to handler(payload, meta) -> result dict (inline
+handlers return {'http_status': ..., 'body': ...}). process() claims the
+event (a processing lease in available_at, so a crashed run is picked up
+again), runs the handler and records status, attempts, result, error and
+duration. Failures are retried with exponential backoff up to
+INBOX_MAX_ATTEMPTS (a drain of the source is queued for when the retry is
+due), then left failed.
+
+drain() processes the pending events of a source in the order received
+(Celery: on receipt and at retry time; beat sweeps every source for events
+whose task was never queued or was lost); one drainer per source at a time (cache lock), and an event
+waits while an earlier event with the same sequence_key is unfinished.
+`manage.py replay_inbound_events` reprocesses failed or selected events in
+parallel, `manage.py inbound_event_stats` reports per-source throughput and
+latency. Done events are purged after INBOX_RETENTION_DAYS.
+"""
+
+import json
+import time
+import uuid
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'inbox:drain:{source}'
+
+# source -> dotted path of handler(payload, meta) -> result dict
+HANDLERS = {
+    'whatconverts': 'orders.services.whatconverts.handle_whatconverts_webhook',
+    'stripe': 'orders.views.stripe.handle_stripe_event',
+    'zoho_tracking_create': 'orders.views.tracking.handle_tid_create',
+    'zoho_tracking_update': 'orders.views.tracking.handle_stage_update',
+    'zoho_review': 'reviews.views.handle_review_webhook',
+}
+
+# Request fields never stored with an event (webhook token fallback)
+SECRET_FIELDS = {'token'}
+
+
+def as_payload(data) -> dict:
+    """Plain dict of request.data (JSON or form) to store, secrets removed."""
+    data = data.dict() if hasattr(data, 'dict') else dict(data)
+    return {k: v for k, v in data.items() if k not in SECRET_FIELDS}
+
+
+def delivery_event_id() -> str:
+    """
+    Event id for a sender that sends no delivery id (Zoho workflows): unique,
+    so the delivery is recorded and replayable but never deduplicated; its
+    handler must be safe to run twice.
+    """
+    return f"delivery:{uuid.uuid4().hex}"
+
+
+# =============================================================================
+# RECEIVE (in the webhook view)
+# =============================================================================
+
+def receive(source: str, event_id: str, payload: dict, sequence_key: str = '',
+            meta: dict | None = None, queue: bool = True) -> tuple:
+    """
+    Save a webhook delivery; a redelivery returns the stored event unchanged.
+
+    Returns:
+        (InboundEvent, created)
+    """
+    from ..models import InboundEvent
+
+    event, created = InboundEvent.objects.get_or_create(
+        source=source,
+        event_id=event_id[:255],
+        defaults={'payload': payload, 'sequence_key': sequence_key[:255], 'meta': meta or {}},
+    )
+    if not created:
+        logger.info(f"[Inbox] Duplicate {source} event {event_id} ({event.status})")
+    elif queue:
+        transaction.on_commit(lambda: kick(source))
+    return event, created
+
+
+def handle_inline(source: str, event_id: str, payload: dict, sequence_key: str = '',
+                  meta: dict | None = None):
+    """
+    Save a delivery and process it now, unless it was already processed.
+
+    Returns:
+        The InboundEvent with its current status (see inline_response)
+    """
+    from ..models import InboundEvent
+
+    event, created = receive(source, event_id, payload, sequence_key, meta, queue=False)
+    if event.status != InboundEvent.STATUS_DONE:
+        if not process(event):
+            event.refresh_from_db()
+    return event
+
+
+def inline_response(event) -> tuple:
+    """(HTTP status, body) answering the delivery of an inline event."""
+    from ..models import InboundEvent
+
+    if event.status == InboundEvent.STATUS_DONE:
+        return event.result.get('http_status', 200), event.result.get('body', {})
+    if event.status == InboundEvent.STATUS_PROCESSING:
+        return 409, {'error': 'event is being processed'}
+    return 500, {'error': 'processing failed, will be retried'}
+
+
+def kick(source: str, countdown: float = 0):
+    """Queue processing of a source's pending events (beat catches up if the broker is down)."""
+    from ..tasks import process_inbound_events_task
+
+    try:
+        process_inbound_events_task.apply_async((source,), countdown=countdown)
+    except Exception as e:
+        logger.warning(f"[Inbox] Failed to queue {source} processing, left to beat: {e}")
+
+
+# =============================================================================
+# PROCESSING
+# =============================================================================
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = min(settings.INBOX_RETRY_BACKOFF * 2 ** max(attempts - 1, 0), settings.INBOX_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=seconds)
+
+
+def _claim(event) -> bool:
+    """Take a due pending (or lease-expired processing) event. False if someone else has it."""
+    from ..models import InboundEvent
+
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.INBOX_PROCESSING_TIMEOUT)
+    claimed = InboundEvent.objects.filter(
+        pk=event.pk,
+        status__in=[InboundEvent.STATUS_PENDING, InboundEvent.STATUS_PROCESSING],
+        available_at__lte=now,
+    ).update(status=InboundEvent.STATUS_PROCESSING, available_at=lease)
+    if claimed:
+        event.status, event.available_at = InboundEvent.STATUS_PROCESSING, lease
+    return bool(claimed)
+
+
+def process(event) -> bool:
+    """
+    Claim one event, run its handler and record the outcome.
+
+    Returns:
+        True if the event is done
+    """
+    from ..models import InboundEvent
+
+    if not _claim(event):
+        return False
+
+    event.attempts += 1
+    start = time.perf_counter()
+    try:
+        if event.source not in HANDLERS:
+            raise ValueError(f"No inbox handler for source '{event.source}'")
+        event.result = import_string(HANDLERS[event.source])(event.payload, event.meta or {}) or {}
+        event.status = InboundEvent.STATUS_DONE
+        event.last_error = ''
+        event.processed_at = timezone.now()
+        ok = True
+    except Exception as e:
+        logger.exception(f"[Inbox] {event.source} event {event.event_id} failed: {e}")
+        event.last_error = str(e)[:2000]
+        if event.attempts >= settings.INBOX_MAX_ATTEMPTS:
+            event.status = InboundEvent.STATUS_FAILED
+            logger.error(f"[Inbox] ❌ Giving up on {event.source} event {event.event_id} after {event.attempts} attempts")
+        else:
+            delay = _retry_delay(event.attempts)
+            event.status = InboundEvent.STATUS_PENDING
+            event.available_at = timezone.now() + delay
+            source = event.source
+            transaction.on_commit(lambda: kick(source, countdown=delay.total_seconds()))
+        ok = False
+    event.duration_ms = int((time.perf_counter() - start) * 1000)
+
+    event.save(update_fields=[
+        'status', 'attempts', 'available_at', 'result', 'last_error', 'duration_ms', 'processed_at',
+    ])
+    return ok
+
+
+def _drain_batch(source: str, batch_size: int) -> int:
+    from ..models import InboundEvent
+
+    now = timezone.now()
+    events = list(
+        InboundEvent.objects
+        .filter(source=source, status__in=[InboundEvent.STATUS_PENDING, InboundEvent.STATUS_PROCESSING])
+        .order_by('id')[:batch_size]
+    )
+
+    blocked, handled = set(), 0
+    for event in events:
+        key = event.sequence_key
+        if key and key in blocked:
+            continue
+        if event.available_at > now:
+            blocked.add(key)
+            continue
+        if not process(event):
+            blocked.add(key)
+        handled += 1
+    return handled
+
+
+def drain(source: str, max_batches: int = 10) -> int:
+    """
+    Process pending events of a source in the order received.
+
+    Returns:
+        Number of events handled (0 if another drainer holds the lock)
+    """
+    lock_key = LOCK_KEY.format(source=source)
+    token = uuid.uuid4().hex
+    try:
+        if not cache.add(lock_key, token, settings.INBOX_LOCK_TIMEOUT):
+            logger.info(f"[Inbox] {source} already being processed elsewhere")
+            return 0
+    except Exception as e:
+        logger.warning(f"[Inbox] Cache unavailable, processing {source} without lock: {e}")
+        token = None
+
+    handled = 0
+    try:
+        for _ in range(max_batches):
+            count = _drain_batch(source, settings.INBOX_BATCH_SIZE)
+            handled += count
+            if count < settings.INBOX_BATCH_SIZE:
+                break
+    finally:
+        if token:
+            try:
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+            except Exception:
+                pass
+
+    if handled:
+        logger.info(f"[Inbox] Processed {handled} {source} event(s)")
+    return handled
+
+
+# =============================================================================
+# REPLAY / RETENTION
+# =============================================================================
+
+def reset(queryset) -> int:
+    """Make events due now with a fresh attempt budget. Returns number of events."""
+    from ..models import InboundEvent
+
+    return queryset.update(status=InboundEvent.STATUS_PENDING, attempts=0, available_at=timezone.now())
+
+
+def retry(queryset) -> int:
+    """Queue events for processing again (done events are left alone). Returns number of events."""
+    from ..models import InboundEvent
+
+    queryset = queryset.exclude(status=InboundEvent.STATUS_DONE)
+    sources = set(queryset.values_list('source', flat=True))
+    updated = reset(queryset)
+    for source in sources:
+        transaction.on_commit(lambda source=source: kick(source))
+    return updated
+
+
+def replay(event) -> bool:
+    """Process an event again now, whatever its status. Returns True if done."""
+    from ..models import InboundEvent
+
+    reset(InboundEvent.objects.filter(pk=event.pk))
+    event.refresh_from_db()
+    return process(event)
+
+
+def purge_done(older_than_days: int | None = None) -> int:
+    """Delete processed events older than INBOX_RETENTION_DAYS. Returns number of rows deleted."""
+    from ..models import InboundEvent
+
+    days = settings.INBOX_RETENTION_DAYS if older_than_days is None else older_than_days
+    deleted, _ = InboundEvent.objects.filter(
+        status=InboundEvent.STATUS_DONE,
+        received_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
+
+
+# =============================================================================
+# STATS
+# =============================================================================
+
+def _percentile(values: list, pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def stats(since, sources=None) -> list:
+    """
+    Per-source numbers for events received since `since`: counts by status,
+    throughput per hour, handler time (duration_ms) and receive-to-done lag.
+
+    Returns:
+        List of dicts, one per source with events
+    """
+    from ..models import InboundEvent
+
+    events = InboundEvent.objects.filter(received_at__gte=since)
+    if sources:
+        events = events.filter(source__in=list(sources))
+    hours = max((timezone.now() - since).total_seconds() / 3600, 1 / 60)
+
+    rows = {}
+    for source, status, duration_ms, received_at, processed_at in events.values_list(
+        'source', 'status', 'duration_ms', 'received_at', 'processed_at',
+    ).iterator():
+        row = rows.setdefault(source, {'source': source, 'received': 0, 'statuses': {}, 'durations': [], 'lags': []})
+        row['received'] += 1
+        row['statuses'][status] = row['statuses'].get(status, 0) + 1
+        if duration_ms is not None:
+            row['durations'].append(duration_ms)
+        if status == InboundEvent.STATUS_DONE and processed_at:
+            row['lags'].append(int((processed_at - received_at).total_seconds() * 1000))
+
+    result = []
+    for source in sorted(rows):
+        row = rows[source]
+        durations, lags = row.pop('durations'), row.pop('lags')
+        row.update({
+            'per_hour': round(row['received'] / hours, 2),
+            'duration_ms_p50': _percentile(durations, 50),
+            'duration_ms_p95': _percentile(durations, 95),
+            'duration_ms_max': max(durations) if durations else None,
+            'lag_ms_p50': _percentile(lags, 50),
+            'lag_ms_p95': _percentile(lags, 95),
+        })
+        result.append(row)
+    return result
+
+
+def backlog_counts() -> dict:
+    """(source, status) -> number of unfinished events (pending, processing, failed)."""
+    from django.db.models import Count
+    from ..models import InboundEvent
+
+    rows = (
+        InboundEvent.objects
+        .exclude(status=InboundEvent.STATUS_DONE)
+        .values('source', 'status')
+        .annotate(count=Count('id'))
+    )
+    return {(r['source'], r['status']): r['count'] for r in rows}
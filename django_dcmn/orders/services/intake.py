@@ -0,0 +1,366 @@
+# orders/services/intake.py
+"""
+Order intake pipeline.
+
+The request only validates, persists (order, files, tracking record, web
+form attribution) and plans the remaining steps on order.intake_status;
+once the transaction commits they run in Celery, one run_intake_step_task
+per step:
+
+    attribution         -> phone lead match (WhatConverts), may update the lead in Zoho
+        then, in parallel:
+    zoho_sync           -> outbox row for the Zoho sync (after attribution: the
+                           sync task decides create vs. phone lead update)
+    staff_notification  -> staff email with file links
+    welcome_email       -> "Order Received" tracking email
+    client_confirmation -> fingerprinting confirmation email
+
+order.intake_status:
+
+    {"pending": true, "context": {...},
+     "steps": {"attribution": {"status": "done", "attempts": 1, "error": "", "updated_at": "..."}, ...}}
+
+A failing step is retried by Celery (INTAKE_STEP_RETRIES) without blocking
+the others; a step still failed after that schedules resume_intake_pipeline_task
+for its order INTAKE_RESUME_AFTER seconds later. Pipelines that never ran
+(broker down at commit, lost task) are restarted by the beat sweep
+resume_intake_pipelines_task (`beat` process in the Procfile) once idle for
+INTAKE_RESUME_AFTER seconds. Each step runs at most INTAKE_MAX_ATTEMPTS times.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STEP_PENDING = 'pending'
+STEP_DONE = 'done'
+STEP_FAILED = 'failed'
+
+STEP_ATTRIBUTION = 'attribution'
+STEP_ZOHO_SYNC = 'zoho_sync'
+STEP_STAFF_NOTIFICATION = 'staff_notification'
+STEP_WELCOME_EMAIL = 'welcome_email'
+STEP_CLIENT_CONFIRMATION = 'client_confirmation'
+
+# Steps that must finish before the rest start
+FIRST_STEPS = (STEP_ATTRIBUTION,)
+
+# Pipelines older than this are not resumed any more
+RESUME_WINDOW = timedelta(days=2)
+
+# order_type (ORDER_EMAIL_CONFIG key) -> orders model
+INTAKE_MODELS = {
+    'fbi': 'FbiApostilleOrder',
+    'marriage': 'MarriageOrder',
+    'embassy': 'EmbassyLegalizationOrder',
+    'translation': 'TranslationOrder',
+    'apostille': 'ApostilleOrder',
+    'i9': 'I9VerificationOrder',
+    'quote': 'QuoteRequest',
+    'pre-check': 'PreCheckSubmission',
+    'fingerprinting': 'FingerprintingSubmission',
+}
+
+# order_type -> order_type of the Zoho sync (sync_order_to_zoho_task), where they differ
+ZOHO_ORDER_TYPES = {
+    'i9': 'I-9',
+}
+
+
+def get_intake_model(order_type: str):
+    return apps.get_model('orders', INTAKE_MODELS[order_type])
+
+
+# =============================================================================
+# STEPS (order, context) -> bool
+# =============================================================================
+
+def _step_attribution(order, context: dict) -> bool:
+    from .attribution import apply_phone_lead_attribution
+
+    apply_phone_lead_attribution(order)
+    return True
+
+
+def _step_zoho_sync(order, context: dict) -> bool:
+    from .outbox import enqueue_order_sync
+
+    enqueue_order_sync(order, context['zoho_order_type'], tracking_id=context.get('tracking_id'))
+    return True
+
+
+def _step_staff_notification(order, context: dict) -> bool:
+    from .files import build_file_links
+    from .notifications import send_staff_notification, build_order_extra_body
+
+    order_type = context['order_type']
+    file_links = ''
+    if context.get('file_links'):
+        file_links = build_file_links(None, order, html=False, base_url=context.get('base_url'))
+    return send_staff_notification(
+        order=order,
+        order_type=order_type,
+        extra_body=build_order_extra_body(order, order_type),
+        file_links=file_links,
+    )
+
+
+def _step_welcome_email(order, context: dict) -> bool:
+    from ..tasks import send_tracking_email_task
+
+    send_tracking_email_task(context['tracking_id'], 'created')
+    return True
+
+
+def _step_client_confirmation(order, context: dict) -> bool:
+    from .notifications import send_fingerprinting_confirmation
+
+    return send_fingerprinting_confirmation(order)
+
+
+STEPS = {
+    STEP_ATTRIBUTION: _step_attribution,
+    STEP_ZOHO_SYNC: _step_zoho_sync,
+    STEP_STAFF_NOTIFICATION: _step_staff_notification,
+    STEP_WELCOME_EMAIL: _step_welcome_email,
+    STEP_CLIENT_CONFIRMATION: _step_client_confirmation,
+}
+
+
+# =============================================================================
+# PLANNING (in the request)
+# =============================================================================
+
+def start_intake(
+    request,
+    order,
+    order_type: str,
+    *,
+    sync_to_zoho: bool = False,
+    tracking_id: str | None = None,
+    send_notification: bool = False,
+    file_links: bool = False,
+    send_welcome_email: bool = False,
+    send_client_confirmation: bool = False,
+) -> dict:
+    """
+    Plan the intake steps of a new order on order.intake_status and start
+    them once the caller's transaction commits.
+
+    Returns:
+        The saved intake_status
+    """
+    steps = [STEP_ATTRIBUTION]
+    if sync_to_zoho:
+        steps.append(STEP_ZOHO_SYNC)
+    if send_notification:
+        steps.append(STEP_STAFF_NOTIFICATION)
+    if send_welcome_email and tracking_id:
+        steps.append(STEP_WELCOME_EMAIL)
+    if send_client_confirmation:
+        steps.append(STEP_CLIENT_CONFIRMATION)
+
+    now = timezone.now().isoformat()
+    order.intake_status = {
+        'pending': True,
+        'context': {
+            'order_type': order_type,
+            'zoho_order_type': ZOHO_ORDER_TYPES.get(order_type, order_type),
+            'tracking_id': tracking_id,
+            'base_url': request.build_absolute_uri('/') if request is not None else '',
+            'file_links': file_links,
+        },
+        'steps': {
+            step: {'status': STEP_PENDING, 'attempts': 0, 'error': '', 'updated_at': now}
+            for step in steps
+        },
+    }
+    order.save(update_fields=['intake_status'])
+
+    transaction.on_commit(lambda: launch(order_type, order.id, steps))
+    return order.intake_status
+
+
+def launch(order_type: str, order_id: int, steps: list | None = None) -> bool:
+    """
+    Send the pipeline to Celery: FIRST_STEPS in a chain, then the other steps
+    as a group. steps: the steps to run (default: every step not done).
+
+    Returns:
+        True if queued; False if the broker is unavailable (resumed later)
+    """
+    from celery import chain, group
+    from ..tasks import run_intake_step_task
+
+    if steps is None:
+        order = get_intake_model(order_type).objects.get(id=order_id)
+        steps = [
+            step for step, state in order.intake_status.get('steps', {}).items()
+            if state['status'] != STEP_DONE
+        ]
+    if not steps:
+        return True
+
+    first = [s for s in steps if s in FIRST_STEPS]
+    rest = [s for s in steps if s not in FIRST_STEPS]
+    signatures = [run_intake_step_task.si(order_type, order_id, step) for step in first]
+    if rest:
+        signatures.append(group(run_intake_step_task.si(order_type, order_id, step) for step in rest))
+
+    try:
+        chain(*signatures).apply_async()
+        logger.info(f"[Intake] Queued {steps} for {order_type} order {order_id}")
+        return True
+    except Exception as e:
+        logger.exception(f"[Intake] Failed to queue pipeline for {order_type} order {order_id}, will be resumed: {e}")
+        return False
+
+
+# =============================================================================
+# EXECUTION (in Celery)
+# =============================================================================
+
+def run_step(order_type: str, order_id: int, step: str) -> bool:
+    """
+    Run one step and record the outcome on order.intake_status.
+    A step that is already done is skipped.
+
+    Returns:
+        True if the step is done
+    """
+    order = get_intake_model(order_type).objects.get(id=order_id)
+    state = order.intake_status.get('steps', {}).get(step)
+    if state is None:
+        logger.warning(f"[Intake] Step '{step}' not planned for {order_type} order {order_id}")
+        return True
+    if state['status'] == STEP_DONE:
+        return True
+
+    error = ''
+    try:
+        ok = STEPS[step](order, order.intake_status.get('context', {}))
+        if not ok:
+            error = 'step reported failure'
+    except Exception as e:
+        ok, error = False, str(e)
+        logger.exception(f"[Intake] Step '{step}' failed for {order_type} order {order_id}: {e}")
+
+    _record(order_type, order_id, step, STEP_DONE if ok else STEP_FAILED, error)
+    if ok:
+        logger.info(f"[Intake] ✅ {step} done for {order_type} order {order_id}")
+    return ok
+
+
+def _record(order_type: str, order_id: int, step: str, status: str, error: str = ''):
+    """Write a step outcome (row lock: group steps finish concurrently)."""
+    model = get_intake_model(order_type)
+    with transaction.atomic():
+        order = model.objects.select_for_update().get(id=order_id)
+        intake = order.intake_status
+        state = intake['steps'][step]
+        state['status'] = status
+        state['attempts'] = state.get('attempts', 0) + 1
+        state['error'] = error[:500]
+        state['updated_at'] = timezone.now().isoformat()
+        intake['pending'] = any(s['status'] != STEP_DONE for s in intake['steps'].values())
+        order.save(update_fields=['intake_status'])
+
+
+# =============================================================================
+# RESUME (scheduled by the step task, swept by Celery beat)
+# =============================================================================
+
+def resume_stalled() -> int:
+    """
+    Restart unfinished steps of pipelines idle for INTAKE_RESUME_AFTER seconds.
+    Steps past INTAKE_MAX_ATTEMPTS are left failed and the pipeline is closed.
+
+    Returns:
+        Number of pipelines restarted
+    """
+    now = timezone.now()
+    idle_before = now - timedelta(seconds=settings.INTAKE_RESUME_AFTER)
+    resumed = 0
+
+    for order_type, model_name in INTAKE_MODELS.items():
+        model = apps.get_model('orders', model_name)
+        stalled = model.objects.filter(
+            intake_status__pending=True,
+            created_at__lt=idle_before,
+            created_at__gte=now - RESUME_WINDOW,
+        ).only('id', 'intake_status')
+
+        for order in stalled:
+            if _resume(order_type, model, order, idle_before):
+                resumed += 1
+
+    return resumed
+
+
+def resume_order(order_type: str, order_id: int) -> bool:
+    """
+    Restart the idle unfinished steps of one pipeline (scheduled by the step
+    task when a step is still failed after its Celery retries).
+
+    Returns:
+        True if steps were restarted
+    """
+    model = get_intake_model(order_type)
+    order = model.objects.filter(id=order_id, intake_status__pending=True).only('id', 'intake_status').first()
+    if order is None:
+        return False
+    idle_before = timezone.now() - timedelta(seconds=settings.INTAKE_RESUME_AFTER)
+    return _resume(order_type, model, order, idle_before)
+
+
+def schedule_resume(order_type: str, order_id: int):
+    """Queue resume_order once the failed step has been idle for INTAKE_RESUME_AFTER."""
+    from ..tasks import resume_intake_pipeline_task
+
+    try:
+        resume_intake_pipeline_task.apply_async((order_type, order_id), countdown=settings.INTAKE_RESUME_AFTER + 5)
+    except Exception as e:
+        logger.warning(f"[Intake] Failed to schedule resume of {order_type} order {order_id}, left to beat: {e}")
+
+
+def _resume(order_type: str, model, order, idle_before) -> bool:
+    steps, exhausted = [], []
+    for step, state in order.intake_status.get('steps', {}).items():
+        if state['status'] == STEP_DONE or state['updated_at'] >= idle_before.isoformat():
+            continue
+        if state.get('attempts', 0) >= settings.INTAKE_MAX_ATTEMPTS:
+            exhausted.append(step)
+        else:
+            steps.append(step)
+
+    if steps:
+        logger.warning(f"[Intake] Resuming {steps} for {order_type} order {order.id}")
+        _touch(model, order.id, steps)
+        return launch(order_type, order.id, steps)
+    if exhausted:
+        logger.error(f"[Intake] ❌ Giving up on {exhausted} for {order_type} order {order.id}")
+        _close(model, order.id)
+    return False
+
+
+def _touch(model, order_id: int, steps: list):
+    """Restart the idle clock of resumed steps (not resumed again while queued)."""
+    with transaction.atomic():
+        order = model.objects.select_for_update().get(id=order_id)
+        now = timezone.now().isoformat()
+        for step in steps:
+            order.intake_status['steps'][step]['updated_at'] = now
+        order.save(update_fields=['intake_status'])
+
+
+def _close(model, order_id: int):
+    with transaction.atomic():
+        order = model.objects.select_for_update().get(id=order_id)
+        order.intake_status['pending'] = False
+        order.save(update_fields=['intake_status'])
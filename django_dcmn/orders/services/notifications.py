@@ -127,6 +127,44 @@ def send_staff_notification(
         return False
 
 
+def send_fingerprinting_confirmation(order) -> bool:
+    """
+    Send the client confirmation email for a fingerprinting inquiry.
+
+    Returns:
+        True if email sent successfully, False otherwise
+    """
+    from django.core.mail import send_mail
+    from django.template.loader import render_to_string
+
+    html_content = render_to_string('emails/fingerprinting_confirmation.html', {
+        'name': order.name,
+        'preferred_date': order.preferred_date,
+        'preferred_time': order.preferred_time,
+        'service_location': order.service_location,
+        'address': order.address or '',
+        'service_type_display': order.get_service_type_display() if order.service_type else '',
+    })
+    try:
+        send_mail(
+            subject='Fingerprinting Inquiry Received — DC Mobile Notary',
+            message=(
+                'Thank you for submitting your inquiry. We will get back to you '
+                'within approximately 30 minutes with a service quote. '
+                'For urgent requests, please call us at (202) 247-0837.'
+            ),
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'support@dcmobilenotary.net'),
+            recipient_list=[order.email],
+            html_message=html_content,
+            fail_silently=False,
+        )
+        logger.info(f"✅ Client confirmation sent for fingerprinting {order.id}")
+        return True
+    except Exception:
+        logger.exception("Failed to send client email for fingerprinting %s", order.id)
+        return False
+
+
 def build_order_extra_body(order, order_type: str) -> str:
     """
     Build extra body content based on order type.
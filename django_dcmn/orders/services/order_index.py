@@ -0,0 +1,185 @@
+# orders/services/order_index.py
+"""
+Cross-type order index (OrderIndex).
+
+Every model in intake.INTAKE_MODELS has one OrderIndex row per order with
+its normalized phone / email, Zoho record id, TID and creation time, so a
+lookup across order types is one indexed query instead of one per model:
+
+    post_save (order)   -> row written in the same transaction (saves that
+                           touch no indexed field, e.g. intake_status, skip it)
+    post_delete (order) -> row removed
+    post_save (Track)   -> TID copied to its order's row (data.order_type /
+                           data.order_id, or data.record_id for TIDs created
+                           from the CRM)
+
+Rows written by queryset.update() or before the table existed are filled by
+`manage.py backfill_order_index`. find_latest() backs the WhatConverts
+matcher, search() the staff order search API.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+from ..utils import normalize_email, normalize_phone
+from .intake import INTAKE_MODELS, get_intake_model
+
+logger = logging.getLogger(__name__)
+
+# Order fields the index row is built from; saves limited to other fields are skipped
+SOURCE_FIELDS = frozenset({'name', 'phone', 'email', 'phone_last10', 'email_lower', 'zoho_record_id'})
+
+# OrderIndex columns rewritten on every index update
+INDEX_FIELDS = ['name', 'phone_last10', 'email_lower', 'zoho_record_id', 'created_at']
+
+SEARCH_LIMIT = 50
+
+
+def order_type_for(model) -> str | None:
+    for order_type, model_name in INTAKE_MODELS.items():
+        if model.__name__ == model_name:
+            return order_type
+    return None
+
+
+def index_values(order) -> dict:
+    """OrderIndex column values of an order (TID excluded, see _on_track_save)."""
+    return {
+        'name': (order.name or '')[:255],
+        'phone_last10': normalize_phone(order.phone),
+        'email_lower': normalize_email(order.email),
+        'zoho_record_id': getattr(order, 'zoho_record_id', '') or '',
+        'created_at': order.created_at,
+    }
+
+
+# =============================================================================
+# SYNC
+# =============================================================================
+
+def index_order(order, order_type: str | None = None):
+    """Create or update the index row of an order. Never raises."""
+    from ..models import OrderIndex
+
+    order_type = order_type or order_type_for(type(order))
+    try:
+        with transaction.atomic():
+            OrderIndex.objects.update_or_create(
+                order_type=order_type, order_id=order.pk, defaults=index_values(order),
+            )
+    except Exception as e:
+        logger.exception(f"[OrderIndex] Failed to index {order_type} order {order.pk}: {e}")
+
+
+def _on_order_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not SOURCE_FIELDS & set(update_fields)):
+        return
+    index_order(instance, order_type_for(sender))
+
+
+def _on_order_delete(sender, instance, **kwargs):
+    from ..models import OrderIndex
+
+    OrderIndex.objects.filter(order_type=order_type_for(sender), order_id=instance.pk).delete()
+
+
+def track_rows(track):
+    """OrderIndex rows a tracking record belongs to (None if it names no order)."""
+    from ..models import OrderIndex
+
+    data = track.data or {}
+    if data.get('order_type') and data.get('order_id'):
+        try:
+            return OrderIndex.objects.filter(order_type=data['order_type'], order_id=int(data['order_id']))
+        except (TypeError, ValueError):
+            return None
+    if data.get('record_id'):
+        return OrderIndex.objects.filter(zoho_record_id=str(data['record_id']))
+    return None
+
+
+def _on_track_save(sender, instance, raw=False, **kwargs):
+    rows = None if raw else track_rows(instance)
+    if rows is not None:
+        rows.exclude(tid=instance.tid).update(tid=instance.tid)
+
+
+def connect_signals():
+    """Keep OrderIndex in sync with the order models. Called from OrdersConfig.ready."""
+    from django.db.models.signals import post_save, post_delete
+    from ..models import Track
+
+    for order_type in INTAKE_MODELS:
+        model = get_intake_model(order_type)
+        post_save.connect(_on_order_save, sender=model, dispatch_uid=f'order_index_{model.__name__}_save')
+        post_delete.connect(_on_order_delete, sender=model, dispatch_uid=f'order_index_{model.__name__}_delete')
+    post_save.connect(_on_track_save, sender=Track, dispatch_uid='order_index_track_save')
+
+
+# =============================================================================
+# LOOKUPS
+# =============================================================================
+
+def find_latest(phone: str = None, email: str = None, order_types=None):
+    """
+    Newest indexed order whose phone or email matches (one query).
+
+    Args:
+        phone: Phone number in any format
+        email: Email address
+        order_types: Restrict to these order types (default: all)
+
+    Returns:
+        OrderIndex row or None
+    """
+    from ..models import OrderIndex
+
+    phone_last10 = normalize_phone(phone)
+    email_lower = normalize_email(email)
+    query = Q()
+    if phone_last10:
+        query |= Q(phone_last10=phone_last10)
+    if email_lower:
+        query |= Q(email_lower=email_lower)
+    if not query:
+        return None
+
+    rows = OrderIndex.objects.filter(query)
+    if order_types is not None:
+        rows = rows.filter(order_type__in=list(order_types))
+    return rows.order_by('-created_at').first()
+
+
+def search(phone: str = '', email: str = '', tid: str = '', zoho_record_id: str = '',
+           order_types=None, limit: int = SEARCH_LIMIT) -> list:
+    """
+    Indexed orders matching every given filter, newest first.
+
+    Returns:
+        List of OrderIndex rows (empty if no filter is given)
+    """
+    from ..models import OrderIndex
+
+    filters = {}
+    if phone:
+        filters['phone_last10'] = normalize_phone(phone)
+    if email:
+        filters['email_lower'] = normalize_email(email)
+    if tid:
+        filters['tid'] = tid.strip().upper()
+    if zoho_record_id:
+        filters['zoho_record_id'] = zoho_record_id.strip()
+    if not filters or not all(filters.values()):
+        return []
+
+    rows = OrderIndex.objects.filter(**filters)
+    if order_types:
+        rows = rows.filter(order_type__in=list(order_types))
+    return list(rows.order_by('-created_at')[:limit])
+
+
+def get_indexed_order(row):
+    """Order instance of an index row (None if it no longer exists)."""
+    return get_intake_model(row.order_type).objects.filter(pk=row.order_id).first()
@@ -1,11 +1,10 @@
 # orders/services/order_processing.py
 """Main order processing pipeline."""
 
-from .files import save_file_attachments, build_file_links
-from .notifications import send_staff_notification, build_order_extra_body
+from .files import save_file_attachments
 from .tracking import create_order_tracking
-from .attribution import process_attribution
-from ..tasks import sync_order_to_zoho_task, send_tracking_email_task
+from .attribution import save_web_attribution
+from .intake import start_intake
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,25 +19,36 @@ def process_new_order(
     create_tracking: bool = True,
     send_notification: bool = True,
     send_welcome_email: bool = True,
+    attach_files: bool = True,
+    send_client_confirmation: bool = False,
 ) -> dict:
     """
-    Full order processing pipeline:
-    1. Process attribution data (marketing tracking)
+    Full order processing pipeline.
+
+    In the request (no external calls):
+    1. Save web form attribution data (marketing tracking)
     2. Save file attachments
     3. Create tracking record
-    4. Sync to Zoho (with attribution)
-    5. Send staff notification
-    6. Send welcome tracking email
+
+    In Celery once the transaction commits (services/intake.py):
+    4. Phone lead match (replaces the web attribution on a match)
+    5. Sync to Zoho (with attribution) via the outbox
+    6. Send staff notification
+    7. Send welcome tracking email / client confirmation
+
+    Call inside the transaction that saved the order.
 
     Args:
         request: Django request object
         order: Order instance
         model_class: Model class of the order
-        order_type: Type key (embassy, apostille, translation, i9, quote)
+        order_type: Type key (embassy, apostille, translation, i9, quote, pre-check, fingerprinting)
         sync_to_zoho: Whether to sync to Zoho CRM
         create_tracking: Whether to create tracking record
         send_notification: Whether to send staff email
         send_welcome_email: Whether to send tracking welcome email
+        attach_files: Whether the form carries file uploads
+        send_client_confirmation: Whether to send the fingerprinting confirmation email
 
     Returns:
         Dict with processing results
@@ -49,15 +59,16 @@ def process_new_order(
         'tracking_id': None,
     }
 
-    # 1. Process attribution data (saves to order.attribution_data)
-    attribution = process_attribution(request, order)
+    # 1. Web form attribution (saves to order.attribution_data)
+    attribution = save_web_attribution(request, order)
     if attribution:
         logger.info(f"Saved attribution for {order_type} order {order.id}: {attribution.get('source')}/{attribution.get('medium')}")
 
     # 2. Save file attachments
-    file_urls = save_file_attachments(request, model_class, order)
-    if file_urls:
-        result['file_urls'] = file_urls
+    if attach_files:
+        file_urls = save_file_attachments(request, model_class, order)
+        if file_urls:
+            result['file_urls'] = file_urls
 
     # 3. Create tracking record (if applicable)
     tid = None
@@ -66,34 +77,17 @@ def process_new_order(
         if tid:
             result['tracking_id'] = tid
 
-    # 4. Sync to Zoho (async) - attribution will be included automatically
-    if sync_to_zoho:
-        try:
-            if tid:
-                sync_order_to_zoho_task.delay(order.id, order_type, tracking_id=tid)
-            else:
-                sync_order_to_zoho_task.delay(order.id, order_type)
-            logger.info(f"Queued Zoho sync for {order_type} order {order.id}")
-        except Exception as e:
-            logger.exception(f"Failed to queue Zoho sync for {order_type} order {order.id}: {e}")
-
-    # 5. Send staff notification
-    if send_notification:
-        file_links = build_file_links(request, order, html=False)
-        extra_body = build_order_extra_body(order, order_type)
-        send_staff_notification(
-            order=order,
-            order_type=order_type,
-            extra_body=extra_body,
-            file_links=file_links,
-        )
-
-    # 6. Send welcome tracking email
-    if send_welcome_email and tid:
-        try:
-            send_tracking_email_task.delay(tid, 'created')
-            logger.info(f"Queued tracking email for {order_type} order {order.id}")
-        except Exception as e:
-            logger.exception(f"Failed to queue tracking email for {order_type} order {order.id}: {e}")
+    # 4-7. Everything that talks to Zoho or the email provider
+    start_intake(
+        request,
+        order,
+        order_type,
+        sync_to_zoho=sync_to_zoho,
+        tracking_id=tid,
+        send_notification=send_notification,
+        file_links=attach_files,
+        send_welcome_email=send_welcome_email,
+        send_client_confirmation=send_client_confirmation,
+    )
 
     return result
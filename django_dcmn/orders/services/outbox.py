@@ -0,0 +1,309 @@
+# orders/services/outbox.py
+"""
+Transactional outbox for CRM side effects.
+
+Views write an Outbox row in the same transaction as the order (no broker
+call in the request), and the relay delivers committed rows in batches:
+
+    zoho.sync_order         -> sync_order_to_zoho_task, acknowledged by the task
+                               through complete() once the order is zoho_synced
+    zoho.update_fields      -> Zoho write buffer (batched PUTs), done on enqueue
+    zoho.phone_lead_update  -> update_phone_lead_in_zoho_task (web form data for
+                               a matched phone lead, deferred while Zoho is down)
+    zoho.sync_phone_lead    -> sync_phone_lead_to_zoho_task (WhatConverts lead
+                               received while Zoho is down)
+
+Delivery is at least once: a row is only done when acknowledged, failures are
+retried with exponential backoff up to OUTBOX_MAX_ATTEMPTS, and dispatched
+rows that are never acknowledged (lost task) are redelivered after
+OUTBOX_REDELIVER_AFTER seconds. Handlers must be idempotent (the sync task
+skips zoho_synced orders). A new row queues relay_outbox_task once its
+transaction commits; Celery beat runs the same task as a sweep for retries and
+kicks lost while the broker was down (or run manage.py run_outbox_relay as a
+long-running process). Several relays can run at once (SELECT ... FOR UPDATE
+SKIP LOCKED). Task topics are held back while the Zoho circuit is open
+(zoho_circuit) and go out one per run while it is half-open.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TOPIC_ZOHO_SYNC_ORDER = 'zoho.sync_order'
+TOPIC_ZOHO_UPDATE_FIELDS = 'zoho.update_fields'
+TOPIC_ZOHO_PHONE_LEAD_UPDATE = 'zoho.phone_lead_update'
+TOPIC_ZOHO_SYNC_PHONE_LEAD = 'zoho.sync_phone_lead'
+
+
+# =============================================================================
+# ENQUEUE (inside the caller's transaction)
+# =============================================================================
+
+def enqueue(topic: str, payload: dict, idempotency_key: str):
+    """
+    Add a side effect to the outbox. Call inside the transaction that saves
+    the change; an existing row with the same key is returned unchanged.
+
+    Returns:
+        Outbox row
+    """
+    from ..models import Outbox
+
+    row, created = Outbox.objects.get_or_create(
+        idempotency_key=idempotency_key,
+        defaults={'topic': topic, 'payload': payload},
+    )
+    if created:
+        logger.info(f"[Outbox] Enqueued {topic} ({idempotency_key})")
+        transaction.on_commit(kick_relay)
+    else:
+        logger.info(f"[Outbox] Duplicate {topic} ({idempotency_key}) — already {row.status}")
+    return row
+
+
+def kick_relay():
+    """Queue a relay run now (beat catches up if the broker is down)."""
+    from ..tasks import relay_outbox_task
+
+    try:
+        relay_outbox_task.delay()
+    except Exception as e:
+        logger.warning(f"[Outbox] Failed to queue relay, left to beat: {e}")
+
+
+def enqueue_order_sync(order, order_type: str, tracking_id: str | None = None):
+    """Queue the Zoho sync of a new (or newly paid) order."""
+    return enqueue(
+        TOPIC_ZOHO_SYNC_ORDER,
+        {'order_id': order.id, 'order_type': order_type, 'tracking_id': tracking_id},
+        f'{TOPIC_ZOHO_SYNC_ORDER}:{order_type}:{order.id}',
+    )
+
+
+def enqueue_field_update(module_name: str, record_id: str, fields: dict, idempotency_key: str,
+                         interactive: bool = False):
+    """
+    Queue a field write to a Zoho record (delivered through the write buffer).
+    interactive: a CRM user is waiting for it (TID write-back), flushed at
+    interactive priority.
+    """
+    return enqueue(
+        TOPIC_ZOHO_UPDATE_FIELDS,
+        {'module': module_name, 'record_id': str(record_id), 'fields': fields, 'interactive': interactive},
+        f'{TOPIC_ZOHO_UPDATE_FIELDS}:{idempotency_key}',
+    )
+
+
+def enqueue_phone_lead_update(phone_lead, order_data: dict, order_type: str, order_id: int):
+    """Queue the Zoho update of a phone lead matched by a web form order."""
+    return enqueue(
+        TOPIC_ZOHO_PHONE_LEAD_UPDATE,
+        {'phone_lead_id': phone_lead.id, 'order_data': order_data},
+        f'{TOPIC_ZOHO_PHONE_LEAD_UPDATE}:{phone_lead.id}:{order_type}:{order_id}',
+    )
+
+
+def enqueue_phone_lead_sync(phone_lead):
+    """Queue the Zoho create of a WhatConverts phone lead."""
+    return enqueue(
+        TOPIC_ZOHO_SYNC_PHONE_LEAD,
+        {'phone_lead_id': phone_lead.id},
+        f'{TOPIC_ZOHO_SYNC_PHONE_LEAD}:{phone_lead.id}',
+    )
+
+
+# =============================================================================
+# DELIVERY
+# =============================================================================
+
+def _dispatch_sync_order(row) -> bool:
+    from ..tasks import sync_order_to_zoho_task
+
+    payload = row.payload
+    sync_order_to_zoho_task.apply_async(
+        (payload['order_id'], payload['order_type']),
+        {'tracking_id': payload.get('tracking_id'), 'outbox_key': row.idempotency_key},
+    )
+    return False  # done when the task acknowledges
+
+
+def _dispatch_phone_lead_update(row) -> bool:
+    from ..tasks import update_phone_lead_in_zoho_task
+
+    update_phone_lead_in_zoho_task.apply_async(
+        (row.payload['phone_lead_id'], row.payload['order_data']),
+        {'outbox_key': row.idempotency_key},
+    )
+    return False
+
+
+def _dispatch_phone_lead_sync(row) -> bool:
+    from ..tasks import sync_phone_lead_to_zoho_task
+
+    sync_phone_lead_to_zoho_task.apply_async(
+        (row.payload['phone_lead_id'],),
+        {'outbox_key': row.idempotency_key},
+    )
+    return False
+
+
+def _dispatch_update_fields(row) -> bool:
+    from ..zoho_write_buffer import enqueue_update
+
+    payload = row.payload
+    enqueue_update(payload['module'], payload['record_id'], payload['fields'],
+                   interactive=payload.get('interactive', False))
+    return True  # the write buffer owns retries from here
+
+
+# topic -> handler(row); returns True if the row is done once the handler returns
+HANDLERS = {
+    TOPIC_ZOHO_SYNC_ORDER: _dispatch_sync_order,
+    TOPIC_ZOHO_UPDATE_FIELDS: _dispatch_update_fields,
+    TOPIC_ZOHO_PHONE_LEAD_UPDATE: _dispatch_phone_lead_update,
+    TOPIC_ZOHO_SYNC_PHONE_LEAD: _dispatch_phone_lead_sync,
+}
+
+# Topics whose handlers call Zoho right away (the write buffer defers on its own)
+CIRCUIT_GATED_TOPICS = frozenset({
+    TOPIC_ZOHO_SYNC_ORDER,
+    TOPIC_ZOHO_PHONE_LEAD_UPDATE,
+    TOPIC_ZOHO_SYNC_PHONE_LEAD,
+})
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = min(settings.OUTBOX_RETRY_BACKOFF * 2 ** max(attempts - 1, 0), settings.OUTBOX_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=seconds)
+
+
+def _mark_failed_attempt(row, error: str):
+    """Back to pending with backoff, or failed after OUTBOX_MAX_ATTEMPTS."""
+    from ..models import Outbox
+
+    row.last_error = str(error)[:2000]
+    if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        row.status = Outbox.STATUS_FAILED
+        logger.error(f"[Outbox] ❌ Giving up on {row.topic} ({row.idempotency_key}) after {row.attempts} attempts: {row.last_error[:500]}")
+    else:
+        row.status = Outbox.STATUS_PENDING
+        row.available_at = timezone.now() + _retry_delay(row.attempts)
+        logger.warning(f"[Outbox] ⚠️ {row.topic} ({row.idempotency_key}) failed, retry at {row.available_at}: {row.last_error[:500]}")
+
+
+def relay_batch(batch_size: int | None = None) -> int:
+    """
+    Deliver one batch of due rows: pending rows past their backoff and
+    dispatched rows that were never acknowledged.
+
+    Returns:
+        Number of rows handled
+    """
+    from ..models import Outbox
+    from .. import zoho_circuit
+
+    now = timezone.now()
+    redeliver_before = now - timedelta(seconds=settings.OUTBOX_REDELIVER_AFTER)
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+
+    due = (
+        Outbox.objects
+        .select_for_update(skip_locked=True)
+        .filter(
+            Q(status=Outbox.STATUS_PENDING, available_at__lte=now)
+            | Q(status=Outbox.STATUS_DISPATCHED, dispatched_at__lt=redeliver_before)
+        )
+    )
+    circuit = zoho_circuit.get_state()
+    if circuit == zoho_circuit.OPEN:
+        due = due.exclude(topic__in=CIRCUIT_GATED_TOPICS)
+    elif circuit == zoho_circuit.HALF_OPEN:
+        batch_size = 1  # one event probes Zoho, the rest waits for the circuit to close
+
+    with transaction.atomic():
+        rows = list(due.order_by('available_at', 'id')[:batch_size])
+
+        for row in rows:
+            if row.status == Outbox.STATUS_DISPATCHED:
+                logger.warning(f"[Outbox] {row.topic} ({row.idempotency_key}) not acknowledged, redelivering")
+
+            row.attempts += 1
+            handler = HANDLERS.get(row.topic)
+            try:
+                if handler is None:
+                    raise ValueError(f"No outbox handler for topic '{row.topic}'")
+                done = handler(row)
+                row.status = Outbox.STATUS_DONE if done else Outbox.STATUS_DISPATCHED
+                row.dispatched_at = now
+                row.last_error = ''
+            except Exception as e:
+                _mark_failed_attempt(row, e)
+            row.save(update_fields=['status', 'attempts', 'available_at', 'dispatched_at', 'last_error', 'updated_at'])
+
+    if rows:
+        logger.info(f"[Outbox] Relayed {len(rows)} event(s)")
+    return len(rows)
+
+
+def relay_pending(max_batches: int = 10) -> int:
+    """Drain up to max_batches batches. Returns number of rows handled."""
+    handled = 0
+    for _ in range(max_batches):
+        count = relay_batch()
+        handled += count
+        if count < settings.OUTBOX_RELAY_BATCH_SIZE:
+            break
+    return handled
+
+
+def complete(idempotency_key: str, ok: bool, error: str = ''):
+    """Acknowledge a dispatched row from the task that handled it."""
+    from ..models import Outbox
+
+    with transaction.atomic():
+        row = Outbox.objects.select_for_update().filter(idempotency_key=idempotency_key).first()
+        if row is None or row.status == Outbox.STATUS_DONE:
+            return
+        if ok:
+            row.status = Outbox.STATUS_DONE
+            row.last_error = ''
+        else:
+            _mark_failed_attempt(row, error or 'handler reported failure')
+        row.save(update_fields=['status', 'available_at', 'last_error', 'updated_at'])
+
+
+def defer(idempotency_key: str, delay: float = 0):
+    """
+    Put a dispatched row back without counting the attempt
+    (the task could not reach Zoho because the circuit was open).
+    """
+    from ..models import Outbox
+
+    with transaction.atomic():
+        row = Outbox.objects.select_for_update().filter(idempotency_key=idempotency_key).first()
+        if row is None or row.status == Outbox.STATUS_DONE:
+            return
+        row.status = Outbox.STATUS_PENDING
+        row.attempts = max(row.attempts - 1, 0)
+        row.available_at = timezone.now() + timedelta(seconds=delay)
+        row.last_error = 'Zoho circuit open'
+        row.save(update_fields=['status', 'attempts', 'available_at', 'last_error', 'updated_at'])
+    logger.info(f"[Outbox] {idempotency_key} deferred until the Zoho circuit closes")
+
+
+def purge_done(older_than_days: int | None = None) -> int:
+    """Delete delivered rows. Returns number of rows deleted."""
+    from ..models import Outbox
+
+    days = older_than_days if older_than_days is not None else settings.OUTBOX_RETENTION_DAYS
+    deleted, _ = Outbox.objects.filter(
+        status=Outbox.STATUS_DONE,
+        updated_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
@@ -5,9 +5,13 @@ Used when web form is submitted after phone call to update existing lead.
 """
 
 import logging
+import requests
 from typing import Optional, Dict, Any
 from django.db.models import Q
 
+from ..utils import normalize_phone
+from ..zoho_schema import get_module, get_stage_field, get_form_stage, changed_fields, remember_synced
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,20 +33,17 @@ def find_phone_lead_for_order(phone: str, service_type: str) -> Optional['PhoneC
     if not phone:
         return None
 
-    # Normalize phone (remove spaces, dashes, parentheses)
-    normalized_phone = ''.join(c for c in phone if c.isdigit())
+    # Last 10 digits, matched exactly against the indexed phone_last10 column
+    phone_last_10 = normalize_phone(phone)
 
-    if not normalized_phone or len(normalized_phone) < 10:
+    if not phone_last_10:
         logger.warning(f"Phone number too short after normalization: {phone}")
         return None
 
-    # Get last 10 digits for matching
-    phone_last_10 = normalized_phone[-10:]
-
     logger.info(f"🔍 Searching for phone lead: phone={phone_last_10}, service={service_type}")
 
     # Search for phone lead with matching phone and service
-    query = Q(contact_phone__icontains=phone_last_10)
+    query = Q(phone_last10=phone_last_10)
 
     # Filter by service if provided
     if service_type:
@@ -152,7 +153,7 @@ def update_zoho_lead_stage(phone_lead: 'PhoneCallLead', new_stage: str = 'Order
         client = ZohoCRMClient()
 
         # Stage field name depends on module
-        stage_field = _get_stage_field(phone_lead.zoho_module)
+        stage_field = get_stage_field(phone_lead.zoho_module)
         update_payload = {
             stage_field: new_stage
         }
@@ -178,36 +179,6 @@ def update_zoho_lead_stage(phone_lead: 'PhoneCallLead', new_stage: str = 'Order
         return False
 
 
-def _get_stage_field(zoho_module: str) -> str:
-    """Return the correct stage/status field name for a Zoho module."""
-    stage_field_map = {
-        'Deals': 'Stage',
-        'Embassy_Legalization': 'Status',
-        'Apostille_Services': 'Status',
-        'Translation_Services': 'Translation_Status',
-        'Triple_Seal_Apostilles': 'Stage',
-        'I_9_Verification': 'Stage',
-        'Notary_Services': 'Notary_Stages',
-        'Get_A_Quote_Leads': 'GET_A_QUOTE_LEADS',
-    }
-    return stage_field_map.get(zoho_module, 'Stage')
-
-
-def _get_form_stage(zoho_module: str) -> str:
-    """Return the correct 'order received' stage value per module (from zoho_sync.py)."""
-    form_stage_map = {
-        'Deals': 'Order Received',
-        'Embassy_Legalization': 'Order Received',
-        'Apostille_Services': 'Client placed the request',
-        'Translation_Services': 'Client Placed Request',
-        'Triple_Seal_Apostilles': 'Order Received',
-        'I_9_Verification': 'Order Received',
-        'Notary_Services': 'Order Received',
-        'Get_A_Quote_Leads': 'Order Received',
-    }
-    return form_stage_map.get(zoho_module, 'Order Received')
-
-
 def update_zoho_lead_with_order_data(
     phone_lead: 'PhoneCallLead',
     order_data: Dict[str, Any],
@@ -248,25 +219,15 @@ def update_zoho_lead_with_order_data(
 
         # Only update stage if explicitly requested
         if new_stage is not None:
-            stage_field = _get_stage_field(zoho_module)
+            stage_field = get_stage_field(zoho_module)
             update_payload[stage_field] = new_stage
 
         # Name/Email field names depend on module — form data always overwrites
-        name = order_data.get('name', '')
-        if zoho_module == 'Deals':
-            update_payload['Name1'] = name
-        elif zoho_module == 'Translation_Services':
-            update_payload['Client_Name1'] = name
-        else:
-            update_payload['Client_Name'] = name
-
-        email = order_data.get('email', '')
-        if zoho_module == 'Deals':
-            update_payload['Email_1'] = email
-        elif zoho_module in ('Triple_Seal_Apostilles', 'I_9_Verification', 'Get_A_Quote_Leads', 'Notary_Services'):
-            update_payload['Client_Email'] = email
-        else:
-            update_payload['Email'] = email
+        module = get_module(zoho_module)
+        client_name_field = module.client_name_field if module else 'Client_Name'
+        if client_name_field:
+            update_payload[client_name_field] = order_data.get('name', '')
+        update_payload[module.email_field if module else 'Email'] = order_data.get('email', '')
 
         # Location — form data overwrites if provided
         if order_data.get('city'):
@@ -276,6 +237,12 @@ def update_zoho_lead_with_order_data(
         if order_data.get('country'):
             update_payload['Country'] = order_data['country']
 
+        # Only what changed since the last write to this record
+        update_payload = changed_fields(zoho_module, phone_lead.zoho_lead_id, update_payload)
+        if not update_payload:
+            logger.info(f"⏭️ Zoho lead {phone_lead.zoho_lead_id} already up to date, no PUT needed")
+            return True
+
         logger.info(f"📤 Updating Zoho lead {phone_lead.zoho_lead_id} in {zoho_module}")
         logger.info(f"   Update payload: {update_payload}")
 
@@ -287,6 +254,7 @@ def update_zoho_lead_with_order_data(
 
         if response and response.get('data'):
             logger.info(f"✅ Updated Zoho lead with form data and stage '{new_stage}'")
+            remember_synced(zoho_module, phone_lead.zoho_lead_id, update_payload)
             return True
 
         logger.error(f"❌ Failed to update Zoho lead: {response}")
@@ -345,27 +313,51 @@ def process_order_with_phone_lead_check(
     # Instead, Celery task checks for matched phone lead to decide CREATE vs UPDATE.
     # zoho_synced will be set to True by Celery after successful Zoho operation.
 
-    # Check current stage in Zoho before updating
-    # Only advance from "Phone Call Received" → "Order Received"
-    # If manager already moved it further — don't roll back
-    if phone_lead.zoho_lead_id and phone_lead.zoho_module:
-        from ..zoho_sync import get_record_by_id
-
-        stage_field = _get_stage_field(phone_lead.zoho_module)
-        record = get_record_by_id(phone_lead.zoho_module, phone_lead.zoho_lead_id, [stage_field])
-        current_stage = record.get(stage_field) if record else None
-
-        if current_stage == 'Phone Call Received':
-            target_stage = _get_form_stage(phone_lead.zoho_module)
-            zoho_updated = update_zoho_lead_with_order_data(phone_lead, order_data, new_stage=target_stage)
-            if zoho_updated:
-                logger.info(f"✅ Moved phone lead from 'Phone Call Received' → '{target_stage}'")
-            else:
-                logger.warning(f"⚠️ Failed to update Zoho lead stage")
-        else:
-            zoho_updated = update_zoho_lead_with_order_data(phone_lead, order_data, new_stage=None)
-            logger.info(f"⏭️ Phone lead already at '{current_stage}', stage untouched, contact data updated")
-    else:
+    if not (phone_lead.zoho_lead_id and phone_lead.zoho_module):
         logger.info(f"⏭️ Phone lead not synced to Zoho yet, skipping Zoho update")
+        return phone_lead
+
+    # Zoho down: don't make the customer wait on timeouts, update the lead later
+    from .. import zoho_circuit
+    if zoho_circuit.is_closed():
+        try:
+            sync_phone_lead_order_to_zoho(phone_lead, order_data)
+            return phone_lead
+        except requests.RequestException as e:  # incl. ZohoCircuitOpen
+            logger.warning(f"⚠️ Zoho call failed while updating phone lead {phone_lead.id}: {e}")
+
+    from .outbox import enqueue_phone_lead_update
+    enqueue_phone_lead_update(phone_lead, order_data, order_type, order_instance.id)
+    logger.warning(f"⚠️ Zoho unavailable, phone lead {phone_lead.id} update deferred to the outbox")
 
     return phone_lead
+
+
+def sync_phone_lead_order_to_zoho(phone_lead: 'PhoneCallLead', order_data: Dict[str, Any]) -> bool:
+    """
+    Push web form data to the phone lead's Zoho record.
+
+    Checks current stage in Zoho before updating:
+    only advance from "Phone Call Received" → "Order Received".
+    If manager already moved it further — don't roll back.
+
+    Returns:
+        True if the Zoho record was updated
+    """
+    from ..zoho_sync import get_record_by_id
+
+    stage_field = get_stage_field(phone_lead.zoho_module)
+    record = get_record_by_id(phone_lead.zoho_module, phone_lead.zoho_lead_id, [stage_field])
+    current_stage = record.get(stage_field) if record else None
+
+    if current_stage == 'Phone Call Received':
+        target_stage = get_form_stage(phone_lead.zoho_module)
+        zoho_updated = update_zoho_lead_with_order_data(phone_lead, order_data, new_stage=target_stage)
+        if zoho_updated:
+            logger.info(f"✅ Moved phone lead from 'Phone Call Received' → '{target_stage}'")
+        else:
+            logger.warning(f"⚠️ Failed to update Zoho lead stage")
+    else:
+        zoho_updated = update_zoho_lead_with_order_data(phone_lead, order_data, new_stage=None)
+        logger.info(f"⏭️ Phone lead already at '{current_stage}', stage untouched, contact data updated")
+    return zoho_updated
@@ -0,0 +1,249 @@
+# orders/services/pricing.py
+"""
+Pricing engine for FBI Apostille and Marriage orders.
+
+The catalog (FBI packages, shipping options, price per certificate, marriage
+price) is an immutable Catalog snapshot whose version is a hash of its
+content. It lives in process memory and in Redis:
+
+    get_catalog()  -> process copy; every PRICING_CATALOG_CHECK_INTERVAL
+                      seconds the Redis version is compared and a newer
+                      snapshot is loaded (Redis down or empty: built from DB)
+    rebuild()      -> built from DB, written to Redis, replaces the process
+                      copy; runs after commit on post_save/post_delete of the
+                      pricing models (connect_signals, from OrdersConfig.ready)
+
+quote() prices an order from the snapshot without touching the DB; it is
+used by order creation, FbiOptionsView and the /api/fbi/quote/ endpoint.
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from decimal import Decimal
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_VERSION = 'pricing:catalog:version'
+CACHE_KEY_CATALOG = 'pricing:catalog:{version}'
+
+# Used when the settings rows do not exist yet (same defaults the views had)
+DEFAULT_PRICE_PER_CERTIFICATE = Decimal('25.00')
+DEFAULT_MARRIAGE_PRICE = Decimal('0.00')
+
+
+class PricingError(ValueError):
+    """Unknown package/shipping code or invalid quantity."""
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+    id: int
+    code: str
+    label: str
+    price: Decimal
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: str
+    packages: tuple
+    shipping_options: tuple
+    price_per_certificate: Decimal
+    marriage_price: Decimal
+
+    def package(self, code: str) -> CatalogItem:
+        for item in self.packages:
+            if item.code == code:
+                return item
+        raise PricingError(f"Unknown package '{code}'")
+
+    def shipping_option(self, code: str) -> CatalogItem:
+        for item in self.shipping_options:
+            if item.code == code:
+                return item
+        raise PricingError(f"Unknown shipping option '{code}'")
+
+    def as_options(self) -> dict:
+        """FbiOptionsView payload."""
+        return {
+            'packages': [
+                {'id': p.id, 'code': p.code, 'label': p.label, 'price': p.price} for p in self.packages
+            ],
+            'shipping_options': [
+                {'id': s.id, 'code': s.code, 'label': s.label, 'price': s.price} for s in self.shipping_options
+            ],
+            'price_per_certificate': self.price_per_certificate,
+        }
+
+
+@dataclass(frozen=True)
+class Quote:
+    order_type: str
+    lines: tuple  # ((label, amount), ...)
+    total: Decimal
+    catalog_version: str
+
+    def as_dict(self) -> dict:
+        return {
+            'order_type': self.order_type,
+            'lines': [{'label': label, 'amount': amount} for label, amount in self.lines],
+            'total': self.total,
+            'catalog_version': self.catalog_version,
+        }
+
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+_local = {'catalog': None, 'checked_at': 0.0}
+_lock = threading.Lock()
+
+
+def _version(packages, shipping_options, price_per_certificate, marriage_price) -> str:
+    content = repr((packages, shipping_options, str(price_per_certificate), str(marriage_price)))
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def build_catalog() -> Catalog:
+    """Read the pricing models (4 queries)."""
+    from ..models import FbiServicePackage, ShippingOption, FbiPricingSettings, MarriagePricingSettings
+
+    packages = tuple(
+        CatalogItem(id=p['id'], code=p['code'], label=p['label'], price=p['price'])
+        for p in FbiServicePackage.objects.values('id', 'code', 'label', 'price')
+    )
+    shipping_options = tuple(
+        CatalogItem(id=s['id'], code=s['code'], label=s['label'], price=s['price'])
+        for s in ShippingOption.objects.order_by('id').values('id', 'code', 'label', 'price')
+    )
+    fbi_settings = FbiPricingSettings.objects.first()
+    marriage_settings = MarriagePricingSettings.objects.first()
+    price_per_certificate = fbi_settings.price_per_certificate if fbi_settings else DEFAULT_PRICE_PER_CERTIFICATE
+    marriage_price = marriage_settings.price if marriage_settings else DEFAULT_MARRIAGE_PRICE
+
+    return Catalog(
+        version=_version(packages, shipping_options, price_per_certificate, marriage_price),
+        packages=packages,
+        shipping_options=shipping_options,
+        price_per_certificate=price_per_certificate,
+        marriage_price=marriage_price,
+    )
+
+
+def _set_local(catalog: Catalog):
+    _local['catalog'] = catalog
+    _local['checked_at'] = time.monotonic()
+
+
+def rebuild() -> Catalog:
+    """Build from DB, publish to Redis and to this process."""
+    catalog = build_catalog()
+    try:
+        cache.set(CACHE_KEY_CATALOG.format(version=catalog.version), catalog, None)
+        cache.set(CACHE_KEY_VERSION, catalog.version, None)
+    except Exception as e:
+        logger.warning(f"[Pricing] Cache unavailable, catalog {catalog.version} kept in process only: {e}")
+    _set_local(catalog)
+    logger.info(f"[Pricing] Catalog rebuilt: version {catalog.version}")
+    return catalog
+
+
+def _load_shared() -> Catalog | None:
+    try:
+        version = cache.get(CACHE_KEY_VERSION)
+        if not version:
+            return None
+        current = _local['catalog']
+        if current is not None and current.version == version:
+            return current
+        return cache.get(CACHE_KEY_CATALOG.format(version=version))
+    except Exception as e:
+        logger.warning(f"[Pricing] Cache unavailable: {e}")
+        return None
+
+
+def get_catalog() -> Catalog:
+    """Current catalog snapshot (see module docstring)."""
+    catalog = _local['catalog']
+    if catalog is not None and time.monotonic() - _local['checked_at'] < settings.PRICING_CATALOG_CHECK_INTERVAL:
+        return catalog
+
+    with _lock:
+        catalog = _local['catalog']
+        if catalog is not None and time.monotonic() - _local['checked_at'] < settings.PRICING_CATALOG_CHECK_INTERVAL:
+            return catalog
+        shared = _load_shared()
+        if shared is not None:
+            _set_local(shared)
+            return shared
+        return rebuild()
+
+
+# =============================================================================
+# QUOTES
+# =============================================================================
+
+def quote(order_type: str, package: str = '', shipping_option: str = '', count: int = 1) -> Quote:
+    """
+    Price an order from the catalog snapshot.
+
+    Args:
+        order_type: 'fbi' or 'marriage'
+        package: FBI package code
+        shipping_option: FBI shipping option code
+        count: Number of FBI certificates
+
+    Raises:
+        PricingError: unknown order type, code or invalid count
+    """
+    catalog = get_catalog()
+
+    if order_type == 'fbi':
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            raise PricingError(f"Invalid count '{count}'")
+        if count < 0:
+            raise PricingError(f"Invalid count '{count}'")
+
+        pkg = catalog.package(package)
+        shipping = catalog.shipping_option(shipping_option)
+        certificates = count * catalog.price_per_certificate
+        lines = (
+            (pkg.label, pkg.price),
+            (shipping.label, shipping.price),
+            (f"{count} × certificate", certificates),
+        )
+        return Quote('fbi', lines, pkg.price + shipping.price + certificates, catalog.version)
+
+    if order_type == 'marriage':
+        lines = (('Triple Seal Marriage Certificate', catalog.marriage_price),)
+        return Quote('marriage', lines, catalog.marriage_price, catalog.version)
+
+    raise PricingError(f"Unknown order type '{order_type}'")
+
+
+# =============================================================================
+# INVALIDATION
+# =============================================================================
+
+def _on_pricing_change(sender, **kwargs):
+    transaction.on_commit(rebuild)
+
+
+def connect_signals():
+    """Rebuild the catalog when a pricing model changes. Called from OrdersConfig.ready."""
+    from django.db.models.signals import post_save, post_delete
+    from ..models import FbiServicePackage, ShippingOption, FbiPricingSettings, MarriagePricingSettings
+
+    for model in (FbiServicePackage, ShippingOption, FbiPricingSettings, MarriagePricingSettings):
+        post_save.connect(_on_pricing_change, sender=model, dispatch_uid=f'pricing_{model.__name__}_save')
+        post_delete.connect(_on_pricing_change, sender=model, dispatch_uid=f'pricing_{model.__name__}_delete')
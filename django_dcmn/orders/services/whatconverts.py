@@ -10,6 +10,8 @@ from typing import Dict, Optional, Tuple
 from django.utils.dateparse import parse_datetime
 from django.db.models import Q
 
+from ..utils import normalize_email, normalize_phone
+
 logger = logging.getLogger(__name__)
 
 
@@ -127,14 +129,18 @@ def find_duplicate_phone_lead(phone: str = None, email: str = None, service_type
 
     query = Q()
 
-    if phone:
-        # Normalize phone (remove spaces, dashes, parentheses)
-        normalized_phone = ''.join(c for c in phone if c.isdigit())
-        if normalized_phone:
-            query |= Q(contact_phone__icontains=normalized_phone[-10:])  # Match last 10 digits
+    # Exact matches on the indexed normalized columns
+    phone_last10 = normalize_phone(phone)
+    if phone_last10:
+        query |= Q(phone_last10=phone_last10)
+
+    email_lower = normalize_email(email)
+    if email_lower:
+        query |= Q(email_lower=email_lower)
 
-    if email:
-        query |= Q(contact_email__iexact=email)
+    # No usable key (e.g. a phone number shorter than 10 digits): nothing to match
+    if not query:
+        return None
 
     # CRITICAL: Filter by service type to avoid cross-service duplicates
     # FBI phone lead should NOT match I-9 phone lead even with same phone
@@ -142,15 +148,18 @@ def find_duplicate_phone_lead(phone: str = None, email: str = None, service_type
         query &= Q(detected_service=service_type)
         logger.info(f"🔍 Checking for duplicate phone lead in '{service_type}' pipeline only")
 
-    if query:
-        existing = PhoneCallLead.objects.filter(query).order_by('-created_at').first()
-        if existing:
-            logger.info(f"🔄 Found existing phone lead: {existing.id} (phone={phone}, service={service_type})")
-            return existing
+    existing = PhoneCallLead.objects.filter(query).order_by('-created_at').first()
+    if existing:
+        logger.info(f"🔄 Found existing phone lead: {existing.id} (phone={phone}, service={service_type})")
+        return existing
 
     return None
 
 
+# Order types find_matching_order searches
+MATCHABLE_ORDER_TYPES = ['fbi', 'marriage', 'embassy', 'translation', 'apostille', 'i9', 'quote']
+
+
 def find_matching_order(phone: str = None, email: str = None, service_type: str = None) -> Optional[Tuple[str, int, object]]:
     """
     Search for matching web form order by phone/email within the same service pipeline.
@@ -167,56 +176,32 @@ def find_matching_order(phone: str = None, email: str = None, service_type: str
     Returns:
         Tuple of (order_type, order_id, order_object) or None
     """
-    from ..models import (
-        FbiApostilleOrder,
-        MarriageOrder,
-        EmbassyLegalizationOrder,
-        TranslationOrder,
-        ApostilleOrder,
-        I9VerificationOrder,
-        QuoteRequest,
-    )
+    from .order_index import find_latest, get_indexed_order
 
     if not phone and not email:
         return None
 
-    # Normalize phone
-    normalized_phone = None
-    if phone:
-        normalized_phone = ''.join(c for c in phone if c.isdigit())[-10:]
-
-    # List of order models to check
-    order_models = [
-        ('fbi', FbiApostilleOrder),
-        ('marriage', MarriageOrder),
-        ('embassy', EmbassyLegalizationOrder),
-        ('translation', TranslationOrder),
-        ('apostille', ApostilleOrder),
-        ('i9', I9VerificationOrder),
-        ('quote', QuoteRequest),
-    ]
+    # Order types a phone call can match (one indexed query on OrderIndex)
+    order_types = MATCHABLE_ORDER_TYPES
 
     # If service detected, only check that specific order type
     if service_type:
-        order_models = [(order_type, model) for order_type, model in order_models if order_type == service_type]
+        order_types = [order_type for order_type in order_types if order_type == service_type]
         logger.info(f"🔍 Searching for orders in '{service_type}' pipeline only")
+        if not order_types:
+            return None
 
-    for order_type, model in order_models:
-        query = Q()
-
-        if normalized_phone:
-            query |= Q(phone__icontains=normalized_phone)
-
-        if email:
-            query |= Q(email__iexact=email)
+    row = find_latest(phone=phone, email=email, order_types=order_types)
+    if row is None:
+        return None
 
-        if query:
-            order = model.objects.filter(query).order_by('-created_at').first()
-            if order:
-                logger.info(f"✅ Found matching {order_type} order: {order.id}")
-                return (order_type, order.id, order)
+    order = get_indexed_order(row)
+    if order is None:
+        logger.warning(f"⚠️ Indexed {row.order_type} order {row.order_id} no longer exists")
+        return None
 
-    return None
+    logger.info(f"✅ Found matching {row.order_type} order: {order.id}")
+    return (row.order_type, order.id, order)
 
 
 # =============================================================================
@@ -430,6 +415,80 @@ def process_whatconverts_phone_lead(webhook_data: Dict) -> Optional['PhoneCallLe
     return phone_lead
 
 
+def handle_whatconverts_webhook(data: Dict, meta: Optional[Dict] = None) -> Dict:
+    """
+    Process one WhatConverts webhook delivery (inbound event inbox, in Celery).
+
+    1. Filters for "Phone Call" lead type only
+    2. Ignores tracking page leads and spam
+    3. Creates/updates PhoneCallLead (skipped if a matching order exists)
+    4. Syncs to Zoho with "Phone Call Received" stage (outbox while Zoho is down
+       or when the sync fails)
+
+    Args:
+        data: Raw webhook payload from WhatConverts
+        meta: Request context saved with the event (unused)
+
+    Returns:
+        Result dict (status: skipped / queued / success)
+    """
+    from .. import zoho_circuit
+    from .outbox import enqueue_phone_lead_sync
+    from .whatconverts_zoho import sync_phone_lead_to_zoho
+
+    logger.info("=" * 80)
+    logger.info("📞 WhatConverts Webhook Processing")
+    logger.info(f"   Lead ID: {data.get('lead_id')}")
+    logger.info(f"   Lead Type: {data.get('lead_type')}")
+    logger.info(f"   Landing URL: {data.get('landing_url')}")
+    logger.info("=" * 80)
+
+    # Filter 1: Only accept "Phone Call" leads
+    if data.get('lead_type') != 'Phone Call':
+        logger.info(f"⏭️ Skipping non-phone lead: {data.get('lead_type')}")
+        return {'status': 'skipped', 'reason': 'Not a phone call lead'}
+
+    # Filter 2: Ignore tracking page leads
+    landing_url = data.get('landing_url') or ''
+    if '/tracking' in landing_url.lower():
+        logger.info(f"⏭️ Skipping tracking page lead: {landing_url}")
+        return {'status': 'skipped', 'reason': 'Tracking page lead ignored'}
+
+    # Filter 3: Check for spam
+    if data.get('spam'):
+        logger.info("🚫 Skipping spam lead")
+        return {'status': 'skipped', 'reason': 'Marked as spam'}
+
+    phone_lead = process_whatconverts_phone_lead(data)
+
+    # None = matching order exists, phone lead intentionally skipped
+    if phone_lead is None:
+        logger.info("✅ Phone lead skipped (matching order exists)")
+        return {'status': 'skipped', 'reason': 'Matching order already exists'}
+
+    # Zoho down: the outbox creates the lead once the circuit closes
+    if not zoho_circuit.is_closed():
+        enqueue_phone_lead_sync(phone_lead)
+        logger.warning(f"⚠️ Zoho unavailable, phone lead {phone_lead.id} sync deferred to the outbox")
+        return {'status': 'queued', 'phone_lead_id': phone_lead.id}
+
+    # Sync failed: the outbox retries the create, same as while Zoho is down
+    if not sync_phone_lead_to_zoho(phone_lead):
+        enqueue_phone_lead_sync(phone_lead)
+        logger.warning(f"⚠️ Phone lead {phone_lead.id} Zoho sync failed, retry deferred to the outbox")
+        return {'status': 'queued', 'phone_lead_id': phone_lead.id}
+
+    logger.info(f"✅ Successfully processed and synced phone lead {phone_lead.id}")
+    return {
+        'status': 'success',
+        'phone_lead_id': phone_lead.id,
+        'zoho_lead_id': phone_lead.zoho_lead_id,
+        'zoho_attribution_id': phone_lead.zoho_attribution_id,
+        'detected_service': phone_lead.detected_service,
+        'matched_with_form': phone_lead.matched_with_form,
+    }
+
+
 # =============================================================================
 # ATTRIBUTION DATA BUILDING FOR ZOHO
 # =============================================================================
@@ -4,8 +4,8 @@ Zoho CRM sync for WhatConverts phone leads.
 """
 
 import logging
-import requests
 from typing import Dict, Optional
+from ..zoho_schema import MODULES, DEFAULT_MODULE, get_contact_field, get_stage_field, remember_synced
 from .attribution import build_zoho_attribution_payload, SOURCE_CATEGORIES
 
 logger = logging.getLogger(__name__)
@@ -43,8 +43,8 @@ def sync_phone_lead_to_zoho(phone_lead: 'PhoneCallLead') -> bool:
         if phone_lead.zoho_module:
             zoho_module = phone_lead.zoho_module
         else:
-            zoho_module = 'Get_A_Quote_Leads'  # Default to Get a Quote if service unknown
-            logger.info(f"⚠️ Service not detected, defaulting to Get_A_Quote_Leads module")
+            zoho_module = DEFAULT_MODULE  # Default to Get a Quote if service unknown
+            logger.info(f"⚠️ Service not detected, defaulting to {zoho_module} module")
 
         logger.info(f"📤 Syncing phone lead {phone_lead.id} to Zoho module: {zoho_module}")
         logger.info(f"   Payload: {lead_payload}")
@@ -69,6 +69,7 @@ def sync_phone_lead_to_zoho(phone_lead: 'PhoneCallLead') -> bool:
         phone_lead.zoho_lead_id = lead_id
         phone_lead.zoho_synced = True
         phone_lead.save()
+        remember_synced(zoho_module, lead_id, lead_payload)
 
         logger.info(f"✅ Created lead in Zoho {zoho_module}: {lead_id}")
 
@@ -92,111 +93,51 @@ def sync_phone_lead_to_zoho(phone_lead: 'PhoneCallLead') -> bool:
         return False
 
 
-# Module → Contact lookup field name
-CONTACT_LOOKUP_FIELD = {
-    'Deals': 'Client_Contact',
-    'Triple_Seal_Apostilles': 'Client_Contact',
-    'I_9_Verification': 'Client_Contact',
-    'Embassy_Legalization': 'Client_Contact',
-    'Apostille_Services': 'Client_Contact',
-    'Translation_Services': 'Client_Contact',
-    'Notary_Services': 'Client_Name',
-    'Get_A_Quote_Leads': 'Name_of_Client',
-}
-
-
 def _get_or_create_contact_for_phone_lead(phone_lead: 'PhoneCallLead') -> Optional[str]:
     """
-    Find or create a Zoho Contact for a phone lead.
-    Search order: phone number first, then email.
+    Find or create a Zoho Contact for a phone lead (matched by email, then phone).
 
     Returns:
         Contact ID or None
     """
-    from ..zoho_sync import get_access_token, ZOHO_API_DOMAIN
+    from .zoho_contacts import resolve_contact
 
     phone = phone_lead.contact_phone
     email = phone_lead.contact_email
-    name = phone_lead.contact_name or 'Phone Lead'
 
     if not phone and not email:
         logger.info(f"⏭️ No phone or email for phone lead {phone_lead.id}, skipping contact creation")
         return None
 
     try:
-        access_token = get_access_token()
-        headers = {
-            "Authorization": f"Zoho-oauthtoken {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        # 1. Search by phone number
-        if phone:
-            search_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts/search?phone={phone}"
-            resp = requests.get(search_url, headers=headers, timeout=30)
-            if resp.status_code == 200:
-                data = resp.json()
-                if 'data' in data and len(data['data']) > 0:
-                    contact_id = data['data'][0]['id']
-                    logger.info(f"📇 Found existing contact by phone {phone}: {contact_id}")
-                    return contact_id
-
-        # 2. Search by email
-        if email:
-            search_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts/search?email={email}"
-            resp = requests.get(search_url, headers=headers, timeout=30)
-            if resp.status_code == 200:
-                data = resp.json()
-                if 'data' in data and len(data['data']) > 0:
-                    contact_id = data['data'][0]['id']
-                    logger.info(f"📇 Found existing contact by email {email}: {contact_id}")
-                    return contact_id
-
-        # 3. Create new contact
-        create_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts"
-        payload = {
-            "data": [{
-                "Last_Name": name,
-                "Email": email or "",
-                "Phone": phone or "",
-            }]
-        }
-        resp = requests.post(create_url, headers=headers, json=payload, timeout=30)
-
-        try:
-            data = resp.json()
-            if 'data' in data and len(data['data']) > 0:
-                item = data['data'][0]
-                if 'details' in item:
-                    contact_id = item['details']['id']
-                    logger.info(f"📇 Created new contact for {name}: {contact_id}")
-                    return contact_id
-                elif item.get('code') == 'DUPLICATE_DATA' and 'details' in item:
-                    contact_id = item['details']['id']
-                    logger.info(f"📇 Contact already exists (duplicate): {contact_id}")
-                    return contact_id
-        except (KeyError, IndexError, TypeError):
-            pass
-
-        logger.warning(f"⚠️ Failed to create contact for phone lead {phone_lead.id}: {resp.text}")
-        return None
-
+        contact = resolve_contact(phone_lead.contact_name, email, phone, fallback_name='Phone Lead')
     except Exception as e:
         logger.error(f"❌ Error creating contact for phone lead {phone_lead.id}: {e}", exc_info=True)
         return None
 
+    if not contact:
+        logger.warning(f"⚠️ Failed to resolve contact for phone lead {phone_lead.id}")
+        return None
+    return contact.id
+
 
 def _link_contact_to_lead(zoho_module: str, lead_id: str, contact_id: str, client: 'ZohoCRMClient'):
     """
     Link a Zoho Contact to a lead record via the module's lookup field.
     Silently skips modules that don't have a contact lookup field.
     """
-    lookup_field = CONTACT_LOOKUP_FIELD.get(zoho_module)
+    lookup_field = get_contact_field(zoho_module)
     if not lookup_field:
         logger.info(f"⏭️ Module {zoho_module} has no contact lookup field, skipping link")
         return
 
     link_payload = {lookup_field: {"id": contact_id}}
+
+    # Buffered: merged with the attribution link into a single PUT of the lead
+    if client.queue_update(zoho_module, lead_id, link_payload):
+        logger.info(f"🔗 Queued link of contact {contact_id} to {zoho_module} record {lead_id} via {lookup_field}")
+        return
+
     response = client.update_record(zoho_module, lead_id, link_payload)
 
     if response:
@@ -210,18 +151,7 @@ def build_zoho_lead_payload(phone_lead: 'PhoneCallLead') -> Dict:
     Build Zoho lead payload from PhoneCallLead.
     Adapts field names based on the target Zoho module.
 
-    Field mapping per module (from zoho_sync.py):
-    ┌──────────────────────────┬────────────┬─────────────┬───────────┬──────────────┬────────────────────┬──────────────────────┐
-    │ Module                   │ Name field │ Client Name │ Email     │ Phone        │ Stage/Status       │ Comments             │
-    ├──────────────────────────┼────────────┼─────────────┼───────────┼──────────────┼────────────────────┼──────────────────────┤
-    │ Deals (FBI)              │ Deal_Name  │ Name1       │ Email_1   │ Phone        │ Stage              │ Client_Comment       │
-    │ Embassy_Legalization     │ Name       │ Client_Name │ Email     │ Phone        │ Status             │ Client_Comment       │
-    │ Translation_Services     │ Name       │ Client_Name1│ Email     │ Phone        │ Translation_Status │ Client_Comments      │
-    │ Apostille_Services       │ Name       │ Client_Name │ Email     │ Phone_Number │ Status             │ Client_Comments      │
-    │ Triple_Seal_Apostilles   │ Name       │ Client_Name │ Client_Email│Client_Phone│ Stage              │ Client_Notes_Comments│
-    │ I_9_Verification         │ Name       │ Client_Name │ Client_Email│Client_Phone│ Stage              │ Client_Comments      │
-    │ Get_A_Quote_Leads        │ Name       │ Client_Name │ Client_Email│Client_Phone│ GET_A_QUOTE_LEADS  │ Client_Comments      │
-    └──────────────────────────┴────────────┴─────────────┴───────────┴──────────────┴────────────────────┴──────────────────────┘
+    Field names per module come from zoho_schema.MODULES.
 
     Args:
         phone_lead: PhoneCallLead instance
@@ -245,105 +175,20 @@ def build_zoho_lead_payload(phone_lead: 'PhoneCallLead') -> Dict:
         description_parts.append(f"Recording: {phone_lead.call_recording_url}")
     description = '\n\n'.join(description_parts) if description_parts else 'Phone call lead from WhatConverts'
 
-    zoho_module = phone_lead.zoho_module or ''
-
-    # --- Deals module (FBI) ---
-    if zoho_module == 'Deals':
-        payload = {
-            'Deal_Name': f"FBI Phone Lead — {name}",
-            'Name1': name,
-            'Email_1': phone_lead.contact_email,
-            'Phone': phone_lead.contact_phone,
-            'Stage': 'Phone Call Received',
-            'Client_Comment': description,
-        }
-
-    # --- Embassy_Legalization ---
-    elif zoho_module == 'Embassy_Legalization':
-        payload = {
-            'Name': f"Embassy Phone Lead — {name}",
-            'Client_Name': name,
-            'Email': phone_lead.contact_email,
-            'Phone': phone_lead.contact_phone,
-            'Status': 'Phone Call Received',
-            'Client_Comment': description,
-        }
-
-    # --- Translation_Services ---
-    elif zoho_module == 'Translation_Services':
-        payload = {
-            'Name': f"Translation Phone Lead — {name}",
-            'Client_Name1': name,
-            'Email': phone_lead.contact_email,
-            'Phone': phone_lead.contact_phone,
-            'Translation_Status': 'Phone Call Received',
-            'Client_Comments': description,
-        }
-
-    # --- Apostille_Services ---
-    elif zoho_module == 'Apostille_Services':
-        payload = {
-            'Name': f"Apostille Phone Lead — {name}",
-            'Client_Name': name,
-            'Email': phone_lead.contact_email,
-            'Phone_Number': phone_lead.contact_phone,
-            'Status': 'Phone Call Received',
-            'Client_Comments': description,
-        }
-
-    # --- Triple_Seal_Apostilles (Marriage) ---
-    elif zoho_module == 'Triple_Seal_Apostilles':
-        payload = {
-            'Name': f"Triple Seal Phone Lead — {name}",
-            'Client_Name': name,
-            'Client_Email': phone_lead.contact_email,
-            'Client_Phone': phone_lead.contact_phone,
-            'Stage': 'Phone Call Received',
-            'Client_Notes_Comments': description,
-        }
-
-    # --- I_9_Verification ---
-    elif zoho_module == 'I_9_Verification':
-        payload = {
-            'Name': f"I9 Phone Lead — {name}",
-            'Client_Name': name,
-            'Client_Email': phone_lead.contact_email,
-            'Client_Phone': phone_lead.contact_phone,
-            'Stage': 'Phone Call Received',
-            'Client_Comments': description,
-        }
-
-    # --- Notary_Services ---
-    elif zoho_module == 'Notary_Services':
-        payload = {
-            'Name': f"Notary Phone Lead — {name}",
-            'Client_Email': phone_lead.contact_email,
-            'Client_Phone_Number': phone_lead.contact_phone,
-            'Notary_Stages': 'Phone Call Received',
-            'Client_Comments': description,
-        }
-
-    # --- Get_A_Quote_Leads ---
-    elif zoho_module == 'Get_A_Quote_Leads':
-        payload = {
-            'Name': f"Quote Phone Lead — {name}",
-            'Client_Name': name,
-            'Client_Email': phone_lead.contact_email,
-            'Client_Phone': phone_lead.contact_phone,
-            'GET_A_QUOTE_LEADS': 'Phone Call Received',
-            'Client_Comments': description,
-        }
-
-    # --- Fallback for unknown modules → goes to Get_A_Quote_Leads ---
-    else:
-        payload = {
-            'Name': f"Phone Lead — {name}",
-            'Client_Name': name,
-            'Client_Email': phone_lead.contact_email,
-            'Client_Phone': phone_lead.contact_phone,
-            'GET_A_QUOTE_LEADS': 'Phone Call Received',
-            'Client_Comments': description,
-        }
+    # Field names per module from zoho_schema.MODULES; unknown modules get Get a Quote fields
+    module = MODULES.get(phone_lead.zoho_module or '')
+    label = f"{module.label} Phone Lead" if module else "Phone Lead"
+    module = module or MODULES[DEFAULT_MODULE]
+
+    payload = {module.name_field: f"{label} — {name}"}
+    if module.client_name_field:
+        payload[module.client_name_field] = name
+    payload.update({
+        module.email_field: phone_lead.contact_email,
+        module.phone_field: phone_lead.contact_phone,
+        module.stage_field: 'Phone Call Received',
+        module.comments_field: description,
+    })
 
     # Common fields for all modules
     if phone_lead.city:
@@ -428,6 +273,10 @@ def create_attribution_record(
         # Step 2: Link attribution to lead by updating the lead record
         # Attribution_Record is a lookup field ON the lead/deal, not on the attribution record
         link_payload = {'Attribution_Record': str(attribution_id)}
+        if client.queue_update(zoho_module, zoho_lead_id, link_payload):
+            logger.info(f"✅ Queued link of attribution {attribution_id} to lead {zoho_lead_id}")
+            return str(attribution_id)
+
         link_response = client.update_record(zoho_module, zoho_lead_id, link_payload)
 
         if link_response and link_response.get('data'):
@@ -475,23 +324,18 @@ def update_order_stage_to_received(order_type: str, order_id: int) -> bool:
             logger.warning(f"Phone lead {phone_lead.id} missing Zoho module or ID")
             return False
 
-        # Update stage in Zoho — field name depends on module
-        # Deals/Marriage/I9 use 'Stage', Embassy/Apostille use 'Status', Translation uses 'Translation_Status'
-        stage_field_map = {
-            'Deals': 'Stage',
-            'Embassy_Legalization': 'Status',
-            'Apostille_Services': 'Status',
-            'Translation_Services': 'Translation_Status',
-            'Triple_Seal_Apostilles': 'Stage',
-            'I_9_Verification': 'Stage',
-        }
-        stage_field = stage_field_map.get(zoho_module, 'Stage')
+        # Update stage in Zoho — field name depends on module (zoho_schema.MODULES)
+        stage_field = get_stage_field(zoho_module)
 
         client = ZohoCRMClient()
         update_payload = {
             stage_field: 'Order Received'
         }
 
+        if client.queue_update(zoho_module, zoho_id, update_payload):
+            logger.info(f"✅ Queued 'Order Received' stage for {order_type} order {order_id} in Zoho")
+            return True
+
         response = client.update_record(zoho_module, zoho_id, update_payload)
 
         if response and response.get('data'):
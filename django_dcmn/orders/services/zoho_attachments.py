@@ -0,0 +1,438 @@
+# orders/services/zoho_attachments.py
+"""
+Upload order files to Zoho record Attachments straight from Django storage.
+
+Files are opened through the storage API (no HTTP round trip to our own media
+URL) and sent as a streamed multipart body read in small chunks, so memory
+stays flat whatever the file size. Used by sync_order_to_zoho, the async
+client and _attach_files_to_record in services/zoho_update.py.
+
+Every file/record pair has a ZohoAttachmentSync ledger row (size, content
+hash taken while streaming, Zoho attachment ID, status, attempts), so a
+retry uploads only the files that are missing, without reading the others,
+a file whose content is already on the record is not sent twice, and a
+crash mid-upload is reconciled against the record's Attachments list
+instead of uploading a duplicate. A file is tried at most
+ZOHO_ATTACHMENT_MAX_ATTEMPTS times; calls refused by the open Zoho circuit
+do not count.
+"""
+
+import os
+import uuid
+import contextvars
+import hashlib
+import logging
+import mimetypes
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartFileStream:
+    """
+    File-like multipart/form-data body with a single file field.
+
+    requests streams any object with read() and uses `len` for Content-Length;
+    seek(0) rewinds it so urllib3/429 retries can resend the body. The file
+    bytes are hashed as they are read (content_hash, after a full pass).
+    """
+
+    def __init__(self, fileobj, filename: str, size: int, field_name: str = 'file'):
+        self.boundary = uuid.uuid4().hex
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        safe_name = filename.replace('"', '%22').replace('\r', '').replace('\n', '')
+        self._head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{safe_name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self._file = fileobj
+        self._file_start = fileobj.tell() if hasattr(fileobj, 'tell') else 0
+        self._size = size
+        self._pos = 0
+        self._digest = hashlib.sha256()
+        self.len = len(self._head) + size + len(self._tail)
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the file bytes sent since the last rewind."""
+        return self._digest.hexdigest()
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.len
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if (offset, whence) == (0, 2):
+            self._pos = self.len
+            return self._pos
+        if (offset, whence) != (0, 0):
+            raise OSError("MultipartFileStream can only be rewound to the start or end")
+        self._file.seek(self._file_start)
+        self._pos = 0
+        self._digest = hashlib.sha256()
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.len - self._pos
+        out = []
+        while size > 0 and self._pos < self.len:
+            chunk = self._read_part(size)
+            if not chunk:
+                break
+            out.append(chunk)
+            size -= len(chunk)
+        return b''.join(out)
+
+    def _read_part(self, size: int) -> bytes:
+        head_len = len(self._head)
+        if self._pos < head_len:
+            chunk = self._head[self._pos:self._pos + size]
+        elif self._pos < head_len + self._size:
+            chunk = self._file.read(min(size, head_len + self._size - self._pos, CHUNK_SIZE))
+            if not chunk:
+                raise OSError("File ended before its reported size")
+            self._digest.update(chunk)
+        else:
+            tail_pos = self._pos - head_len - self._size
+            chunk = self._tail[tail_pos:tail_pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+    def __iter__(self):
+        self.seek(0)
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def attachment_filename(file_attachment) -> str:
+    return os.path.basename(file_attachment.file.name)
+
+
+def upload_file_attachment(file_attachment, module_name: str, record_id: str, access_token: str | None = None):
+    """
+    Stream one FileAttachment to a Zoho record's Attachments.
+
+    Retries once with a fresh token after a 401.
+
+    Returns:
+        (requests.Response of the upload, SHA-256 of the file as sent)
+    """
+    from .. import zoho_transport
+    from ..zoho_sync import get_access_token, ZOHO_API_DOMAIN
+
+    url = f'{ZOHO_API_DOMAIN}/crm/v2/{module_name}/{record_id}/Attachments'
+    filename = attachment_filename(file_attachment)
+    access_token = access_token or get_access_token()
+
+    with file_attachment.file.open('rb') as fileobj:
+        body = MultipartFileStream(fileobj, filename, file_attachment.file.size)
+        for attempt in range(2):
+            body.seek(0)
+            headers = {
+                'Authorization': f'Zoho-oauthtoken {access_token}',
+                'Content-Type': body.content_type,
+            }
+            response = zoho_transport.post(url, headers=headers, data=body)
+            if response.status_code == 401 and attempt == 0:
+                access_token = get_access_token(force_refresh=True, rejected_token=access_token)
+                continue
+            break
+
+    logger.info(f'[ZohoAttachments] Attach "{filename}" to {module_name}/{record_id}: {response.status_code}')
+    return response, body.content_hash
+
+
+# =============================================================================
+# LEDGER
+# =============================================================================
+
+def list_record_attachments(module_name: str, record_id: str) -> list[dict]:
+    """
+    Attachments already on a Zoho record (id, File_Name, Size).
+    Retries once with a fresh token after a 401.
+    """
+    from ..zoho_sync import get_access_token, ZOHO_API_DOMAIN
+    from .. import zoho_transport
+
+    url = f'{ZOHO_API_DOMAIN}/crm/v2/{module_name}/{record_id}/Attachments'
+    access_token = get_access_token()
+    for attempt in range(2):
+        headers = {'Authorization': f'Zoho-oauthtoken {access_token}'}
+        response = zoho_transport.get(url, headers=headers, params={'fields': 'id,File_Name,Size'})
+        if response.status_code == 401 and attempt == 0:
+            access_token = get_access_token(force_refresh=True, rejected_token=access_token)
+            continue
+        break
+    if response.status_code == 204:
+        return []
+    response.raise_for_status()
+    return response.json().get('data') or []
+
+
+def _find_uploaded(existing: list[dict], file_attachment) -> str | None:
+    """ID of a Zoho attachment matching the file's name and size."""
+    filename = attachment_filename(file_attachment)
+    size = file_attachment.file.size
+    for item in existing:
+        if item.get('File_Name') == filename and str(item.get('Size')) == str(size):
+            return str(item.get('id'))
+    return None
+
+
+def _file_hash(file_attachment) -> str:
+    """SHA-256 of a stored file, read in CHUNK_SIZE chunks."""
+    digest = hashlib.sha256()
+    with file_attachment.file.open('rb') as fileobj:
+        for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _find_same_content(uploaded: list, file_attachment, size: int) -> tuple | None:
+    """
+    (Zoho attachment ID, hash) of a file with the same content already
+    uploaded to the record (an order re-submitted with the same documents).
+    The file is only read when an uploaded file has the same size.
+    """
+    candidates = [row for row in uploaded if row.size == size and row.file_attachment_id != file_attachment.pk]
+    if not candidates:
+        return None
+    content_hash = _file_hash(file_attachment)
+    for row in candidates:
+        if row.content_hash == content_hash:
+            return row.zoho_attachment_id, content_hash
+    return None
+
+
+def plan_attachment_uploads(order, module_name: str, record_id: str) -> list:
+    """
+    Claim the files of an order that still have to be uploaded to a record.
+
+    Files already uploaded with the same size are skipped without reading
+    them, and so are files that used up ZOHO_ATTACHMENT_MAX_ATTEMPTS. A file
+    whose content (content_hash) is already on the record is recorded as
+    uploaded instead of sent again. Rows left 'uploading' by a crashed worker
+    are checked against Zoho first; rows another worker is uploading right
+    now are left alone. Zoho and storage are read before any row is locked;
+    each ledger row is locked only while it is written.
+
+    Returns:
+        ZohoAttachmentSync rows (status 'uploading') to upload
+    """
+    from ..models import ZohoAttachmentSync
+
+    # QuoteRequest has no file_attachments GenericRelation
+    if not hasattr(order, 'file_attachments'):
+        return []
+
+    stale_before = timezone.now() - timedelta(seconds=settings.ZOHO_ATTACHMENT_STALE_AFTER)
+    files = list(order.file_attachments.all())
+    record_rows = list(ZohoAttachmentSync.objects.filter(zoho_module=module_name, zoho_record_id=str(record_id)))
+    ledgers = {row.file_attachment_id: row for row in record_rows}
+    uploaded = [row for row in record_rows if row.status == ZohoAttachmentSync.STATUS_UPLOADED and row.content_hash]
+
+    # Outside any transaction: Zoho / storage reads
+    existing = None
+    if any(row.status == ZohoAttachmentSync.STATUS_UPLOADING and row.updated_at <= stale_before
+           for row in ledgers.values()):
+        try:
+            existing = list_record_attachments(module_name, record_id)
+        except Exception as e:
+            logger.warning(f'[ZohoAttachments] Could not list {module_name}/{record_id} attachments, '
+                           f'leaving interrupted uploads for later: {e}')
+
+    planned = []
+    for file_attachment in files:
+        size = file_attachment.file.size
+        ledger = ledgers.get(file_attachment.pk)
+        if ledger and ledger.status == ZohoAttachmentSync.STATUS_UPLOADED and ledger.size in (None, size):
+            continue
+        found = None
+        if ledger and ledger.status == ZohoAttachmentSync.STATUS_UPLOADING and existing is not None:
+            found = _find_uploaded(existing, file_attachment)
+            found = (found, '') if found else None
+        if found is None:
+            found = _find_same_content(uploaded, file_attachment, size)
+        planned.append((file_attachment, size, found))
+
+    claimed = []
+    for file_attachment, size, found in planned:
+        with transaction.atomic():
+            ledger, _ = ZohoAttachmentSync.objects.select_for_update().get_or_create(
+                file_attachment=file_attachment,
+                zoho_module=module_name,
+                zoho_record_id=str(record_id),
+            )
+            # size is None on rows uploaded before it was recorded
+            if ledger.status == ZohoAttachmentSync.STATUS_UPLOADED and ledger.size in (None, size):
+                continue
+            if ledger.status == ZohoAttachmentSync.STATUS_UPLOADING:
+                if ledger.updated_at > stale_before:
+                    continue
+                # Crashed mid-upload: the file may already be in Zoho
+                if existing is None and not found:
+                    continue
+            if found:
+                zoho_attachment_id, content_hash = found
+                ledger.status = ZohoAttachmentSync.STATUS_UPLOADED
+                ledger.zoho_attachment_id = zoho_attachment_id
+                ledger.content_hash = content_hash or ledger.content_hash
+                ledger.size = size
+                ledger.save()
+                logger.info(f'[ZohoAttachments] {file_attachment.file.name} already on {module_name}/{record_id}, not sent')
+                continue
+            if ledger.attempts >= settings.ZOHO_ATTACHMENT_MAX_ATTEMPTS:
+                logger.warning(f'[ZohoAttachments] Giving up on {file_attachment.file.name} for {module_name}/{record_id} '
+                               f'after {ledger.attempts} attempt(s)')
+                continue
+
+            ledger.status = ZohoAttachmentSync.STATUS_UPLOADING
+            ledger.size = size
+            ledger.attempts += 1
+            ledger.save()
+            # Upload threads must not hit the DB for the FK
+            ledger.file_attachment = file_attachment
+            claimed.append(ledger)
+
+    return claimed
+
+
+def record_upload_result(ledger, status_code: int | None, data: dict | None = None, error: str = '',
+                         content_hash: str = ''):
+    """Store the outcome of one upload (and the hash of what was sent) in its ledger row."""
+    from ..models import ZohoAttachmentSync
+
+    item = ((data or {}).get('data') or [{}])[0]
+    if status_code in (200, 201) and (item.get('code') or 'SUCCESS').upper() == 'SUCCESS':
+        ledger.status = ZohoAttachmentSync.STATUS_UPLOADED
+        ledger.zoho_attachment_id = str((item.get('details') or {}).get('id') or '')
+        ledger.content_hash = content_hash
+        ledger.last_error = ''
+    else:
+        ledger.status = ZohoAttachmentSync.STATUS_FAILED
+        ledger.last_error = error or f'{status_code}: {data}'
+    ledger.save(update_fields=['status', 'zoho_attachment_id', 'content_hash', 'last_error', 'updated_at'])
+    return ledger.status == ZohoAttachmentSync.STATUS_UPLOADED
+
+
+def release_upload(ledger, error: str = 'Zoho circuit open') -> bool:
+    """
+    Put back a claimed row whose upload was never sent (Zoho circuit open),
+    without counting the attempt.
+    """
+    from ..models import ZohoAttachmentSync
+
+    ledger.status = ZohoAttachmentSync.STATUS_FAILED
+    ledger.attempts = max(ledger.attempts - 1, 0)
+    ledger.last_error = error
+    ledger.save(update_fields=['status', 'attempts', 'last_error', 'updated_at'])
+    return False
+
+
+def _upload_for_ledger(ledger, access_token):
+    """
+    Worker thread: network + storage only, the ledger is written by the caller.
+
+    Returns:
+        (status_code, data, error, content_hash, sent); sent is False when the
+        Zoho circuit was open and nothing went out
+    """
+    from ..zoho_circuit import ZohoCircuitOpen
+
+    try:
+        response, content_hash = upload_file_attachment(
+            ledger.file_attachment, ledger.zoho_module, ledger.zoho_record_id, access_token,
+        )
+        try:
+            data = response.json()
+        except ValueError:
+            data = {'raw': response.text[:500]}
+        return response.status_code, data, '', content_hash, True
+    except ZohoCircuitOpen as e:
+        return None, None, str(e), '', False
+    except Exception as e:
+        return None, None, str(e), '', True
+
+
+def attach_order_files(order, module_name: str, record_id: str, access_token: str | None = None) -> int:
+    """
+    Upload the files of an order that are not on the Zoho record yet,
+    ZOHO_ATTACHMENT_UPLOAD_WORKERS at a time. A failed file is logged and
+    left 'failed' in the ledger for the next attempt.
+
+    Returns:
+        Number of files uploaded by this call
+    """
+    pending = plan_attachment_uploads(order, module_name, record_id)
+    if not pending:
+        return 0
+
+    workers = max(1, min(settings.ZOHO_ATTACHMENT_UPLOAD_WORKERS, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each upload runs in a copy of the caller's context (zoho_ratelimit op class)
+        futures = [
+            pool.submit(contextvars.copy_context().run, _upload_for_ledger, ledger, access_token)
+            for ledger in pending
+        ]
+        results = [future.result() for future in futures]
+
+    uploaded = 0
+    for ledger, (status_code, data, error, content_hash, sent) in zip(pending, results):
+        if not sent:
+            release_upload(ledger, error)
+        elif record_upload_result(ledger, status_code, data, error, content_hash):
+            uploaded += 1
+        else:
+            logger.error(f'[ZohoAttachments] ❌ Upload of {ledger.file_attachment.file.name} '
+                         f'to {module_name}/{record_id} failed: {ledger.last_error[:500]}')
+    logger.info(f'[ZohoAttachments] {uploaded}/{len(pending)} file(s) uploaded to {module_name}/{record_id}')
+    return uploaded
+
+
+def resume_pending_uploads() -> int:
+    """
+    Re-run uploads left 'failed' or stuck 'uploading' (crashed worker),
+    up to ZOHO_ATTACHMENT_MAX_ATTEMPTS per file.
+
+    Returns:
+        Number of files uploaded
+    """
+    from ..models import ZohoAttachmentSync
+
+    stale_before = timezone.now() - timedelta(seconds=settings.ZOHO_ATTACHMENT_STALE_AFTER)
+    rows = (
+        ZohoAttachmentSync.objects
+        .filter(attempts__lt=settings.ZOHO_ATTACHMENT_MAX_ATTEMPTS, updated_at__lt=stale_before)
+        .filter(status__in=[ZohoAttachmentSync.STATUS_FAILED, ZohoAttachmentSync.STATUS_UPLOADING])
+        .select_related('file_attachment')
+    )
+
+    uploaded = 0
+    seen = set()
+    for row in rows:
+        order = row.file_attachment.content_object
+        key = (row.zoho_module, row.zoho_record_id)
+        if order is None or key in seen:
+            continue
+        seen.add(key)
+        uploaded += attach_order_files(order, row.zoho_module, row.zoho_record_id)
+    return uploaded
@@ -0,0 +1,278 @@
+# orders/services/zoho_contacts.py
+"""
+Zoho Contact resolution: local cache + one Contacts/upsert call.
+
+Contacts are keyed by lowercased email and by the last 10 digits of the
+phone number. The ZohoContact table is the source of truth, Redis (Django
+cache) is the hot tier in front of it. Both are filled from every resolved
+contact and invalidated by the CRM merge/delete webhook, so repeat
+customers resolve their contact without calling Zoho.
+
+A cache miss costs one upsert that matches the contact by email, then phone,
+or creates it. Zoho treats a match as an update (Modified_Time, workflows),
+so the submission's name / email / phone are written to the matched contact.
+
+resolve_contact() is the one resolver for order sync, phone leads and
+review requests; the async client sends the same upsert body.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_dcmn import metrics
+from .. import zoho_transport
+from ..utils import normalize_email, normalize_phone
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'zoho_contact'
+
+
+# =============================================================================
+# NORMALIZATION
+# =============================================================================
+
+def _keys_for(email: Optional[str] = None, phone: Optional[str] = None) -> list[tuple[str, str]]:
+    from ..models import ZohoContact
+
+    keys = []
+    email = normalize_email(email)
+    if email:
+        keys.append((ZohoContact.KEY_EMAIL, email))
+    phone = normalize_phone(phone)
+    if phone:
+        keys.append((ZohoContact.KEY_PHONE, phone))
+    return keys
+
+
+def _cache_key(key_type: str, key_value: str) -> str:
+    return f'{CACHE_KEY_PREFIX}:{key_type}:{key_value}'
+
+
+# =============================================================================
+# LOOKUP / REMEMBER / INVALIDATE
+# =============================================================================
+
+def get_cached_contact_id(email: Optional[str] = None, phone: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve a Zoho Contact ID locally: Redis first, then the DB.
+    Email is checked before phone (same order as the Contacts/upsert duplicate check).
+
+    Returns:
+        Contact ID or None if the contact was never seen
+    """
+    from ..models import ZohoContact
+
+    keys = _keys_for(email, phone)
+
+    try:
+        for key_type, key_value in keys:
+            contact_id = cache.get(_cache_key(key_type, key_value))
+            if contact_id:
+                logger.info(f"📇 Contact cache hit ({key_type}): {contact_id}")
+                metrics.observe_cache('contact', 'hit')
+                return contact_id
+    except Exception as e:
+        logger.warning(f"⚠️ Contact cache unavailable, falling back to DB: {e}")
+
+    for key_type, key_value in keys:
+        row = ZohoContact.objects.filter(key_type=key_type, key_value=key_value).first()
+        if row:
+            try:
+                cache.set(_cache_key(key_type, key_value), row.zoho_contact_id, settings.ZOHO_CONTACT_CACHE_TTL)
+            except Exception:
+                pass
+            logger.info(f"📇 Contact DB hit ({key_type}): {row.zoho_contact_id}")
+            metrics.observe_cache('contact', 'hit')
+            return row.zoho_contact_id
+
+    metrics.observe_cache('contact', 'miss')
+    return None
+
+
+def remember_contact(contact_id: Optional[str], email: Optional[str] = None, phone: Optional[str] = None):
+    """Store email/phone -> contact ID in the DB and Redis. Never raises."""
+    from ..models import ZohoContact
+
+    if not contact_id:
+        return
+
+    contact_id = str(contact_id)
+    try:
+        for key_type, key_value in _keys_for(email, phone):
+            ZohoContact.objects.update_or_create(
+                key_type=key_type,
+                key_value=key_value,
+                defaults={'zoho_contact_id': contact_id},
+            )
+            cache.set(_cache_key(key_type, key_value), contact_id, settings.ZOHO_CONTACT_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to cache Zoho contact {contact_id}: {e}")
+
+
+def invalidate_contact(contact_id: str) -> int:
+    """
+    Forget every key pointing at a Zoho Contact (deleted or merged away).
+
+    Returns:
+        Number of keys removed
+    """
+    from ..models import ZohoContact
+
+    rows = list(ZohoContact.objects.filter(zoho_contact_id=str(contact_id)))
+    if not rows:
+        return 0
+
+    cache.delete_many([_cache_key(row.key_type, row.key_value) for row in rows])
+    ZohoContact.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    logger.info(f"🗑️ Invalidated {len(rows)} cached key(s) for Zoho contact {contact_id}")
+    return len(rows)
+
+
+# =============================================================================
+# RESOLVER (one Contacts/upsert call)
+# =============================================================================
+
+@dataclass
+class ResolvedContact:
+    id: str
+    created: bool = False
+    fields: dict = field(default_factory=dict)  # requested fields (empty for a new contact)
+
+
+def build_contact_upsert(name: Optional[str], email: Optional[str], phone: Optional[str]) -> dict:
+    """
+    Contacts/upsert body: Zoho matches an existing contact by email, then by
+    phone, and updates it; otherwise it creates one. Without a name the
+    payload has no Last_Name, which only succeeds for an existing contact.
+    """
+    record = {}
+    duplicate_check_fields = []
+    if name:
+        record['Last_Name'] = name
+    if email:
+        record['Email'] = email
+        duplicate_check_fields.append('Email')
+    if phone:
+        record['Phone'] = phone
+        duplicate_check_fields.append('Phone')
+    return {"data": [record], "duplicate_check_fields": duplicate_check_fields}
+
+
+def contact_from_upsert(data: dict, email: Optional[str] = None, phone: Optional[str] = None) -> Optional[ResolvedContact]:
+    """Contact of a Contacts/upsert response (remembered locally), None on error."""
+    items = (data or {}).get('data') or []
+    if not items:
+        return None
+
+    item = items[0]
+    details = item.get('details') or {}
+    if item.get('code') in ('SUCCESS', 'DUPLICATE_DATA') and details.get('id'):
+        contact_id = details['id']
+        created = item.get('action') == 'insert'
+        logger.info(f"📇 Contact {'created' if created else 'matched'} via upsert: {contact_id}")
+        remember_contact(contact_id, email=email, phone=phone)
+        return ResolvedContact(contact_id, created=created)
+    return None
+
+
+class _ContactsAPI:
+    """Contacts calls with one token refresh after a 401."""
+
+    def __init__(self):
+        from ..zoho_sync import get_access_token
+
+        self.token = get_access_token()
+
+    def request(self, method: str, path: str, **kwargs):
+        from ..zoho_sync import get_access_token, ZOHO_API_DOMAIN
+
+        for attempt in range(2):
+            headers = {
+                "Authorization": f"Zoho-oauthtoken {self.token}",
+                "Content-Type": "application/json"
+            }
+            resp = zoho_transport.request(method, f"{ZOHO_API_DOMAIN}/crm/v2/Contacts/{path}", headers=headers, **kwargs)
+            if resp.status_code == 401 and attempt == 0:
+                self.token = get_access_token(force_refresh=True, rejected_token=self.token)
+                continue
+            return resp
+        return resp
+
+
+def _fetch_contact_fields(api: _ContactsAPI, contact_id: str, fields: list) -> Optional[dict]:
+    """Requested fields of a contact, None if the contact no longer exists."""
+    resp = api.request('GET', contact_id, params={'fields': ','.join(fields)})
+    if resp.status_code in (204, 404):
+        return None
+    if resp.status_code != 200:
+        logger.warning(f"⚠️ Failed to fetch contact {contact_id}: {resp.status_code}")
+        return {}
+    records = resp.json().get('data') or [{}]
+    return {f: records[0].get(f) for f in fields}
+
+
+def resolve_contact(
+    name: Optional[str],
+    email: Optional[str],
+    phone: Optional[str],
+    fields: Optional[list] = None,
+    contact_id: Optional[str] = None,
+    fallback_name: str = 'Client',
+) -> Optional[ResolvedContact]:
+    """
+    Find or create the Zoho Contact for an email/phone.
+
+    Known contacts (contact_id, or the local cache) cost no Zoho call, or one
+    GET when fields are requested. Otherwise a single Contacts/upsert call
+    matches or creates the contact; only a matched contact whose fields are
+    requested (review requests: Leads Won) is then read by ID. Without a name
+    the upsert leaves the matched contact's name alone, and fallback_name is
+    only used to create a new one.
+
+    Returns:
+        ResolvedContact or None if Zoho returned no contact
+    """
+    if not email and not phone:
+        return None
+
+    from_cache = not contact_id
+    contact_id = contact_id or get_cached_contact_id(email=email, phone=phone)
+    if contact_id and not fields:
+        return ResolvedContact(contact_id)
+
+    api = _ContactsAPI()
+
+    if contact_id:
+        values = _fetch_contact_fields(api, contact_id, fields)
+        if values is not None:
+            return ResolvedContact(contact_id, fields=values)
+        # Deleted or merged in Zoho
+        logger.info(f"📇 Contact {contact_id} no longer exists in Zoho, resolving again")
+        if from_cache:
+            invalidate_contact(contact_id)
+
+    def upsert(last_name):
+        resp = api.request('POST', 'upsert', json=build_contact_upsert(last_name, email, phone))
+        try:
+            contact = contact_from_upsert(resp.json(), email=email, phone=phone)
+        except ValueError:
+            contact = None
+        if contact is None and last_name:
+            logger.warning(f"⚠️ Contact upsert failed: {resp.status_code} {resp.text[:500]}")
+        return contact
+
+    contact = upsert(name)
+    if contact is None and not name:
+        # No existing contact to update: create one under the fallback name
+        contact = upsert(fallback_name)
+    if contact is None:
+        return None
+
+    if fields and not contact.created:
+        contact.fields = _fetch_contact_fields(api, contact.id, fields) or {}
+    return contact
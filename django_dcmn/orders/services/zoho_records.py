@@ -0,0 +1,94 @@
+# orders/services/zoho_records.py
+"""
+Read-through cache for Zoho record reads (get_record_by_id).
+
+One cache entry per module/record holds every field read so far; a read is a
+hit when the entry covers the requested field set (a full-record read covers
+all fields). Entries live ZOHO_RECORD_CACHE_TTL seconds, successful writes
+through update_record_fields / update_records / ZohoCRMClient.update_record
+merge the new values in (write-through), and the CRM tracking webhooks drop
+the entry because the record just changed in Zoho. Hits and misses are
+exported as zoho_cache_lookups_total{cache="record"}.
+"""
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_dcmn import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'zoho_record'
+ALL_FIELDS = '__all__'
+
+
+def _cache_key(module_name: str, record_id: str) -> str:
+    return f'{CACHE_KEY_PREFIX}:{module_name}:{record_id}'
+
+
+def get_cached_record(module_name: str, record_id: str, fields: Optional[list] = None) -> Optional[dict]:
+    """
+    Cached record restricted to `fields` (all fields if None).
+
+    Returns:
+        Record dict or None on a miss
+    """
+    if not settings.ZOHO_RECORD_CACHE_TTL:
+        return None
+    try:
+        entry = cache.get(_cache_key(module_name, str(record_id)))
+    except Exception as e:
+        logger.warning(f"[ZohoRecordCache] Cache unavailable: {e}")
+        return None
+
+    record = (entry or {}).get('record') or {}
+    complete = (entry or {}).get(ALL_FIELDS, False)
+    if entry and (complete if not fields else all(f in record for f in fields)):
+        metrics.observe_cache('record', 'hit')
+        if not fields:
+            return dict(record)
+        return {'id': record.get('id', str(record_id)), **{f: record[f] for f in fields}}
+
+    metrics.observe_cache('record', 'miss')
+    return None
+
+
+def remember_record(module_name: str, record_id: str, record: dict, fields: Optional[list] = None):
+    """Merge a record read from Zoho into the cache (fields=None: full record)."""
+    if not settings.ZOHO_RECORD_CACHE_TTL or not record:
+        return
+    key = _cache_key(module_name, str(record_id))
+    try:
+        entry = cache.get(key) or {'record': {}}
+        entry['record'].update(record)
+        if not fields:
+            entry[ALL_FIELDS] = True
+        cache.set(key, entry, settings.ZOHO_RECORD_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"[ZohoRecordCache] Failed to cache {module_name}/{record_id}: {e}")
+
+
+def write_through(module_name: str, record_id: str, fields: dict):
+    """Apply a successful write to a cached record (nothing cached: nothing to do)."""
+    if not settings.ZOHO_RECORD_CACHE_TTL:
+        return
+    key = _cache_key(module_name, str(record_id))
+    try:
+        entry = cache.get(key)
+        if entry:
+            entry['record'].update({k: v for k, v in fields.items() if k != 'id'})
+            cache.set(key, entry, settings.ZOHO_RECORD_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"[ZohoRecordCache] Write-through failed for {module_name}/{record_id}, dropping it: {e}")
+        invalidate_record(module_name, record_id)
+
+
+def invalidate_record(module_name: str, record_id: str):
+    """Forget a cached record (changed in Zoho)."""
+    try:
+        cache.delete(_cache_key(module_name, str(record_id)))
+    except Exception as e:
+        logger.warning(f"[ZohoRecordCache] Failed to invalidate {module_name}/{record_id}: {e}")
@@ -25,7 +25,12 @@ def test_celery_task():
 
 
 @shared_task
-def sync_order_to_zoho_task(order_id, order_type, tracking_id=None):
+def sync_order_to_zoho_task(order_id, order_type, tracking_id=None, outbox_key=None):
+    """Create (or update the matched phone lead of) an order in Zoho.
+
+    outbox_key: set when delivered by the outbox relay; the outbox row is
+    acknowledged done if the order ends up zoho_synced, else retried.
+    """
     import logging
     logger = logging.getLogger(__name__)
 
@@ -40,6 +45,12 @@ def sync_order_to_zoho_task(order_id, order_type, tracking_id=None):
         "pre-check": (PreCheckSubmission, sync_precheck_to_zoho),
     }
 
+    from . import zoho_circuit
+    from .zoho_circuit import ZohoCircuitOpen
+
+    synced = False
+    error = ''
+    circuit_open = False
     try:
         entry = ORDER_TYPE_MAP.get(order_type)
         if not entry:
@@ -51,6 +62,7 @@ def sync_order_to_zoho_task(order_id, order_type, tracking_id=None):
 
         if order.zoho_synced:
             logger.info(f"[Celery] Order {order_type} #{order_id} already zoho_synced — skipping")
+            synced = True
             return
 
         # Check if this order has a matched phone lead (UPDATE existing Zoho record)
@@ -67,32 +79,264 @@ def sync_order_to_zoho_task(order_id, order_type, tracking_id=None):
             ok = update_matched_zoho_record(order, order_type, tracking_id=tracking_id)
             if ok:
                 order.zoho_synced = True
-                order.save(update_fields=['zoho_synced'])
+                order.zoho_record_id = matched_phone_lead.zoho_lead_id
+                order.save(update_fields=['zoho_synced', 'zoho_record_id'])
                 logger.info(f"[Celery] ✅ Updated Zoho lead for {order_type} #{order_id}, zoho_synced=True")
         else:
             # Normal flow: CREATE new Zoho record
             # (zoho_synced is set inside sync_order_to_zoho / sync_order_with_attribution)
-            if order_type in ("quote", "pre-check"):
+            from . import zoho_async
+            if settings.ZOHO_ASYNC_SYNC_ENABLED and zoho_async.is_available():
+                # Contact, attribution and attachment calls run concurrently
+                zoho_async.run_order_sync(order, order_type, tracking_id=tracking_id)
+            elif order_type in ("quote", "pre-check"):
                 sync_func(order)
             else:
                 sync_func(order, tracking_id=tracking_id)
 
+        synced = order.zoho_synced
+
+    except ZohoCircuitOpen:
+        circuit_open = True
+        logger.warning(f"[Celery] Zoho circuit open, sync of {order_type} order #{order_id} deferred")
+
     except Exception as e:
+        error = str(e)
         logger.error(f"[Celery Task Error] Failed to sync {order_type} order #{order_id} to Zoho: {e}", exc_info=True)
 
+    finally:
+        if outbox_key:
+            # Sync helpers swallow most errors: not synced while Zoho is down is not an attempt
+            circuit_open = circuit_open or (not synced and not zoho_circuit.is_closed())
+            _ack_outbox(outbox_key, synced, error, circuit_open)
+
+
+def _ack_outbox(outbox_key: str, ok: bool, error: str = '', circuit_open: bool = False):
+    """Report the outcome of an outbox-delivered task (circuit open = not an attempt)."""
+    import logging
+    from .services.outbox import complete, defer
+    logger = logging.getLogger(__name__)
+
+    try:
+        if circuit_open:
+            defer(outbox_key)
+        else:
+            complete(outbox_key, ok, error)
+    except Exception as e:
+        logger.exception(f"[Celery] Failed to acknowledge outbox event {outbox_key}: {e}")
+
+
+@shared_task
+def update_phone_lead_in_zoho_task(phone_lead_id, order_data, outbox_key=None):
+    """Push web form data to a matched phone lead's Zoho record (deferred while Zoho was down)."""
+    import logging
+    from .models import PhoneCallLead
+    from .services.phone_lead_matcher import sync_phone_lead_order_to_zoho
+    from .zoho_circuit import ZohoCircuitOpen
+    logger = logging.getLogger(__name__)
+
+    ok, error, circuit_open = False, '', False
+    try:
+        phone_lead = PhoneCallLead.objects.get(id=phone_lead_id)
+        ok = sync_phone_lead_order_to_zoho(phone_lead, order_data)
+    except ZohoCircuitOpen:
+        circuit_open = True
+    except Exception as e:
+        error = str(e)
+        logger.exception(f"[Celery] Failed to update phone lead {phone_lead_id} in Zoho: {e}")
+    finally:
+        if outbox_key:
+            _ack_outbox(outbox_key, ok, error, circuit_open)
+    return ok
+
+
+@shared_task
+def sync_phone_lead_to_zoho_task(phone_lead_id, outbox_key=None):
+    """Create a WhatConverts phone lead in Zoho (deferred while Zoho was down)."""
+    import logging
+    from .models import PhoneCallLead
+    from .services.whatconverts_zoho import sync_phone_lead_to_zoho
+    from . import zoho_circuit
+    logger = logging.getLogger(__name__)
+
+    ok, error = False, ''
+    try:
+        phone_lead = PhoneCallLead.objects.get(id=phone_lead_id)
+        ok = sync_phone_lead_to_zoho(phone_lead)
+    except Exception as e:
+        error = str(e)
+        logger.exception(f"[Celery] Failed to sync phone lead {phone_lead_id} to Zoho: {e}")
+    finally:
+        if outbox_key:
+            # sync_phone_lead_to_zoho swallows errors: a failure while the circuit is open is not an attempt
+            _ack_outbox(outbox_key, ok, error, circuit_open=not ok and not zoho_circuit.is_closed())
+    return ok
+
+
+@shared_task
+def relay_outbox_task() -> int:
+    """Deliver committed outbox events (Zoho sync, Zoho field writes): queued on commit, swept by beat."""
+    import logging
+    from .services.outbox import relay_pending
+    logger = logging.getLogger(__name__)
+
+    try:
+        return relay_pending()
+    except Exception as e:
+        logger.exception(f"[Celery] Outbox relay failed: {e}")
+        return 0
+
+
+@shared_task
+def purge_outbox_task() -> int:
+    """Celery beat: delete delivered outbox events older than OUTBOX_RETENTION_DAYS."""
+    import logging
+    from .services.outbox import purge_done
+    logger = logging.getLogger(__name__)
+
+    deleted = purge_done()
+    if deleted:
+        logger.info(f"[Celery] Purged {deleted} delivered outbox event(s)")
+    return deleted
+
+
+@shared_task
+def process_inbound_events_task(source=None) -> int:
+    """Process pending inbound webhook events (queued on receipt and at retry time; beat sweeps every source)."""
+    import logging
+    from .models import InboundEvent
+    from .services.inbox import drain
+    logger = logging.getLogger(__name__)
+
+    sources = [source] if source else [value for value, _ in InboundEvent.SOURCE_CHOICES]
+    handled = 0
+    for name in sources:
+        try:
+            handled += drain(name)
+        except Exception as e:
+            logger.exception(f"[Celery] Failed to process {name} inbound events: {e}")
+    return handled
+
+
+@shared_task
+def purge_inbound_events_task() -> int:
+    """Celery beat: delete processed inbound events older than INBOX_RETENTION_DAYS."""
+    import logging
+    from .services.inbox import purge_done
+    logger = logging.getLogger(__name__)
+
+    deleted = purge_done()
+    if deleted:
+        logger.info(f"[Celery] Purged {deleted} processed inbound event(s)")
+    return deleted
+
+
+@shared_task(bind=True)
+def run_intake_step_task(self, order_type, order_id, step):
+    """Run one step of an order's intake pipeline (services/intake.py).
+
+    A failed step is retried with backoff up to INTAKE_STEP_RETRIES times,
+    then left failed and resumed later (resume_intake_pipeline_task); it
+    never raises, so the steps chained after it still run.
+    """
+    import logging
+    from .services.intake import run_step, schedule_resume
+    logger = logging.getLogger(__name__)
+
+    try:
+        ok = run_step(order_type, order_id, step)
+    except Exception as e:
+        logger.exception(f"[Celery] Intake step '{step}' crashed for {order_type} order #{order_id}: {e}")
+        ok = False
+
+    if not ok and self.request.retries < settings.INTAKE_STEP_RETRIES:
+        raise self.retry(countdown=settings.INTAKE_STEP_RETRY_BACKOFF * 2 ** self.request.retries)
+    if not ok:
+        schedule_resume(order_type, order_id)
+    return ok
+
+
+@shared_task
+def resume_intake_pipeline_task(order_type, order_id) -> bool:
+    """Restart the failed steps of one order's intake pipeline (scheduled by run_intake_step_task)."""
+    import logging
+    from .services.intake import resume_order
+    logger = logging.getLogger(__name__)
+
+    try:
+        return resume_order(order_type, order_id)
+    except Exception as e:
+        logger.exception(f"[Celery] Failed to resume intake pipeline of {order_type} order #{order_id}: {e}")
+        return False
+
+
+@shared_task
+def resume_intake_pipelines_task() -> int:
+    """Celery beat: restart intake pipelines that were never queued, lost, or still have failed steps."""
+    import logging
+    from .services.intake import resume_stalled
+    logger = logging.getLogger(__name__)
+
+    try:
+        return resume_stalled()
+    except Exception as e:
+        logger.exception(f"[Celery] Failed to resume intake pipelines: {e}")
+        return 0
+
+
+@shared_task
+def purge_idempotency_keys_task() -> int:
+    """Celery beat: delete expired idempotency keys of order-creation / checkout POSTs."""
+    import logging
+    from .services.idempotency import purge_expired
+    logger = logging.getLogger(__name__)
+
+    deleted = purge_expired()
+    if deleted:
+        logger.info(f"[Celery] Purged {deleted} expired idempotency key(s)")
+    return deleted
+
+
+@shared_task
+def refresh_zoho_token_task():
+    """Celery beat: renew the Zoho access token before it expires."""
+    import logging
+    from .zoho_auth import token_manager
+    logger = logging.getLogger(__name__)
+
+    try:
+        refreshed = token_manager.refresh_if_expiring(settings.ZOHO_TOKEN_REFRESH_AHEAD)
+        stats = token_manager.get_stats()
+        logger.info(f"[Celery] Zoho token check: refreshed={refreshed}, stats={stats}")
+        return refreshed
+    except Exception as e:
+        logger.exception(f"[Celery] Proactive Zoho token refresh failed: {e}")
+        return False
+
 
 @shared_task
 def write_tracking_id_to_zoho_task(module_name: str, record_id: str, tracking_id: str) -> bool:
     """Persist TID to Zoho record using configured custom field name.
     Adjust the field key below to your Zoho module custom field.
+
+    The update goes through the Zoho write buffer, so TID write-backs for many
+    records (e.g. after a CRM import) are sent as batched PUTs.
+    Falls back to a direct PUT if the buffer (Redis) is unavailable.
     """
     import logging
+    from .zoho_write_buffer import enqueue_update
     logger = logging.getLogger(__name__)
     
     # Example: custom field API name 'Tracking_ID'
     fields = {"Tracking_ID": tracking_id}
     logger.info(f"[Celery] write_tracking_id_to_zoho_task: module={module_name}, record_id={record_id}, tid={tracking_id}")
     
+    try:
+        enqueue_update(module_name, record_id, fields)
+        return True
+    except Exception as e:
+        logger.warning(f"[Celery] Write buffer unavailable ({e}), writing Tracking_ID={tracking_id} directly")
+
     try:
         ok = update_record_fields(module_name, record_id, fields)
         if not ok:
@@ -105,6 +349,48 @@ def write_tracking_id_to_zoho_task(module_name: str, record_id: str, tracking_id
         return False
 
 
+@shared_task
+def flush_zoho_write_buffer_task(module_name: str | None = None) -> dict:
+    """Flush buffered Zoho updates for one module (or every pending module) as batched PUTs.
+
+    Batches holding a TID write-back go out as interactive Zoho operations
+    (see zoho_write_buffer); the rest run at the default sync priority.
+    """
+    import logging
+    from .zoho_write_buffer import flush_module, pending_modules
+    logger = logging.getLogger(__name__)
+
+    modules = [module_name] if module_name else pending_modules()
+    results = {}
+    for module in modules:
+        try:
+            statuses = flush_module(module)
+            results[module] = statuses
+            if statuses:
+                summary = {s: list(statuses.values()).count(s) for s in set(statuses.values())}
+                logger.info(f"[Celery] Zoho write buffer {module}: {summary}")
+        except Exception as e:
+            logger.exception(f"[Celery] Failed to flush Zoho write buffer for {module}: {e}")
+    return results
+
+
+@shared_task
+def resume_zoho_attachment_uploads_task() -> int:
+    """Celery beat: finish attachment uploads that failed or were cut off by a crash."""
+    import logging
+    from .services.zoho_attachments import resume_pending_uploads
+    logger = logging.getLogger(__name__)
+
+    try:
+        uploaded = resume_pending_uploads()
+        if uploaded:
+            logger.info(f"[Celery] Resumed Zoho attachment uploads: {uploaded} file(s) uploaded")
+        return uploaded
+    except Exception as e:
+        logger.exception(f"[Celery] Failed to resume Zoho attachment uploads: {e}")
+        return 0
+
+
 @shared_task(
     bind=True,
     autoretry_for=(Exception,),
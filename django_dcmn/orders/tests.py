@@ -47,3 +47,1244 @@ class TrackingApiTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         t = Track.objects.get(tid='ABC123')
         self.assertEqual(t.current_stage, 'submitted')
+
+
+# ---------------------------------------------------------------------------
+# Contact keys and exact-match matchers
+# ---------------------------------------------------------------------------
+
+import hashlib
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.utils import timezone
+
+from .models import (
+    EmbassyLegalizationOrder, FileAttachment, InboundEvent, OrderIndex, PhoneCallLead, ZohoAttachmentSync,
+)
+from .services import inbox
+from .services.whatconverts import find_duplicate_phone_lead, find_matching_order
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_embassy_order(**kwargs):
+    fields = {
+        'name': 'Jane Roe', 'email': 'Jane.Roe@Example.com', 'phone': '+1 (555) 123-4567',
+        'address': '1 Main St', 'document_type': 'Diploma', 'country': 'Spain',
+    }
+    fields.update(kwargs)
+    return EmbassyLegalizationOrder.objects.create(**fields)
+
+
+class ContactKeysTests(TestCase):
+    def test_keys_computed_on_save(self):
+        order = make_embassy_order()
+        self.assertEqual(order.phone_last10, '5551234567')
+        self.assertEqual(order.email_lower, 'jane.roe@example.com')
+
+    def test_update_fields_with_contact_field_saves_keys(self):
+        order = make_embassy_order()
+        order.phone = '555.987.6543'
+        order.save(update_fields=['phone'])
+        order.refresh_from_db()
+        self.assertEqual(order.phone_last10, '5559876543')
+
+    def test_update_fields_without_contact_field_leaves_keys(self):
+        order = make_embassy_order()
+        EmbassyLegalizationOrder.objects.filter(pk=order.pk).update(phone_last10='')
+        order.comments = 'note'
+        order.save(update_fields=['comments'])
+        order.refresh_from_db()
+        self.assertEqual(order.phone_last10, '')
+
+    def test_duplicate_phone_lead_exact_match_within_service(self):
+        lead = PhoneCallLead.objects.create(
+            whatconverts_lead_id='1', raw_webhook_data={}, contact_phone='15551234567', detected_service='fbi',
+        )
+        self.assertEqual(find_duplicate_phone_lead(phone='(555) 123-4567', service_type='fbi'), lead)
+        self.assertIsNone(find_duplicate_phone_lead(phone='(555) 123-4567', service_type='i9'))
+        self.assertIsNone(find_duplicate_phone_lead(phone='555-123-456', service_type='fbi'))
+
+    def test_matching_order_by_email_within_service(self):
+        order = make_embassy_order()
+        self.assertEqual(find_matching_order(email='jane.roe@example.com', service_type='embassy'), ('embassy', order.id, order))
+        self.assertIsNone(find_matching_order(email='jane.roe@example.com', service_type='fbi'))
+
+
+# ---------------------------------------------------------------------------
+# OrderIndex signal sync
+# ---------------------------------------------------------------------------
+
+class OrderIndexTests(TestCase):
+    def test_row_follows_order_save_and_delete(self):
+        order = make_embassy_order()
+        row = OrderIndex.objects.get(order_type='embassy', order_id=order.pk)
+        self.assertEqual((row.phone_last10, row.email_lower), ('5551234567', 'jane.roe@example.com'))
+
+        order.email = 'new@example.com'
+        order.save(update_fields=['email'])
+        row.refresh_from_db()
+        self.assertEqual(row.email_lower, 'new@example.com')
+
+        order.delete()
+        self.assertFalse(OrderIndex.objects.filter(order_type='embassy', order_id=order.pk).exists())
+
+    def test_track_copies_tid_to_its_order(self):
+        order = make_embassy_order()
+        Track.objects.create(tid='TID123', service='embassy_legalization',
+                             data={'order_type': 'embassy', 'order_id': order.pk})
+        self.assertEqual(OrderIndex.objects.get(order_type='embassy', order_id=order.pk).tid, 'TID123')
+
+
+# ---------------------------------------------------------------------------
+# Inbound event inbox
+# ---------------------------------------------------------------------------
+
+@override_settings(CACHES=LOCMEM_CACHE, INBOX_MAX_ATTEMPTS=2)
+class InboxTests(TestCase):
+    handler = 'orders.services.whatconverts.handle_whatconverts_webhook'
+
+    def receive(self, event_id, sequence_key=''):
+        event, _ = inbox.receive(InboundEvent.SOURCE_WHATCONVERTS, event_id, {'lead_id': event_id},
+                                 sequence_key=sequence_key, queue=False)
+        return event
+
+    def test_receive_dedups_on_event_id(self):
+        first, created = inbox.receive(InboundEvent.SOURCE_WHATCONVERTS, '1:new', {}, queue=False)
+        again, created_again = inbox.receive(InboundEvent.SOURCE_WHATCONVERTS, '1:new', {}, queue=False)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, again.pk)
+
+    def test_process_records_result(self):
+        event = self.receive('1:new')
+        with mock.patch(self.handler, return_value={'status': 'success'}) as handler:
+            self.assertTrue(inbox.process(event))
+        handler.assert_called_once_with({'lead_id': '1:new'}, {})
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.result), (InboundEvent.STATUS_DONE, 1, {'status': 'success'}))
+        self.assertIsNotNone(event.duration_ms)
+
+    def test_failure_backs_off_then_gives_up(self):
+        event = self.receive('1:new')
+        with mock.patch(self.handler, side_effect=RuntimeError('boom')):
+            self.assertFalse(inbox.process(event))
+            event.refresh_from_db()
+            self.assertEqual((event.status, event.attempts), (InboundEvent.STATUS_PENDING, 1))
+            self.assertGreater(event.available_at, timezone.now())
+
+            # Not due yet: not claimed
+            self.assertFalse(inbox.process(event))
+            InboundEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+            event.refresh_from_db()
+            self.assertFalse(inbox.process(event))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.last_error), (InboundEvent.STATUS_FAILED, 2, 'boom'))
+
+    def test_processing_lease(self):
+        event = self.receive('1:new')
+        self.assertTrue(inbox._claim(event))
+        self.assertFalse(inbox._claim(InboundEvent.objects.get(pk=event.pk)))
+
+        # Lease expired (crashed worker): claimable again
+        InboundEvent.objects.filter(pk=event.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(inbox._claim(InboundEvent.objects.get(pk=event.pk)))
+
+    def test_drain_keeps_sequence_order(self):
+        first = self.receive('7:new', sequence_key='7')
+        second = self.receive('7:update', sequence_key='7')
+        other = self.receive('8:new', sequence_key='8')
+
+        def handle(payload, meta):
+            if payload['lead_id'] == '7:new':
+                raise RuntimeError('boom')
+            return {'status': 'success'}
+
+        with mock.patch(self.handler, side_effect=handle):
+            inbox.drain(InboundEvent.SOURCE_WHATCONVERTS)
+        statuses = dict(InboundEvent.objects.values_list('event_id', 'status'))
+        self.assertEqual(statuses[first.event_id], InboundEvent.STATUS_PENDING)
+        self.assertEqual(statuses[second.event_id], InboundEvent.STATUS_PENDING)  # waits for 7:new
+        self.assertEqual(statuses[other.event_id], InboundEvent.STATUS_DONE)
+
+    def test_retry_resets_failed_events(self):
+        event = self.receive('1:new')
+        InboundEvent.objects.filter(pk=event.pk).update(status=InboundEvent.STATUS_FAILED, attempts=2)
+        self.assertEqual(inbox.retry(InboundEvent.objects.all()), 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (InboundEvent.STATUS_PENDING, 0))
+
+    def test_failure_queues_drain_when_retry_is_due(self):
+        event = self.receive('1:new')
+        with mock.patch(self.handler, side_effect=RuntimeError('boom')), \
+                mock.patch('orders.tasks.process_inbound_events_task.apply_async') as apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            inbox.process(event)
+        apply_async.assert_called_once_with(
+            (InboundEvent.SOURCE_WHATCONVERTS,), countdown=inbox._retry_delay(1).total_seconds())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('orders.views.tracking.send_tracking_email_task')
+class InlineWebhookTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        settings.ZOHO_WEBHOOK_TOKEN = 'testtoken'
+
+    def post(self, name, payload):
+        return self.client.post(reverse(name), payload, format='json', HTTP_X_ZOHO_TOKEN='testtoken')
+
+    def test_create_is_recorded_and_not_deduplicated_by_content(self, _email):
+        payload = {'name': 'John Doe', 'email': 'john@example.com', 'service': 'translation'}
+        first = self.post('tracking_crm_create', payload)
+        second = self.post('tracking_crm_create', payload)
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertNotEqual(first.data['tid'], second.data['tid'])
+        self.assertEqual(InboundEvent.objects.filter(source=InboundEvent.SOURCE_ZOHO_TRACKING_CREATE,
+                                                     status=InboundEvent.STATUS_DONE).count(), 2)
+
+    def test_stage_correction_is_applied(self, _email):
+        Track.objects.create(tid='ABC123', service='fbi_apostille',
+                             data={'service': 'fbi_apostille', 'current_stage': 'document_received'})
+        codes = [d['code'] for d in STAGE_DEFS['fbi_apostille']]
+        for stage in (codes[1], codes[2], codes[1]):
+            self.assertEqual(self.post('tracking_crm_update', {'tid': 'ABC123', 'current_stage': stage}).status_code, 200)
+        self.assertEqual(Track.objects.get(tid='ABC123').data['current_stage'], codes[1])
+
+    def test_stage_update_with_modified_time_is_deduplicated(self, _email):
+        Track.objects.create(tid='ABC123', service='fbi_apostille',
+                             data={'service': 'fbi_apostille', 'current_stage': 'document_received'})
+        stage = [d['code'] for d in STAGE_DEFS['fbi_apostille']][1]
+        payload = {'tid': 'ABC123', 'current_stage': stage, 'modified_time': '2026-01-01T10:00:00'}
+        self.post('tracking_crm_update', payload)
+        self.post('tracking_crm_update', payload)
+        self.assertEqual(InboundEvent.objects.filter(source=InboundEvent.SOURCE_ZOHO_TRACKING_UPDATE).count(), 1)
+
+
+# ---------------------------------------------------------------------------
+# Zoho attachment ledger
+# ---------------------------------------------------------------------------
+
+class AttachmentLedgerTests(TestCase):
+    content = b'%PDF-1.4 test file'
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, ZOHO_ATTACHMENT_MAX_ATTEMPTS=2)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.order = make_embassy_order()
+        self.attachment = FileAttachment(content_object=self.order)
+        self.attachment.file.save('passport.pdf', ContentFile(self.content))
+
+    def attach(self, status_code=200):
+        from .services.zoho_attachments import attach_order_files
+
+        def post(url, headers=None, data=None, **kwargs):
+            data.read()  # the body is streamed like requests would
+            response = mock.Mock(status_code=status_code, text='')
+            response.json.return_value = {'data': [{'code': 'SUCCESS', 'details': {'id': 'Z1'}}]}
+            return response
+
+        with mock.patch('orders.zoho_transport.post', side_effect=post) as transport:
+            uploaded = attach_order_files(self.order, 'Embassy_Legalization', 'R1', access_token='token')
+        return uploaded, transport.call_count
+
+    def test_uploaded_file_is_skipped(self):
+        self.assertEqual(self.attach(), (1, 1))
+        ledger = ZohoAttachmentSync.objects.get(file_attachment=self.attachment)
+        self.assertEqual(ledger.status, ZohoAttachmentSync.STATUS_UPLOADED)
+        self.assertEqual(ledger.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(ledger.size, len(self.content))
+
+        self.assertEqual(self.attach(), (0, 0))
+
+    def test_attempts_are_capped_per_file(self):
+        self.assertEqual(self.attach(status_code=500), (0, 1))
+        self.assertEqual(self.attach(status_code=500), (0, 1))
+        self.assertEqual(self.attach(status_code=500), (0, 0))
+        ledger = ZohoAttachmentSync.objects.get(file_attachment=self.attachment)
+        self.assertEqual((ledger.status, ledger.attempts), (ZohoAttachmentSync.STATUS_FAILED, 2))
+
+    def test_crashed_upload_resumed_from_zoho(self):
+        ZohoAttachmentSync.objects.create(
+            file_attachment=self.attachment, zoho_module='Embassy_Legalization', zoho_record_id='R1',
+            status=ZohoAttachmentSync.STATUS_UPLOADING, attempts=1,
+        )
+        ZohoAttachmentSync.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        existing = [{'id': 'Z9', 'File_Name': 'passport.pdf', 'Size': len(self.content)}]
+
+        with mock.patch('orders.services.zoho_attachments.list_record_attachments', return_value=existing):
+            self.assertEqual(self.attach(), (0, 0))
+        ledger = ZohoAttachmentSync.objects.get(file_attachment=self.attachment)
+        self.assertEqual((ledger.status, ledger.zoho_attachment_id), (ZohoAttachmentSync.STATUS_UPLOADED, 'Z9'))
+
+    def test_crashed_upload_left_alone_when_zoho_cannot_be_listed(self):
+        ZohoAttachmentSync.objects.create(
+            file_attachment=self.attachment, zoho_module='Embassy_Legalization', zoho_record_id='R1',
+            status=ZohoAttachmentSync.STATUS_UPLOADING, attempts=1,
+        )
+        ZohoAttachmentSync.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+        with mock.patch('orders.services.zoho_attachments.list_record_attachments', side_effect=RuntimeError('down')):
+            self.assertEqual(self.attach(), (0, 0))
+        ledger = ZohoAttachmentSync.objects.get(file_attachment=self.attachment)
+        self.assertEqual((ledger.status, ledger.attempts), (ZohoAttachmentSync.STATUS_UPLOADING, 1))
+
+    def test_same_content_is_not_sent_twice(self):
+        self.attach()
+        again = FileAttachment(content_object=self.order)
+        again.file.save('passport-copy.pdf', ContentFile(self.content))
+
+        self.assertEqual(self.attach(), (0, 0))
+        ledger = ZohoAttachmentSync.objects.get(file_attachment=again)
+        self.assertEqual((ledger.status, ledger.zoho_attachment_id), (ZohoAttachmentSync.STATUS_UPLOADED, 'Z1'))
+
+    def test_circuit_open_does_not_use_up_attempts(self):
+        from .services.zoho_attachments import attach_order_files
+        from .zoho_circuit import ZohoCircuitOpen
+
+        with mock.patch('orders.zoho_transport.post', side_effect=ZohoCircuitOpen('open')):
+            self.assertEqual(attach_order_files(self.order, 'Embassy_Legalization', 'R1', access_token='token'), 0)
+        ledger = ZohoAttachmentSync.objects.get(file_attachment=self.attachment)
+        self.assertEqual((ledger.status, ledger.attempts), (ZohoAttachmentSync.STATUS_FAILED, 0))
+
+
+# ---------------------------------------------------------------------------
+# Outbox relay
+# ---------------------------------------------------------------------------
+
+from .models import Outbox
+from .services import outbox
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class OutboxTests(TestCase):
+    def enqueue_sync(self, order_id=1):
+        with mock.patch('orders.services.outbox.kick_relay'):
+            return outbox.enqueue(outbox.TOPIC_ZOHO_SYNC_ORDER,
+                                  {'order_id': order_id, 'order_type': 'embassy_legalization'},
+                                  f'sync:{order_id}')
+
+    def test_enqueue_dedups_and_kicks_relay_on_commit(self):
+        with mock.patch('orders.tasks.relay_outbox_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = outbox.enqueue(outbox.TOPIC_ZOHO_SYNC_ORDER, {'order_id': 1}, 'sync:1')
+                again = outbox.enqueue(outbox.TOPIC_ZOHO_SYNC_ORDER, {'order_id': 1}, 'sync:1')
+        self.assertEqual(first.pk, again.pk)
+        delay.assert_called_once_with()
+
+    @mock.patch('orders.tasks.sync_order_to_zoho_task.apply_async')
+    def test_relay_dispatches_until_acknowledged(self, apply_async):
+        row = self.enqueue_sync()
+        self.assertEqual(outbox.relay_batch(), 1)
+        apply_async.assert_called_once()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Outbox.STATUS_DISPATCHED, 1))
+
+        # Not redelivered before OUTBOX_REDELIVER_AFTER
+        self.assertEqual(outbox.relay_batch(), 0)
+
+        outbox.complete(row.idempotency_key, ok=True)
+        row.refresh_from_db()
+        self.assertEqual(row.status, Outbox.STATUS_DONE)
+
+    @mock.patch('orders.tasks.sync_order_to_zoho_task.apply_async', side_effect=RuntimeError('broker down'))
+    def test_failed_dispatch_backs_off(self, apply_async):
+        row = self.enqueue_sync()
+        outbox.relay_batch()
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts, row.last_error), (Outbox.STATUS_PENDING, 1, 'broker down'))
+        self.assertGreater(row.available_at, timezone.now())
+        self.assertEqual(outbox.relay_batch(), 0)
+
+    @mock.patch('orders.tasks.sync_order_to_zoho_task.apply_async')
+    def test_unacknowledged_row_is_redelivered(self, apply_async):
+        row = self.enqueue_sync()
+        outbox.relay_batch()
+        Outbox.objects.filter(pk=row.pk).update(
+            dispatched_at=timezone.now() - timedelta(seconds=settings.OUTBOX_REDELIVER_AFTER + 1))
+        self.assertEqual(outbox.relay_batch(), 1)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Outbox.STATUS_DISPATCHED, 2))
+
+    def test_defer_does_not_count_the_attempt(self):
+        row = self.enqueue_sync()
+        Outbox.objects.filter(pk=row.pk).update(status=Outbox.STATUS_DISPATCHED, attempts=1)
+        outbox.defer(row.idempotency_key, delay=30)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Outbox.STATUS_PENDING, 0))
+
+
+# ---------------------------------------------------------------------------
+# Intake pipeline resume
+# ---------------------------------------------------------------------------
+
+from .services import intake
+
+
+@mock.patch('orders.services.intake.launch', return_value=True)
+class IntakeResumeTests(TestCase):
+    def make_order(self, steps, age=3600):
+        updated_at = (timezone.now() - timedelta(seconds=age)).isoformat()
+        order = make_embassy_order()
+        order.intake_status = {
+            'pending': True, 'context': {},
+            'steps': {step: {'status': status, 'attempts': attempts, 'error': '', 'updated_at': updated_at}
+                      for step, (status, attempts) in steps.items()},
+        }
+        order.save(update_fields=['intake_status'])
+        return order
+
+    def test_resume_order_restarts_idle_failed_steps(self, launch):
+        order = self.make_order({
+            intake.STEP_ATTRIBUTION: (intake.STEP_DONE, 1),
+            intake.STEP_WELCOME_EMAIL: (intake.STEP_FAILED, 4),
+        })
+        self.assertTrue(intake.resume_order('embassy', order.id))
+        launch.assert_called_once_with('embassy', order.id, [intake.STEP_WELCOME_EMAIL])
+
+        # Touched: not resumed again until idle once more
+        launch.reset_mock()
+        self.assertFalse(intake.resume_order('embassy', order.id))
+        launch.assert_not_called()
+
+    def test_exhausted_steps_close_the_pipeline(self, launch):
+        order = self.make_order({intake.STEP_WELCOME_EMAIL: (intake.STEP_FAILED, settings.INTAKE_MAX_ATTEMPTS)})
+        self.assertFalse(intake.resume_order('embassy', order.id))
+        launch.assert_not_called()
+        order.refresh_from_db()
+        self.assertFalse(order.intake_status['pending'])
+
+    def test_failed_step_schedules_resume(self, launch):
+        order = self.make_order({intake.STEP_WELCOME_EMAIL: (intake.STEP_PENDING, 0)}, age=0)
+        with mock.patch.dict(intake.STEPS, {intake.STEP_WELCOME_EMAIL: mock.Mock(return_value=False)}), \
+                mock.patch('orders.tasks.resume_intake_pipeline_task.apply_async') as apply_async, \
+                override_settings(INTAKE_STEP_RETRIES=0):
+            from .tasks import run_intake_step_task
+            self.assertFalse(run_intake_step_task.apply(('embassy', order.id, intake.STEP_WELCOME_EMAIL)).get())
+        apply_async.assert_called_once_with(('embassy', order.id), countdown=settings.INTAKE_RESUME_AFTER + 5)
+
+
+# ---------------------------------------------------------------------------
+# Zoho contact resolution
+# ---------------------------------------------------------------------------
+
+from django.core.cache import cache
+
+from .services import zoho_contacts
+
+
+def zoho_response(status_code=200, data=None):
+    resp = mock.Mock(status_code=status_code, text='')
+    resp.json.return_value = data or {}
+    return resp
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('orders.zoho_sync.get_access_token', return_value='token')
+class ResolveContactTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def upserted(self, action='insert', contact_id='111'):
+        return zoho_response(data={'data': [{'code': 'SUCCESS', 'action': action, 'details': {'id': contact_id}}]})
+
+    def test_miss_is_one_upsert_then_cached(self, token):
+        with mock.patch('orders.zoho_transport.request', return_value=self.upserted()) as request:
+            contact = zoho_contacts.resolve_contact('Jane Roe', 'jane@example.com', '+1 555 123 4567')
+            again = zoho_contacts.resolve_contact('Jane Roe', 'JANE@example.com', '')
+        self.assertEqual((contact.id, contact.created, again.id), ('111', True, '111'))
+        request.assert_called_once()
+        method, url = request.call_args.args
+        self.assertEqual((method, url.rsplit('/', 2)[-2:]), ('POST', ['Contacts', 'upsert']))
+        self.assertEqual(request.call_args.kwargs['json'], {
+            'data': [{'Last_Name': 'Jane Roe', 'Email': 'jane@example.com', 'Phone': '+1 555 123 4567'}],
+            'duplicate_check_fields': ['Email', 'Phone'],
+        })
+
+    def test_nameless_miss_creates_under_fallback_name(self, token):
+        failed = zoho_response(400, {'data': [{'code': 'MANDATORY_NOT_FOUND', 'details': {}}]})
+        with mock.patch('orders.zoho_transport.request', side_effect=[failed, self.upserted()]) as request:
+            contact = zoho_contacts.resolve_contact('', '', '5551234567', fallback_name='Phone Lead')
+        self.assertEqual(contact.id, '111')
+        self.assertNotIn('Last_Name', request.call_args_list[0].kwargs['json']['data'][0])
+        self.assertEqual(request.call_args_list[1].kwargs['json']['data'][0]['Last_Name'], 'Phone Lead')
+
+    def test_fields_of_a_cached_contact_cost_one_get(self, token):
+        zoho_contacts.remember_contact('222', email='jane@example.com')
+        fetched = zoho_response(data={'data': [{'Number_of_Leads_Won': 2}]})
+        with mock.patch('orders.zoho_transport.request', return_value=fetched) as request:
+            contact = zoho_contacts.resolve_contact('Jane', 'jane@example.com', '', fields=['Number_of_Leads_Won'])
+        self.assertEqual((contact.id, contact.fields), ('222', {'Number_of_Leads_Won': 2}))
+        self.assertEqual(request.call_args.args[0], 'GET')
+
+
+# ---------------------------------------------------------------------------
+# Zoho schema: diff-only updates and stage fields
+# ---------------------------------------------------------------------------
+
+from . import zoho_schema
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ZohoSchemaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_changed_fields_drops_values_already_written(self):
+        fields = {'Client_Name': 'Jane', 'Phone': '5551234567'}
+        self.assertEqual(zoho_schema.changed_fields('Deals', '1', fields), fields)
+
+        zoho_schema.remember_synced('Deals', '1', fields)
+        self.assertEqual(zoho_schema.changed_fields('Deals', '1', fields), {})
+        self.assertEqual(zoho_schema.changed_fields('Deals', '1', {**fields, 'Phone': '5559876543'}),
+                         {'Phone': '5559876543'})
+        # State is per record
+        self.assertEqual(zoho_schema.changed_fields('Deals', '2', fields), fields)
+
+    def test_changed_fields_sends_everything_without_cache(self):
+        with mock.patch('orders.zoho_schema.cache.get', side_effect=ConnectionError('down')):
+            self.assertEqual(zoho_schema.changed_fields('Deals', '1', {'Stage': 'x'}), {'Stage': 'x'})
+
+    def test_stage_field_per_module(self):
+        self.assertEqual(zoho_schema.get_stage_field('Get_A_Quote_Leads'), 'GET_A_QUOTE_LEADS')
+        self.assertEqual(zoho_schema.get_stage_field('Notary_Services'), 'Notary_Stages')
+        self.assertEqual(zoho_schema.get_stage_field('Unknown'), 'Stage')
+
+    def test_quote_update_resends_services(self):
+        from types import SimpleNamespace
+        quote = SimpleNamespace(id=1, name='Jane', email='j@example.com', phone='555', number=2, address='x',
+                                appointment_date='2026-01-01', appointment_time='10:00', services='Apostille',
+                                comments='')
+        self.assertEqual(zoho_schema.get_order_schema('quote').build_update(quote)['GET_A_QUOTE_LEADS'], 'Apostille')
+
+
+# ---------------------------------------------------------------------------
+# Zoho operation classes
+# ---------------------------------------------------------------------------
+
+from . import zoho_ratelimit, zoho_write_buffer
+
+
+class ZohoOperationTests(TestCase):
+    def test_operation_scopes_the_class(self):
+        self.assertEqual(zoho_ratelimit.current_operation(), zoho_ratelimit.SYNC)
+        with zoho_ratelimit.operation(zoho_ratelimit.BACKGROUND):
+            with zoho_ratelimit.operation(zoho_ratelimit.INTERACTIVE):
+                self.assertEqual(zoho_ratelimit.current_operation(), zoho_ratelimit.INTERACTIVE)
+            self.assertEqual(zoho_ratelimit.current_operation(), zoho_ratelimit.BACKGROUND)
+        self.assertEqual(zoho_ratelimit.current_operation(), zoho_ratelimit.SYNC)
+
+    def test_unknown_class_is_rejected(self):
+        with self.assertRaises(ValueError):
+            with zoho_ratelimit.operation('urgent'):
+                pass
+
+    def test_write_buffer_batch_with_tid_write_back_is_interactive(self):
+        conn = mock.Mock()
+        conn.pipeline.return_value.execute.return_value = [False, True]
+        self.assertEqual(zoho_write_buffer._batch_operation(conn, 'Deals', ['1', '2']), zoho_ratelimit.INTERACTIVE)
+
+        conn.pipeline.return_value.execute.return_value = [False, False]
+        self.assertEqual(zoho_write_buffer._batch_operation(conn, 'Deals', ['1', '2']), zoho_ratelimit.SYNC)
+
+
+# ---------------------------------------------------------------------------
+# Zoho token manager
+# ---------------------------------------------------------------------------
+
+from . import zoho_auth
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ZohoTokenManagerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager = zoho_auth.ZohoTokenManager()
+        self.lock = mock.Mock()
+        patcher = mock.patch.object(cache, 'lock', create=True, return_value=self.lock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_refresh_publishes_token_for_other_processes(self):
+        self.lock.acquire.return_value = True
+        resp = mock.Mock(status_code=200)
+        resp.json.return_value = {'access_token': 'new', 'expires_in': 3600}
+        with mock.patch('orders.zoho_transport.post', return_value=resp) as post:
+            self.assertEqual(self.manager.get_token(), 'new')
+            self.assertEqual(zoho_auth.ZohoTokenManager().get_token(), 'new')
+        post.assert_called_once()
+        self.lock.release.assert_called_once()
+
+    def test_lock_wait_timeout_takes_published_token(self):
+        self.lock.acquire.return_value = False
+        cache.set_many({zoho_auth.TOKEN_CACHE_KEY: 'fresh', zoho_auth.TOKEN_EXPIRES_KEY: time.time() + 3600})
+        with mock.patch('orders.zoho_transport.post') as post:
+            self.assertEqual(self.manager.recover_from_401('stale'), 'fresh')
+        post.assert_not_called()
+
+    def test_lock_wait_timeout_does_not_refresh_unlocked(self):
+        self.lock.acquire.return_value = False
+        with mock.patch('orders.zoho_transport.post') as post:
+            with self.assertRaises(zoho_auth.ZohoTokenUnavailable):
+                self.manager.get_token()
+        post.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Zoho HTTP transport
+# ---------------------------------------------------------------------------
+
+import requests
+
+from . import zoho_transport
+
+
+@override_settings(ZOHO_RATE_LIMIT_ENABLED=False, ZOHO_CIRCUIT_ENABLED=False)
+class ZohoTransportTests(TestCase):
+    def test_session_is_pooled_per_process(self):
+        session = zoho_transport.get_session()
+        self.assertIs(zoho_transport.get_session(), session)
+        with mock.patch('orders.zoho_transport.os.getpid', return_value=-1):
+            self.assertIsNot(zoho_transport.get_session(), session)
+
+    def test_only_idempotent_methods_retry_on_5xx(self):
+        retry = zoho_transport._build_session().get_adapter('https://www.zohoapis.com').max_retries
+        self.assertEqual(retry.total, settings.ZOHO_HTTP_MAX_RETRIES)
+        self.assertIn('PUT', retry.allowed_methods)
+        self.assertNotIn('POST', retry.allowed_methods)
+
+    def test_default_timeout_applied(self):
+        session = mock.Mock()
+        session.request.return_value = mock.Mock(status_code=200)
+        with mock.patch('orders.zoho_transport.get_session', return_value=session):
+            zoho_transport.get('https://www.zohoapis.com/crm/v2/Deals/1')
+        self.assertEqual(session.request.call_args.kwargs['timeout'], zoho_transport.get_timeout())
+
+    def test_network_error_is_recorded_and_raised(self):
+        session = mock.Mock()
+        session.request.side_effect = requests.ConnectTimeout('slow')
+        with mock.patch('orders.zoho_transport.get_session', return_value=session), \
+                mock.patch('orders.zoho_circuit.record_failure') as record_failure:
+            with self.assertRaises(requests.ConnectTimeout):
+                zoho_transport.post('https://www.zohoapis.com/crm/v2/Deals', json={})
+        record_failure.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Zoho write buffer
+# ---------------------------------------------------------------------------
+
+@override_settings(ZOHO_CIRCUIT_ENABLED=False, ZOHO_WRITE_BUFFER_MAX_ATTEMPTS=2)
+class ZohoWriteBufferTests(TestCase):
+    def setUp(self):
+        self.conn = mock.MagicMock()
+        self.conn.zcard.return_value = 0
+        self.conn.pipeline.return_value.execute.return_value = []
+        patcher = mock.patch('orders.zoho_write_buffer.get_redis_connection', return_value=self.conn)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flush(self, batch, items):
+        with mock.patch('orders.zoho_write_buffer._take_batch', side_effect=[batch, []]), \
+                mock.patch('orders.zoho_sync.update_records', return_value=items) as update_records:
+            statuses = zoho_write_buffer.flush_module('Deals')
+        return statuses, update_records
+
+    def test_merged_records_go_out_in_one_put(self):
+        batch = [('1', {'Tracking_ID': 'A'}), ('2', {'Stage': 'Done', 'Tracking_ID': 'B'})]
+        statuses, update_records = self.flush(batch, [{'code': 'SUCCESS'}, {'code': 'SUCCESS'}])
+        update_records.assert_called_once_with('Deals', [
+            {'id': '1', 'Tracking_ID': 'A'}, {'id': '2', 'Stage': 'Done', 'Tracking_ID': 'B'},
+        ])
+        self.assertEqual(statuses, {'1': 'success', '2': 'success'})
+        self.conn.srem.assert_any_call(zoho_write_buffer.MODULES_KEY, 'Deals')
+
+    def test_failed_record_is_requeued_until_max_attempts(self):
+        self.conn.hincrby.return_value = 1
+        with mock.patch('orders.zoho_write_buffer._requeue') as requeue:
+            statuses, _ = self.flush([('1', {'Stage': 'x'})], [{'code': 'INVALID_DATA'}])
+        self.assertEqual(statuses, {'1': 'retrying'})
+        requeue.assert_called_once_with(self.conn, 'Deals', '1', {'Stage': 'x'})
+
+        self.conn.hincrby.return_value = 2
+        with mock.patch('orders.zoho_write_buffer._requeue') as requeue:
+            statuses, _ = self.flush([('1', {'Stage': 'x'})], [{'code': 'INVALID_DATA'}])
+        self.assertEqual(statuses, {'1': 'failed'})
+        requeue.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Zoho contact cache
+# ---------------------------------------------------------------------------
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ContactCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_keys_are_normalized(self):
+        zoho_contacts.remember_contact('111', email=' Jane@Example.COM ', phone='+1 (555) 123-4567')
+        self.assertEqual(zoho_contacts.get_cached_contact_id(email='jane@example.com'), '111')
+        self.assertEqual(zoho_contacts.get_cached_contact_id(phone='555.123.4567'), '111')
+        self.assertIsNone(zoho_contacts.get_cached_contact_id(email='other@example.com', phone='555-123'))
+
+    def test_db_backs_the_cache(self):
+        zoho_contacts.remember_contact('111', email='jane@example.com')
+        cache.clear()
+        self.assertEqual(zoho_contacts.get_cached_contact_id(email='jane@example.com'), '111')
+
+    def test_invalidate_forgets_every_key(self):
+        zoho_contacts.remember_contact('111', email='jane@example.com', phone='5551234567')
+        self.assertEqual(zoho_contacts.invalidate_contact('111'), 2)
+        self.assertIsNone(zoho_contacts.get_cached_contact_id(email='jane@example.com', phone='5551234567'))
+
+
+# ---------------------------------------------------------------------------
+# Streamed attachment body
+# ---------------------------------------------------------------------------
+
+import io
+
+from .services.zoho_attachments import MultipartFileStream
+
+
+class MultipartFileStreamTests(TestCase):
+    content = b'x' * 200_000  # several CHUNK_SIZE reads
+
+    def test_body_matches_a_multipart_encoding(self):
+        body = MultipartFileStream(io.BytesIO(self.content), 'scan "1".pdf', len(self.content))
+        raw = body.read()
+        self.assertEqual(len(raw), len(body))
+        self.assertTrue(raw.startswith(f'--{body.boundary}\r\n'.encode()))
+        self.assertIn(b'filename="scan %221%22.pdf"', raw)
+        self.assertIn(b'Content-Type: application/pdf\r\n\r\n' + self.content + b'\r\n', raw)
+        self.assertTrue(raw.endswith(f'\r\n--{body.boundary}--\r\n'.encode()))
+        self.assertEqual(body.content_hash, hashlib.sha256(self.content).hexdigest())
+
+    def test_rewind_resends_the_same_bytes(self):
+        body = MultipartFileStream(io.BytesIO(self.content), 'a.pdf', len(self.content))
+        first = b''.join(iter(lambda: body.read(1000), b''))
+        body.seek(0)
+        self.assertEqual(body.read(), first)
+        self.assertEqual(body.content_hash, hashlib.sha256(self.content).hexdigest())
+
+    def test_short_file_fails_instead_of_sending_a_bad_body(self):
+        body = MultipartFileStream(io.BytesIO(b'short'), 'a.pdf', 100)
+        with self.assertRaises(OSError):
+            body.read()
+
+
+# ---------------------------------------------------------------------------
+# Composite attribution + order create
+# ---------------------------------------------------------------------------
+
+from . import zoho_sync
+
+
+def composite_sub(record_id, code='SUCCESS'):
+    return {'details': {'response': {'body': {'data': [{'code': code, 'details': {'id': record_id}}]}}}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ZOHO_COMPOSITE_ENABLED=True)
+class ZohoCompositeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_order_links_the_attribution_sub_request(self):
+        body = zoho_sync.build_composite_order_request(
+            'Deals', {'data': [{'Deal_Name': 'FBI ID1'}], 'duplicate_check_fields': ['Order_ID']}, {})
+        attribution, order = body['__composite_requests']
+        self.assertTrue(body['rollback_on_fail'])
+        self.assertTrue(attribution['uri'].endswith('/upsert'))
+        self.assertEqual(order['uri'], '/crm/v3/Deals/upsert')
+        self.assertEqual(order['body']['data'][0]['Attribution_Record'], {'id': '@{1:$.data[0].details.id}'})
+        self.assertEqual(order['body']['duplicate_check_fields'], ['Order_ID'])
+
+    def test_response_returns_both_ids(self):
+        data = {'__composite_requests': [composite_sub('A1'), composite_sub('D1')]}
+        self.assertEqual(zoho_sync.parse_composite_order_response(200, data), ('A1', 'D1'))
+
+    def test_failed_sub_request_falls_back(self):
+        data = {'__composite_requests': [composite_sub('A1'), composite_sub('D1', code='INVALID_DATA')]}
+        self.assertIsNone(zoho_sync.parse_composite_order_response(207, data))
+        self.assertTrue(zoho_sync.composite_available())
+
+    def test_refused_call_disables_composite_for_a_while(self):
+        self.assertIsNone(zoho_sync.parse_composite_order_response(403, {'code': 'OAUTH_SCOPE_MISMATCH'}))
+        self.assertFalse(zoho_sync.composite_available())
+
+
+# ---------------------------------------------------------------------------
+# Zoho circuit breaker
+# ---------------------------------------------------------------------------
+
+from . import zoho_circuit
+
+
+class FakeRedis:
+    """The few Redis commands the circuit breaker uses, in memory."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return False
+        self.data[key] = str(value).encode()
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def expire(self, key, seconds):
+        return True
+
+    def hincrby(self, key, field, amount=1):
+        counters = self.data.setdefault(key, {})
+        counters[field] = counters.get(field, 0) + amount
+        return counters[field]
+
+    def pipeline(self):
+        conn, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs))
+
+            def execute(self):
+                return [getattr(conn, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+        return Pipeline()
+
+
+@override_settings(ZOHO_CIRCUIT_ENABLED=True, ZOHO_CIRCUIT_FAILURE_THRESHOLD=2, ZOHO_CIRCUIT_OPEN_SECONDS=30)
+class ZohoCircuitTests(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('orders.zoho_circuit.get_redis_connection', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_circuit(self):
+        zoho_circuit.record_response(503)
+        zoho_circuit.record_failure('timeout')
+
+    def test_opens_after_threshold_failures(self):
+        zoho_circuit.record_response(503)
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.CLOSED)
+        zoho_circuit.record_failure('timeout')
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.OPEN)
+        with self.assertRaises(zoho_circuit.ZohoCircuitOpen):
+            zoho_circuit.before_call()
+
+    def test_success_resets_the_failure_count(self):
+        zoho_circuit.record_response(503)
+        zoho_circuit.record_response(200)
+        zoho_circuit.record_response(503)
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.CLOSED)
+
+    def test_client_errors_do_not_count(self):
+        for _ in range(3):
+            zoho_circuit.record_response(400)
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.CLOSED)
+
+    def test_half_open_lets_one_probe_through(self):
+        self.open_circuit()
+        self.redis.set(zoho_circuit.OPEN_UNTIL_KEY, time.time() - 1)
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.HALF_OPEN)
+        zoho_circuit.before_call()
+        with self.assertRaises(zoho_circuit.ZohoCircuitOpen):
+            zoho_circuit.before_call()
+
+    def test_probe_success_closes_and_failure_reopens(self):
+        self.open_circuit()
+        self.redis.set(zoho_circuit.OPEN_UNTIL_KEY, time.time() - 1)
+        zoho_circuit.before_call()
+        zoho_circuit.record_failure('timeout')
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.OPEN)
+
+        self.redis.set(zoho_circuit.OPEN_UNTIL_KEY, time.time() - 1)
+        zoho_circuit.before_call()
+        zoho_circuit.record_response(200)
+        self.assertEqual(zoho_circuit.get_state(), zoho_circuit.CLOSED)
+        zoho_circuit.before_call()
+
+    def test_fails_open_without_redis(self):
+        with mock.patch('orders.zoho_circuit.get_redis_connection', side_effect=ConnectionError('down')):
+            self.assertEqual(zoho_circuit.get_state(), zoho_circuit.CLOSED)
+            zoho_circuit.before_call()
+
+
+# ---------------------------------------------------------------------------
+# Prometheus metrics
+# ---------------------------------------------------------------------------
+
+from django_dcmn import metrics
+
+
+class MetricsTests(TestCase):
+    def test_zoho_operation_labels(self):
+        api = 'https://www.zohoapis.com/crm/v2'
+        self.assertEqual(metrics.zoho_operation('POST', 'https://accounts.zoho.com/oauth/v2/token'), 'token_refresh')
+        self.assertEqual(metrics.zoho_operation('POST', f'{api}/Deals/1/Attachments'), 'attach')
+        self.assertEqual(metrics.zoho_operation('GET', f'{api}/Contacts/search'), 'search')
+        self.assertEqual(metrics.zoho_operation('POST', 'https://www.zohoapis.com/crm/v3/__composite_requests'), 'composite')
+        self.assertEqual(metrics.zoho_operation('PUT', f'{api}/Deals'), 'update')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_requires_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+
+        metrics.observe_zoho('PUT', 'https://www.zohoapis.com/crm/v2/Deals', 0.2, 200)
+        resp = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'zoho_requests_total{operation="update",status="200"}', resp.content)
+
+
+# ---------------------------------------------------------------------------
+# Zoho record read-through cache
+# ---------------------------------------------------------------------------
+
+from .services import zoho_records
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ZOHO_RECORD_CACHE_TTL=300)
+class ZohoRecordCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_needs_every_requested_field(self):
+        zoho_records.remember_record('Deals', '1', {'id': '1', 'Stage': 'New'}, fields=['Stage'])
+        self.assertEqual(zoho_records.get_cached_record('Deals', '1', ['Stage']), {'id': '1', 'Stage': 'New'})
+        self.assertIsNone(zoho_records.get_cached_record('Deals', '1', ['Stage', 'Email_1']))
+        self.assertIsNone(zoho_records.get_cached_record('Deals', '1'))  # not a full read
+
+        zoho_records.remember_record('Deals', '1', {'id': '1', 'Stage': 'New', 'Email_1': 'a@b.c'})
+        self.assertEqual(zoho_records.get_cached_record('Deals', '1')['Email_1'], 'a@b.c')
+
+    def test_write_through_and_invalidate(self):
+        zoho_records.remember_record('Deals', '1', {'id': '1', 'Stage': 'New'})
+        zoho_records.write_through('Deals', '1', {'id': '1', 'Stage': 'Done'})
+        self.assertEqual(zoho_records.get_cached_record('Deals', '1', ['Stage'])['Stage'], 'Done')
+
+        zoho_records.invalidate_record('Deals', '1')
+        self.assertIsNone(zoho_records.get_cached_record('Deals', '1', ['Stage']))
+
+    def test_write_through_does_not_create_entries(self):
+        zoho_records.write_through('Deals', '2', {'Stage': 'Done'})
+        self.assertIsNone(zoho_records.get_cached_record('Deals', '2', ['Stage']))
+
+
+# ---------------------------------------------------------------------------
+# Order create by upsert on a unique key
+# ---------------------------------------------------------------------------
+
+from . import zoho_sync
+
+
+class ZohoUpsertKeyTests(TestCase):
+    def test_create_payload_carries_duplicate_check_key(self):
+        order = make_embassy_order()
+        payload = zoho_schema.get_order_schema('embassy').build_create(order)
+        self.assertEqual(payload['duplicate_check_fields'], ['Name'])
+        self.assertEqual(payload['data'][0]['Name'], f'Embassy ID{order.id}')
+        self.assertEqual(zoho_schema.get_order_schema('fbi').key_field, 'Order_ID')
+
+        self.assertTrue(zoho_sync._create_url('Deals', payload).endswith('/Deals/upsert'))
+        self.assertTrue(zoho_sync._create_url('Deals', {'data': [{}]}).endswith('/Deals'))
+
+    @mock.patch('orders.zoho_sync.get_access_token', return_value='token')
+    def test_record_id_stored_and_create_not_repeated(self, _token):
+        order = make_embassy_order()
+        payload = zoho_schema.get_order_schema('embassy').build_create(order)
+        created = zoho_response(200, {'data': [{'code': 'SUCCESS', 'action': 'update', 'details': {'id': '77'}}]})
+        with mock.patch('orders.zoho_sync.zoho_transport.post', return_value=created) as post:
+            self.assertTrue(zoho_sync.sync_order_to_zoho(order, 'Embassy_Legalization', payload, attach_files=False))
+            post.assert_called_once()
+            self.assertTrue(post.call_args.args[0].endswith('/Embassy_Legalization/upsert'))
+
+        order.refresh_from_db()
+        self.assertEqual(order.zoho_record_id, '77')
+        self.assertTrue(order.zoho_synced)
+
+        # A retry resumes from the stored ID instead of creating again
+        with mock.patch('orders.zoho_sync.zoho_transport.post') as post:
+            self.assertTrue(zoho_sync.sync_order_with_attribution(order, 'Embassy_Legalization', payload,
+                                                                  attach_files=False))
+            post.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Offline Zoho stand-in
+# ---------------------------------------------------------------------------
+
+import json
+import random
+
+from .zoho_fake import FakeZoho, FakeZohoConfig, parse_latency
+
+
+class FakeZohoTests(TestCase):
+    def call(self, fake, method, path, payload=None, token=None, query=None):
+        environ = {'HTTP_AUTHORIZATION': f'Zoho-oauthtoken {token}'} if token else {}
+        body = json.dumps(payload).encode() if payload is not None else b''
+        return fake.handle(method, path, query or {}, body, environ)
+
+    def token(self, fake):
+        return self.call(fake, 'POST', '/oauth/v2/token')[1]['access_token']
+
+    def test_upsert_matches_on_duplicate_check_field(self):
+        fake = FakeZoho()
+        token = self.token(fake)
+        payload = {'data': [{'Name': 'Embassy ID1'}], 'duplicate_check_fields': ['Name']}
+
+        status, body, _ = self.call(fake, 'POST', '/crm/v2/Embassy_Legalization/upsert', payload, token)
+        self.assertEqual((status, body['data'][0]['action']), (201, 'insert'))
+        record_id = body['data'][0]['details']['id']
+
+        status, body, _ = self.call(fake, 'POST', '/crm/v2/Embassy_Legalization/upsert', payload, token)
+        self.assertEqual(body['data'][0]['action'], 'update')
+        self.assertEqual(body['data'][0]['details']['id'], record_id)
+        self.assertEqual(len(fake.records['Embassy_Legalization']), 1)
+
+        # Plain create of a Contact with the same Email is a DUPLICATE_DATA
+        contact = {'data': [{'Last_Name': 'Roe', 'Email': 'j@example.com'}]}
+        self.call(fake, 'POST', '/crm/v2/Contacts', contact, token)
+        status, body, _ = self.call(fake, 'POST', '/crm/v2/Contacts', contact, token)
+        self.assertEqual((status, body['data'][0]['code']), (202, 'DUPLICATE_DATA'))
+
+    def test_composite_resolves_references(self):
+        fake = FakeZoho()
+        token = self.token(fake)
+        status, body, _ = self.call(fake, 'POST', '/crm/v3/__composite_requests', {'__composite_requests': [
+            {'sub_request_id': '1', 'method': 'POST', 'uri': '/crm/v3/Lead_Attribution_Records',
+             'body': {'data': [{'Name': 'A1'}]}},
+            {'sub_request_id': '2', 'method': 'POST', 'uri': '/crm/v3/Deals',
+             'body': {'data': [{'Deal_Name': 'D1', 'Attribution_Record': {'id': '@{1:$.data[0].details.id}'}}]}},
+        ]}, token)
+        self.assertEqual(status, 200)
+        attribution_id = next(iter(fake.records['Lead_Attribution_Records']))
+        deal = next(iter(fake.records['Deals'].values()))
+        self.assertEqual(deal['Attribution_Record'], {'id': attribution_id})
+
+    def test_faults(self):
+        fake = FakeZoho(FakeZohoConfig(token_ttl=-1, rate_limit=1, rate_burst=2, retry_after=3))
+        expired = self.token(fake)
+        status, body, _ = self.call(fake, 'GET', '/crm/v2/Deals/1', token=expired)
+        self.assertEqual((status, body['code']), (401, 'INVALID_TOKEN'))
+
+        status, _, headers = self.call(fake, 'GET', '/crm/v2/Deals/1', token=expired)
+        self.assertEqual((status, headers), (429, [('Retry-After', '3')]))
+        self.assertEqual(fake.stats['injected_429'], 1)
+
+        fake = FakeZoho(FakeZohoConfig(error_rate=1.0, error_statuses=(503,), seed=1))
+        self.assertEqual(self.call(fake, 'POST', '/oauth/v2/token')[0], 503)
+
+    def test_latency_spec(self):
+        self.assertEqual(parse_latency('const:0.2')(None), 0.2)
+        self.assertGreaterEqual(parse_latency('normal:0,1')(random.Random(0)), 0.0)
+        with self.assertRaises(ValueError):
+            parse_latency('pareto:1')
+        with self.assertRaises(IndexError):
+            parse_latency('uniform:0.1')
+
+
+# ---------------------------------------------------------------------------
+# Idempotent order-creation POSTs
+# ---------------------------------------------------------------------------
+
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from .models import IdempotencyKey
+from .services import idempotency
+
+
+class CountingView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    calls = 0
+    status_code = 201
+
+    @idempotency.idempotent
+    def post(self, request):
+        CountingView.calls += 1
+        return Response({'id': CountingView.calls}, status=CountingView.status_code)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CountingView.calls = 0
+        CountingView.status_code = 201
+        self.factory = APIRequestFactory()
+
+    def post(self, data, key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        request = self.factory.post('/api/orders/fbi/', data, format='json', **headers)
+        return CountingView.as_view()(request)
+
+    def test_repeat_with_key_is_replayed(self):
+        first = self.post({'email': 'a@b.c'}, key='k1')
+        self.assertEqual((first.status_code, first.data), (201, {'id': 1}))
+
+        again = self.post({'email': 'a@b.c'}, key='k1')
+        self.assertEqual((again.status_code, again.data), (201, {'id': 1}))
+        self.assertEqual(again[idempotency.REPLAYED_HEADER], 'true')
+        self.assertEqual(CountingView.calls, 1)
+
+        # Replayed from the row when the cache is gone
+        cache.clear()
+        self.assertEqual(self.post({'email': 'a@b.c'}, key='k1').data, {'id': 1})
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_repeat_without_key_is_matched_by_payload(self):
+        self.post({'email': 'a@b.c'})
+        self.assertEqual(self.post({'email': 'a@b.c'})[idempotency.REPLAYED_HEADER], 'true')
+        self.assertEqual(self.post({'email': 'x@b.c'}).data, {'id': 2})
+
+    def test_key_reused_with_other_payload_is_422(self):
+        self.post({'email': 'a@b.c'}, key='k1')
+        response = self.post({'email': 'other@b.c'}, key='k1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_repeat_while_processing_is_409(self):
+        key = idempotency._key('/api/orders/fbi/', 'k1')
+        self.assertIsNone(idempotency.claim(key, '/api/orders/fbi/', 'hash', 600))
+
+        response = self.post({'email': 'a@b.c'}, key='k1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(CountingView.calls, 0)
+
+        # A claim left by a crashed worker is taken over after the lock timeout
+        IdempotencyKey.objects.filter(key=key).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.post({'email': 'a@b.c'}, key='k1').status_code, 201)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_error_releases_key(self):
+        CountingView.status_code = 400
+        self.assertEqual(self.post({'email': 'a@b.c'}, key='k1').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        CountingView.status_code = 201
+        self.assertEqual(self.post({'email': 'a@b.c'}, key='k1').status_code, 201)
+        self.assertEqual(CountingView.calls, 2)
+
+
+# ---------------------------------------------------------------------------
+# Pricing catalog
+# ---------------------------------------------------------------------------
+
+from decimal import Decimal
+
+from .models import FbiPricingSettings, FbiServicePackage, ShippingOption
+from .services import pricing
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PRICING_CATALOG_CHECK_INTERVAL=60)
+class PricingCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pricing._local.update(catalog=None, checked_at=0.0)
+        self.addCleanup(pricing._local.update, catalog=None, checked_at=0.0)
+        FbiServicePackage.objects.create(code='t-std', label='Standard', price=Decimal('50.00'))
+        ShippingOption.objects.create(code='t-usps', label='USPS', price=Decimal('10.00'))
+        FbiPricingSettings.objects.create(price_per_certificate=Decimal('20.00'))
+
+    def test_quote_from_snapshot_without_queries(self):
+        pricing.get_catalog()
+        with self.assertNumQueries(0):
+            price = pricing.quote('fbi', package='t-std', shipping_option='t-usps', count=2)
+        self.assertEqual(price.total, Decimal('100.00'))
+        self.assertEqual(price.lines[2], ('2 × certificate', Decimal('40.00')))
+
+        with self.assertRaises(pricing.PricingError):
+            pricing.quote('fbi', package='nope', shipping_option='t-usps')
+        with self.assertRaises(pricing.PricingError):
+            pricing.quote('fbi', package='t-std', shipping_option='t-usps', count=-1)
+
+    def test_other_process_loads_published_snapshot(self):
+        version = pricing.get_catalog().version
+        self.assertEqual(cache.get(pricing.CACHE_KEY_VERSION), version)
+
+        pricing._local.update(catalog=None, checked_at=0.0)
+        with self.assertNumQueries(0):
+            self.assertEqual(pricing.get_catalog().version, version)
+
+    def test_model_change_rebuilds_after_commit(self):
+        old = pricing.get_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            package = FbiServicePackage.objects.get(code='t-std')
+            package.price = Decimal('60.00')
+            package.save()
+
+        catalog = pricing.get_catalog()
+        self.assertNotEqual(catalog.version, old.version)
+        self.assertEqual(catalog.package('t-std').price, Decimal('60.00'))
+        self.assertEqual(cache.get(pricing.CACHE_KEY_VERSION), catalog.version)
+
+
+# ---------------------------------------------------------------------------
+# Pricing ETag / CDN cache headers
+# ---------------------------------------------------------------------------
+
+@override_settings(CACHES=LOCMEM_CACHE, PRICING_CATALOG_CHECK_INTERVAL=60)
+class PricingETagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pricing._local.update(catalog=None, checked_at=0.0)
+        self.addCleanup(pricing._local.update, catalog=None, checked_at=0.0)
+        FbiServicePackage.objects.create(code='t-std', label='Standard', price=Decimal('50.00'))
+        ShippingOption.objects.create(code='t-usps', label='USPS', price=Decimal('10.00'))
+
+    def test_options_etag_and_304(self):
+        response = self.client.get('/api/fbi/options/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{pricing.get_catalog().version}"')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage', response['Cache-Control'])
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/fbi/options/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.assertEqual(self.client.get('/api/fbi/options/', HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_quote_etag_follows_catalog_version(self):
+        url = '/api/fbi/quote/?package=t-std&shipping_option=t-usps&count=1'
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ShippingOption.objects.filter(code='t-usps').update(price=Decimal('12.00'))
+            ShippingOption.objects.get(code='t-usps').save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        self.assertEqual(self.client.get('/api/fbi/quote/?package=nope&shipping_option=t-usps').status_code, 400)
@@ -6,6 +6,8 @@ from .views import (
     CreateEmbassyOrderView,
     CreateTranslationOrderView,
     FbiOptionsView,
+    FbiQuoteView,
+    OrderSearchView,
     CreateStripeSessionView,
     CreateApostilleOrderView,
     CreateI9OrderView,
@@ -22,6 +24,7 @@ from .views import (
     PublicTrackView,
     whatconverts_test_webhook,
     whatconverts_webhook,
+    ZohoContactWebhookView,
 )
 
 urlpatterns = [
@@ -36,11 +39,14 @@ urlpatterns = [
     path('fingerprinting/submit/', CreateFingerprintingView.as_view(), name='fingerprinting-submit'),
 
     path('fbi/options/', FbiOptionsView.as_view(), name='fbi_options'),
+    path('fbi/quote/', FbiQuoteView.as_view(), name='fbi_quote'),
+    path('orders/search/', OrderSearchView.as_view(), name='order_search'),
     path("create-stripe-session/", CreateStripeSessionView.as_view(), name="create_stripe_session"),
 
     path("webhook/stripe/", stripe_webhook),
     path("webhook/whatconverts-test/", whatconverts_test_webhook, name="whatconverts_test"),
     path("webhook/whatconverts/", whatconverts_webhook, name="whatconverts"),
+    path("webhook/zoho/contacts/", ZohoContactWebhookView.as_view(), name="zoho_contact_webhook"),
 
     path("test-email/", test_email, name="test_email"),
 
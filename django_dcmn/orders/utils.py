@@ -1,5 +1,8 @@
+import re
 import secrets
 import string
+from typing import Optional
+
 from django.conf import settings
 from .constants import SERVICE_LABELS
 
@@ -53,3 +56,12 @@ def service_label(service: str) -> str:
     return SERVICE_LABELS.get(service, service)
 
 
+def normalize_email(email: Optional[str]) -> str:
+    email = (email or '').strip().lower()
+    return email if '@' in email else ''
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """Last 10 digits (US number without country code), '' if too short."""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] if len(digits) >= 10 else ''
@@ -15,6 +15,8 @@ from .orders import (
     CreatePreCheckView,
     CreateFingerprintingView,
     FbiOptionsView,
+    FbiQuoteView,
+    OrderSearchView,
 )
 
 from .stripe import (
@@ -31,6 +33,7 @@ from .tracking import (
 from .webhooks import (
     whatconverts_test_webhook,
     whatconverts_webhook,
+    ZohoContactWebhookView,
 )
 
 from .misc import (
@@ -50,6 +53,8 @@ __all__ = [
     'CreatePreCheckView',
     'CreateFingerprintingView',
     'FbiOptionsView',
+    'FbiQuoteView',
+    'OrderSearchView',
     # Stripe
     'CreateStripeSessionView',
     'stripe_webhook',
@@ -60,6 +65,7 @@ __all__ = [
     # Webhooks
     'whatconverts_test_webhook',
     'whatconverts_webhook',
+    'ZohoContactWebhookView',
     # Misc
     'test_email',
     'zoho_callback',
@@ -2,7 +2,13 @@
 """Order creation views."""
 
 from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -19,22 +25,21 @@ from ..serializers import (
 )
 from ..models import (
     FbiApostilleOrder,
-    FbiServicePackage,
-    FbiPricingSettings,
-    ShippingOption,
     MarriageOrder,
-    MarriagePricingSettings,
     EmbassyLegalizationOrder,
     TranslationOrder,
     ApostilleOrder,
     I9VerificationOrder,
+    QuoteRequest,
     PreCheckSubmission,
     FingerprintingSubmission,
     FileAttachment,
 )
-from ..services import process_new_order, save_file_attachments
-from ..services.attribution import process_attribution
-from ..tasks import sync_order_to_zoho_task
+from ..services import process_new_order
+from ..services.idempotency import idempotent
+from ..services.pricing import get_catalog, quote, PricingError
+from ..services.intake import INTAKE_MODELS
+from ..services.order_index import search as search_orders, SEARCH_LIMIT
 
 import logging
 
@@ -47,56 +52,94 @@ class CreateFbiOrderView(APIView):
     TID, Zoho sync, and emails are handled AFTER payment in stripe webhook.
     """
     
+    @idempotent
     def post(self, request, format=None):
         serializer = FbiApostilleOrderSerializer(data=request.data)
-        if serializer.is_valid():
-            try:
-                package = FbiServicePackage.objects.get(code=request.data['package'])
-                shipping = ShippingOption.objects.get(code=request.data['shipping_option'])
-                count = int(request.data['count'])
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-                price_setting = FbiPricingSettings.objects.first()
-                per_certificate_price = price_setting.price_per_certificate if price_setting else 25
+        # Package and shipping option already resolved by the serializer; prices from the catalog snapshot
+        data = serializer.validated_data
+        try:
+            price = quote('fbi', data['package'].code, data['shipping_option'].code, data['count'])
+        except PricingError:
+            return Response({'error': 'Invalid package or shipping option.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                total = package.price + shipping.price + (count * per_certificate_price)
+        with transaction.atomic():
+            order = serializer.save(total_price=price.total)
 
-                order = serializer.save(
-                    total_price=total,
-                    package=package,
-                    shipping_option=shipping
-                )
-
-                # Process attribution data
-                process_attribution(request, order)
+            # Attribution + files now, phone lead match in Celery
+            result = process_new_order(
+                request=request,
+                order=order,
+                model_class=FbiApostilleOrder,
+                order_type='fbi',
+                sync_to_zoho=False,
+                create_tracking=False,
+                send_notification=False,
+                send_welcome_email=False,
+            )
 
-                file_urls = save_file_attachments(request, FbiApostilleOrder, order)
+        return Response({
+            'message': 'Order created',
+            'order_id': order.id,
+            'file_urls': result['file_urls'],
+            'calculated_total': float(price.total),
+        }, status=status.HTTP_201_CREATED)
 
-                return Response({
-                    'message': 'Order created',
-                    'order_id': order.id,
-                    'file_urls': file_urls or None,
-                    'calculated_total': float(total),
-                }, status=status.HTTP_201_CREATED)
 
-            except (FbiServicePackage.DoesNotExist, ShippingOption.DoesNotExist):
-                return Response({'error': 'Invalid package or shipping option.'}, status=status.HTTP_400_BAD_REQUEST)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+def _catalog_response(request, catalog_version: str, build_data):
+    """
+    Response for data derived only from the pricing catalog (and the URL):
+    strong ETag = catalog version, 304 on If-None-Match without building
+    the body, Cache-Control for browsers and the CDN.
+    """
+    etag = quote_etag(catalog_version)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(build_data())
+
+    response['ETag'] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.PRICING_CACHE_MAX_AGE,
+        s_maxage=settings.PRICING_CACHE_S_MAXAGE,
+        stale_while_revalidate=settings.PRICING_CACHE_STALE_WHILE_REVALIDATE,
+    )
+    patch_vary_headers(response, ['Accept'])
+    return response
 
 
 class FbiOptionsView(APIView):
-    """Get FBI Apostille options (packages, shipping, pricing)."""
-    
+    """Get FBI Apostille options (packages, shipping, pricing) from the pricing catalog."""
+    authentication_classes = []  # public + cacheable: no session lookup, no Vary: Cookie
+
     def get(self, request, format=None):
-        packages = FbiServicePackage.objects.values('id', 'code', 'label', 'price')
-        shipping = ShippingOption.objects.values('id', 'code', 'label', 'price')
-        price_setting = FbiPricingSettings.objects.first()
-        price_per_certificate = price_setting.price_per_certificate if price_setting else 25.00
+        catalog = get_catalog()
+        return _catalog_response(request, catalog.version, catalog.as_options)
 
-        return Response({
-            'packages': list(packages),
-            'shipping_options': list(shipping),
-            'price_per_certificate': price_per_certificate
-        })
+
+class FbiQuoteView(APIView):
+    """
+    Price an FBI Apostille order from the pricing catalog (no DB queries).
+    GET /api/fbi/quote/?package=<code>&shipping_option=<code>&count=<n>
+    """
+    authentication_classes = []
+
+    def get(self, request, format=None):
+        try:
+            price = quote(
+                'fbi',
+                package=request.query_params.get('package', ''),
+                shipping_option=request.query_params.get('shipping_option', ''),
+                count=request.query_params.get('count', 1),
+            )
+        except PricingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return _catalog_response(request, price.catalog_version, price.as_dict)
 
 
 class CreateMarriageOrderView(APIView):
@@ -105,52 +148,60 @@ class CreateMarriageOrderView(APIView):
     TID, Zoho sync, and emails are handled AFTER payment in stripe webhook.
     """
     
+    @idempotent
     def post(self, request, format=None):
         serializer = MarriageOrderSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        marriage_order = MarriageOrder.objects.create(**serializer.validated_data)
-
-        price_setting = MarriagePricingSettings.objects.first()
-        base_price = price_setting.price if price_setting else 0.00
+        price = quote('marriage')
 
-        marriage_order.total_price = base_price
-        marriage_order.save()
+        with transaction.atomic():
+            marriage_order = serializer.save(total_price=price.total)
 
-        # Process attribution data
-        process_attribution(request, marriage_order)
-
-        file_urls = save_file_attachments(request, MarriageOrder, marriage_order)
+            # Attribution + files now, phone lead match in Celery
+            result = process_new_order(
+                request=request,
+                order=marriage_order,
+                model_class=MarriageOrder,
+                order_type='marriage',
+                sync_to_zoho=False,
+                create_tracking=False,
+                send_notification=False,
+                send_welcome_email=False,
+            )
 
         return Response({
             'message': 'Marriage order created',
             'order_id': marriage_order.id,
             'calculated_total': float(marriage_order.total_price),
-            'file_urls': file_urls or None
+            'file_urls': result['file_urls']
         }, status=status.HTTP_201_CREATED)
 
 
 class CreateEmbassyOrderView(APIView):
     """Create Embassy Legalization order with full processing pipeline."""
     
+    @idempotent
     def post(self, request, format=None):
         serializer = EmbassyLegalizationOrderSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        order = serializer.save()
-        
-        result = process_new_order(
-            request=request,
-            order=order,
-            model_class=EmbassyLegalizationOrder,
-            order_type='embassy',
-            sync_to_zoho=True,
-            create_tracking=True,
-            send_notification=True,
-            send_welcome_email=True,
-        )
+        # Order + outbox row in one transaction, emails after commit
+        with transaction.atomic():
+            order = serializer.save()
+
+            result = process_new_order(
+                request=request,
+                order=order,
+                model_class=EmbassyLegalizationOrder,
+                order_type='embassy',
+                sync_to_zoho=True,
+                create_tracking=True,
+                send_notification=True,
+                send_welcome_email=True,
+            )
 
         return Response({
             'message': 'Embassy legalization order created',
@@ -163,6 +214,7 @@ class CreateEmbassyOrderView(APIView):
 class CreateApostilleOrderView(APIView):
     """Create Apostille order with full processing pipeline."""
 
+    @idempotent
     def post(self, request, format=None):
         try:
             logger.info(f"[Apostille] Received request data: {request.data}")
@@ -173,20 +225,21 @@ class CreateApostilleOrderView(APIView):
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
             logger.info(f"[Apostille] Serializer valid, saving order...")
-            order = serializer.save()
-            logger.info(f"[Apostille] Order saved: {order.id}")
-
-            logger.info(f"[Apostille] Starting process_new_order...")
-            result = process_new_order(
-                request=request,
-                order=order,
-                model_class=ApostilleOrder,
-                order_type='apostille',
-                sync_to_zoho=True,
-                create_tracking=True,
-                send_notification=True,
-                send_welcome_email=True,
-            )
+            with transaction.atomic():
+                order = serializer.save()
+                logger.info(f"[Apostille] Order saved: {order.id}")
+
+                logger.info(f"[Apostille] Starting process_new_order...")
+                result = process_new_order(
+                    request=request,
+                    order=order,
+                    model_class=ApostilleOrder,
+                    order_type='apostille',
+                    sync_to_zoho=True,
+                    create_tracking=True,
+                    send_notification=True,
+                    send_welcome_email=True,
+                )
             logger.info(f"[Apostille] process_new_order completed: {result}")
 
             return Response({
@@ -203,23 +256,25 @@ class CreateApostilleOrderView(APIView):
 class CreateTranslationOrderView(APIView):
     """Create Translation order with full processing pipeline."""
     
+    @idempotent
     def post(self, request, format=None):
         serializer = TranslationOrderSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        order = serializer.save()
-        
-        result = process_new_order(
-            request=request,
-            order=order,
-            model_class=TranslationOrder,
-            order_type='translation',
-            sync_to_zoho=True,
-            create_tracking=True,
-            send_notification=True,
-            send_welcome_email=True,
-        )
+        with transaction.atomic():
+            order = serializer.save()
+
+            result = process_new_order(
+                request=request,
+                order=order,
+                model_class=TranslationOrder,
+                order_type='translation',
+                sync_to_zoho=True,
+                create_tracking=True,
+                send_notification=True,
+                send_welcome_email=True,
+            )
 
         return Response({
             'message': 'Translation order created',
@@ -232,32 +287,27 @@ class CreateTranslationOrderView(APIView):
 class CreateQuoteRequestView(APIView):
     """Create Quote Request with Zoho sync and staff notification."""
     
+    @idempotent
     def post(self, request, format=None):
         serializer = QuoteRequestSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        order = serializer.save()
-
-        # Process attribution data
-        process_attribution(request, order)
-
         # Quote requests don't have file attachments or tracking
-        from ..services.notifications import send_staff_notification, build_order_extra_body
+        with transaction.atomic():
+            order = serializer.save()
 
-        # Sync to Zoho
-        try:
-            sync_order_to_zoho_task.delay(order.id, "quote")
-        except Exception:
-            logger.exception("Failed to enqueue Zoho sync task for quote request %s", order.id)
-        
-        # Send staff notification
-        extra_body = build_order_extra_body(order, 'quote')
-        send_staff_notification(
-            order=order,
-            order_type='quote',
-            extra_body=extra_body,
-        )
+            process_new_order(
+                request=request,
+                order=order,
+                model_class=QuoteRequest,
+                order_type='quote',
+                sync_to_zoho=True,
+                create_tracking=False,
+                send_notification=True,
+                send_welcome_email=False,
+                attach_files=False,
+            )
 
         return Response({
             'message': 'Quote request created',
@@ -268,37 +318,25 @@ class CreateQuoteRequestView(APIView):
 class CreateI9OrderView(APIView):
     """Create I-9 Verification order with Zoho sync and staff notification."""
     
+    @idempotent
     def post(self, request, format=None):
         serializer = I9OrderSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        order = serializer.save()
-
-        # Process attribution data
-        process_attribution(request, order)
+        with transaction.atomic():
+            order = serializer.save()
 
-        # Sync to Zoho
-        try:
-            sync_order_to_zoho_task.delay(order.id, "I-9")
-        except Exception:
-            logger.exception("Failed to enqueue Zoho sync task for I-9 order %s", order.id)
-        
-        # Save files
-        file_urls = save_file_attachments(request, I9VerificationOrder, order)
-        
-        # Send staff notification
-        from ..services.notifications import send_staff_notification, build_order_extra_body
-        from ..services.files import build_file_links
-        
-        extra_body = build_order_extra_body(order, 'i9')
-        file_links = build_file_links(request, order, html=False)
-        send_staff_notification(
-            order=order,
-            order_type='i9',
-            extra_body=extra_body,
-            file_links=file_links,
-        )
+            process_new_order(
+                request=request,
+                order=order,
+                model_class=I9VerificationOrder,
+                order_type='i9',
+                sync_to_zoho=True,
+                create_tracking=False,
+                send_notification=True,
+                send_welcome_email=False,
+            )
 
         return Response({
             'message': 'I-9 Verification order created',
@@ -309,98 +347,108 @@ class CreateI9OrderView(APIView):
 class CreatePreCheckView(APIView):
     """Create Pre-Check Document Review submission with Zoho sync and staff notification."""
 
+    @idempotent
     def post(self, request, format=None):
         serializer = PreCheckSubmissionSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        order = serializer.save()
-
-        # Process attribution data
-        process_attribution(request, order)
-
-        # Save file attachments
-        file_urls = save_file_attachments(request, PreCheckSubmission, order)
+        with transaction.atomic():
+            order = serializer.save()
 
-        # Sync to Zoho
-        try:
-            sync_order_to_zoho_task.delay(order.id, "pre-check")
-        except Exception:
-            logger.exception("Failed to enqueue Zoho sync task for pre-check %s", order.id)
-
-        # Send staff notification
-        from ..services.notifications import send_staff_notification, build_order_extra_body
-        from ..services.files import build_file_links
-
-        extra_body = build_order_extra_body(order, 'pre-check')
-        file_links = build_file_links(request, order, html=False)
-        send_staff_notification(
-            order=order,
-            order_type='pre-check',
-            extra_body=extra_body,
-            file_links=file_links,
-        )
+            result = process_new_order(
+                request=request,
+                order=order,
+                model_class=PreCheckSubmission,
+                order_type='pre-check',
+                sync_to_zoho=True,
+                create_tracking=False,
+                send_notification=True,
+                send_welcome_email=False,
+            )
 
         return Response({
             'message': 'Pre-check submission created',
             'order_id': order.id,
-            'file_urls': file_urls or None,
+            'file_urls': result['file_urls'],
         }, status=status.HTTP_201_CREATED)
 
 
 class CreateFingerprintingView(APIView):
     """Create Fingerprinting submission with staff + client email notifications."""
 
+    @idempotent
     def post(self, request, format=None):
         serializer = FingerprintingSubmissionSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        order = serializer.save()
-
-        # Process attribution data
-        process_attribution(request, order)
-
-        # Send staff notification
-        from ..services.notifications import send_staff_notification, build_order_extra_body
-
-        extra_body = build_order_extra_body(order, 'fingerprinting')
-        send_staff_notification(
-            order=order,
-            order_type='fingerprinting',
-            extra_body=extra_body,
-        )
-
-        # Send client confirmation email
-        from django.template.loader import render_to_string
-        from django.core.mail import send_mail
-        from django.conf import settings as django_settings
-
-        html_content = render_to_string('emails/fingerprinting_confirmation.html', {
-            'name': order.name,
-            'preferred_date': order.preferred_date,
-            'preferred_time': order.preferred_time,
-            'service_location': order.service_location,
-            'address': order.address or '',
-            'service_type_display': order.get_service_type_display() if order.service_type else '',
-        })
-        try:
-            send_mail(
-                subject='Fingerprinting Inquiry Received — DC Mobile Notary',
-                message=(
-                    'Thank you for submitting your inquiry. We will get back to you '
-                    'within approximately 30 minutes with a service quote. '
-                    'For urgent requests, please call us at (202) 247-0837.'
-                ),
-                from_email=getattr(django_settings, 'DEFAULT_FROM_EMAIL', 'support@dcmobilenotary.net'),
-                recipient_list=[order.email],
-                html_message=html_content,
-                fail_silently=False,
+        with transaction.atomic():
+            order = serializer.save()
+
+            process_new_order(
+                request=request,
+                order=order,
+                model_class=FingerprintingSubmission,
+                order_type='fingerprinting',
+                sync_to_zoho=False,
+                create_tracking=False,
+                send_notification=True,
+                send_welcome_email=False,
+                attach_files=False,
+                send_client_confirmation=True,
             )
-        except Exception:
-            logger.exception("Failed to send client email for fingerprinting %s", order.id)
 
         return Response({
             'message': 'Fingerprinting submission created',
             'order_id': order.id,
         }, status=status.HTTP_201_CREATED)
+
+
+class OrderSearchView(APIView):
+    """
+    Staff search across all order types (OrderIndex).
+
+    GET /api/orders/search/?phone=&email=&tid=&zoho_record_id=&type=fbi&type=marriage&limit=50
+    Every given filter must match; at least one of phone, email, tid,
+    zoho_record_id is required.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        params = request.query_params
+        order_types = params.getlist('type')
+        unknown = [t for t in order_types if t not in INTAKE_MODELS]
+        if unknown:
+            return Response({'error': f'Unknown order type(s): {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {key: params.get(key, '').strip() for key in ('phone', 'email', 'tid', 'zoho_record_id')}
+        if not any(filters.values()):
+            return Response(
+                {'error': 'Provide at least one of phone, email, tid, zoho_record_id'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = min(max(int(params.get('limit', SEARCH_LIMIT)), 1), SEARCH_LIMIT)
+        except ValueError:
+            limit = SEARCH_LIMIT
+
+        rows = search_orders(**filters, order_types=order_types, limit=limit)
+        results = [
+            {
+                'order_type': row.order_type,
+                'order_id': row.order_id,
+                'name': row.name,
+                'phone_last10': row.phone_last10,
+                'email': row.email_lower,
+                'zoho_record_id': row.zoho_record_id,
+                'tid': row.tid,
+                'created_at': row.created_at,
+                'admin_url': reverse(
+                    f'admin:orders_{INTAKE_MODELS[row.order_type].lower()}_change', args=[row.order_id],
+                ),
+            }
+            for row in rows
+        ]
+        return Response({'count': len(results), 'results': results})
@@ -2,7 +2,7 @@
 """Stripe payment views and webhooks."""
 
 from django.conf import settings
-from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse
@@ -15,14 +15,19 @@ from rest_framework.response import Response
 from ..models import (
     FbiApostilleOrder,
     MarriageOrder,
-    FileAttachment,
+    InboundEvent,
     Track,
 )
 from ..utils import generate_tid
 from ..constants import STAGE_DEFS
-from ..tasks import sync_order_to_zoho_task, send_tracking_email_task
+from ..services.outbox import enqueue_order_sync
+from ..tasks import send_tracking_email_task
 from ..services.files import build_file_links
+from ..services.idempotency import idempotent
+from ..services.inbox import receive
+from django_dcmn.metrics import track_webhook
 
+import json
 import stripe
 import logging
 from datetime import datetime
@@ -34,6 +39,7 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 class CreateStripeSessionView(APIView):
     """Create Stripe Checkout session for payment."""
     
+    @idempotent
     def post(self, request):
         order_id = request.data.get("order_id")
         order_type = request.data.get("order_type")
@@ -122,8 +128,13 @@ class CreateStripeSessionView(APIView):
 
 
 @csrf_exempt
+@track_webhook('stripe')
 def stripe_webhook(request):
-    """Handle Stripe webhook events (checkout.session.completed)."""
+    """
+    Stripe webhook: verify the signature, save the event to the inbound event
+    inbox (deduplicated by event id) and answer 200; handle_stripe_event
+    runs in Celery.
+    """
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
     webhook_secret = settings.STRIPE_WEBHOOK_SECRET
@@ -133,40 +144,60 @@ def stripe_webhook(request):
     except (ValueError, stripe.error.SignatureVerificationError):
         return HttpResponse(status=400)
 
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        order_id = session.get("metadata", {}).get("order_id")
-        order_type = session.get("metadata", {}).get("order_type")
-        tracking_id = session.get("metadata", {}).get("tracking_id")
+    data = json.loads(payload)
+    metadata = (data.get("data", {}).get("object") or {}).get("metadata") or {}
+    sequence_key = f"{metadata['order_type']}:{metadata['order_id']}" if metadata.get("order_type") and metadata.get("order_id") else ''
 
-        if not order_id or not order_type:
-            return HttpResponse(status=400)
+    try:
+        receive(
+            InboundEvent.SOURCE_STRIPE, event["id"], data,
+            sequence_key=sequence_key,
+            meta={'base_url': request.build_absolute_uri('/')},
+        )
+    except Exception as e:
+        # Not stored: let Stripe redeliver
+        logger.exception(f"[Webhook Error] Failed to store Stripe event {event['id']}: {e}")
+        return HttpResponse(status=500)
 
-        try:
-            if order_type == "fbi":
-                _handle_fbi_payment(request, order_id, tracking_id)
-            elif order_type == "marriage":
-                _handle_marriage_payment(request, order_id, tracking_id)
-            else:
-                return HttpResponse(status=400)
+    return HttpResponse(status=200)
 
-        except Exception as e:
-            logger.exception(f"[Webhook Error] {e}")
-            return HttpResponse(status=400)
 
-    return HttpResponse(status=200)
+def handle_stripe_event(event: dict, meta: dict) -> dict:
+    """Process a Stripe event from the inbound event inbox (checkout.session.completed)."""
+    if event.get("type") != "checkout.session.completed":
+        return {'status': 'ignored', 'type': event.get("type")}
+
+    session = event["data"]["object"]
+    order_id = session.get("metadata", {}).get("order_id")
+    order_type = session.get("metadata", {}).get("order_type")
+    tracking_id = session.get("metadata", {}).get("tracking_id")
+
+    if not order_id or not order_type:
+        return {'status': 'skipped', 'reason': 'order_id/order_type missing from session metadata'}
 
+    base_url = meta.get('base_url', '')
+    if order_type == "fbi":
+        _handle_fbi_payment(order_id, tracking_id, base_url)
+    elif order_type == "marriage":
+        _handle_marriage_payment(order_id, tracking_id, base_url)
+    else:
+        return {'status': 'skipped', 'reason': f"unknown order_type '{order_type}'"}
 
-def _handle_fbi_payment(request, order_id, tracking_id):
+    return {'status': 'processed', 'order_type': order_type, 'order_id': order_id}
+
+
+def _handle_fbi_payment(order_id, tracking_id, base_url):
     """Process FBI order after successful payment."""
     order = FbiApostilleOrder.objects.get(id=order_id)
     
     if not order.is_paid:
-        order.is_paid = True
-        order.save()
+        # Paid flag + Zoho sync (outbox, deduped by order) in one transaction
+        with transaction.atomic():
+            order.is_paid = True
+            order.save()
 
-        # Pass tracking_id to Zoho sync
-        sync_order_to_zoho_task.delay(order.id, "fbi", tracking_id=tracking_id)
+            # Pass tracking_id to Zoho sync
+            enqueue_order_sync(order, "fbi", tracking_id=tracking_id)
         
         # Start tracking emails (Order Received)
         if tracking_id:
@@ -177,7 +208,7 @@ def _handle_fbi_payment(request, order_id, tracking_id):
 
     # Send email to manager (only if not sent before)
     if not order.manager_notified:
-        file_links = build_file_links(request, order, html=False)
+        file_links = build_file_links(None, order, html=False, base_url=base_url)
 
         today_str = datetime.utcnow().strftime("%Y-%m-%d")
         thread_id = f"<fbi-orders-thread-{today_str}@dcmobilenotary.com>"
@@ -241,16 +272,18 @@ def _handle_fbi_payment(request, order_id, tracking_id):
             logger.error(f"[ERROR] Sending client email failed: {e}")
 
 
-def _handle_marriage_payment(request, order_id, tracking_id):
+def _handle_marriage_payment(order_id, tracking_id, base_url):
     """Process Marriage order after successful payment."""
     order = MarriageOrder.objects.get(id=order_id)
     
     if not order.is_paid:
-        order.is_paid = True
-        order.save()
+        # Paid flag + Zoho sync (outbox, deduped by order) in one transaction
+        with transaction.atomic():
+            order.is_paid = True
+            order.save()
 
-        # Pass tracking_id to Zoho sync (same as FBI)
-        sync_order_to_zoho_task.delay(order.id, "marriage", tracking_id=tracking_id)
+            # Pass tracking_id to Zoho sync (same as FBI)
+            enqueue_order_sync(order, "marriage", tracking_id=tracking_id)
 
         # Send tracking email (Order Received)
         if tracking_id:
@@ -261,14 +294,7 @@ def _handle_marriage_payment(request, order_id, tracking_id):
 
     # Send email to manager (only if not sent before)
     if not order.manager_notified:
-        ct = ContentType.objects.get_for_model(MarriageOrder)
-        file_attachments = FileAttachment.objects.filter(
-            content_type=ct,
-            object_id=order.id
-        )
-        file_links = ""
-        for att in file_attachments:
-            file_links += f"📎 {request.build_absolute_uri(att.file.url)}\n"
+        file_links = build_file_links(None, order, html=False, base_url=base_url)
 
         today_str = datetime.utcnow().strftime("%Y-%m-%d")
         thread_id = f"<marriage-orders-thread-{today_str}@dcmobilenotary.com>"
@@ -286,7 +312,7 @@ def _handle_marriage_payment(request, order_id, tracking_id):
             f"Country: {order.country}\n"
             f"Certificate Number: {order.marriage_number}\n"
             f"------ OR ------\n\n"
-            f"Files:\n{file_links if file_links else 'None'}\n\n"
+            f"Files:\n{file_links}\n\n"
             
             f"Comments: \n{order.comments}\n\n"
             
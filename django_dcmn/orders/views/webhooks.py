@@ -1,10 +1,18 @@
 # orders/views/webhooks.py
-"""External webhook handlers (WhatConverts, etc.)"""
+"""External webhook handlers (WhatConverts, Zoho CRM contacts, etc.)"""
 
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from ..models import InboundEvent
+from ..services.inbox import receive
+from ..utils import check_zoho_webhook_token
+from django_dcmn.metrics import track_webhook
 
 import json
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
@@ -63,18 +71,20 @@ def whatconverts_test_webhook(request):
 
 
 @csrf_exempt
+@track_webhook('whatconverts')
 def whatconverts_webhook(request):
     """
     Production WhatConverts webhook handler.
 
-    Processes phone call leads from WhatConverts:
+    Saves the delivery to the inbound event inbox, deduplicated by lead_id +
+    trigger, and answers 202 without calling Zoho. The lead is processed in
+    Celery (services/whatconverts.py handle_whatconverts_webhook):
     1. Filters for "Phone Call" lead type only
-    2. Ignores tracking page leads
+    2. Ignores tracking page leads and spam
     3. Detects service from landing URL
-    4. Checks for duplicate leads
+    4. Checks for matching web form orders and duplicate leads
     5. Creates PhoneCallLead in Django
     6. Syncs to Zoho with "Phone Call Received" stage
-    7. Checks for matching web form orders
 
     URL: /api/webhook/whatconverts/
     """
@@ -82,88 +92,84 @@ def whatconverts_webhook(request):
         return JsonResponse({'error': 'Only POST requests allowed'}, status=405)
 
     try:
-        # Parse webhook data
         data = json.loads(request.body)
-
-        logger.info("=" * 80)
-        logger.info("📞 WhatConverts Webhook Received")
-        logger.info(f"   Lead ID: {data.get('lead_id')}")
-        logger.info(f"   Lead Type: {data.get('lead_type')}")
-        logger.info(f"   Landing URL: {data.get('landing_url')}")
-        logger.info("=" * 80)
-
-        # Filter 1: Only accept "Phone Call" leads
-        if data.get('lead_type') != 'Phone Call':
-            logger.info(f"⏭️ Skipping non-phone lead: {data.get('lead_type')}")
-            return JsonResponse({
-                'status': 'skipped',
-                'reason': 'Not a phone call lead'
-            })
-
-        # Filter 2: Ignore tracking page leads
-        landing_url = data.get('landing_url', '')
-        if '/tracking' in landing_url.lower():
-            logger.info(f"⏭️ Skipping tracking page lead: {landing_url}")
-            return JsonResponse({
-                'status': 'skipped',
-                'reason': 'Tracking page lead ignored'
-            })
-
-        # Filter 3: Check for spam
-        if data.get('spam'):
-            logger.info(f"🚫 Skipping spam lead")
-            return JsonResponse({
-                'status': 'skipped',
-                'reason': 'Marked as spam'
-            })
-
-        # Process the phone lead
-        from ..services.whatconverts import process_whatconverts_phone_lead
-        from ..services.whatconverts_zoho import sync_phone_lead_to_zoho
-
-        phone_lead = process_whatconverts_phone_lead(data)
-
-        # None = matching order exists, phone lead intentionally skipped
-        if phone_lead is None:
-            logger.info("✅ Phone lead skipped (matching order exists)")
-            return JsonResponse({
-                'status': 'skipped',
-                'reason': 'Matching order already exists',
-                'message': '90% probability: clarification call about existing order'
-            })
-
-        # Sync to Zoho
-        success = sync_phone_lead_to_zoho(phone_lead)
-
-        if success:
-            logger.info(f"✅ Successfully processed and synced phone lead {phone_lead.id}")
-
-            return JsonResponse({
-                'status': 'success',
-                'phone_lead_id': phone_lead.id,
-                'zoho_lead_id': phone_lead.zoho_lead_id,
-                'zoho_attribution_id': phone_lead.zoho_attribution_id,
-                'detected_service': phone_lead.detected_service,
-                'matched_with_form': phone_lead.matched_with_form,
-            })
-        else:
-            logger.warning(f"⚠️ Phone lead {phone_lead.id} created but Zoho sync failed")
-            return JsonResponse({
-                'status': 'partial',
-                'message': 'Lead saved but Zoho sync failed',
-                'phone_lead_id': phone_lead.id,
-            })
-
     except json.JSONDecodeError as e:
         logger.error(f"❌ Invalid JSON: {e}")
         return JsonResponse({
             'status': 'error',
             'message': 'Invalid JSON payload'
         }, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid JSON payload'
+        }, status=400)
 
+    lead_id = str(data.get('lead_id') or '').strip()
+    trigger = str(data.get('trigger') or '').strip()
+    if lead_id:
+        event_id = f"{lead_id}:{trigger}"
+    else:
+        event_id = f"sha256:{hashlib.sha256(request.body).hexdigest()}"
+
+    try:
+        event, created = receive(InboundEvent.SOURCE_WHATCONVERTS, event_id, data, sequence_key=lead_id)
     except Exception as e:
-        logger.error(f"❌ Webhook processing error: {e}", exc_info=True)
+        # Not stored: let WhatConverts redeliver
+        logger.error(f"❌ Failed to store WhatConverts webhook {event_id}: {e}", exc_info=True)
         return JsonResponse({
             'status': 'error',
             'message': 'Internal processing error'
         }, status=500)
+
+    logger.info(f"📞 WhatConverts webhook {event_id} {'accepted' if created else 'already received'} (event {event.id})")
+    return JsonResponse({
+        'status': 'accepted',
+        'event_id': event.id,
+        'duplicate': not created,
+    }, status=202)
+
+
+class ZohoContactWebhookView(APIView):
+    """
+    Zoho CRM workflow webhook fired when Contacts are merged, deleted or
+    get a new email/phone. Drops the affected IDs from the local contact cache.
+
+    Accepted body (any of the ID keys, single value or list):
+        {"action": "merge", "ids": [...], "merged_ids": [...], "master_id": "...", "token": "..."}
+
+    URL: /api/webhook/zoho/contacts/
+    """
+
+    ID_KEYS = ('id', 'ids', 'record_id', 'contact_id', 'merged_ids', 'master_id')
+
+    @track_webhook('zoho_contacts')
+    def post(self, request, format=None):
+        if not check_zoho_webhook_token(request):
+            return Response({'error': 'unauthorized'}, status=401)
+
+        from ..services.zoho_contacts import invalidate_contact
+
+        body = request.data
+        node = body.get('data') if isinstance(body.get('data'), dict) else {}
+
+        contact_ids = set()
+        for src in (node, body):
+            for key in self.ID_KEYS:
+                value = src.get(key)
+                if not value:
+                    continue
+                if isinstance(value, str):
+                    value = value.split(',')
+                elif not isinstance(value, (list, tuple)):
+                    value = [value]
+                contact_ids.update(str(v).strip() for v in value if str(v).strip())
+
+        if not contact_ids:
+            return Response({'error': 'contact id required'}, status=400)
+
+        removed = sum(invalidate_contact(contact_id) for contact_id in contact_ids)
+        logger.info(f"📇 Zoho contact webhook ({body.get('action') or node.get('action') or 'change'}): "
+                    f"ids={sorted(contact_ids)}, removed {removed} cached key(s)")
+
+        return Response({'ok': True, 'invalidated': removed})
@@ -0,0 +1,393 @@
+# orders/zoho_async.py
+"""
+Asyncio Zoho client for order sync.
+
+sync_order_with_attribution runs every step of an order sync back to back.
+Here the steps that don't depend on each other run concurrently:
+
+    1. contact search/create  ┐ concurrently
+       attribution record     ┘ (skipped when the composite request is used)
+    2. create the order record (needs contact + attribution IDs), or the
+       attribution record + order in one composite request
+    3. attachment uploads streamed from storage, in parallel
+       (ZOHO_ATTACHMENT_UPLOAD_WORKERS at a time, tracked in the attachment ledger)
+
+Uses httpx with HTTP/2 when the h2 package is installed. Calls go through the
+same token manager, rate limiter and field schema (zoho_schema) as the sync client.
+sync_order_to_zoho_task runs one sync per event loop via run_order_sync().
+"""
+
+import time
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django_dcmn import metrics
+
+from . import zoho_ratelimit, zoho_circuit
+from .zoho_schema import ORDER_SCHEMAS
+from .services.zoho_attachments import (
+    MultipartFileStream,
+    attachment_filename,
+    plan_attachment_uploads,
+    record_upload_result,
+    release_upload,
+    CHUNK_SIZE,
+)
+from .zoho_sync import (
+    ZOHO_API_DOMAIN,
+    ZOHO_ATTRIBUTION_MODULE,
+    ZOHO_COMPOSITE_URL,
+    attribution_create_body,
+    build_composite_order_request,
+    build_order_attribution_payload,
+    composite_available,
+    parse_composite_order_response,
+    get_access_token,
+    is_success_item,
+    remember_zoho_record_id,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_available() -> bool:
+    return httpx is not None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class AsyncZohoClient:
+    """Async counterpart of zoho_transport + the token/401 handling in zoho_sync."""
+
+    def __init__(self):
+        self._client = None
+
+    async def __aenter__(self):
+        http2 = _http2_available()
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.ZOHO_HTTP_READ_TIMEOUT, connect=settings.ZOHO_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=settings.ZOHO_HTTP_POOL_SIZE),
+            transport=httpx.AsyncHTTPTransport(http2=http2, retries=settings.ZOHO_HTTP_MAX_RETRIES),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+
+    # -------- transport --------
+
+    async def request(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        """
+        Send a request through the shared circuit breaker, honouring the rate
+        limiter for CRM API calls. `content` may be a callable returning a
+        fresh body, so retries can resend streams.
+        """
+        await asyncio.to_thread(zoho_circuit.before_call)
+        start = time.perf_counter()
+        try:
+            resp = await self._send(method, url, **kwargs)
+        except httpx.TransportError as e:
+            metrics.observe_zoho(method, url, time.perf_counter() - start, type(e).__name__)
+            await asyncio.to_thread(zoho_circuit.record_failure, e)
+            raise
+        metrics.observe_zoho(method, url, time.perf_counter() - start, resp.status_code)
+        await asyncio.to_thread(zoho_circuit.record_response, resp.status_code)
+        return resp
+
+    async def _send(self, method: str, url: str, **kwargs) -> 'httpx.Response':
+        if not zoho_ratelimit.applies_to(url):
+            if callable(kwargs.get('content')):
+                kwargs['content'] = kwargs['content']()
+            return await self._client.request(method, url, **kwargs)
+
+        content = kwargs.pop('content', None)
+        for attempt in range(settings.ZOHO_RATE_LIMIT_429_RETRIES + 1):
+            if callable(content):
+                kwargs['content'] = content()  # fresh body stream per attempt
+            elif content is not None:
+                kwargs['content'] = content
+            # The limiter blocks on Redis: keep it off the event loop
+            lease = await asyncio.to_thread(zoho_ratelimit.acquire)
+            try:
+                resp = await self._client.request(method, url, **kwargs)
+            finally:
+                await asyncio.to_thread(zoho_ratelimit.release, lease)
+
+            await asyncio.to_thread(zoho_ratelimit.record_response, resp)
+            if resp.status_code != 429:
+                break
+        return resp
+
+    async def api(self, method: str, path: str, **kwargs) -> 'httpx.Response':
+        """Authenticated CRM call (path relative to /crm/v2/ or a full URL), one retry after a 401."""
+        url = path if path.startswith(('https://', 'http://')) else f"{ZOHO_API_DOMAIN}/crm/v2/{path}"
+        extra_headers = kwargs.pop('headers', None) or {}
+        token = await asyncio.to_thread(get_access_token)
+        for attempt in range(2):
+            headers = {**extra_headers, "Authorization": f"Zoho-oauthtoken {token}"}
+            resp = await self.request(method, url, headers=headers, **kwargs)
+            if resp.status_code == 401 and attempt == 0:
+                token = await asyncio.to_thread(get_access_token, True, token)
+                continue
+            return resp
+        return resp
+
+    # -------- CRM operations --------
+
+    async def create_record(self, module_name: str, payload: dict) -> str | None:
+        """Upserted on the payload's duplicate_check_fields when it has them (order payloads)."""
+        path = f"{module_name}/upsert" if payload.get("duplicate_check_fields") else module_name
+        resp = await self.api("POST", path, json=payload)
+        try:
+            item = resp.json()['data'][0]
+        except (ValueError, KeyError, IndexError, TypeError):
+            logger.error(f"[ZohoAsync] Create {module_name} failed: {resp.status_code} {resp.text[:500]}")
+            return None
+        if not is_success_item(item):
+            logger.error(f"[ZohoAsync] Create {module_name} failed: {item}")
+            return None
+        return str(item['details']['id'])
+
+    async def create_with_attribution(self, module_name: str, payload: dict, attribution_payload: dict) -> tuple[str, str] | None:
+        """Attribution record + order in one composite request, None = use the two-step flow."""
+        body = build_composite_order_request(module_name, payload, attribution_payload)
+        resp = await self.api("POST", ZOHO_COMPOSITE_URL, json=body)
+        try:
+            data = resp.json()
+        except ValueError:
+            data = resp.text[:500]
+        return await sync_to_async(parse_composite_order_response)(resp.status_code, data)
+
+    async def get_or_create_contact_id(self, name: str, email: str, phone: str) -> str | None:
+        """Same Contacts/upsert call as zoho_contacts.resolve_contact (match by email/phone or create)."""
+        from .services.zoho_contacts import build_contact_upsert, contact_from_upsert
+
+        resp = await self.api("POST", "Contacts/upsert", json=build_contact_upsert(name or 'Client', email, phone))
+        try:
+            data = resp.json()
+        except ValueError:
+            data = {}
+        contact = await sync_to_async(contact_from_upsert)(data, email=email, phone=phone)
+        if contact:
+            return contact.id
+        logger.error(f"[ZohoAsync] ❌ Error resolving contact: {resp.status_code} {resp.text[:500]}")
+        return None
+
+    async def upload_attachment(self, module_name: str, record_id: str, file_attachment) -> tuple:
+        """
+        Stream a FileAttachment from storage (file reads run in a worker thread).
+
+        Returns:
+            (httpx.Response, SHA-256 of the file as sent)
+        """
+        filename = attachment_filename(file_attachment)
+        fileobj = await asyncio.to_thread(file_attachment.file.open, 'rb')
+        try:
+            size = await asyncio.to_thread(lambda: file_attachment.file.size)
+            body = MultipartFileStream(fileobj, filename, size)
+
+            async def stream():
+                await asyncio.to_thread(body.seek, 0)
+                while True:
+                    chunk = await asyncio.to_thread(body.read, CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+            resp = await self.api(
+                "POST", f"{module_name}/{record_id}/Attachments",
+                content=stream,
+                headers={'Content-Type': body.content_type, 'Content-Length': str(body.len)},
+            )
+        finally:
+            await asyncio.to_thread(fileobj.close)
+        logger.info(f'[ZohoAsync] Attach "{filename}": {resp.status_code}')
+        return resp, body.content_hash
+
+
+# =============================================================================
+# ORDER SYNC
+# =============================================================================
+
+def _prepare(order, order_type: str, tracking_id: str | None) -> dict:
+    """Everything that touches the DB, done before the concurrent part."""
+    from .services.zoho_contacts import get_cached_contact_id
+
+    schema = ORDER_SCHEMAS[order_type]
+    attribution_payload = build_order_attribution_payload(order)
+
+    return {
+        "module": schema.module,
+        "contact_field": schema.contact_field,
+        "cached_contact_id": get_cached_contact_id(email=order.email, phone=order.phone) if schema.contact_field else None,
+        "payload": schema.build_create(order, contact_id=None, tracking_id=tracking_id),
+        "attribution_payload": attribution_payload,
+        "use_composite": bool(attribution_payload) and composite_available(),
+        "attach_files": schema.attach_files,
+    }
+
+
+async def _upload_attachments(client: AsyncZohoClient, order, module_name: str, record_id: str):
+    pending = await sync_to_async(plan_attachment_uploads)(order, module_name, record_id)
+    semaphore = asyncio.Semaphore(settings.ZOHO_ATTACHMENT_UPLOAD_WORKERS)
+
+    async def upload(ledger):
+        async with semaphore:
+            try:
+                resp, content_hash = await client.upload_attachment(module_name, record_id, ledger.file_attachment)
+            except zoho_circuit.ZohoCircuitOpen as e:
+                return await sync_to_async(release_upload)(ledger, str(e))
+            except Exception as e:
+                return await sync_to_async(record_upload_result)(ledger, None, error=str(e))
+            try:
+                data = resp.json()
+            except ValueError:
+                data = {'raw': resp.text[:500]}
+            return await sync_to_async(record_upload_result)(ledger, resp.status_code, data, content_hash=content_hash)
+
+    results = await asyncio.gather(*(upload(ledger) for ledger in pending))
+    failed = results.count(False)
+    if failed:
+        logger.warning(f"[ZohoAsync] ⚠️ {failed}/{len(results)} attachment(s) failed for {module_name}/{record_id}")
+
+
+def _mark_synced(order):
+    order.zoho_synced = True
+    order.save(update_fields=['zoho_synced'])
+
+
+async def sync_order_async(order, order_type: str, tracking_id: str | None = None) -> bool:
+    """
+    Async equivalent of the sync_*_order_to_zoho functions.
+
+    Returns:
+        True if the order record was created in Zoho
+    """
+    prepared = await sync_to_async(_prepare)(order, order_type, tracking_id)
+    module_name = prepared["module"]
+    record = prepared["payload"]["data"][0]
+
+    if order.zoho_record_id:
+        # Created by an earlier attempt: finish it without a second create
+        logger.info(f"[ZohoAsync] {order_type} #{order.id} already created as {module_name}/{order.zoho_record_id}, resuming")
+        if prepared["attach_files"]:
+            async with AsyncZohoClient() as client:
+                await _upload_attachments(client, order, module_name, order.zoho_record_id)
+        await sync_to_async(_mark_synced)(order)
+        return True
+
+    async with AsyncZohoClient() as client:
+        async def no_result():
+            return None
+
+        if prepared["contact_field"] and not prepared["cached_contact_id"]:
+            contact_step = client.get_or_create_contact_id(order.name, order.email, order.phone)
+        else:
+            contact_step = no_result()
+
+        if prepared["attribution_payload"] and not prepared["use_composite"]:
+            attribution_step = client.create_record(ZOHO_ATTRIBUTION_MODULE, attribution_create_body(prepared["attribution_payload"]))
+        else:
+            attribution_step = no_result()
+
+        # Step 1: independent calls
+        contact_id, attribution_id = await asyncio.gather(contact_step, attribution_step, return_exceptions=True)
+        for name, value in (("contact", contact_id), ("attribution", attribution_id)):
+            if isinstance(value, BaseException):
+                logger.error(f"[ZohoAsync] ❌ {name} step failed for {order_type} #{order.id}: {value}")
+        contact_id = None if isinstance(contact_id, BaseException) else contact_id
+        attribution_id = None if isinstance(attribution_id, BaseException) else attribution_id
+
+        if prepared["contact_field"]:
+            record[prepared["contact_field"]] = {"id": prepared["cached_contact_id"] or contact_id}
+        if attribution_id:
+            record['Attribution_Record'] = attribution_id
+            logger.info(f"[ZohoAsync] Linking order to Attribution Record: {attribution_id}")
+
+        # Step 2: the order record itself
+        record_id = None
+        if prepared["use_composite"]:
+            created = await client.create_with_attribution(module_name, prepared["payload"], prepared["attribution_payload"])
+            if created:
+                attribution_id, record_id = created
+                logger.info(f"[ZohoAsync] Composite: {module_name}/{record_id} linked to Attribution Record {attribution_id}")
+            else:
+                attribution_id = await client.create_record(ZOHO_ATTRIBUTION_MODULE, attribution_create_body(prepared["attribution_payload"]))
+                if attribution_id:
+                    record['Attribution_Record'] = attribution_id
+
+        if not record_id:
+            record_id = await client.create_record(module_name, prepared["payload"])
+        if not record_id:
+            return False
+        logger.info(f"[ZohoAsync] ✅ Created {module_name}/{record_id} for {order_type} #{order.id}")
+        await sync_to_async(remember_zoho_record_id)(order, record_id)
+
+        # Step 3: attachments in parallel, capped, recorded in the ledger
+        if prepared["attach_files"]:
+            await _upload_attachments(client, order, module_name, record_id)
+
+    await sync_to_async(_mark_synced)(order)
+    return True
+
+
+async def sync_fbi_order_to_zoho_async(order, tracking_id: str | None = None):
+    return await sync_order_async(order, "fbi", tracking_id)
+
+
+async def sync_embassy_order_to_zoho_async(order, tracking_id: str | None = None):
+    return await sync_order_async(order, "embassy", tracking_id)
+
+
+async def sync_translation_order_to_zoho_async(order, tracking_id: str | None = None):
+    return await sync_order_async(order, "translation", tracking_id)
+
+
+async def sync_apostille_order_to_zoho_async(order, tracking_id: str | None = None):
+    return await sync_order_async(order, "apostille", tracking_id)
+
+
+async def sync_marriage_order_to_zoho_async(order, tracking_id: str | None = None):
+    return await sync_order_async(order, "marriage", tracking_id)
+
+
+async def sync_i9_order_to_zoho_async(order, tracking_id: str | None = None):
+    return await sync_order_async(order, "I-9", tracking_id)
+
+
+async def sync_quote_request_to_zoho_async(order):
+    return await sync_order_async(order, "quote")
+
+
+async def sync_precheck_to_zoho_async(order):
+    return await sync_order_async(order, "pre-check")
+
+
+async def _sync_order_in_task(order, order_type: str, tracking_id: str | None) -> bool:
+    # ORM calls run in asgiref's shared sync thread, which Celery's per-task
+    # close_old_connections never reaches: drop stale connections there too
+    await sync_to_async(close_old_connections)()
+    try:
+        return await sync_order_async(order, order_type, tracking_id)
+    finally:
+        await sync_to_async(close_old_connections)()
+
+
+def run_order_sync(order, order_type: str, tracking_id: str | None = None) -> bool:
+    """Run one async order sync from sync code (Celery task) in its own event loop."""
+    return asyncio.run(_sync_order_in_task(order, order_type, tracking_id))
@@ -0,0 +1,200 @@
+# orders/zoho_auth.py
+"""
+Zoho OAuth access token manager.
+
+Two-tier cache: an in-process memory tier in front of Redis (Django cache).
+Refreshes are single-flight across the cluster: a Redis lock lets exactly one
+process call accounts.zoho.com while the others wait and pick up the new
+token from Redis. A waiter that times out never refreshes on its own (no
+stampede on accounts.zoho.com): it takes the token the lock holder
+published, or raises ZohoTokenUnavailable. A Celery beat job
+(refresh_zoho_token_task) renews the token before it expires, so the
+request path normally never pays for it.
+"""
+
+import time
+import threading
+import logging
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from . import zoho_transport
+
+logger = logging.getLogger(__name__)
+
+ZOHO_TOKEN_URL = settings.ZOHO_TOKEN_URL
+
+TOKEN_CACHE_KEY = 'zoho_access_token'
+TOKEN_EXPIRES_KEY = 'zoho_access_token_expires_at'
+REFRESH_LOCK_KEY = 'zoho_access_token_refresh_lock'
+
+# Cluster-wide counters (Redis)
+COUNTER_KEYS = {
+    'refreshes': 'zoho_token:refreshes',
+    'lock_waits': 'zoho_token:lock_waits',
+    'recoveries_401': 'zoho_token:recoveries_401',
+}
+
+# Token is treated as expired this many seconds before Zoho's expiry
+EXPIRY_SKEW = 60
+# Zoho access tokens live 1 hour; used if the response has no expires_in
+DEFAULT_EXPIRES_IN = 3600
+
+
+class ZohoTokenUnavailable(requests.RequestException):
+    """Another process holds the refresh lock and published no token in time."""
+
+
+class ZohoTokenManager:
+    """Process-wide holder of the current Zoho access token."""
+
+    def __init__(self):
+        self._token = None
+        self._expires_at = 0.0
+        self._local_lock = threading.Lock()
+
+    # -------- public API --------
+
+    def get_token(self) -> str:
+        """Return a valid access token, refreshing only when nothing valid is cached."""
+        token = self._from_memory()
+        if token:
+            return token
+
+        token = self._from_redis()
+        if token:
+            return token
+
+        return self._refresh()
+
+    def recover_from_401(self, rejected_token: str | None = None) -> str:
+        """
+        Called after Zoho rejected a token with 401.
+
+        If another process already replaced the rejected token, its new token
+        is reused; otherwise a single-flight refresh is performed.
+        """
+        self._incr('recoveries_401')
+        rejected_token = rejected_token or self._token
+        with self._local_lock:
+            self._token = None
+            self._expires_at = 0.0
+        return self._refresh(rejected_token=rejected_token)
+
+    def refresh_if_expiring(self, min_ttl: int) -> bool:
+        """
+        Proactively refresh when the shared token expires within min_ttl seconds.
+        Returns True if a refresh was performed.
+        """
+        values = cache.get_many([TOKEN_CACHE_KEY, TOKEN_EXPIRES_KEY])
+        expires_at = values.get(TOKEN_EXPIRES_KEY) or 0
+        if values.get(TOKEN_CACHE_KEY) and expires_at - time.time() > min_ttl:
+            return False
+
+        current = values.get(TOKEN_CACHE_KEY)
+        new_token = self._refresh(rejected_token=current)
+        return bool(new_token and new_token != current)
+
+    def get_stats(self) -> dict:
+        """Counters for refreshes, lock waits and 401 recoveries."""
+        values = cache.get_many(list(COUNTER_KEYS.values()))
+        stats = {name: int(values.get(key) or 0) for name, key in COUNTER_KEYS.items()}
+        expires_at = cache.get(TOKEN_EXPIRES_KEY) or 0
+        stats['expires_in'] = max(0, int(expires_at - time.time()))
+        return stats
+
+    # -------- tiers --------
+
+    def _from_memory(self) -> str | None:
+        if self._token and self._expires_at - time.time() > EXPIRY_SKEW:
+            return self._token
+        return None
+
+    def _from_redis(self, exclude: str | None = None) -> str | None:
+        values = cache.get_many([TOKEN_CACHE_KEY, TOKEN_EXPIRES_KEY])
+        token = values.get(TOKEN_CACHE_KEY)
+        # Tokens written before expiry tracking existed have no expires_at:
+        # trust them for the remainder of their cache TTL.
+        expires_at = values.get(TOKEN_EXPIRES_KEY) or (time.time() + EXPIRY_SKEW * 2)
+
+        if not token or token == exclude or expires_at - time.time() <= EXPIRY_SKEW:
+            return None
+
+        self._remember(token, expires_at)
+        return token
+
+    def _remember(self, token: str, expires_at: float):
+        with self._local_lock:
+            self._token = token
+            self._expires_at = expires_at
+
+    # -------- refresh --------
+
+    def _refresh(self, rejected_token: str | None = None) -> str:
+        lock = cache.lock(REFRESH_LOCK_KEY, timeout=settings.ZOHO_TOKEN_LOCK_TIMEOUT)
+
+        acquired = lock.acquire(blocking=False)
+        if not acquired:
+            self._incr('lock_waits')
+            logger.info("[ZohoAuth] Token refresh in progress elsewhere, waiting...")
+            acquired = lock.acquire(blocking=True, blocking_timeout=settings.ZOHO_TOKEN_LOCK_WAIT)
+
+        if not acquired:
+            # Lock holder is slow or stuck: use whatever it managed to publish.
+            # Refreshing without the lock would let every waiter hit Zoho at once;
+            # the caller retries, and the lock expires after ZOHO_TOKEN_LOCK_TIMEOUT.
+            token = self._from_redis(exclude=rejected_token)
+            if token:
+                return token
+            logger.warning("[ZohoAuth] Timed out waiting for refresh lock, no token published")
+            raise ZohoTokenUnavailable("Zoho token refresh in progress elsewhere, try again")
+
+        try:
+            # Another process may have refreshed while we waited for the lock
+            token = self._from_redis(exclude=rejected_token)
+            if token:
+                return token
+            return self._request_new_token()
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # Lock expired before release; nothing to clean up
+                pass
+
+    def _request_new_token(self) -> str:
+        params = {
+            "refresh_token": settings.ZOHO_REFRESH_TOKEN,
+            "client_id": settings.ZOHO_CLIENT_ID,
+            "client_secret": settings.ZOHO_CLIENT_SECRET,
+            "grant_type": "refresh_token"
+        }
+        resp = zoho_transport.post(ZOHO_TOKEN_URL, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        token = data["access_token"]
+        expires_in = int(data.get("expires_in") or DEFAULT_EXPIRES_IN)
+        expires_at = time.time() + expires_in
+
+        cache.set_many(
+            {TOKEN_CACHE_KEY: token, TOKEN_EXPIRES_KEY: expires_at},
+            timeout=max(expires_in - EXPIRY_SKEW, EXPIRY_SKEW),
+        )
+        self._remember(token, expires_at)
+        self._incr('refreshes')
+        logger.info(f"[ZohoAuth] ✅ Refreshed access token (expires in {expires_in}s)")
+        return token
+
+    @staticmethod
+    def _incr(name: str):
+        key = COUNTER_KEYS[name]
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+        except Exception:
+            logger.debug(f"[ZohoAuth] Failed to increment counter {key}")
+
+
+token_manager = ZohoTokenManager()
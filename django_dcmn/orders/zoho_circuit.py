@@ -0,0 +1,168 @@
+# orders/zoho_circuit.py
+"""
+Cluster-wide circuit breaker for Zoho calls.
+
+State lives in Redis so every gunicorn and Celery process sees the same
+circuit:
+
+    closed     calls go through; network errors and 5xx responses are counted
+    open       ZOHO_CIRCUIT_FAILURE_THRESHOLD failures within
+               ZOHO_CIRCUIT_FAILURE_WINDOW seconds: every call fails fast with
+               ZohoCircuitOpen for ZOHO_CIRCUIT_OPEN_SECONDS
+    half-open  open period over: one probe call at a time is let through;
+               success closes the circuit, failure opens it again
+
+zoho_transport and the async client call before_call() / record_success() /
+record_failure() around every request. Request-path callers check
+is_closed() and defer optional Zoho work to the outbox instead of waiting
+on timeouts. If Redis is unavailable the breaker fails open (calls go through).
+"""
+
+import time
+import logging
+
+import requests
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+OPEN_UNTIL_KEY = 'zoho_cb:open_until'
+FAILURES_KEY = 'zoho_cb:failures'
+PROBE_KEY = 'zoho_cb:probe'
+COUNTER_KEY = 'zoho_cb:counters'
+
+
+class ZohoCircuitOpen(requests.RequestException):
+    """Zoho is failing: the call was not sent (circuit open)."""
+
+
+def _enabled() -> bool:
+    return settings.ZOHO_CIRCUIT_ENABLED
+
+
+# =============================================================================
+# STATE
+# =============================================================================
+
+def get_state() -> str:
+    if not _enabled():
+        return CLOSED
+    try:
+        open_until = get_redis_connection('default').get(OPEN_UNTIL_KEY)
+    except Exception:
+        return CLOSED
+    if open_until is None:
+        return CLOSED
+    return OPEN if float(open_until) > time.time() else HALF_OPEN
+
+
+def is_closed() -> bool:
+    """True if Zoho is healthy enough for optional request-path work."""
+    return get_state() == CLOSED
+
+
+def retry_after() -> float:
+    """Seconds until the next probe is allowed (0 if closed or half-open)."""
+    try:
+        open_until = get_redis_connection('default').get(OPEN_UNTIL_KEY)
+    except Exception:
+        return 0
+    return max(0.0, float(open_until) - time.time()) if open_until else 0
+
+
+# =============================================================================
+# CALL HOOKS
+# =============================================================================
+
+def before_call():
+    """
+    Raises:
+        ZohoCircuitOpen if the circuit is open, or half-open with a probe
+        already in flight
+    """
+    if not _enabled():
+        return
+    try:
+        conn = get_redis_connection('default')
+        open_until = conn.get(OPEN_UNTIL_KEY)
+        if open_until is None:
+            return
+        if float(open_until) <= time.time() and conn.set(PROBE_KEY, 1, nx=True, ex=settings.ZOHO_CIRCUIT_PROBE_TIMEOUT):
+            logger.info("[ZohoCircuit] Half-open, sending probe call")
+            return
+        conn.hincrby(COUNTER_KEY, 'rejected', 1)
+    except Exception as e:
+        logger.debug(f"[ZohoCircuit] Breaker unavailable ({e}), calling Zoho without it")
+        return
+    raise ZohoCircuitOpen("Zoho circuit is open, call not sent")
+
+
+def record_success():
+    if not _enabled():
+        return
+    try:
+        conn = get_redis_connection('default')
+        if conn.get(OPEN_UNTIL_KEY) is not None:
+            conn.delete(OPEN_UNTIL_KEY, FAILURES_KEY, PROBE_KEY)
+            logger.info("[ZohoCircuit] ✅ Zoho recovered, circuit closed")
+        else:
+            conn.delete(FAILURES_KEY)
+    except Exception:
+        pass
+
+
+def record_failure(reason):
+    if not _enabled():
+        return
+    try:
+        conn = get_redis_connection('default')
+        now = time.time()
+        if conn.get(OPEN_UNTIL_KEY) is not None:
+            # Failed probe (or a call that started before the circuit opened)
+            _open(conn, now, reason)
+            return
+
+        pipe = conn.pipeline()
+        pipe.incr(FAILURES_KEY)
+        pipe.expire(FAILURES_KEY, settings.ZOHO_CIRCUIT_FAILURE_WINDOW)
+        failures = pipe.execute()[0]
+        if failures >= settings.ZOHO_CIRCUIT_FAILURE_THRESHOLD:
+            _open(conn, now, reason)
+    except Exception:
+        pass
+
+
+def _open(conn, now: float, reason):
+    pipe = conn.pipeline()
+    pipe.set(OPEN_UNTIL_KEY, now + settings.ZOHO_CIRCUIT_OPEN_SECONDS)
+    pipe.delete(FAILURES_KEY, PROBE_KEY)
+    pipe.hincrby(COUNTER_KEY, 'opened', 1)
+    pipe.execute()
+    logger.warning(f"[ZohoCircuit] ⚠️ Circuit open for {settings.ZOHO_CIRCUIT_OPEN_SECONDS}s: {reason}")
+
+
+def is_failure_status(status_code: int) -> bool:
+    """5xx means Zoho is unhealthy; 4xx/429 are answers (429 is the rate limiter's job)."""
+    return status_code >= 500
+
+
+def record_response(status_code: int):
+    if is_failure_status(status_code):
+        record_failure(f"HTTP {status_code}")
+    else:
+        record_success()
+
+
+def get_stats() -> dict:
+    conn = get_redis_connection('default')
+    return {
+        'state': get_state(),
+        'retry_after': retry_after(),
+        'failures': int(conn.get(FAILURES_KEY) or 0),
+        'counters': {k.decode(): int(v) for k, v in conn.hgetall(COUNTER_KEY).items()},
+    }
@@ -7,6 +7,7 @@ Provides a unified interface for creating records and attribution records.
 import requests
 import logging
 from django.conf import settings
+from . import zoho_transport
 from .zoho_sync import get_access_token, ZOHO_API_DOMAIN, ZOHO_ATTRIBUTION_MODULE
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,14 @@ class ZohoCRMClient:
             "Content-Type": "application/json"
         }
 
+    def _send(self, method, url, payload):
+        """Send request, refreshing the token once if Zoho rejects it (401)."""
+        response = zoho_transport.request(method, url, json=payload, headers=self._get_headers())
+        if response.status_code == 401:
+            self.access_token = get_access_token(force_refresh=True, rejected_token=self.access_token)
+            response = zoho_transport.request(method, url, json=payload, headers=self._get_headers())
+        return response
+
     def create_record(self, module_name, data):
         """
         Create a record in Zoho CRM.
@@ -43,11 +52,10 @@ class ZohoCRMClient:
             API response dict or None on error
         """
         url = f"{self.api_domain}/crm/v2/{module_name}"
-        headers = self._get_headers()
         payload = {"data": [data]}
 
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self._send('POST', url, payload)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -67,17 +75,54 @@ class ZohoCRMClient:
             API response dict or None on error
         """
         url = f"{self.api_domain}/crm/v2/{module_name}"
-        headers = self._get_headers()
         payload = {"data": [{"id": record_id, **data}]}
 
         try:
-            response = requests.put(url, json=payload, headers=headers, timeout=30)
+            response = self._send('PUT', url, payload)
             response.raise_for_status()
-            return response.json()
+            result = response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to update record {record_id} in {module_name}: {e}")
             return None
 
+        from .zoho_sync import is_success_item
+        from .services.zoho_records import write_through
+        items = result.get('data') or []
+        if items and is_success_item(items[0]):
+            write_through(module_name, record_id, data)
+        return result
+
+    def update_records(self, module_name, records):
+        """
+        Update up to 100 records of one module in a single request.
+
+        Args:
+            module_name: Zoho module name
+            records: List of dicts, each with 'id' and the fields to update
+
+        Returns:
+            List of per-record result items (same order as records) or None on error
+        """
+        from .zoho_sync import update_records
+        return update_records(module_name, records)
+
+    def queue_update(self, module_name, record_id, data):
+        """
+        Queue a record update in the Zoho write buffer instead of sending it now.
+        Updates of the same record are merged field by field and sent in batches.
+
+        Returns:
+            True if queued, False if the buffer is unavailable
+        """
+        from .zoho_write_buffer import enqueue_update
+
+        try:
+            enqueue_update(module_name, record_id, data)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to queue update for {record_id} in {module_name}: {e}")
+            return False
+
     def create_attribution_record(self, attribution_data):
         """
         Create a Lead Attribution Record in Zoho.
@@ -89,11 +134,10 @@ class ZohoCRMClient:
             Attribution record ID or None on error
         """
         url = f"{self.api_domain}/crm/v2/{ZOHO_ATTRIBUTION_MODULE}"
-        headers = self._get_headers()
         payload = {"data": [attribution_data]}
 
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self._send('POST', url, payload)
             response.raise_for_status()
             result = response.json()
 
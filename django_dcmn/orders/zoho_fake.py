@@ -0,0 +1,385 @@
+# orders/zoho_fake.py
+"""
+Offline stand-in for the Zoho CRM v2/v3 API, for load tests and benchmarks.
+
+In-memory WSGI app (stdlib only) covering what this project calls:
+
+    POST /oauth/v2/token                      access token (any refresh token)
+    POST /crm/v{2,3}/{module}                 create (Contacts: DUPLICATE_DATA on same Email)
+    POST /crm/v{2,3}/{module}/upsert          upsert on duplicate_check_fields
+    PUT  /crm/v{2,3}/{module}[/{id}]          update (batch or single)
+    GET  /crm/v{2,3}/{module}/{id}            get (?fields=A,B), 204 if unknown
+    GET  /crm/v{2,3}/{module}/search          ?email= / ?phone= / ?criteria=(Field:equals:value)
+    POST /crm/v{2,3}/{module}/{id}/Attachments
+    POST /crm/v3/__composite_requests         sub-requests in order, @{n:$.data[0].details.id} references
+
+    GET  /__fake__/stats                      request counts per operation and injected failures
+    POST /__fake__/reset                      drop records, tokens and stats
+
+Fault injection (FakeZohoConfig): latency drawn from a distribution
+("const:0.2", "uniform:0.1,0.4", "normal:0.3,0.1", "lognormal:-1.5,0.5",
+"exp:0.25"), access tokens that stop working after token_ttl seconds (401
+INVALID_TOKEN), a token bucket answering 429 with Retry-After above
+rate_limit calls/sec, and 5xx answers with probability error_rate.
+
+Run it with `manage.py run_fake_zoho` and point ZOHO_API_DOMAIN and
+ZOHO_TOKEN_URL at it.
+"""
+
+import re
+import json
+import time
+import random
+import threading
+import itertools
+import logging
+import socketserver
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+logger = logging.getLogger(__name__)
+
+CRM_PATH_RE = re.compile(r'^/crm/v[23]/(?P<module>[A-Za-z0-9_]+)(?:/(?P<rest>.*))?$')
+COMPOSITE_REF_RE = re.compile(r'@\{(\d+):\$\.data\[0\]\.details\.id\}')
+CRITERIA_RE = re.compile(r'\(([A-Za-z0-9_]+):equals:([^)]*)\)')
+
+# Zoho's default duplicate check field per module (create/upsert without duplicate_check_fields)
+DEFAULT_DUPLICATE_FIELDS = {'Contacts': ['Email']}
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution from "kind:params" (seconds):
+    const:S, uniform:LOW,HIGH, normal:MEAN,SD, lognormal:MU,SIGMA, exp:MEAN.
+    """
+    kind, _, params = (spec or 'const:0').partition(':')
+    args = [float(p) for p in params.split(',') if p.strip()]
+    samplers = {
+        'const': lambda rng: args[0],
+        'uniform': lambda rng: rng.uniform(args[0], args[1]),
+        'normal': lambda rng: rng.gauss(args[0], args[1]),
+        'lognormal': lambda rng: rng.lognormvariate(args[0], args[1]),
+        'exp': lambda rng: rng.expovariate(1 / args[0]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution '{kind}' (use {', '.join(samplers)})")
+    sampler = samplers[kind]
+    sampler(random.Random(0))  # fail on missing parameters now, not per request
+    return lambda rng: max(0.0, sampler(rng))
+
+
+@dataclass
+class FakeZohoConfig:
+    latency: str = 'const:0'          # see parse_latency
+    error_rate: float = 0.0           # probability of a 5xx answer
+    error_statuses: tuple = (500, 502, 503)
+    token_ttl: float = 3600           # seconds an issued token is accepted
+    token_expires_in: int = 3600      # expires_in reported to the client
+    rate_limit: float = 0             # calls/sec per server, 0 = unlimited
+    rate_burst: int = 20
+    retry_after: int = 1              # Retry-After header of a 429
+    seed: Optional[int] = None
+
+
+# =============================================================================
+# APP
+# =============================================================================
+
+class FakeZoho:
+    """The fake API. Thread-safe; `fake.app` is the WSGI callable."""
+
+    def __init__(self, config: FakeZohoConfig | None = None):
+        self.config = config or FakeZohoConfig()
+        self._latency = parse_latency(self.config.latency)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.records = {}            # module -> {id: record}
+            self.attachments = Counter()  # (module, id) -> count
+            self.tokens = {}             # token -> accepted until
+            self.stats = Counter()
+            self._ids = itertools.count(5_000_000_000_000_000_000)
+            self._bucket = float(self.config.rate_burst)
+            self._bucket_at = time.monotonic()
+
+    # -------- WSGI --------
+
+    def app(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO', '')
+        query = {k: v[0] for k, v in parse_qs(environ.get('QUERY_STRING', '')).items()}
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        body = environ['wsgi.input'].read(length) if length else b''
+
+        status, payload, headers = self.handle(method, path, query, body, environ)
+        data = b'' if payload is None else json.dumps(payload).encode()
+        reason = {200: 'OK', 201: 'Created', 202: 'Accepted', 204: 'No Content', 207: 'Multi-Status',
+                  400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 429: 'Too Many Requests'}
+        start_response(f"{status} {reason.get(status, 'Error')}", [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(data))),
+            *headers,
+        ])
+        return [data]
+
+    def handle(self, method: str, path: str, query: dict, body: bytes, environ: dict) -> tuple:
+        """Returns (status, json payload or None, extra headers)."""
+        if path.startswith('/__fake__/'):
+            return self._control(method, path)
+
+        operation = self._operation(method, path)
+        time.sleep(self._latency(self._rng))
+
+        with self._lock:
+            self.stats[operation] += 1
+            if self._throttled():
+                self.stats['injected_429'] += 1
+                return 429, {'code': 'TOO_MANY_REQUESTS', 'message': 'API rate limit exceeded'}, [
+                    ('Retry-After', str(self.config.retry_after)),
+                ]
+            if self.config.error_rate and self._rng.random() < self.config.error_rate:
+                status = self._rng.choice(self.config.error_statuses)
+                self.stats[f'injected_{status}'] += 1
+                return status, {'code': 'INTERNAL_ERROR', 'message': 'injected failure'}, []
+
+            if path.startswith('/oauth/'):
+                return self._issue_token()
+
+            auth = environ.get('HTTP_AUTHORIZATION', '')
+            token = auth.split(' ', 1)[1] if ' ' in auth else ''
+            if self.tokens.get(token, 0) < time.time():
+                self.stats['injected_401'] += 1
+                return 401, {'code': 'INVALID_TOKEN', 'message': 'invalid oauth token', 'status': 'error'}, []
+
+            if path.endswith('/__composite_requests'):
+                return self._composite(json.loads(body or b'{}'))
+
+            match = CRM_PATH_RE.match(path)
+            if not match:
+                return 404, {'code': 'INVALID_URL_PATTERN', 'status': 'error'}, []
+            return self._crm(method, match['module'], match['rest'] or '', query, body)
+
+    @staticmethod
+    def _operation(method: str, path: str) -> str:
+        if path.startswith('/oauth/'):
+            return 'token'
+        if path.endswith('/__composite_requests'):
+            return 'composite'
+        if path.endswith('/Attachments'):
+            return 'attach'
+        if path.endswith('/upsert'):
+            return 'upsert'
+        if '/search' in path:
+            return 'search'
+        return {'POST': 'create', 'PUT': 'update', 'GET': 'get'}.get(method, method.lower())
+
+    def _throttled(self) -> bool:
+        if not self.config.rate_limit:
+            return False
+        now = time.monotonic()
+        self._bucket = min(self.config.rate_burst, self._bucket + (now - self._bucket_at) * self.config.rate_limit)
+        self._bucket_at = now
+        if self._bucket < 1:
+            return True
+        self._bucket -= 1
+        return False
+
+    def _control(self, method: str, path: str) -> tuple:
+        if path == '/__fake__/reset' and method == 'POST':
+            self.reset()
+            return 200, {'status': 'reset'}, []
+        if path == '/__fake__/stats':
+            with self._lock:
+                return 200, {
+                    'requests': dict(self.stats),
+                    'records': {m: len(r) for m, r in self.records.items()},
+                    'attachments': sum(self.attachments.values()),
+                }, []
+        return 404, {'code': 'INVALID_URL_PATTERN'}, []
+
+    # -------- OAuth --------
+
+    def _issue_token(self) -> tuple:
+        token = f"1000.fake.{next(self._ids)}"
+        self.tokens[token] = time.time() + self.config.token_ttl
+        return 200, {
+            'access_token': token,
+            'api_domain': 'fake',
+            'token_type': 'Bearer',
+            'expires_in': self.config.token_expires_in,
+        }, []
+
+    # -------- CRM --------
+
+    def _crm(self, method: str, module: str, rest: str, query: dict, body: bytes) -> tuple:
+        payload = json.loads(body) if body and not rest.endswith('Attachments') else {}
+
+        if rest == '' and method == 'POST':
+            return self._write(module, payload, upsert=False)
+        if rest == 'upsert' and method == 'POST':
+            return self._write(module, payload, upsert=True)
+        if rest == '' and method == 'PUT':
+            return self._update(module, payload.get('data') or [])
+        if rest == 'search' and method == 'GET':
+            return self._search(module, query)
+
+        parts = rest.split('/')
+        record_id = parts[0]
+        if len(parts) == 2 and parts[1] == 'Attachments' and method == 'POST':
+            if record_id not in self.records.get(module, {}):
+                return 400, self._items([self._error('INVALID_DATA', 'the related id given seems to be invalid')]), []
+            self.attachments[(module, record_id)] += 1
+            return 200, self._items([self._success(next(self._ids), 'attachment uploaded')]), []
+        if len(parts) == 1 and method == 'PUT':
+            return self._update(module, [{**(payload.get('data') or [{}])[0], 'id': record_id}])
+        if len(parts) == 1 and method == 'GET':
+            record = self.records.get(module, {}).get(record_id)
+            if record is None:
+                return 204, None, []
+            fields = [f for f in query.get('fields', '').split(',') if f]
+            if fields:
+                record = {'id': record_id, **{f: record.get(f) for f in fields}}
+            return 200, {'data': [record]}, []
+        return 404, {'code': 'INVALID_URL_PATTERN', 'status': 'error'}, []
+
+    def _write(self, module: str, payload: dict, upsert: bool) -> tuple:
+        records = self.records.setdefault(module, {})
+        duplicate_fields = payload.get('duplicate_check_fields') or DEFAULT_DUPLICATE_FIELDS.get(module, [])
+        items = []
+        for data in payload.get('data') or []:
+            match_field, existing_id = self._find_duplicate(records, data, duplicate_fields)
+            if existing_id and upsert:
+                records[existing_id].update(data)
+                items.append({**self._success(existing_id, 'record updated'),
+                              'action': 'update', 'duplicate_field': match_field})
+            elif existing_id:
+                items.append(self._error('DUPLICATE_DATA', 'duplicate data',
+                                         {'id': existing_id, 'api_name': match_field}))
+            elif module == 'Contacts' and not data.get('Last_Name'):
+                items.append(self._error('MANDATORY_NOT_FOUND', 'required field not found', {'api_name': 'Last_Name'}))
+            else:
+                record_id = str(next(self._ids))
+                records[record_id] = {**data, 'id': record_id}
+                items.append({**self._success(record_id, 'record added'), **({'action': 'insert'} if upsert else {})})
+        return (201 if all(i['code'] == 'SUCCESS' for i in items) else 202), self._items(items), []
+
+    @staticmethod
+    def _find_duplicate(records: dict, data: dict, fields: list) -> tuple:
+        for field in fields:
+            value = data.get(field)
+            if value in (None, ''):
+                continue
+            for record_id, record in records.items():
+                if str(record.get(field, '')).lower() == str(value).lower():
+                    return field, record_id
+        return None, None
+
+    def _update(self, module: str, rows: list) -> tuple:
+        records = self.records.get(module, {})
+        items = []
+        for row in rows:
+            record_id = str(row.get('id', ''))
+            if record_id not in records:
+                items.append(self._error('INVALID_DATA', 'the id given seems to be invalid', {'api_name': 'id'}))
+                continue
+            records[record_id].update({k: v for k, v in row.items() if k != 'id'})
+            items.append(self._success(record_id, 'record updated'))
+        return 200, self._items(items), []
+
+    def _search(self, module: str, query: dict) -> tuple:
+        if 'criteria' in query:
+            conditions = CRITERIA_RE.findall(query['criteria'])
+        elif 'email' in query:
+            conditions = [('Email', query['email'])]
+        elif 'phone' in query:
+            conditions = [('Phone', query['phone'])]
+        else:
+            return 400, {'code': 'REQUIRED_PARAM_MISSING', 'status': 'error'}, []
+
+        found = [
+            record for record in self.records.get(module, {}).values()
+            if any(str(record.get(field, '')).lower() == value.lower() for field, value in conditions)
+        ]
+        if not found:
+            return 204, None, []
+        return 200, {'data': found, 'info': {'count': len(found), 'more_records': False}}, []
+
+    def _composite(self, payload: dict) -> tuple:
+        results = {}
+        responses = []
+        for sub in payload.get('__composite_requests') or []:
+            body = json.dumps(sub.get('body') or {})
+            body = COMPOSITE_REF_RE.sub(lambda m: results.get(m.group(1), ''), body)
+            match = CRM_PATH_RE.match(sub.get('uri', ''))
+            if match:
+                status, resp_body, _ = self._crm(sub.get('method', 'GET'), match['module'], match['rest'] or '', {}, body.encode())
+            else:
+                status, resp_body = 404, {'code': 'INVALID_URL_PATTERN'}
+            items = (resp_body or {}).get('data') or [{}]
+            if items[0].get('code') == 'SUCCESS':
+                results[str(sub.get('sub_request_id'))] = str(items[0]['details']['id'])
+            responses.append({
+                'code': 'SUCCESS',
+                'details': {'response': {'status_code': status, 'body': resp_body}},
+                'message': 'success',
+                'status': 'success',
+            })
+        return 200, {'__composite_requests': responses}, []
+
+    # -------- Response helpers --------
+
+    @staticmethod
+    def _items(items: list) -> dict:
+        return {'data': items}
+
+    @staticmethod
+    def _success(record_id, message: str) -> dict:
+        now = time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime())
+        return {
+            'code': 'SUCCESS',
+            'details': {'id': str(record_id), 'Created_Time': now, 'Modified_Time': now},
+            'message': message,
+            'status': 'success',
+        }
+
+    @staticmethod
+    def _error(code: str, message: str, details: dict | None = None) -> dict:
+        return {'code': code, 'details': details or {}, 'message': message, 'status': 'error'}
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        logger.debug(f"[FakeZoho] {format % args}")
+
+
+def make_fake_server(host: str = '127.0.0.1', port: int = 8765, config: FakeZohoConfig | None = None):
+    """
+    Threaded server around a FakeZoho (port 0 = any free port).
+
+    Returns:
+        (server, fake); run server.serve_forever(), possibly in a thread
+    """
+    fake = FakeZoho(config)
+    server = make_server(host, port, fake.app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    return server, fake
@@ -0,0 +1,279 @@
+# orders/zoho_ratelimit.py
+"""
+Cluster-wide rate limiter for Zoho CRM API calls.
+
+One Redis token bucket plus an in-flight counter (Zoho's per-org concurrency
+limit) is shared by every gunicorn and Celery process. Calls are tagged with
+an operation class; lower-priority classes must leave a reserve of tokens and
+of daily API credits for the classes above them:
+
+    interactive  user/CRM facing (TID write-back)       no reserve
+    sync         order sync tasks, webhooks (default)   leaves 20% of tokens / 5% of credits
+    background   reviews, backfills                     leaves 50% of tokens / 20% of credits
+
+Daily credits are read from Zoho's X-RATELIMIT-* response headers, and a 429
+blocks every process until Retry-After / the reset time. When no budget is
+left a call waits (queues) up to its class's max wait, then raises
+ZohoRateLimited. Usage (context manager or decorator):
+
+    with zoho_ratelimit.operation(zoho_ratelimit.INTERACTIVE):
+        update_record_fields(...)
+
+    @zoho_ratelimit.operation(zoho_ratelimit.BACKGROUND)
+    def backfill(...): ...
+"""
+
+import time
+import uuid
+import logging
+import contextvars
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+SYNC = 'sync'
+BACKGROUND = 'background'
+
+# reserve: share of the token bucket left for higher classes
+# credit_floor: share of daily API credits left for higher classes
+# max_wait: seconds a call may queue before ZohoRateLimited is raised
+OP_CLASSES = {
+    INTERACTIVE: {'reserve': 0.0, 'credit_floor': 0.0, 'max_wait': 15},
+    SYNC: {'reserve': 0.2, 'credit_floor': 0.05, 'max_wait': 120},
+    BACKGROUND: {'reserve': 0.5, 'credit_floor': 0.2, 'max_wait': 600},
+}
+
+BUCKET_KEY = 'zoho_rl:bucket'
+INFLIGHT_KEY = 'zoho_rl:inflight'
+BLOCKED_KEY = 'zoho_rl:blocked_until'
+CREDITS_KEY = 'zoho_rl:credits'
+COUNTER_KEY = 'zoho_rl:counters'
+
+# Leases of crashed processes free their concurrency slot after this long
+INFLIGHT_LEASE = 120
+# Poll interval bounds while queued
+MIN_SLEEP = 0.05
+MAX_SLEEP = 5.0
+
+_op_class = contextvars.ContextVar('zoho_op_class', default=SYNC)
+
+# Returns '0' when a token + concurrency slot were taken, else seconds to wait.
+_ACQUIRE_LUA = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local concurrency = tonumber(ARGV[5])
+
+local blocked = tonumber(redis.call('GET', KEYS[3]) or '0')
+if blocked > now then
+    return tostring(blocked - now)
+end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if redis.call('ZCARD', KEYS[2]) >= concurrency then
+    return '0.1'
+end
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+if tokens - 1 < reserve then
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], 3600)
+    return tostring((reserve + 1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[7]), ARGV[6])
+return '0'
+"""
+
+
+class ZohoRateLimited(requests.RequestException):
+    """No Zoho API budget became available within the operation class's max wait."""
+
+
+# =============================================================================
+# OPERATION CLASS
+# =============================================================================
+
+@contextmanager
+def operation(op_class: str):
+    """Tag every Zoho call made inside the block with an operation class."""
+    if op_class not in OP_CLASSES:
+        raise ValueError(f"Unknown Zoho operation class: {op_class}")
+    token = _op_class.set(op_class)
+    try:
+        yield
+    finally:
+        _op_class.reset(token)
+
+
+def current_operation() -> str:
+    return _op_class.get()
+
+
+def applies_to(url: str) -> bool:
+    """Only CRM API calls are limited (OAuth token calls have their own limits)."""
+    return settings.ZOHO_RATE_LIMIT_ENABLED and urlparse(url).path.startswith('/crm/')
+
+
+# =============================================================================
+# ACQUIRE / RELEASE
+# =============================================================================
+
+def acquire(op_class: str | None = None) -> str | None:
+    """
+    Block until the operation class may call Zoho.
+
+    Returns:
+        Lease ID to pass to release(), or None if Redis is unavailable (fail open)
+    Raises:
+        ZohoRateLimited after the class's max wait
+    """
+    op_class = op_class or current_operation()
+    policy = OP_CLASSES[op_class]
+    burst = settings.ZOHO_RATE_LIMIT_BURST
+    lease_id = uuid.uuid4().hex
+    deadline = time.time() + policy['max_wait']
+    waited = False
+
+    try:
+        conn = get_redis_connection('default')
+        while True:
+            now = time.time()
+            wait = _credit_wait(conn, policy, now)
+            if not wait:
+                wait = float(conn.eval(
+                    _ACQUIRE_LUA, 3, BUCKET_KEY, INFLIGHT_KEY, BLOCKED_KEY,
+                    now, settings.ZOHO_RATE_LIMIT_RATE, burst, burst * policy['reserve'],
+                    settings.ZOHO_RATE_LIMIT_CONCURRENCY, lease_id, INFLIGHT_LEASE,
+                ))
+            if wait <= 0:
+                return lease_id
+
+            if not waited:
+                waited = True
+                conn.hincrby(COUNTER_KEY, f'waits:{op_class}', 1)
+                logger.info(f"[ZohoRateLimit] {op_class} call queued (~{wait:.1f}s)")
+
+            if now >= deadline:
+                conn.hincrby(COUNTER_KEY, f'rejected:{op_class}', 1)
+                raise ZohoRateLimited(f"Zoho API budget exhausted for '{op_class}' calls")
+            time.sleep(min(max(wait, MIN_SLEEP), MAX_SLEEP, max(deadline - now, MIN_SLEEP)))
+    except ZohoRateLimited:
+        raise
+    except Exception as e:
+        logger.warning(f"[ZohoRateLimit] Limiter unavailable ({e}), calling Zoho without it")
+        return None
+
+
+def release(lease_id: str | None):
+    if not lease_id:
+        return
+    try:
+        get_redis_connection('default').zrem(INFLIGHT_KEY, lease_id)
+    except Exception:
+        logger.debug(f"[ZohoRateLimit] Failed to release lease {lease_id}")
+
+
+def _credit_wait(conn, policy: dict, now: float) -> float:
+    """Seconds until daily credits reset if this class is below its credit floor, else 0."""
+    if not policy['credit_floor']:
+        return 0
+    credits = conn.hgetall(CREDITS_KEY)
+    if not credits:
+        return 0
+    limit = float(credits.get(b'limit') or 0)
+    remaining = float(credits.get(b'remaining') or 0)
+    reset_at = float(credits.get(b'reset_at') or 0)
+    if limit and remaining <= limit * policy['credit_floor'] and reset_at > now:
+        return reset_at - now
+    return 0
+
+
+# =============================================================================
+# RESPONSE FEEDBACK
+# =============================================================================
+
+def _parse_reset(value, now: float) -> float | None:
+    """X-RATELIMIT-RESET may be an epoch in ms, an epoch in s or a delay in s."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value > 1e12:
+        return value / 1000
+    if value > 1e9:
+        return value
+    return now + value
+
+
+def record_response(response: requests.Response) -> float:
+    """
+    Feed Zoho's rate-limit headers back into the limiter.
+
+    Returns:
+        Seconds every process must back off (429), else 0
+    """
+    headers = response.headers
+    now = time.time()
+    try:
+        conn = get_redis_connection('default')
+
+        reset_at = _parse_reset(headers.get('X-RATELIMIT-RESET'), now)
+        if headers.get('X-RATELIMIT-REMAINING') is not None:
+            mapping = {
+                'limit': headers.get('X-RATELIMIT-LIMIT') or 0,
+                'remaining': headers.get('X-RATELIMIT-REMAINING'),
+                'reset_at': reset_at or now + 24 * 3600,
+            }
+            pipe = conn.pipeline()
+            pipe.hset(CREDITS_KEY, mapping=mapping)
+            pipe.expireat(CREDITS_KEY, int(mapping['reset_at']) + 1)
+            pipe.execute()
+
+        if response.status_code != 429:
+            return 0
+
+        try:
+            delay = float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            delay = (reset_at - now) if reset_at and reset_at > now else settings.ZOHO_RATE_LIMIT_429_BACKOFF
+        blocked_until = now + delay
+
+        current = float(conn.get(BLOCKED_KEY) or 0)
+        if blocked_until > current:
+            conn.set(BLOCKED_KEY, blocked_until, ex=max(int(delay) + 1, 1))
+        conn.hincrby(COUNTER_KEY, '429', 1)
+        logger.warning(f"[ZohoRateLimit] ⚠️ Zoho returned 429, all processes back off for {delay:.0f}s")
+        return delay
+    except Exception as e:
+        logger.debug(f"[ZohoRateLimit] Failed to record rate-limit headers: {e}")
+        return settings.ZOHO_RATE_LIMIT_429_BACKOFF if response.status_code == 429 else 0
+
+
+def get_stats() -> dict:
+    """Current bucket, in-flight calls, daily credits and wait/429 counters."""
+    conn = get_redis_connection('default')
+    now = time.time()
+    bucket = {k.decode(): float(v) for k, v in conn.hgetall(BUCKET_KEY).items()}
+    credits = {k.decode(): float(v) for k, v in conn.hgetall(CREDITS_KEY).items()}
+    counters = {k.decode(): int(v) for k, v in conn.hgetall(COUNTER_KEY).items()}
+    return {
+        'tokens': bucket.get('tokens', settings.ZOHO_RATE_LIMIT_BURST),
+        'inflight': conn.zcount(INFLIGHT_KEY, now, '+inf'),
+        'blocked_for': max(0.0, float(conn.get(BLOCKED_KEY) or 0) - now),
+        'credits': credits,
+        'counters': counters,
+    }
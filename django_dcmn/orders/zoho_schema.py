@@ -0,0 +1,313 @@
+# orders/zoho_schema.py
+"""
+Zoho field schema: the one place where our records are mapped onto Zoho
+modules.
+
+    MODULES        per Zoho module: record name, client name, email, phone,
+                   stage and comments fields, the Contact lookup field and the
+                   "order received" stage value
+    ORDER_SCHEMAS  per order_type: target module, field list and unique key
+                   field, compiled once into the create payload (an upsert on
+                   the key, so a retried create finds the record instead of
+                   duplicating it) and the update payload (web form matched
+                   to a phone lead)
+
+WhatConverts phone lead payloads and the phone lead stage/contact updates
+read their field names from MODULES.
+
+Updates are diff-only: a hash of every field value last written to a record
+is kept in the cache (ZOHO_SYNC_STATE_TTL). changed_fields() drops fields
+whose value has not changed since, and an update left empty is not sent.
+A lost hash only means the field is sent again.
+"""
+
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# MODULES
+# =============================================================================
+
+@dataclass(frozen=True)
+class ModuleSchema:
+    api_name: str
+    label: str                          # record name prefix ("FBI Phone Lead — ...")
+    name_field: str
+    client_name_field: Optional[str]    # None: no plain-text client name field
+    email_field: str
+    phone_field: str
+    stage_field: str
+    comments_field: str
+    contact_field: Optional[str]        # lookup to Contacts
+    form_stage: str = 'Order Received'  # stage of a record created from a web form
+
+
+MODULES = {m.api_name: m for m in (
+    ModuleSchema('Deals', 'FBI', 'Deal_Name', 'Name1', 'Email_1', 'Phone',
+                 'Stage', 'Client_Comment', 'Client_Contact'),
+    ModuleSchema('Embassy_Legalization', 'Embassy', 'Name', 'Client_Name', 'Email', 'Phone',
+                 'Status', 'Client_Comment', 'Client_Contact'),
+    ModuleSchema('Translation_Services', 'Translation', 'Name', 'Client_Name1', 'Email', 'Phone',
+                 'Translation_Status', 'Client_Comments', 'Client_Contact',
+                 form_stage='Client Placed Request'),
+    ModuleSchema('Apostille_Services', 'Apostille', 'Name', 'Client_Name', 'Email', 'Phone_Number',
+                 'Status', 'Client_Comments', 'Client_Contact',
+                 form_stage='Client placed the request'),
+    ModuleSchema('Triple_Seal_Apostilles', 'Triple Seal', 'Name', 'Client_Name', 'Client_Email', 'Client_Phone',
+                 'Stage', 'Client_Notes_Comments', 'Client_Contact'),
+    ModuleSchema('I_9_Verification', 'I9', 'Name', 'Client_Name', 'Client_Email', 'Client_Phone',
+                 'Stage', 'Client_Comments', 'Client_Contact'),
+    ModuleSchema('Notary_Services', 'Notary', 'Name', None, 'Client_Email', 'Client_Phone_Number',
+                 'Notary_Stages', 'Client_Comments', 'Client_Name'),
+    ModuleSchema('Get_A_Quote_Leads', 'Quote', 'Name', 'Client_Name', 'Client_Email', 'Client_Phone',
+                 'GET_A_QUOTE_LEADS', 'Client_Comments', 'Name_of_Client'),
+)}
+
+# Phone leads with an unknown service go to Get a Quote
+DEFAULT_MODULE = 'Get_A_Quote_Leads'
+
+
+def get_module(module_name: str) -> Optional[ModuleSchema]:
+    return MODULES.get(module_name)
+
+
+def get_stage_field(module_name: str) -> str:
+    module = MODULES.get(module_name)
+    return module.stage_field if module else 'Stage'
+
+
+def get_form_stage(module_name: str) -> str:
+    module = MODULES.get(module_name)
+    return module.form_stage if module else 'Order Received'
+
+
+def get_contact_field(module_name: str) -> Optional[str]:
+    module = MODULES.get(module_name)
+    return module.contact_field if module else None
+
+
+# =============================================================================
+# ORDER SCHEMAS
+# =============================================================================
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    value: Callable[[Any], Any]
+    create_only: bool = False  # initial stage/status: never resent by updates
+
+
+def const(value):
+    return lambda order: value
+
+
+def stage(module_name: str) -> Field:
+    """The module's stage field set to its "order received" value (create only)."""
+    module = MODULES[module_name]
+    return Field(module.stage_field, const(module.form_stage), create_only=True)
+
+
+@dataclass(frozen=True)
+class OrderSchema:
+    order_type: str
+    module: str
+    fields: tuple
+    key_field: str = "Name"           # unique per order: create is an upsert on it
+    link_contact: bool = False        # lookup the client's Contact on create
+    tracking_on_create: bool = True   # Tracking_ID sent on create
+    attach_files: bool = True
+    _create_fields: tuple = field(init=False, repr=False, compare=False)
+    _update_fields: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_create_fields', tuple((f.name, f.value) for f in self.fields))
+        object.__setattr__(self, '_update_fields', tuple((f.name, f.value) for f in self.fields if not f.create_only))
+
+    @property
+    def contact_field(self) -> Optional[str]:
+        return MODULES[self.module].contact_field if self.link_contact else None
+
+    def build_create(self, order, contact_id: str | None = None, tracking_id: str | None = None) -> dict:
+        """Create payload for {module}/upsert ({"data": [record], "duplicate_check_fields": [key]})."""
+        record = {name: value(order) for name, value in self._create_fields}
+        if self.contact_field:
+            record[self.contact_field] = {"id": contact_id}
+        if tracking_id and self.tracking_on_create:
+            record["Tracking_ID"] = tracking_id
+        return {"data": [record], "duplicate_check_fields": [self.key_field]}
+
+    def build_update(self, order, tracking_id: str | None = None) -> dict:
+        """Update fields: create fields without stage/status, None values dropped."""
+        record = {name: value(order) for name, value in self._update_fields}
+        if tracking_id:
+            record["Tracking_ID"] = tracking_id
+        return {k: v for k, v in record.items() if v is not None}
+
+
+def _marriage_info(order) -> str:
+    if order.file_attachments.exists():
+        return "- File Uploaded -"
+    return (
+        f"Husband: {order.husband_full_name}\n"
+        f"Wife: {order.wife_full_name}\n"
+        f"Date of marriage: {order.marriage_date}\n"
+        f"Certificate Number: {order.marriage_number}\n"
+        f"Country of Use: {order.country}"
+    )
+
+
+ORDER_SCHEMAS = {s.order_type: s for s in (
+    OrderSchema("fbi", "Deals", (
+        Field("Deal_Name", lambda o: f"FBI {o.package.label} ID{o.id}"),
+        Field("Order_ID", lambda o: o.id),
+        Field("Name1", lambda o: o.name),
+        Field("Email_1", lambda o: o.email),
+        Field("Phone", lambda o: o.phone),
+        Field("Country_of_Use", lambda o: o.country_name),
+        Field("Client_Comment", lambda o: o.comments),
+        Field("Address", lambda o: o.address),
+        Field("Package", lambda o: o.package.label),
+        Field("Certificate", lambda o: str(o.count)),
+        Field("Shipping_speed", lambda o: o.shipping_option.label),
+        Field("Amount", lambda o: float(o.total_price)),
+        Field("Status", const("Order Received"), create_only=True),
+        Field("Payment_Status", lambda o: "Fully Paid" if o.is_paid else "Not Paid"),
+        Field("Submission_Date", lambda o: o.created_at.date().isoformat()),
+    ), key_field="Order_ID", link_contact=True),
+
+    OrderSchema("embassy", "Embassy_Legalization", (
+        Field("Name", lambda o: f"Embassy ID{o.id}"),
+        Field("Client_Name", lambda o: o.name),
+        Field("Email", lambda o: o.email),
+        Field("Phone", lambda o: o.phone),
+        Field("Country_of_Legalization", lambda o: o.country),
+        Field("Address", lambda o: o.address),
+        Field("Document_Type", lambda o: o.document_type),
+        stage("Embassy_Legalization"),
+        Field("Payment_Status", const("Not Paid")),
+        Field("Client_Comment", lambda o: o.comments),
+    )),
+
+    OrderSchema("translation", "Translation_Services", (
+        Field("Name", lambda o: f"Translation {o.name} ID{o.id}"),
+        Field("Client_Name1", lambda o: o.name),
+        Field("Email", lambda o: o.email),
+        Field("Phone", lambda o: o.phone),
+        Field("Client_Address", lambda o: o.address),
+        Field("Languages", lambda o: o.languages),
+        Field("Client_Comments", lambda o: o.comments),
+        stage("Translation_Services"),
+    )),
+
+    OrderSchema("apostille", "Apostille_Services", (
+        Field("Name", lambda o: f"Apostille Order ID{o.id}"),
+        Field("Client_Name", lambda o: o.name),
+        Field("Email", lambda o: o.email),
+        Field("Phone_Number", lambda o: o.phone),
+        Field("Address", lambda o: o.address or "- Office Visit -"),
+        Field("Country_of_Use", lambda o: o.country),
+        Field("Document_Type", lambda o: o.type),
+        Field("Client_Comments", lambda o: o.comments or ""),
+        stage("Apostille_Services"),
+        Field("Process_Stage", const("Submission Received")),
+    ), attach_files=False),
+
+    OrderSchema("marriage", "Triple_Seal_Apostilles", (
+        Field("Name", lambda o: f"Triple Seal ID{o.id}"),
+        Field("Client_Name", lambda o: o.name),
+        Field("Client_Email", lambda o: o.email),
+        Field("Client_Phone", lambda o: o.phone),
+        Field("Client_Address", lambda o: o.address),
+        Field("Type_of_Legalization", const("Triple Seal")),
+        stage("Triple_Seal_Apostilles"),
+        Field("Payment_Status", const("Deposit")),
+        Field("Amount_Paid", lambda o: str(o.total_price)),
+        Field("Marriage_Info", _marriage_info),
+        Field("Client_Notes_Comments", lambda o: o.comments or ""),
+    ), link_contact=True, tracking_on_create=False),
+
+    OrderSchema("I-9", "I_9_Verification", (
+        Field("Name", lambda o: f"I9 Verification ID{o.id}"),
+        Field("Client_Name", lambda o: o.name),
+        Field("Client_Email", lambda o: o.email),
+        Field("Client_Phone", lambda o: o.phone),
+        Field("Address", lambda o: o.address),
+        Field("Form_Date_Time", lambda o: f'{o.appointment_date} - {o.appointment_time}'),
+        stage("I_9_Verification"),
+        Field("Client_Comments", lambda o: o.comments or ""),
+    ), link_contact=True, tracking_on_create=False),
+
+    OrderSchema("quote", "Get_A_Quote_Leads", (
+        Field("Name", lambda o: f"Quote ID{o.id}"),
+        Field("Client_Name", lambda o: o.name),
+        Field("Client_Email", lambda o: o.email),
+        Field("Client_Phone", lambda o: o.phone),
+        Field("Number_Of_Documents", lambda o: str(o.number)),
+        Field("Client_Address_Location", lambda o: o.address),
+        Field("Date_Time", lambda o: o.appointment_date + ' - ' + o.appointment_time),
+        Field("GET_A_QUOTE_LEADS", lambda o: o.services),  # requested services, resent by updates
+        Field("Client_Comments", lambda o: o.comments or ""),
+    ), link_contact=True, tracking_on_create=False, attach_files=False),
+
+    OrderSchema("pre-check", "Get_A_Quote_Leads", (
+        Field("Name", lambda o: f"Pre-Check ID{o.id}"),
+        Field("Client_Name", lambda o: o.name),
+        Field("Client_Email", lambda o: o.email),
+        Field("Client_Phone", lambda o: o.phone),
+        Field("Document_Type", lambda o: o.document_type),
+        Field("Country_of_Use", lambda o: o.destination_country),
+        Field("GET_A_QUOTE_LEADS", const("Pre-Check Document Review"), create_only=True),
+        Field("Client_Comments", lambda o: o.comments or ""),
+    ), link_contact=True, tracking_on_create=False),
+)}
+
+
+def get_order_schema(order_type: str) -> Optional[OrderSchema]:
+    return ORDER_SCHEMAS.get('I-9' if order_type == 'i9' else order_type)
+
+
+# =============================================================================
+# DIFF-ONLY UPDATES
+# =============================================================================
+
+SYNC_STATE_KEY_PREFIX = 'zoho_synced'
+
+
+def _state_key(module_name: str, record_id: str) -> str:
+    return f'{SYNC_STATE_KEY_PREFIX}:{module_name}:{record_id}'
+
+
+def _value_hash(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def changed_fields(module_name: str, record_id: str, fields: dict) -> dict:
+    """Fields whose value differs from what was last written to the record."""
+    try:
+        state = cache.get(_state_key(module_name, str(record_id))) or {}
+    except Exception as e:
+        logger.warning(f"[ZohoSchema] Sync state unavailable, sending all fields: {e}")
+        return dict(fields)
+    return {k: v for k, v in fields.items() if state.get(k) != _value_hash(v)}
+
+
+def remember_synced(module_name: str, record_id: str, fields: dict):
+    """Record field values just written to Zoho (after a successful create/update)."""
+    if not fields:
+        return
+    key = _state_key(module_name, str(record_id))
+    try:
+        state = cache.get(key) or {}
+        state.update({k: _value_hash(v) for k, v in fields.items()})
+        cache.set(key, state, settings.ZOHO_SYNC_STATE_TTL)
+    except Exception as e:
+        logger.warning(f"[ZohoSchema] Failed to store sync state for {module_name}/{record_id}: {e}")
@@ -1,120 +1,88 @@
 # orders/zoho_sync.py
-import requests
 import datetime
 import logging
 from django.conf import settings
-from django.core.cache import cache
+from . import zoho_transport
+from .zoho_auth import token_manager
+from .zoho_schema import ORDER_SCHEMAS
 from .models import FbiApostilleOrder, EmbassyLegalizationOrder, TranslationOrder, ApostilleOrder
 
 logger = logging.getLogger(__name__)
 
-ZOHO_API_DOMAIN = 'https://www.zohoapis.com'
+ZOHO_API_DOMAIN = settings.ZOHO_API_DOMAIN
 
 # Module name for Lead Attribution Records
 ZOHO_ATTRIBUTION_MODULE = 'Lead_Attribution_Records'
 
+# Order attribution records are upserted on their Name, which carries the order key
+ZOHO_ATTRIBUTION_KEY_FIELD = 'Name'
+
 
 def get_or_create_contact_id(name, email, phone):
-    access_token = get_access_token()
-    headers = {
-        "Authorization": f"Zoho-oauthtoken {access_token}",
-        "Content-Type": "application/json"
-    }
+    """Zoho Contact ID for the client (local cache, else matched or created in Zoho)."""
+    from .services.zoho_contacts import resolve_contact
 
-    search_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts/search?email={email}"
-    resp = requests.get(search_url, headers=headers)
-    if resp.status_code == 204:
-        contact_data = {}
-    else:
-        try:
-            contact_data = resp.json()
-        except Exception as e:
-            print("❌ Failed to parse Zoho JSON response:", e)
-            return None
+    contact = resolve_contact(name, email, phone)
+    return contact.id if contact else None
 
-    if 'data' in contact_data and len(contact_data['data']) > 0:
-        return contact_data['data'][0]['id']
-    else:
-        # Create a new contact
-        create_contact_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts"
-        payload = {
-            "data": [{
-                "Last_Name": name,
-                "Email": email,
-                "Phone": phone
-            }]
-        }
-        resp = requests.post(create_contact_url, headers=headers, json=payload)
-        try:
-            created_data = resp.json()
-            if 'data' in created_data:
-                return created_data['data'][0]['details']['id']
-            elif 'data' in created_data and 'details' in created_data['data'][0]:
-                return created_data['data'][0]['details']['id']
-            elif 'code' in created_data['data'][0] and created_data['data'][0]['code'] == 'DUPLICATE_DATA':
-                return created_data['data'][0]['details']['id']
-            else:
-                print("❌ Error creating contact:", created_data)
-                return None
-        except Exception as e:
-            print("❌ Exception while creating contact:", e)
-            return None
 
+def get_access_token(force_refresh=False, rejected_token=None):
+    """Return a Zoho access token.
 
-def get_access_token(force_refresh=False):
-    token = cache.get("zoho_access_token")
-    if token and not force_refresh:
-        return token
+    force_refresh=True means Zoho just rejected the current token (401):
+    the token manager refreshes it once for the whole cluster.
+    """
+    if force_refresh:
+        return token_manager.recover_from_401(rejected_token)
+    return token_manager.get_token()
 
-    url = "https://accounts.zoho.com/oauth/v2/token"
-    params = {
-        "refresh_token": settings.ZOHO_REFRESH_TOKEN,
-        "client_id": settings.ZOHO_CLIENT_ID,
-        "client_secret": settings.ZOHO_CLIENT_SECRET,
-        "grant_type": "refresh_token"
-    }
-    resp = requests.post(url, params=params, timeout=30)
-    resp.raise_for_status()
-    token = resp.json()["access_token"]
 
-    # Save token to cache
-    cache.set("zoho_access_token", token, timeout=2900)  # ~50 min
-    return token
+def _create_url(module_name: str, data_payload: dict) -> str:
+    """Payloads with duplicate_check_fields (see zoho_schema) are upserted on their key."""
+    if data_payload.get('duplicate_check_fields'):
+        return f"{ZOHO_API_DOMAIN}/crm/v2/{module_name}/upsert"
+    return f"{ZOHO_API_DOMAIN}/crm/v2/{module_name}"
 
 
 def sync_order_to_zoho(order, module_name, data_payload, attach_files=True):
+    token_rejected = False
     for attempt in range(2):
-        access_token = get_access_token(force_refresh=(attempt == 1))
+        access_token = get_access_token(force_refresh=token_rejected)
         headers = {
             "Authorization": f"Zoho-oauthtoken {access_token}",
             "Content-Type": "application/json"
         }
-        resp = requests.post(f"{ZOHO_API_DOMAIN}/crm/v2/{module_name}", headers=headers, json=data_payload)
+        resp = zoho_transport.post(_create_url(module_name, data_payload), headers=headers, json=data_payload)
+        token_rejected = resp.status_code == 401
         resp_data = resp.json()
         print(f"Create {module_name} deal:", resp_data)
         try:
             record_id = resp_data['data'][0]['details']['id']
+            if resp_data['data'][0].get('action') == 'update':
+                logger.info(f"[Zoho] {module_name}/{record_id} already existed for order {order.id}, matched by upsert")
             break
         except Exception as e:
             print(f"{module_name} order creation ERROR:", e)
             if attempt == 1:
                 return False
 
+    return _complete_order_sync(order, module_name, record_id, attach_files, access_token)
+
+
+def remember_zoho_record_id(order, record_id: str):
+    """Store the Zoho record ID on the order as soon as it is known (retries resume from it)."""
+    if getattr(order, 'zoho_record_id', None) != str(record_id):
+        order.zoho_record_id = str(record_id)
+        order.save(update_fields=['zoho_record_id'])
+
+
+def _complete_order_sync(order, module_name, record_id, attach_files=True, access_token=None):
+    """Attach files to the created record and mark the order synced."""
+    remember_zoho_record_id(order, record_id)
     if attach_files:
-        file_urls = [settings.BASE_URL + fa.file.url for fa in order.file_attachments.all()]
-        for url in file_urls:
-            file_response = requests.get(url)
-            file_response.raise_for_status()
-            filename = url.split('/')[-1]
-            files = {
-                'file': (filename, file_response.content)
-            }
-            attach_url = f'{ZOHO_API_DOMAIN}/crm/v2/{module_name}/{record_id}/Attachments'
-            attach_headers = {
-                'Authorization': f'Zoho-oauthtoken {access_token}'
-            }
-            response = requests.post(attach_url, headers=attach_headers, files=files)
-            print(f'Attach "{filename}":', response.status_code, response.text)
+        # Streamed from storage, no re-download through our media URL
+        from .services.zoho_attachments import attach_order_files
+        attach_order_files(order, module_name, record_id, access_token)
 
     order.zoho_synced = True
     order.save(update_fields=['zoho_synced'])
@@ -122,12 +90,21 @@ def sync_order_to_zoho(order, module_name, data_payload, attach_files=True):
 
 
 # -------- Generic helpers to read/update Zoho records --------
-def get_record_by_id(module_name: str, record_id: str, fields: list | None = None):
+def get_record_by_id(module_name: str, record_id: str, fields: list | None = None, use_cache: bool = True):
     """Fetch Zoho CRM record by id. Optionally restrict fields with ?fields=A,B.
     Returns parsed JSON dict or None on error.
+    Served from the record cache when possible (services/zoho_records.py).
     """
+    from .services.zoho_records import get_cached_record, remember_record
+
+    if use_cache:
+        cached = get_cached_record(module_name, record_id, fields)
+        if cached is not None:
+            return cached
+
+    token_rejected = False
     for attempt in range(2):
-        access_token = get_access_token(force_refresh=(attempt == 1))
+        access_token = get_access_token(force_refresh=token_rejected)
         headers = {
             "Authorization": f"Zoho-oauthtoken {access_token}",
         }
@@ -135,13 +112,15 @@ def get_record_by_id(module_name: str, record_id: str, fields: list | None = Non
         if fields:
             params["fields"] = ",".join(fields)
         url = f"{ZOHO_API_DOMAIN}/crm/v2/{module_name}/{record_id}"
-        resp = requests.get(url, headers=headers, params=params)
+        resp = zoho_transport.get(url, headers=headers, params=params)
         if resp.status_code == 401 and attempt == 0:
             # token expired, retry once
+            token_rejected = True
             continue
         try:
             data = resp.json()
             if 'data' in data and len(data['data']) > 0:
+                remember_record(module_name, record_id, data['data'][0], fields)
                 return data['data'][0]
         except Exception:
             return None
@@ -156,8 +135,9 @@ def update_record_fields(module_name: str, record_id: str, fields_dict: dict) ->
     logger = logging.getLogger(__name__)
     
     payload = {"data": [{"id": record_id, **fields_dict}]}
+    token_rejected = False
     for attempt in range(2):
-        access_token = get_access_token(force_refresh=(attempt == 1))
+        access_token = get_access_token(force_refresh=token_rejected)
         headers = {
             "Authorization": f"Zoho-oauthtoken {access_token}",
             "Content-Type": "application/json",
@@ -165,11 +145,12 @@ def update_record_fields(module_name: str, record_id: str, fields_dict: dict) ->
         url = f"{ZOHO_API_DOMAIN}/crm/v2/{module_name}"
         
         logger.info(f"[Zoho] PUT {url} payload={payload}")
-        resp = requests.put(url, headers=headers, json=payload)
+        resp = zoho_transport.put(url, headers=headers, json=payload)
         logger.info(f"[Zoho] Response status={resp.status_code}, body={resp.text}")
         
         if resp.status_code == 401 and attempt == 0:
             # token expired, retry once
+            token_rejected = True
             continue
             
         try:
@@ -177,30 +158,105 @@ def update_record_fields(module_name: str, record_id: str, fields_dict: dict) ->
             if 'data' in data and len(data['data']) > 0:
                 item = data['data'][0]
                 # Check both 'code' and 'status' fields for success
-                code = item.get('code', '').upper()
-                status = item.get('status', '').lower()
-                if code == 'SUCCESS' or status == 'success':
+                if is_success_item(item):
                     logger.info(f"[Zoho] ✅ Successfully updated {module_name}/{record_id}")
+                    from .services.zoho_records import write_through
+                    write_through(module_name, record_id, fields_dict)
                     return True
                 else:
-                    logger.warning(f"[Zoho] Update failed: code={code}, status={status}, message={item.get('message')}")
+                    logger.warning(f"[Zoho] Update failed: code={item.get('code')}, status={item.get('status')}, message={item.get('message')}")
         except Exception as e:
             logger.exception(f"[Zoho] Exception parsing response: {e}")
             
     return False
 
 
+def is_success_item(item: dict) -> bool:
+    """Check one per-record item of a Zoho write response."""
+    code = (item.get('code') or '').upper()
+    status = (item.get('status') or '').lower()
+    return code == 'SUCCESS' or status == 'success'
+
+
+def update_records(module_name: str, records: list[dict]) -> list[dict] | None:
+    """Update up to 100 records of one module with a single PUT.
+
+    Each record dict must contain 'id'. Returns Zoho's per-record result items
+    in the same order as `records`, or None if the request itself failed.
+    """
+    payload = {"data": records}
+    url = f"{ZOHO_API_DOMAIN}/crm/v2/{module_name}"
+    token_rejected = False
+    for attempt in range(2):
+        access_token = get_access_token(force_refresh=token_rejected)
+        headers = {
+            "Authorization": f"Zoho-oauthtoken {access_token}",
+            "Content-Type": "application/json",
+        }
+        try:
+            resp = zoho_transport.put(url, headers=headers, json=payload)
+        except Exception as e:
+            logger.error(f"[Zoho] Batch PUT {module_name} ({len(records)} records) failed: {e}")
+            return None
+
+        if resp.status_code == 401 and attempt == 0:
+            token_rejected = True
+            continue
+
+        try:
+            items = resp.json().get('data') or []
+        except ValueError:
+            items = []
+        if len(items) != len(records):
+            logger.error(f"[Zoho] Batch PUT {module_name} unexpected response: {resp.status_code} {resp.text[:500]}")
+            return None
+
+        from .services.zoho_records import write_through
+        for record, item in zip(records, items):
+            if is_success_item(item):
+                write_through(module_name, record['id'], record)
+        return items
+
+    return None
+
+
 # =============================================================================
 # LEAD ATTRIBUTION RECORDS
 # =============================================================================
 
-def create_attribution_record(attribution_data: dict, lead_name: str = '') -> str | None:
+def attribution_record_key(order) -> str:
+    """Per-order part of the attribution record Name (the key it is upserted on)."""
+    return f"{type(order).__name__} #{order.pk}"
+
+
+def build_order_attribution_payload(order) -> dict | None:
+    """Attribution record payload of an order, named by attribution_record_key."""
+    from .services.attribution import build_zoho_attribution_payload
+
+    attribution_data = getattr(order, 'attribution_data', None)
+    if not attribution_data:
+        return None
+    return build_zoho_attribution_payload(
+        attribution_data, getattr(order, 'name', ''), record_key=attribution_record_key(order),
+    )
+
+
+def attribution_create_body(payload: dict) -> dict:
+    """Upsert body of an order attribution record (matched on its Name)."""
+    return {"data": [payload], "duplicate_check_fields": [ZOHO_ATTRIBUTION_KEY_FIELD]}
+
+
+def create_attribution_record(attribution_data: dict, lead_name: str = '', record_key: str = '') -> str | None:
     """
     Create a Lead Attribution Record in Zoho CRM.
 
+    With a record_key (orders) the record is upserted on its Name, so a retry
+    after a lost response or a failed order create reuses the same record.
+
     Args:
         attribution_data: Cleaned attribution dict from order.attribution_data
         lead_name: Client name for record naming
+        record_key: Per-order key (see attribution_record_key)
 
     Returns:
         Zoho Record ID (string) or None on failure
@@ -212,7 +268,7 @@ def create_attribution_record(attribution_data: dict, lead_name: str = '') -> st
     print(f"🔍 [DEBUG] Lead name: {lead_name}")
 
     logger.info(f"[Zoho Attribution] Building payload from: {attribution_data}")
-    payload = build_zoho_attribution_payload(attribution_data, lead_name)
+    payload = build_zoho_attribution_payload(attribution_data, lead_name, record_key=record_key)
 
     if not payload:
         print(f"❌ [DEBUG] build_zoho_attribution_payload returned None!")
@@ -221,16 +277,17 @@ def create_attribution_record(attribution_data: dict, lead_name: str = '') -> st
 
     print(f"✅ [DEBUG] Payload built: {payload}")
     logger.info(f"[Zoho Attribution] Payload built: {payload}")
-    zoho_payload = {"data": [payload]}
+    zoho_payload = attribution_create_body(payload) if record_key else {"data": [payload]}
 
+    token_rejected = False
     for attempt in range(2):
-        access_token = get_access_token(force_refresh=(attempt == 1))
+        access_token = get_access_token(force_refresh=token_rejected)
         headers = {
             "Authorization": f"Zoho-oauthtoken {access_token}",
             "Content-Type": "application/json"
         }
 
-        url = f"{ZOHO_API_DOMAIN}/crm/v2/{ZOHO_ATTRIBUTION_MODULE}"
+        url = _create_url(ZOHO_ATTRIBUTION_MODULE, zoho_payload)
         logger.info(f"[Zoho] Creating Attribution Record: {payload.get('Name')}")
 
         try:
@@ -238,7 +295,7 @@ def create_attribution_record(attribution_data: dict, lead_name: str = '') -> st
             print(f"🔍 [DEBUG] Request body: {zoho_payload}")
             logger.info(f"[Zoho Attribution] POST {url}")
             logger.info(f"[Zoho Attribution] Request body: {zoho_payload}")
-            resp = requests.post(url, headers=headers, json=zoho_payload)
+            resp = zoho_transport.post(url, headers=headers, json=zoho_payload)
             print(f"🔍 [DEBUG] Response status: {resp.status_code}")
             print(f"🔍 [DEBUG] Response body: {resp.text}")
             logger.info(f"[Zoho Attribution] Response status: {resp.status_code}")
@@ -247,6 +304,7 @@ def create_attribution_record(attribution_data: dict, lead_name: str = '') -> st
 
             if resp.status_code == 401 and attempt == 0:
                 logger.warning("[Zoho] Token expired, refreshing...")
+                token_rejected = True
                 continue
 
             # Extract record ID from response
@@ -273,11 +331,134 @@ def create_attribution_record(attribution_data: dict, lead_name: str = '') -> st
     return None
 
 
+# =============================================================================
+# COMPOSITE REQUEST (attribution record + order in one round trip)
+# =============================================================================
+
+ZOHO_COMPOSITE_URL = f"{ZOHO_API_DOMAIN}/crm/v3/__composite_requests"
+COMPOSITE_UNAVAILABLE_KEY = 'zoho_composite_unavailable'
+
+# Zoho refusing the composite API itself (NOT_SUPPORTED, OAUTH_SCOPE_MISMATCH, ...);
+# 429 / 5xx / an unrecovered 401 are ordinary failed attempts
+COMPOSITE_REFUSED_STATUSES = (400, 403, 404)
+
+
+def composite_available() -> bool:
+    from django.core.cache import cache
+
+    if not settings.ZOHO_COMPOSITE_ENABLED:
+        return False
+    try:
+        return not cache.get(COMPOSITE_UNAVAILABLE_KEY)
+    except Exception:
+        return True
+
+
+def mark_composite_unavailable(reason):
+    """Use the two-step flow for ZOHO_COMPOSITE_RETRY_AFTER seconds (e.g. missing OAuth scope)."""
+    from django.core.cache import cache
+
+    logger.warning(f"[Zoho Composite] Unavailable, falling back to two-step sync: {reason}")
+    try:
+        cache.set(COMPOSITE_UNAVAILABLE_KEY, str(reason)[:500], settings.ZOHO_COMPOSITE_RETRY_AFTER)
+    except Exception:
+        pass
+
+
+def build_composite_order_request(module_name: str, data_payload: dict, attribution_payload: dict) -> dict:
+    """
+    Sub-request 1 creates the attribution record (upserted on its Name, see
+    attribution_record_key), sub-request 2 the order (upserted on its key,
+    like sync_order_to_zoho), whose Attribution_Record lookup points at
+    sub-request 1's ID.
+    rollback_on_fail keeps Zoho from ending up with only one of the two.
+    """
+    record = dict(data_payload['data'][0])
+    record['Attribution_Record'] = {"id": "@{1:$.data[0].details.id}"}
+    order_body = {"data": [record]}
+    order_uri = f"/crm/v3/{module_name}"
+    if data_payload.get('duplicate_check_fields'):
+        order_body["duplicate_check_fields"] = data_payload['duplicate_check_fields']
+        order_uri += "/upsert"
+    return {
+        "rollback_on_fail": True,
+        "parallel_execution": False,
+        "__composite_requests": [
+            {
+                "sub_request_id": "1",
+                "method": "POST",
+                "uri": f"/crm/v3/{ZOHO_ATTRIBUTION_MODULE}/upsert",
+                "body": attribution_create_body(attribution_payload),
+            },
+            {
+                "sub_request_id": "2",
+                "method": "POST",
+                "uri": order_uri,
+                "body": order_body,
+            },
+        ],
+    }
+
+
+def parse_composite_order_response(status_code: int, resp_data) -> tuple[str, str] | None:
+    """
+    Returns:
+        (attribution_record_id, order_record_id) on success, None if the call
+        or either sub-request failed. Marks composite unavailable only if the
+        call itself was refused (COMPOSITE_REFUSED_STATUSES).
+    """
+    if status_code in COMPOSITE_REFUSED_STATUSES:
+        mark_composite_unavailable(f"{status_code}: {resp_data}")
+        return None
+
+    subs = (resp_data or {}).get('__composite_requests') if isinstance(resp_data, dict) else None
+    if status_code not in (200, 201, 207) or not subs or len(subs) != 2:
+        logger.warning(f"[Zoho Composite] Request failed: {status_code} {str(resp_data)[:500]}")
+        return None
+
+    ids = []
+    for sub in subs:
+        response = (sub.get('details') or {}).get('response') or {}
+        items = (response.get('body') or {}).get('data') or []
+        if not items or not is_success_item(items[0]):
+            logger.warning(f"[Zoho Composite] Sub-request failed: {sub}")
+            return None
+        ids.append(str(items[0]['details']['id']))
+    return ids[0], ids[1]
+
+
+def create_with_attribution_composite(module_name: str, data_payload: dict, attribution_payload: dict) -> tuple[str, str] | None:
+    """Create attribution record + order with one composite call (None = use the two-step flow)."""
+    body = build_composite_order_request(module_name, data_payload, attribution_payload)
+    access_token = get_access_token()
+    for attempt in range(2):
+        headers = {
+            "Authorization": f"Zoho-oauthtoken {access_token}",
+            "Content-Type": "application/json"
+        }
+        resp = zoho_transport.post(ZOHO_COMPOSITE_URL, headers=headers, json=body)
+        if resp.status_code == 401 and attempt == 0:
+            access_token = get_access_token(force_refresh=True, rejected_token=access_token)
+            continue
+        try:
+            resp_data = resp.json()
+        except ValueError:
+            resp_data = resp.text[:500]
+        logger.info(f"[Zoho Composite] {module_name} + attribution: {resp.status_code}")
+        return parse_composite_order_response(resp.status_code, resp_data)
+    return None
+
+
 def sync_order_with_attribution(order, module_name: str, data_payload: dict, attach_files: bool = True) -> bool:
     """
     Sync order to Zoho with Attribution Record lookup.
 
+    With attribution_data, the attribution record and the order are created
+    by one composite request (ZOHO_COMPOSITE_ENABLED). If that is unavailable
+    or fails, falls back to:
+
     1. Creates Lead_Attribution_Record if order has attribution_data
+       (upserted on a per-order Name: a retry reuses it, see attribution_record_key)
     2. Adds Attribution_Record lookup to order payload
     3. Creates order in the specified module
 
@@ -290,6 +471,11 @@ def sync_order_with_attribution(order, module_name: str, data_payload: dict, att
     Returns:
         True on success, False on failure
     """
+    # Created by an earlier attempt: attachments + zoho_synced only, no second create
+    if getattr(order, 'zoho_record_id', ''):
+        logger.info(f"[Zoho] Order {order.id} already created as {module_name}/{order.zoho_record_id}, resuming")
+        return _complete_order_sync(order, module_name, order.zoho_record_id, attach_files)
+
     attribution_data = getattr(order, 'attribution_data', None)
     attribution_record_id = None
 
@@ -303,13 +489,24 @@ def sync_order_with_attribution(order, module_name: str, data_payload: dict, att
     if attribution_data:
         logger.info(f"[Zoho Attribution] Data: {attribution_data}")
 
+    # One round trip: attribution record + order via a composite request
+    if attribution_data and composite_available():
+        attribution_payload = build_order_attribution_payload(order)
+        if attribution_payload:
+            created = create_with_attribution_composite(module_name, data_payload, attribution_payload)
+            if created:
+                attribution_record_id, record_id = created
+                logger.info(f"[Zoho Composite] ✅ Created {module_name}/{record_id} linked to Attribution Record {attribution_record_id}")
+                return _complete_order_sync(order, module_name, record_id, attach_files)
+
     # Step 1: Create Attribution Record if we have data
     if attribution_data:
         print(f"🔍 [DEBUG] Creating attribution record...")
         logger.info(f"[Zoho Attribution] Creating attribution record for order {order.id}...")
         attribution_record_id = create_attribution_record(
             attribution_data,
-            lead_name=getattr(order, 'name', '')
+            lead_name=getattr(order, 'name', ''),
+            record_key=attribution_record_key(order),
         )
         if attribution_record_id:
             print(f"✅ [DEBUG] Attribution record created: {attribution_record_id}")
@@ -331,215 +528,44 @@ def sync_order_with_attribution(order, module_name: str, data_payload: dict, att
 # ORDER SYNC FUNCTIONS (with attribution support)
 # =============================================================================
 
+def _sync_order_by_schema(order, order_type: str, tracking_id: str | None = None):
+    schema = ORDER_SCHEMAS[order_type]
+    contact_id = None
+    if schema.contact_field:
+        contact_id = get_or_create_contact_id(order.name, order.email, order.phone)
+    data = schema.build_create(order, contact_id=contact_id, tracking_id=tracking_id)
+    return sync_order_with_attribution(order, schema.module, data, attach_files=schema.attach_files)
+
+
 def sync_fbi_order_to_zoho(order: FbiApostilleOrder, tracking_id: str | None = None):
-    contact_id = get_or_create_contact_id(order.name, order.email, order.phone)
-    zoho_module = 'Deals'
-    data = {
-        "data": [
-            {
-                "Deal_Name": f"FBI {order.package.label} ID{order.id}",
-                "Order_ID": order.id,
-                "Name1": order.name,
-                "Email_1": order.email,
-                "Phone": order.phone,
-                "Country_of_Use": order.country_name,
-                "Client_Comment": order.comments,
-                "Address": order.address,
-                "Package": order.package.label,
-                "Certificate": str(order.count),
-                "Shipping_speed": order.shipping_option.label,
-                "Amount": float(order.total_price),
-                "Status": "Order Received",
-                "Payment_Status": "Fully Paid" if order.is_paid else "Not Paid",
-                "Submission_Date": order.created_at.date().isoformat(),
-                "Client_Contact": {"id": contact_id},
-                **({"Tracking_ID": tracking_id} if tracking_id else {}),
-            }
-        ]
-    }
-    # Use attribution-aware sync
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=True)
+    return _sync_order_by_schema(order, "fbi", tracking_id)
 
 
 def sync_embassy_order_to_zoho(order: EmbassyLegalizationOrder, tracking_id: str | None = None):
-    zoho_module = 'Embassy_Legalization'
-    data = {
-        "data": [
-            {
-                "Name": f"Embassy ID{order.id}",
-
-                "Client_Name": order.name,
-                "Email": order.email,
-                "Phone": order.phone,
-                "Country_of_Legalization": order.country,
-                "Address": order.address,
-                "Document_Type": order.document_type,
-
-                "Status": "Order Received",
-                "Payment_Status": "Not Paid",
-
-                "Client_Comment": order.comments,
-                **({"Tracking_ID": tracking_id} if tracking_id else {}),
-            }
-        ]
-    }
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=True)
+    return _sync_order_by_schema(order, "embassy", tracking_id)
 
 
 def sync_translation_order_to_zoho(order: TranslationOrder, tracking_id: str | None = None):
-    zoho_module = 'Translation_Services'
-    data = {
-        "data": [
-            {
-                "Name": f"Translation {order.name} ID{order.id}",
-                "Client_Name1": order.name,
-                "Email": order.email,
-                "Phone": order.phone,
-                "Client_Address": order.address,
-                "Languages": order.languages,
-                "Client_Comments": order.comments,
-                "Translation_Status": "Client Placed Request",
-                **({"Tracking_ID": tracking_id} if tracking_id else {}),
-            }
-        ]
-    }
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=True)
+    return _sync_order_by_schema(order, "translation", tracking_id)
 
 
 def sync_apostille_order_to_zoho(order: ApostilleOrder, tracking_id: str | None = None):
-    zoho_module = 'Apostille_Services'
-
-    data = {
-        "data": [
-            {
-                "Name": f"Apostille Order ID{order.id}",
-                "Client_Name": order.name,
-                "Email": order.email,
-                "Phone_Number": order.phone,
-                "Address": order.address or "- Office Visit -",
-                "Country_of_Use": order.country,
-                "Document_Type": order.type,
-                "Client_Comments": order.comments or "",
-                "Status": "Client placed the request",
-                "Process_Stage": "Submission Received",
-                **({"Tracking_ID": tracking_id} if tracking_id else {}),
-            }
-        ]
-    }
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=False)
+    return _sync_order_by_schema(order, "apostille", tracking_id)
 
 
 def sync_marriage_order_to_zoho(order, tracking_id: str | None = None):
     """Sync Marriage/Triple Seal order to Zoho. tracking_id accepted but not used."""
-    contact_id = get_or_create_contact_id(order.name, order.email, order.phone)
-    zoho_module = 'Triple_Seal_Apostilles'
-
-    marriage_info = "- File Uploaded -"
-    if not order.file_attachments.exists():
-        marriage_info = (
-            f"Husband: {order.husband_full_name}\n"
-            f"Wife: {order.wife_full_name}\n"
-            f"Date of marriage: {order.marriage_date}\n"
-            f"Certificate Number: {order.marriage_number}\n"
-            f"Country of Use: {order.country}"
-        )
-
-    data = {
-        "data": [
-            {
-                "Name": f"Triple Seal ID{order.id}",
-                "Client_Name": order.name,
-                "Client_Email": order.email,
-                "Client_Phone": order.phone,
-                "Client_Address": order.address,
-                "Type_of_Legalization": "Triple Seal",
-                "Stage": "Order Received",
-                "Payment_Status": "Deposit",
-                "Amount_Paid": str(order.total_price),
-
-                "Marriage_Info": marriage_info,
-
-                "Client_Notes_Comments": order.comments or "",
-                "Client_Contact": {"id": contact_id},
-            }
-        ]
-    }
-
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=True)
+    return _sync_order_by_schema(order, "marriage", tracking_id)
 
 
 def sync_i9_order_to_zoho(order, tracking_id: str | None = None):
     """Sync I-9 Verification order to Zoho. tracking_id accepted but not used."""
-    contact_id = get_or_create_contact_id(order.name, order.email, order.phone)
-    zoho_module = 'I_9_Verification'
-
-    data = {
-        "data": [
-            {
-                "Name": f"I9 Verification ID{order.id}",
-                "Client_Name": order.name,
-                "Client_Email": order.email,
-                "Client_Phone": order.phone,
-                "Address": order.address,
-                "Form_Date_Time": f'{order.appointment_date} - {order.appointment_time}',
-                "Stage": "Order Received",
-                "Client_Comments": order.comments or "",
-                "Client_Contact": {"id": contact_id},
-            }
-        ]
-    }
-
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=True)
+    return _sync_order_by_schema(order, "I-9", tracking_id)
 
 
 def sync_quote_request_to_zoho(order):
-    contact_id = get_or_create_contact_id(order.name, order.email, order.phone)
-    zoho_module = 'Get_A_Quote_Leads'
-
-    data = {
-        "data": [
-            {
-                "Name": f"Quote ID{order.id}",
-                "Client_Name": order.name,
-                "Client_Email": order.email,
-                "Client_Phone": order.phone,
-                "Number_Of_Documents": str(order.number),
-                "Client_Address_Location": order.address,
-                "Date_Time": order.appointment_date + ' - ' + order.appointment_time,
-
-                'GET_A_QUOTE_LEADS': order.services,
-
-                "Client_Comments": order.comments or "",
-
-                "Name_of_Client": {"id": contact_id}
-            }
-        ]
-    }
-
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=False)
+    return _sync_order_by_schema(order, "quote")
 
 
 def sync_precheck_to_zoho(order):
-    contact_id = get_or_create_contact_id(order.name, order.email, order.phone)
-    zoho_module = 'Get_A_Quote_Leads'
-
-    data = {
-        "data": [
-            {
-                "Name": f"Pre-Check ID{order.id}",
-                "Client_Name": order.name,
-                "Client_Email": order.email,
-                "Client_Phone": order.phone,
-                "Document_Type": order.document_type,
-                "Country_of_Use": order.destination_country,
-
-                'GET_A_QUOTE_LEADS': 'Pre-Check Document Review',
-
-                "Client_Comments": order.comments or "",
-
-                "Name_of_Client": {"id": contact_id}
-            }
-        ]
-    }
-
-    return sync_order_with_attribution(order, zoho_module, data, attach_files=True)
+    return _sync_order_by_schema(order, "pre-check")
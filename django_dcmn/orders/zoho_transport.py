@@ -0,0 +1,148 @@
+# orders/zoho_transport.py
+"""
+Shared HTTP transport for every Zoho call (CRM API and OAuth).
+
+Keeps one keep-alive requests.Session per worker process so bursts of
+orders reuse pooled TLS connections, and applies connect/read timeouts
+plus a retry/backoff adapter to every call. CRM API calls also pass through
+the cluster-wide rate limiter (zoho_ratelimit), and every call through the
+shared circuit breaker (zoho_circuit), which fails fast while Zoho is down.
+All Zoho callers should go through request()/get()/post()/put() instead of
+bare requests.* calls.
+"""
+
+import os
+import time
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from django_dcmn import metrics
+
+from . import zoho_ratelimit, zoho_circuit
+
+logger = logging.getLogger(__name__)
+
+# Only idempotent methods are retried on read errors / 5xx.
+# Connection errors are retried for every method (request never reached Zoho).
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_timeout() -> tuple[float, float]:
+    """Default (connect, read) timeout for Zoho calls."""
+    return (settings.ZOHO_HTTP_CONNECT_TIMEOUT, settings.ZOHO_HTTP_READ_TIMEOUT)
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=settings.ZOHO_HTTP_MAX_RETRIES,
+        backoff_factor=settings.ZOHO_HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=settings.ZOHO_HTTP_POOL_SIZE,
+        pool_maxsize=settings.ZOHO_HTTP_POOL_SIZE,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide Zoho session.
+
+    Rebuilt after fork (gunicorn/Celery prefork) so children never share
+    sockets with the parent process.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+            logger.debug(f"[ZohoTransport] New session for pid={pid}")
+    return _session
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Send a request to Zoho through the pooled session.
+
+    Args:
+        method: HTTP method
+        url: Absolute Zoho URL
+        timeout: Optional override, defaults to get_timeout()
+        **kwargs: Passed through to requests.Session.request
+
+    Returns:
+        requests.Response (raises requests.RequestException on network errors,
+        zoho_ratelimit.ZohoRateLimited when no API budget frees up in time,
+        zoho_circuit.ZohoCircuitOpen while Zoho is failing)
+    """
+    if timeout is None:
+        timeout = get_timeout()
+
+    zoho_circuit.before_call()
+    start = time.perf_counter()
+    try:
+        resp = _send(method, url, timeout, **kwargs)
+    except (zoho_ratelimit.ZohoRateLimited, zoho_circuit.ZohoCircuitOpen):
+        raise
+    except requests.RequestException as e:
+        metrics.observe_zoho(method, url, time.perf_counter() - start, type(e).__name__)
+        zoho_circuit.record_failure(e)
+        raise
+    metrics.observe_zoho(method, url, time.perf_counter() - start, resp.status_code)
+    zoho_circuit.record_response(resp.status_code)
+    return resp
+
+
+def _send(method: str, url: str, timeout, **kwargs) -> requests.Response:
+    if not zoho_ratelimit.applies_to(url):
+        return get_session().request(method, url, timeout=timeout, **kwargs)
+
+    # CRM API: wait for the shared rate limiter, back off cluster-wide on 429
+    body = kwargs.get('data')
+    for attempt in range(settings.ZOHO_RATE_LIMIT_429_RETRIES + 1):
+        if attempt and hasattr(body, 'seek'):
+            body.seek(0)  # streamed upload: resend from the start
+        lease = zoho_ratelimit.acquire()
+        try:
+            resp = get_session().request(method, url, timeout=timeout, **kwargs)
+        finally:
+            zoho_ratelimit.release(lease)
+
+        zoho_ratelimit.record_response(resp)
+        if resp.status_code != 429:
+            break
+    return resp
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request('PUT', url, **kwargs)
@@ -0,0 +1,259 @@
+# orders/zoho_write_buffer.py
+"""
+Redis-backed write buffer for Zoho record updates.
+
+Updates are queued per module and merged field by field per record, then
+flushed by a Celery task as one PUT of up to 100 records (Zoho v2 limit)
+once a batch is full or the oldest queued update is ZOHO_WRITE_BUFFER_MAX_DELAY
+seconds old. Zoho answers per record, so each result is stored under the
+record and failed records are re-queued (without overwriting newer values)
+until ZOHO_WRITE_BUFFER_MAX_ATTEMPTS is reached.
+
+A batch holding a record queued as interactive (a TID write-back a CRM
+user is waiting for) is sent under the interactive Zoho operation class
+(zoho_ratelimit); other batches keep the flushing task's class.
+
+Redis layout:
+    zoho:wbuf:modules                   SET  modules with pending updates
+    zoho:wbuf:{module}:queue            ZSET record_id -> first queued timestamp
+    zoho:wbuf:{module}:rec:{record_id}  HASH field -> JSON value
+    zoho:wbuf:{module}:attempts         HASH record_id -> failed flush attempts
+    zoho:wbuf:{module}:scheduled        STR  set while a delayed flush is pending
+    zoho:wbuf:{module}:interactive      SET  record_ids queued as interactive
+    zoho:wbuf:result:{module}:{id}      STR  JSON result of the last flush
+"""
+
+import json
+import time
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from . import zoho_circuit, zoho_ratelimit
+
+logger = logging.getLogger(__name__)
+
+ZOHO_MAX_RECORDS_PER_REQUEST = 100
+
+MODULES_KEY = 'zoho:wbuf:modules'
+RESULT_TTL = 24 * 3600
+
+# Atomically pop up to ARGV[1] records (ids + merged fields) from a module queue,
+# so updates queued while a flush is running are never lost.
+_TAKE_BATCH_LUA = """
+local ids = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+local out = {}
+for _, id in ipairs(ids) do
+    local rec_key = ARGV[2] .. id
+    local fields = redis.call('HGETALL', rec_key)
+    redis.call('DEL', rec_key)
+    redis.call('ZREM', KEYS[1], id)
+    table.insert(out, id)
+    table.insert(out, cjson.encode(fields))
+end
+return out
+"""
+
+
+def _queue_key(module: str) -> str:
+    return f'zoho:wbuf:{module}:queue'
+
+
+def _record_prefix(module: str) -> str:
+    return f'zoho:wbuf:{module}:rec:'
+
+
+def _attempts_key(module: str) -> str:
+    return f'zoho:wbuf:{module}:attempts'
+
+
+def _scheduled_key(module: str) -> str:
+    return f'zoho:wbuf:{module}:scheduled'
+
+
+def _interactive_key(module: str) -> str:
+    return f'zoho:wbuf:{module}:interactive'
+
+
+def _result_key(module: str, record_id: str) -> str:
+    return f'zoho:wbuf:result:{module}:{record_id}'
+
+
+def _batch_size() -> int:
+    return min(settings.ZOHO_WRITE_BUFFER_BATCH_SIZE, ZOHO_MAX_RECORDS_PER_REQUEST)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+# =============================================================================
+# ENQUEUE
+# =============================================================================
+
+def enqueue_update(module_name: str, record_id: str, fields: dict, interactive: bool = False) -> int:
+    """
+    Queue a field update for a Zoho record.
+
+    Later updates of the same field overwrite earlier ones; other fields of the
+    same record are kept, so several callers end up in a single record entry.
+    interactive: a user is waiting for the write, its batch is flushed at interactive priority.
+
+    Returns:
+        Number of records pending for the module
+    """
+    from .tasks import flush_zoho_write_buffer_task
+
+    if not fields:
+        return 0
+
+    record_id = str(record_id)
+    conn = get_redis_connection('default')
+
+    pipe = conn.pipeline()
+    pipe.hset(
+        _record_prefix(module_name) + record_id,
+        mapping={k: json.dumps(v, default=str) for k, v in fields.items()},
+    )
+    pipe.zadd(_queue_key(module_name), {record_id: time.time()}, nx=True)
+    pipe.sadd(MODULES_KEY, module_name)
+    if interactive:
+        pipe.sadd(_interactive_key(module_name), record_id)
+    pipe.zcard(_queue_key(module_name))
+    pending = pipe.execute()[-1]
+
+    logger.info(f"[ZohoWriteBuffer] Queued {module_name}/{record_id} fields={list(fields)} (pending={pending})")
+
+    # Size threshold: flush now. Time threshold: one delayed flush per window.
+    if pending >= _batch_size():
+        flush_zoho_write_buffer_task.delay(module_name)
+    elif conn.set(_scheduled_key(module_name), 1, nx=True, ex=settings.ZOHO_WRITE_BUFFER_MAX_DELAY):
+        flush_zoho_write_buffer_task.apply_async(
+            (module_name,), countdown=settings.ZOHO_WRITE_BUFFER_MAX_DELAY
+        )
+
+    return pending
+
+
+def get_result(module_name: str, record_id: str) -> dict | None:
+    """
+    Result of the last flush for a record:
+    {'status': 'success' | 'retrying' | 'failed', 'attempts': int, 'details': {...}}
+    """
+    raw = get_redis_connection('default').get(_result_key(module_name, str(record_id)))
+    return json.loads(raw) if raw else None
+
+
+def pending_modules() -> list[str]:
+    return sorted(_decode(m) for m in get_redis_connection('default').smembers(MODULES_KEY))
+
+
+# =============================================================================
+# FLUSH
+# =============================================================================
+
+def _take_batch(conn, module_name: str) -> list[tuple[str, dict]]:
+    raw = conn.eval(_TAKE_BATCH_LUA, 1, _queue_key(module_name), _batch_size(), _record_prefix(module_name))
+    batch = []
+    for i in range(0, len(raw), 2):
+        record_id = _decode(raw[i])
+        flat = json.loads(_decode(raw[i + 1])) or []
+        fields = {flat[j]: json.loads(flat[j + 1]) for j in range(0, len(flat), 2)}
+        if fields:
+            batch.append((record_id, fields))
+    return batch
+
+
+def _requeue(conn, module_name: str, record_id: str, fields: dict):
+    """Put failed fields back without clobbering values queued after the flush started."""
+    rec_key = _record_prefix(module_name) + record_id
+    pipe = conn.pipeline()
+    for key, value in fields.items():
+        pipe.hsetnx(rec_key, key, json.dumps(value, default=str))
+    pipe.zadd(_queue_key(module_name), {record_id: time.time()}, nx=True)
+    pipe.sadd(MODULES_KEY, module_name)
+    pipe.execute()
+
+
+def _store_result(conn, module_name: str, record_id: str, status: str, attempts: int, details):
+    conn.set(
+        _result_key(module_name, record_id),
+        json.dumps({'status': status, 'attempts': attempts, 'details': details}, default=str),
+        ex=RESULT_TTL,
+    )
+
+
+def _batch_operation(conn, module_name: str, record_ids: list) -> str:
+    """Interactive if any record of the batch was queued as interactive, else the caller's class."""
+    pipe = conn.pipeline()
+    for record_id in record_ids:
+        pipe.sismember(_interactive_key(module_name), record_id)
+    if any(pipe.execute()):
+        return zoho_ratelimit.INTERACTIVE
+    return zoho_ratelimit.current_operation()
+
+
+def flush_module(module_name: str) -> dict:
+    """
+    Send every pending update for a module in batches of up to 100 records.
+
+    Returns:
+        Dict record_id -> status ('success' | 'retrying' | 'failed')
+    """
+    from .zoho_sync import update_records, is_success_item
+
+    conn = get_redis_connection('default')
+    conn.delete(_scheduled_key(module_name))
+    statuses = {}
+
+    # Zoho down: leave the queue alone, the next window retries
+    while zoho_circuit.get_state() != zoho_circuit.OPEN:
+        batch = _take_batch(conn, module_name)
+        if not batch:
+            break
+
+        records = [{"id": record_id, **fields} for record_id, fields in batch]
+        op_class = _batch_operation(conn, module_name, [record_id for record_id, _ in batch])
+        with zoho_ratelimit.operation(op_class):
+            items = update_records(module_name, records)
+        logger.info(f"[ZohoWriteBuffer] Flushed {len(records)} {module_name} records in one PUT ({op_class})")
+
+        for index, (record_id, fields) in enumerate(batch):
+            item = items[index] if items and index < len(items) else None
+
+            if item is not None and is_success_item(item):
+                conn.hdel(_attempts_key(module_name), record_id)
+                conn.srem(_interactive_key(module_name), record_id)
+                _store_result(conn, module_name, record_id, 'success', 0, item.get('details'))
+                statuses[record_id] = 'success'
+                continue
+
+            attempts = conn.hincrby(_attempts_key(module_name), record_id, 1)
+            if attempts < settings.ZOHO_WRITE_BUFFER_MAX_ATTEMPTS:
+                _requeue(conn, module_name, record_id, fields)
+                _store_result(conn, module_name, record_id, 'retrying', attempts, item)
+                statuses[record_id] = 'retrying'
+                logger.warning(f"[ZohoWriteBuffer] {module_name}/{record_id} failed (attempt {attempts}), re-queued: {item}")
+            else:
+                conn.hdel(_attempts_key(module_name), record_id)
+                conn.srem(_interactive_key(module_name), record_id)
+                _store_result(conn, module_name, record_id, 'failed', attempts, item)
+                statuses[record_id] = 'failed'
+                logger.error(f"[ZohoWriteBuffer] ❌ Giving up on {module_name}/{record_id} fields={fields}: {item}")
+
+        # Whole request failed: stop here, re-queued records wait for the next flush
+        if items is None:
+            break
+
+    if conn.zcard(_queue_key(module_name)):
+        # Retries (or updates queued meanwhile) still pending: schedule the next window
+        from .tasks import flush_zoho_write_buffer_task
+        if conn.set(_scheduled_key(module_name), 1, nx=True, ex=settings.ZOHO_WRITE_BUFFER_MAX_DELAY):
+            flush_zoho_write_buffer_task.apply_async(
+                (module_name,), countdown=settings.ZOHO_WRITE_BUFFER_MAX_DELAY
+            )
+    else:
+        conn.srem(MODULES_KEY, module_name)
+
+    return statuses
@@ -3,7 +3,8 @@ from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.utils import timezone
-import requests
+from orders import zoho_transport, zoho_ratelimit
+from orders.services.zoho_contacts import resolve_contact
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,66 +22,6 @@ ZOHO_LEADS_WON_FIELD = getattr(settings, 'ZOHO_LEADS_WON_FIELD', 'Number_of_Lead
 FRONTEND_URL = getattr(settings, 'FRONTEND_URL', 'https://www.dcmobilenotary.com')
 
 
-def _get_contact_by_email(email: str, access_token: str) -> dict | None:
-    """
-    Search for Zoho Contact by email.
-    Returns dict with 'id' and leads_won field, or None if not found.
-    """
-    from orders.zoho_sync import ZOHO_API_DOMAIN
-    
-    headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
-    search_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts/search?email={email}"
-    
-    resp = requests.get(search_url, headers=headers, timeout=30)
-
-    if resp.status_code == 200:
-        data = resp.json()
-        if 'data' in data and len(data['data']) > 0:
-            return data['data'][0]
-    elif resp.status_code == 204:
-        return None
-    else:
-        logger.warning(f"Failed to search contact by email {email}: {resp.status_code}")
-    
-    return None
-
-
-def _create_contact(name: str, email: str, phone: str, access_token: str) -> str | None:
-    """
-    Create new Zoho Contact. Returns contact ID or None.
-    """
-    from orders.zoho_sync import ZOHO_API_DOMAIN
-    
-    headers = {
-        "Authorization": f"Zoho-oauthtoken {access_token}",
-        "Content-Type": "application/json"
-    }
-    
-    create_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts"
-    payload = {
-        "data": [{
-            "Last_Name": name or email.split('@')[0],
-            "Email": email,
-            "Phone": phone or ""
-        }]
-    }
-    
-    resp = requests.post(create_url, headers=headers, json=payload, timeout=30)
-    
-    try:
-        data = resp.json()
-        if 'data' in data and len(data['data']) > 0:
-            item = data['data'][0]
-            if 'details' in item:
-                return item['details']['id']
-            elif item.get('code') == 'DUPLICATE_DATA' and 'details' in item:
-                return item['details']['id']
-    except Exception as e:
-        logger.exception(f"Failed to create contact: {e}")
-    
-    return None
-
-
 def _get_service_label(module: str) -> str:
     """Get human-readable service label from module name."""
     labels = {
@@ -105,6 +46,7 @@ def _get_service_label(module: str) -> str:
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
+@zoho_ratelimit.operation(zoho_ratelimit.BACKGROUND)
 def process_review_request_task(self, review_request_id: int):
     """
     Main task for processing review request:
@@ -135,57 +77,32 @@ def process_review_request_task(self, review_request_id: int):
         access_token = get_access_token()
         logger.info(f"Got token, processing {review_request.email}")
         
-        # 1. Get or find Contact ID
-        contact_id = review_request.zoho_contact_id
-        leads_won = 0
-        
-        if not contact_id:
-            logger.info(f"No contact_id provided, searching by email: {review_request.email}")
-            contact = _get_contact_by_email(review_request.email, access_token)
-            
-            if contact:
-                contact_id = contact.get('id')
-                leads_won_value = contact.get(ZOHO_LEADS_WON_FIELD)
-                if leads_won_value is not None:
-                    try:
-                        leads_won = int(leads_won_value)
-                    except (ValueError, TypeError):
-                        leads_won = 0
-                logger.info(f"Found contact {contact_id} with {ZOHO_LEADS_WON_FIELD}={leads_won}")
-            else:
-                logger.info(f"Contact not found, creating new one for {review_request.email}")
-                contact_id = _create_contact(
-                    review_request.name,
-                    review_request.email,
-                    review_request.phone,
-                    access_token
-                )
-                leads_won = 0
-                logger.info(f"Created new contact: {contact_id}")
-            
-            if contact_id:
-                review_request.zoho_contact_id = contact_id
-                review_request.save(update_fields=['zoho_contact_id'])
-        else:
-            # Contact ID provided, fetch leads_won from Zoho
-            headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
-            contact_url = f"{ZOHO_API_DOMAIN}/crm/v2/Contacts/{contact_id}"
-            resp = requests.get(contact_url, headers=headers, params={'fields': ZOHO_LEADS_WON_FIELD}, timeout=30)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                if 'data' in data and len(data['data']) > 0:
-                    leads_won_value = data['data'][0].get(ZOHO_LEADS_WON_FIELD)
-                    if leads_won_value is not None:
-                        try:
-                            leads_won = int(leads_won_value)
-                        except (ValueError, TypeError):
-                            leads_won = 0
-        
-        if not contact_id:
+        # 1. Get or create Contact with its Leads_Won (known/cached ID: one GET, else match by key / create)
+        contact = resolve_contact(
+            review_request.name,
+            review_request.email,
+            review_request.phone,
+            fields=[ZOHO_LEADS_WON_FIELD],
+            contact_id=review_request.zoho_contact_id or None,
+            fallback_name=review_request.email.split('@')[0],
+        )
+
+        if not contact:
             logger.error(f"Could not get or create contact for {review_request.email}")
             return
-        
+
+        contact_id = contact.id
+        if contact_id != review_request.zoho_contact_id:
+            review_request.zoho_contact_id = contact_id
+            review_request.save(update_fields=['zoho_contact_id'])
+
+        try:
+            leads_won = int(contact.fields.get(ZOHO_LEADS_WON_FIELD) or 0)
+        except (ValueError, TypeError):
+            leads_won = 0
+        logger.info(f"Contact {contact_id} ({'created' if contact.created else 'existing'}) "
+                    f"with {ZOHO_LEADS_WON_FIELD}={leads_won}")
+
         review_request.leads_won_before = leads_won
         
         # 2. Determine review type
@@ -217,7 +134,7 @@ def process_review_request_task(self, review_request_id: int):
                 ZOHO_LEADS_WON_FIELD: new_leads_won
             }]
         }
-        update_resp = requests.put(update_url, headers=headers, json=update_payload, timeout=30)
+        update_resp = zoho_transport.put(update_url, headers=headers, json=update_payload)
         
         if update_resp.status_code in (200, 201):
             logger.info(f"Updated {ZOHO_LEADS_WON_FIELD}={new_leads_won} for contact {contact_id}")
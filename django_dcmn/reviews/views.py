@@ -3,7 +3,10 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import ReviewRequest
 from .tasks import process_review_request_task
+from orders.models import InboundEvent
+from orders.services.inbox import as_payload, handle_inline, inline_response, delivery_event_id
 from orders.utils import check_zoho_webhook_token
+from django_dcmn.metrics import track_webhook
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,69 +39,84 @@ class ReviewWebhookView(APIView):
     }
     """
     
+    @track_webhook('zoho_review')
     def post(self, request, format=None):
         if not check_zoho_webhook_token(request):
             logger.warning("Review webhook: unauthorized request")
             return Response({'error': 'unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        data = request.data
+        data = as_payload(request.data)
         logger.info(f"Review webhook received: {data}")
         
-        # Required field - only email
-        email = data.get('email')
-        
-        if not email:
-            logger.warning(f"Review webhook missing email")
-            return Response({
-                'error': 'email is required',
-                'received_data': data
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Optional fields
-        name = data.get('name', '')
-        phone = data.get('phone', '')
-        contact_id = data.get('contact_id', '')  # Now optional
-        deal_id = data.get('deal_id', '')
-        module = data.get('module', '')
-        tracking_id = data.get('tracking_id') or data.get('Tracking_ID', '')
-        
-        # Check if this deal_id was already processed (deduplication)
-        if deal_id:
-            existing = ReviewRequest.objects.filter(zoho_deal_id=deal_id).first()
-            if existing:
-                logger.info(f"Review request already exists for deal_id={deal_id}")
-                return Response({
-                    'ok': True,
-                    'message': 'Review request already exists',
-                    'review_request_id': existing.id
-                }, status=status.HTTP_200_OK)
-        
-        # Create record (contact_id and leads_won will be fetched in task if needed)
-        review_request = ReviewRequest.objects.create(
-            email=email,
-            name=name,
-            phone=phone,
-            zoho_contact_id=contact_id,
-            zoho_deal_id=deal_id,
-            zoho_module=module,
-            tracking_id=tracking_id,
-        )
-        
-        # Link Track if exists
-        if tracking_id:
-            from orders.models import Track
-            track = Track.objects.filter(tid=tracking_id).first()
-            if track:
-                review_request.track = track
-                review_request.save(update_fields=['track'])
-        
-        # Run async task for processing
-        process_review_request_task.delay(review_request.id)
-        
-        logger.info(f"Review request created: id={review_request.id}, email={email}")
-        
-        return Response({
-            'ok': True,
-            'review_request_id': review_request.id,
-            'message': 'Review request queued for processing'
-        }, status=status.HTTP_201_CREATED)
+        # Recorded in the inbound event inbox; a redelivery for the same deal gets the stored response
+        deal_id = data.get('deal_id')
+        event_id = f"deal:{deal_id}" if deal_id else delivery_event_id()
+        event = handle_inline(InboundEvent.SOURCE_ZOHO_REVIEW, event_id, data, sequence_key=str(deal_id or ''))
+        http_status, body = inline_response(event)
+        return Response(body, status=http_status)
+
+
+def _result(http_status: int, body: dict) -> dict:
+    return {'http_status': http_status, 'body': body}
+
+
+def handle_review_webhook(data: dict, meta: dict) -> dict:
+    """Create a review request from a stored Zoho "review" webhook payload (inbox handler)."""
+    # Required field - only email
+    email = data.get('email')
+    
+    if not email:
+        logger.warning(f"Review webhook missing email")
+        return _result(status.HTTP_400_BAD_REQUEST, {
+            'error': 'email is required',
+            'received_data': data
+        })
+    
+    # Optional fields
+    name = data.get('name', '')
+    phone = data.get('phone', '')
+    contact_id = data.get('contact_id', '')  # Now optional
+    deal_id = data.get('deal_id', '')
+    module = data.get('module', '')
+    tracking_id = data.get('tracking_id') or data.get('Tracking_ID', '')
+    
+    # Check if this deal_id was already processed (deduplication)
+    if deal_id:
+        existing = ReviewRequest.objects.filter(zoho_deal_id=deal_id).first()
+        if existing:
+            logger.info(f"Review request already exists for deal_id={deal_id}")
+            return _result(status.HTTP_200_OK, {
+                'ok': True,
+                'message': 'Review request already exists',
+                'review_request_id': existing.id
+            })
+    
+    # Create record (contact_id and leads_won will be fetched in task if needed)
+    review_request = ReviewRequest.objects.create(
+        email=email,
+        name=name,
+        phone=phone,
+        zoho_contact_id=contact_id,
+        zoho_deal_id=deal_id,
+        zoho_module=module,
+        tracking_id=tracking_id,
+    )
+    
+    # Link Track if exists
+    if tracking_id:
+        from orders.models import Track
+        track = Track.objects.filter(tid=tracking_id).first()
+        if track:
+            review_request.track = track
+            review_request.save(update_fields=['track'])
+    
+    # Run async task for processing
+    process_review_request_task.delay(review_request.id)
+    
+    logger.info(f"Review request created: id={review_request.id}, email={email}")
+    
+    return _result(status.HTTP_201_CREATED, {
+        'ok': True,
+        'review_request_id': review_request.id,
+        'message': 'Review request queued for processing'
+    })
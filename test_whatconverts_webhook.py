@@ -164,7 +164,7 @@ def test_webhook(endpoint_url: str, test_name: str, payload: dict):
         print(json.dumps(response.json(), indent=2))
         print()
 
-        return response.status_code == 200
+        return response.status_code in (200, 202)  # production endpoint answers 202 (processed in Celery)
 
     except requests.exceptions.RequestException as e:
         print(f"❌ Error: {e}")